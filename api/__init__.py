@@ -0,0 +1,2 @@
+# api/__init__.py
+"""API HTTP (FastAPI) au-dessus des services : voir api/app.py"""
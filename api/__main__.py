@@ -0,0 +1,41 @@
+# api/__main__.py
+"""
+Serveur de l'API : python -m api [--workers N] [--port 8000]
+
+Plusieurs workers = plusieurs processus (uvicorn), chacun avec ses clients
+Supabase, son pool de connexions et son cache : une écriture n'invalide que
+le cache du worker qui l'a faite, les autres se mettent à jour au plus tard
+après CACHE_TTL_S (ou partagent un BackendCache, voir services/cache.py).
+"""
+import argparse
+import os
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API HTTP des projets IA")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("API_WORKERS", str(os.cpu_count() or 1))))
+    parser.add_argument("--app", default="api.app:app", help="application ASGI (module:attribut)")
+    parser.add_argument("--factory", action="store_true", help="--app désigne une fonction qui crée l'application")
+    parser.add_argument("--access-log", action="store_true", help="journal de chaque requête (coûteux)")
+    args = parser.parse_args()
+
+    uvicorn.run(
+        args.app,
+        factory=args.factory,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        # uvloop et httptools (uvicorn[standard]) quand ils sont installés
+        loop="auto",
+        http="auto",
+        access_log=args.access_log,
+        backlog=4096,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+# api/app.py
+"""
+API HTTP des services (FastAPI)
+
+Endpoints asynchrones sur les services async (lectures, écritures) ; les
+services sans version async (recherche, upload, téléchargement) tournent dans
+des threads. Listes en NDJSON (une ligne JSON par élément), le reste en JSON
+(orjson).
+
+Authentification : jeton Supabase dans Authorization (api/securite.py) ;
+chaque endpoint est limité aux projets de l'utilisateur du jeton et à leurs
+datasets (404 pour ceux des autres).
+
+Lectures conditionnelles : les listes portent un ETag calculé sur les
+(id, updated_at) des lignes, les statistiques un ETag du contenu ; un
+If-None-Match correspondant renvoie 304 sans corps. Les listes sont gardées
+encodées (et compressées) dans le cache des services, invalidé par les
+écritures : une liste inchangée ne coûte ni requête ni sérialisation.
+
+    uvicorn api.app:app            # un processus
+    python -m api --workers 4      # plusieurs (voir api/__main__.py)
+"""
+import asyncio
+import os
+import tempfile
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, Field
+from starlette.concurrency import iterate_in_threadpool
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+
+from api.reponses import (
+    NDJSON, TAILLE_MORCEAU, Compression, Representation, ReponseJSON, encoder, etag_lignes, vers_dict
+)
+from api.securite import utilisateur_courant
+from models.dataset import Dataset
+from models.projet import ProjetIA
+from services.async_dataset_service import AsyncDatasetService
+from services.async_projet_service import AsyncProjetService
+from services.cache import cache, tag_utilisateur, tag_projet, TAG_TOUS_DATASETS
+from services.dataset_service import DatasetService
+from services.instrumentation import instrumentation
+from services.projection import normaliser_fields
+from services.projet_service import ProjetService
+from services.recherche_service import RechercheService
+from services.storage_service import StorageService
+
+TYPES_FICHIERS = {"csv": "text/csv", "tsv": "text/tab-separated-values", "txt": "text/plain",
+                  "json": "application/json", "ndjson": NDJSON, "jsonl": NDJSON}
+
+
+def _statut_amont(erreur: BaseException) -> Optional[int]:
+    """Statut HTTP de Supabase à l'origine d'une erreur de service (les services la ré-emballent)"""
+    while erreur is not None:
+        statut = getattr(getattr(erreur, "response", None), "status_code", None) or getattr(erreur, "status", None)
+        if statut is not None:
+            try:
+                return int(statut)
+            except (TypeError, ValueError):
+                return None
+        erreur = erreur.__cause__ or erreur.__context__
+    return None
+
+
+class RouteServices(APIRoute):
+    """
+    Erreurs des services en réponses HTTP : ValueError (paramètre invalide) -> 422,
+    objet absent côté Supabase -> 404, autres (Supabase injoignable ou en erreur) -> 502
+    """
+
+    def get_route_handler(self) -> Callable:
+        traiter = super().get_route_handler()
+
+        async def route(request: Request) -> Response:
+            try:
+                return await traiter(request)
+            except (StarletteHTTPException, RequestValidationError):
+                raise
+            except ValueError as e:
+                return ReponseJSON({"detail": str(e)}, status_code=422)
+            except Exception as e:
+                return ReponseJSON({"detail": str(e)}, status_code=404 if _statut_amont(e) == 404 else 502)
+        return route
+
+
+class ProjetEntree(BaseModel):
+    nom: str = Field(min_length=1)
+    description: str = ""
+    type_modele: str
+    statut: str = "en_cours"
+    hyperparametres: Dict[str, Any] = Field(default_factory=dict)
+
+
+def _fields(modele, fields: Optional[str]) -> Optional[tuple]:
+    """Projection ?fields=a,b ; id et updated_at toujours inclus (ETag)"""
+    if not fields:
+        return None
+    return normaliser_fields(modele, [champ.strip() for champ in fields.split(",") if champ.strip()],
+                             ("id", "updated_at"))
+
+
+# Colonnes d'un dataset modifiables par PATCH ; les colonnes du fichier
+# (fichier_url, empreinte_sha256, compression, tailles...) ne sont écrites que par l'upload
+CHAMPS_DATASET_MODIFIABLES = frozenset({"nom", "format_fichier", "nb_lignes", "projet_id"})
+
+
+def _mises_a_jour(modele, updates: Dict[str, Any], modifiables: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    if modifiables is None:
+        modifiables = set(modele.champs()) - {"id", "created_at", "created_by"}
+    inconnues = set(updates) - set(modifiables)
+    if inconnues:
+        raise ValueError(f"Colonnes non modifiables pour {modele.__name__}: {', '.join(sorted(inconnues))}")
+    return updates
+
+
+def _morceaux_ndjson(elements: Iterable, champs: Optional[tuple]) -> Iterator[bytes]:
+    """NDJSON d'une itération de modèles, par morceaux d'environ TAILLE_MORCEAU"""
+    courant, taille = [], 0
+    for element in elements:
+        octets = encoder(vers_dict(element, champs)) + b"\n"
+        courant.append(octets)
+        taille += len(octets)
+        if taille >= TAILLE_MORCEAU:
+            yield b"".join(courant)
+            courant, taille = [], 0
+    if courant:
+        yield b"".join(courant)
+
+
+async def _representation_liste(
+    cle: tuple, tags: List, charger: Callable, champs: Optional[tuple]
+) -> Representation:
+    """Liste encodée en NDJSON avec son ETag, à travers le cache (partagée, jamais modifiée)"""
+    async def construire():
+        lignes = [vers_dict(element, champs) for element in await charger()]
+        return Representation.ndjson(lignes, etag_lignes(lignes, champs))
+
+    return await cache.charger_async(cle, tags, construire, copier=False)
+
+
+async def _projets_utilisateur(user_id: str) -> frozenset:
+    """Identifiants des projets de l'utilisateur (en cache, invalidé par ses écritures)"""
+    async def charger():
+        return frozenset(projet.id for projet in await AsyncProjetService.lister_projets(user_id, ("id",)))
+
+    return await cache.charger_async(("api_projets_ids", user_id), [tag_utilisateur(user_id)], charger, copier=False)
+
+
+async def _verifier_projet(projet_id: str, user_id: str):
+    """404 si le projet n'appartient pas à l'utilisateur (son existence n'est pas révélée)"""
+    if projet_id not in await _projets_utilisateur(user_id):
+        raise HTTPException(404, "Projet introuvable")
+
+
+async def _dataset_utilisateur(dataset_id: str, user_id: str, champs: tuple = ("projet_id",)) -> Dataset:
+    """Dataset d'un projet de l'utilisateur, 404 sinon"""
+    dataset = await AsyncDatasetService.obtenir_dataset(dataset_id, champs)
+    if dataset is None or dataset.projet_id not in await _projets_utilisateur(user_id):
+        raise HTTPException(404, "Dataset introuvable")
+    return dataset
+
+
+async def _chemin_fichier(dataset: Dataset, user_id: str) -> Optional[str]:
+    """
+    Chemin Storage du fichier d'un dataset (bucket datasets), None sans fichier
+    Les fichiers sont lus et supprimés avec la clé de service (sans RLS) : seuls
+    les chemins du dataset lui-même sont acceptés, {projet_id}/... (projet de
+    l'utilisateur : un dataset déplacé garde son chemin d'origine) ou
+    cas/{aa}/{empreinte} de son empreinte ; 404 pour tout autre chemin
+    """
+    if not dataset.fichier_url:
+        return None
+    chemin = StorageService.chemin_depuis_url(dataset.fichier_url)
+    if chemin is not None:
+        if dataset.empreinte_sha256 and chemin == DatasetService.generer_chemin_contenu(dataset.empreinte_sha256):
+            return chemin
+        projet_id, separateur, nom = chemin.partition("/")
+        if separateur and nom and ".." not in chemin.split("/") and (
+            projet_id == dataset.projet_id or projet_id in await _projets_utilisateur(user_id)
+        ):
+            return chemin
+    raise HTTPException(404, "Fichier du dataset introuvable")
+
+
+routeur = APIRouter(route_class=RouteServices)
+
+
+# --- Projets ---
+
+@routeur.get("/projets")
+async def lister_projets(request: Request, fields: Optional[str] = None, user_id: str = Depends(utilisateur_courant)):
+    """Projets de l'utilisateur (NDJSON, ETag)"""
+    champs = _fields(ProjetIA, fields)
+    representation = await _representation_liste(
+        ("api_projets", user_id, champs), [tag_utilisateur(user_id)],
+        lambda: AsyncProjetService.lister_projets(user_id, champs), champs
+    )
+    return representation.reponse(request)
+
+
+@routeur.post("/projets", status_code=201)
+async def creer_projet(entree: ProjetEntree, user_id: str = Depends(utilisateur_courant)):
+    projet = await AsyncProjetService.creer_projet_ia(ProjetIA(**entree.model_dump()), user_id)
+    return vers_dict(projet)
+
+
+@routeur.get("/projets/statistiques")
+async def statistiques_projets(request: Request, user_id: str = Depends(utilisateur_courant)):
+    """Agrégats par type de modèle et statut (ETag du contenu)"""
+    return Representation.json(await AsyncProjetService.statistiques_projets(user_id)).reponse(request)
+
+
+@routeur.patch("/projets/{projet_id}")
+async def mettre_a_jour_projet(projet_id: str, updates: Dict[str, Any], user_id: str = Depends(utilisateur_courant)):
+    projet = await AsyncProjetService.mettre_a_jour_projet(projet_id, _mises_a_jour(ProjetIA, updates), user_id)
+    return vers_dict(projet)
+
+
+@routeur.delete("/projets/{projet_id}", status_code=204)
+async def supprimer_projet(projet_id: str, user_id: str = Depends(utilisateur_courant)):
+    """Projet, ses datasets et ses fichiers Storage (ProjetService.supprimer_projet_cascade)"""
+    rapport = await asyncio.to_thread(ProjetService.supprimer_projet_cascade, projet_id, user_id)
+    if not rapport.projet_trouve:
+        raise HTTPException(404, "Projet introuvable")
+    if not rapport.projet_supprime:
+        # Fichiers non supprimés : projet conservé, la suppression peut être relancée
+        return ReponseJSON({"detail": rapport.get_resume()}, status_code=502)
+    return Response(status_code=204)
+
+
+# --- Datasets ---
+
+@routeur.get("/projets/{projet_id}/datasets")
+async def lister_datasets(
+    request: Request, projet_id: str, fields: Optional[str] = None, flux: bool = False,
+    user_id: str = Depends(utilisateur_courant)
+):
+    """
+    Datasets du projet (NDJSON, ETag)
+    flux=true : lecture par pages (keyset) envoyée au fil de l'eau, sans ETag ni
+    cache ; pour les très gros projets
+    """
+    await _verifier_projet(projet_id, user_id)
+    champs = _fields(Dataset, fields)
+    if flux:
+        pages = DatasetService.iter_datasets_projet(projet_id, fields=champs)
+        return StreamingResponse(iterate_in_threadpool(_morceaux_ndjson(pages, champs)), media_type=NDJSON)
+
+    representation = await _representation_liste(
+        ("api_datasets", projet_id, champs), [tag_projet(projet_id), TAG_TOUS_DATASETS],
+        lambda: AsyncDatasetService.lister_datasets_projet(projet_id, champs), champs
+    )
+    return representation.reponse(request)
+
+
+@routeur.post("/projets/{projet_id}/datasets", status_code=201)
+async def uploader_dataset(
+    request: Request,
+    projet_id: str,
+    nom: str,
+    format_fichier: str,
+    nom_fichier: Optional[str] = None,
+    dedupliquer: bool = False,
+    compresser: bool = False,
+    convertir_parquet: bool = False,
+    user_id: str = Depends(utilisateur_courant)
+):
+    """
+    Upload du fichier envoyé en corps brut (pas de multipart) et création du dataset
+    Le corps est écrit sur disque au fil de la réception, puis confié à
+    DatasetService.uploader_et_creer_dataset (upload résumable au-delà du seuil)
+    """
+    await _verifier_projet(projet_id, user_id)
+    nom_fichier = os.path.basename(nom_fichier or f"{nom}.{format_fichier}")
+    if not nom_fichier or nom_fichier.startswith("."):
+        raise ValueError(f"Nom de fichier invalide: {nom_fichier!r}")
+
+    with tempfile.TemporaryDirectory() as repertoire:
+        chemin = os.path.join(repertoire, nom_fichier)
+        with open(chemin, "wb") as fichier:
+            tampon = bytearray()
+            async for morceau in request.stream():
+                tampon += morceau
+                # Écritures disque groupées, hors de la boucle d'événements
+                if len(tampon) >= 1024 * 1024:
+                    await asyncio.to_thread(fichier.write, bytes(tampon))
+                    tampon.clear()
+            await asyncio.to_thread(fichier.write, bytes(tampon))
+
+        dataset = await asyncio.to_thread(
+            DatasetService.uploader_et_creer_dataset, chemin, nom, projet_id, format_fichier,
+            dedupliquer=dedupliquer, compresser=compresser, convertir_parquet=convertir_parquet
+        )
+    return ReponseJSON(vers_dict(dataset), status_code=201)
+
+
+@routeur.get("/projets/{projet_id}/datasets/statistiques")
+async def statistiques_datasets(request: Request, projet_id: str, user_id: str = Depends(utilisateur_courant)):
+    await _verifier_projet(projet_id, user_id)
+    return Representation.json(await AsyncDatasetService.statistiques_datasets(projet_id)).reponse(request)
+
+
+@routeur.patch("/datasets/{dataset_id}")
+async def mettre_a_jour_dataset(dataset_id: str, updates: Dict[str, Any], user_id: str = Depends(utilisateur_courant)):
+    await _dataset_utilisateur(dataset_id, user_id)
+    if "projet_id" in updates:
+        # Déplacement : vers un projet de l'utilisateur seulement
+        await _verifier_projet(updates["projet_id"], user_id)
+    updates = _mises_a_jour(Dataset, updates, CHAMPS_DATASET_MODIFIABLES)
+    dataset = await AsyncDatasetService.mettre_a_jour_dataset(dataset_id, updates)
+    return vers_dict(dataset)
+
+
+@routeur.delete("/datasets/{dataset_id}", status_code=204)
+async def supprimer_dataset(
+    dataset_id: str, supprimer_fichier: bool = True, user_id: str = Depends(utilisateur_courant)
+):
+    """Dataset et son fichier ; un fichier hors des chemins du dataset n'est jamais supprimé (404)"""
+    dataset = await _dataset_utilisateur(dataset_id, user_id, ("projet_id", "fichier_url", "empreinte_sha256"))
+    if supprimer_fichier:
+        await _chemin_fichier(dataset, user_id)
+    if not await AsyncDatasetService.supprimer_dataset(dataset_id, supprimer_fichier):
+        raise HTTPException(404, "Dataset introuvable")
+    return Response(status_code=204)
+
+
+# --- Recherche ---
+
+def _page(resultat, champs: Optional[tuple]) -> Dict[str, Any]:
+    return {
+        "resultats": [vers_dict(element, champs) for element in resultat.resultats],
+        "scores": resultat.scores,
+        "total": resultat.total,
+        "limite": resultat.limite,
+        "offset": resultat.offset,
+        "mode": resultat.mode,
+    }
+
+
+@routeur.get("/recherche/projets")
+async def rechercher_projets(
+    q: str, limite: int = Query(20, ge=1, le=200), offset: int = Query(0, ge=0),
+    fields: Optional[str] = None, user_id: str = Depends(utilisateur_courant)
+):
+    champs = _fields(ProjetIA, fields)
+    resultat = await asyncio.to_thread(RechercheService.rechercher_projets, user_id, q, limite, offset, champs)
+    return _page(resultat, champs)
+
+
+@routeur.get("/recherche/datasets")
+async def rechercher_datasets(
+    q: str, projet_id: str, limite: int = Query(20, ge=1, le=200),
+    offset: int = Query(0, ge=0), fields: Optional[str] = None, user_id: str = Depends(utilisateur_courant)
+):
+    """Datasets d'un projet de l'utilisateur (pas de recherche sur tous les projets)"""
+    await _verifier_projet(projet_id, user_id)
+    champs = _fields(Dataset, fields)
+    resultat = await asyncio.to_thread(RechercheService.rechercher_datasets, q, projet_id, limite, offset, champs)
+    return _page(resultat, champs)
+
+
+# --- Fichiers ---
+
+@routeur.get("/datasets/{dataset_id}/fichier")
+async def telecharger_fichier(dataset_id: str, user_id: str = Depends(utilisateur_courant)):
+    """
+    Fichier d'un dataset de l'utilisateur en flux (décompressé si le dataset est stocké compressé)
+    Le chemin vient du dataset (fichier_url, bucket datasets, voir _chemin_fichier),
+    jamais de la requête.
+    Le premier morceau est lu avant de répondre : un objet absent donne une erreur, pas un flux vide
+    """
+    dataset = await _dataset_utilisateur(
+        dataset_id, user_id, ("projet_id", "fichier_url", "empreinte_sha256", "compression")
+    )
+    chemin = await _chemin_fichier(dataset, user_id)
+    if chemin is None:
+        raise HTTPException(404, "Dataset sans fichier")
+    morceaux = StorageService.telecharger_flux(chemin, compression=dataset.compression)
+    premier = await asyncio.to_thread(next, morceaux, b"")
+
+    async def corps():
+        yield premier
+        async for morceau in iterate_in_threadpool(morceaux):
+            yield morceau
+
+    base, extension = os.path.splitext(chemin)
+    if extension in (".gz", ".zst"):
+        extension = os.path.splitext(base)[1]
+    return StreamingResponse(corps(), media_type=TYPES_FICHIERS.get(extension.lstrip(".").lower(), "application/octet-stream"))
+
+
+# --- Exploitation ---
+
+@routeur.get("/sante")
+async def sante():
+    return {"statut": "ok"}
+
+
+@routeur.get("/metriques")
+async def metriques():
+    """Métriques Prometheus (instrumentation, résilience, regroupement des lectures)"""
+    return PlainTextResponse(instrumentation.exporter_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+def creer_app() -> FastAPI:
+    app = FastAPI(title="Projets IA", default_response_class=ReponseJSON)
+    app.add_middleware(Compression)
+    app.include_router(routeur)
+    return app
+
+
+app = creer_app()
@@ -0,0 +1,283 @@
+# api/reponses.py
+"""
+Réponses HTTP de l'API : sérialisation orjson, NDJSON, ETag et compression
+
+- Representation : corps NDJSON / JSON d'une lecture, avec son ETag, mis en
+  cache (services/cache.py, invalidé par les écritures des services) et
+  compressé une seule fois par encodage
+- Compression : middleware gzip / brotli des autres réponses (flux compris),
+  limité aux types textuels
+"""
+import gzip
+import hashlib
+import zlib
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle : gzip seul
+    brotli = None
+
+NDJSON = "application/x-ndjson"
+TAILLE_MORCEAU = 64 * 1024
+# En dessous, la compression coûte plus qu'elle ne rapporte
+TAILLE_MIN_COMPRESSION = 1024
+TYPES_COMPRESSIBLES = ("text/", "application/json", NDJSON)
+
+
+def _defaut(valeur: Any) -> Any:
+    """Types non gérés nativement par orjson (taille_mb en Decimal...)"""
+    if isinstance(valeur, Decimal):
+        return float(valeur)
+    if isinstance(valeur, (set, frozenset)):
+        return list(valeur)
+    raise TypeError(f"Type non sérialisable: {type(valeur).__name__}")
+
+
+def encoder(valeur: Any) -> bytes:
+    return orjson.dumps(valeur, default=_defaut, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ReponseJSON(ORJSONResponse):
+    """ORJSONResponse qui accepte aussi les Decimal des modèles"""
+
+    def render(self, content: Any) -> bytes:
+        return encoder(content)
+
+
+def vers_dict(objet, champs: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    Colonnes d'un modèle (ProjetIA, Dataset)
+    champs: projection demandée ; les autres colonnes d'une instance partielle ne sont pas chargées
+    """
+    return {champ: getattr(objet, champ) for champ in (champs or type(objet).champs())}
+
+
+# --- ETag ---
+
+def etag_lignes(lignes: Iterable[Dict[str, Any]], *variante: Any) -> str:
+    """
+    ETag faible d'une liste : identifiants et updated_at (created_at à défaut)
+    de chaque ligne, et la variante (projection...). Une ligne ajoutée,
+    modifiée ou supprimée change l'ETag
+    """
+    empreinte = hashlib.blake2b(repr(variante).encode(), digest_size=16)
+    for ligne in lignes:
+        empreinte.update(f"{ligne.get('id')}@{ligne.get('updated_at') or ligne.get('created_at')};".encode())
+    return f'W/"{empreinte.hexdigest()}"'
+
+
+def etag_contenu(corps: bytes) -> str:
+    """ETag faible d'un agrégat (statistiques) : empreinte du corps"""
+    return f'W/"{hashlib.blake2b(corps, digest_size=16).hexdigest()}"'
+
+
+def correspond(request: Request, etag: str) -> bool:
+    """If-None-Match de la requête satisfait par l'ETag (comparaison faible, RFC 9110)"""
+    entete = request.headers.get("if-none-match")
+    if not entete:
+        return False
+    if entete.strip() == "*":
+        return True
+    valeur = etag.removeprefix("W/")
+    return any(candidat.strip().removeprefix("W/") == valeur for candidat in entete.split(","))
+
+
+# --- Représentations mises en cache ---
+
+def encodages_acceptes(request: Request) -> List[str]:
+    """Encodages proposés par le client parmi ceux disponibles, préférés d'abord"""
+    acceptes = {}
+    for element in request.headers.get("accept-encoding", "").split(","):
+        nom, _, parametres = element.strip().partition(";")
+        qualite = 1.0
+        if parametres.strip().startswith("q="):
+            try:
+                qualite = float(parametres.strip()[2:])
+            except ValueError:
+                continue
+        if nom and qualite > 0:
+            acceptes[nom.lower()] = qualite
+    disponibles = ["br", "gzip"] if brotli is not None else ["gzip"]
+    return sorted((nom for nom in disponibles if nom in acceptes), key=lambda nom: -acceptes[nom])
+
+
+def compresser(corps: bytes, encodage: str) -> bytes:
+    if encodage == "br":
+        return brotli.compress(corps, quality=5)
+    return gzip.compress(corps, compresslevel=6, mtime=0)
+
+
+class Representation:
+    """Corps d'une lecture (en morceaux), son ETag et ses versions compressées"""
+
+    __slots__ = ("etag", "media_type", "morceaux", "taille", "_compressees")
+
+    def __init__(self, etag: str, media_type: str, morceaux: List[bytes]):
+        self.etag = etag
+        self.media_type = media_type
+        self.morceaux = morceaux
+        self.taille = sum(len(morceau) for morceau in morceaux)
+        self._compressees: Dict[str, bytes] = {}
+
+    @classmethod
+    def ndjson(cls, lignes: List[Dict[str, Any]], etag: str) -> "Representation":
+        """Une ligne JSON par élément, regroupées en morceaux d'environ TAILLE_MORCEAU"""
+        morceaux, courant, taille = [], [], 0
+        for ligne in lignes:
+            octets = encoder(ligne) + b"\n"
+            courant.append(octets)
+            taille += len(octets)
+            if taille >= TAILLE_MORCEAU:
+                morceaux.append(b"".join(courant))
+                courant, taille = [], 0
+        if courant:
+            morceaux.append(b"".join(courant))
+        return cls(etag, NDJSON, morceaux)
+
+    @classmethod
+    def json(cls, valeur: Any) -> "Representation":
+        corps = encoder(valeur)
+        return cls(etag_contenu(corps), "application/json", [corps])
+
+    def compressee(self, encodage: str) -> bytes:
+        corps = self._compressees.get(encodage)
+        if corps is None:
+            corps = self._compressees[encodage] = compresser(b"".join(self.morceaux), encodage)
+        return corps
+
+    def reponse(self, request: Request) -> Response:
+        """304 si le client a déjà cette version, sinon le corps (compressé d'avance si accepté)"""
+        entetes = {"ETag": self.etag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+        if correspond(request, self.etag):
+            return Response(status_code=304, headers=entetes)
+
+        encodages = encodages_acceptes(request) if self.taille >= TAILLE_MIN_COMPRESSION else []
+        if encodages:
+            entetes["Content-Encoding"] = encodages[0]
+            return Response(self.compressee(encodages[0]), media_type=self.media_type, headers=entetes)
+        if len(self.morceaux) == 1:
+            return Response(self.morceaux[0], media_type=self.media_type, headers=entetes)
+        return StreamingResponse(iter(self.morceaux), media_type=self.media_type, headers=entetes)
+
+
+# --- Compression des autres réponses ---
+
+class _CompresseurGzip:
+    def __init__(self):
+        self._compresseur = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compresser(self, donnees: bytes) -> bytes:
+        return self._compresseur.compress(donnees)
+
+    def vider(self) -> bytes:
+        return self._compresseur.flush(zlib.Z_SYNC_FLUSH)
+
+    def terminer(self) -> bytes:
+        return self._compresseur.flush()
+
+
+class _CompresseurBrotli:
+    def __init__(self):
+        self._compresseur = brotli.Compressor(quality=4)
+
+    def compresser(self, donnees: bytes) -> bytes:
+        return self._compresseur.process(donnees)
+
+    def vider(self) -> bytes:
+        return self._compresseur.flush()
+
+    def terminer(self) -> bytes:
+        return self._compresseur.finish()
+
+
+COMPRESSEURS = {"gzip": _CompresseurGzip, "br": _CompresseurBrotli}
+
+
+class Compression:
+    """
+    Middleware ASGI gzip / brotli (GZipMiddleware de Starlette, étendu)
+    Ne touche pas aux réponses déjà encodées (représentations compressées
+    d'avance), aux petits corps ni aux types non textuels (Parquet, archives) ;
+    les flux sont compressés morceau par morceau
+    """
+
+    def __init__(self, app: ASGIApp, taille_min: int = TAILLE_MIN_COMPRESSION):
+        self.app = app
+        self.taille_min = taille_min
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encodages = encodages_acceptes(Request(scope))
+        if not encodages:
+            await self.app(scope, receive, send)
+            return
+        await _Compresseur(self.app, encodages[0], self.taille_min)(scope, receive, send)
+
+
+class _Compresseur:
+    """Compression d'une réponse (une instance par requête)"""
+
+    def __init__(self, app: ASGIApp, encodage: str, taille_min: int):
+        self.app = app
+        self.encodage = encodage
+        self.taille_min = taille_min
+        self.send: Optional[Send] = None
+        self.debut: Optional[Message] = None
+        self.compresseur = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.envoyer)
+
+    async def envoyer(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Retenu jusqu'au premier morceau : on saura alors s'il faut compresser
+            self.debut = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        corps = message.get("body", b"")
+        suite = message.get("more_body", False)
+        if self.debut is not None:
+            debut, self.debut = self.debut, None
+            if self._compressible(debut, corps, suite):
+                self.compresseur = COMPRESSEURS[self.encodage]()
+                entetes = MutableHeaders(raw=debut["headers"])
+                entetes["Content-Encoding"] = self.encodage
+                entetes.add_vary_header("Accept-Encoding")
+                if suite:
+                    del entetes["Content-Length"]
+                else:
+                    corps = self.compresseur.compresser(corps) + self.compresseur.terminer()
+                    entetes["Content-Length"] = str(len(corps))
+                    await self.send(debut)
+                    await self.send({**message, "body": corps})
+                    return
+            await self.send(debut)
+
+        if self.compresseur is not None:
+            donnees = self.compresseur.compresser(corps)
+            donnees += self.compresseur.vider() if suite else self.compresseur.terminer()
+            message = {**message, "body": donnees}
+        await self.send(message)
+
+    def _compressible(self, debut: Message, corps: bytes, suite: bool) -> bool:
+        entetes = Headers(raw=debut["headers"])
+        return (
+            "content-encoding" not in entetes
+            and entetes.get("content-type", "").startswith(TYPES_COMPRESSIBLES)
+            and (suite or len(corps) >= self.taille_min)
+        )
@@ -0,0 +1,94 @@
+# api/securite.py
+"""
+Authentification de l'API : jeton Supabase (JWT) de l'en-tête Authorization
+
+L'utilisateur est celui du jeton (claim sub), jamais un paramètre de la requête.
+- SUPABASE_JWT_SECRET défini (et PyJWT installé) : signature vérifiée localement
+  (HS256, audience "authenticated"), sans aller-retour ; les jetons décodés
+  sont gardés (LRU) jusqu'à leur expiration
+- sinon : jeton validé par Supabase Auth (GET /auth/v1/user), résultat gardé
+  dans le cache des services (CACHE_TTL_S) sous une empreinte du jeton
+"""
+import hashlib
+import os
+import time
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+from config.database import get_async_supabase
+from services.cache import cache
+
+try:
+    import jwt
+except ImportError:  # dépendance optionnelle : validation par Supabase Auth
+    jwt = None
+
+# Clés de cache des jetons validés : un seul tag, vidé par invalider_jetons()
+TAG_JETONS = ("jetons",)
+
+
+def _non_authentifie(detail: str) -> HTTPException:
+    return HTTPException(401, detail, headers={"WWW-Authenticate": "Bearer"})
+
+
+def _jeton(request: Request) -> str:
+    schema, _, jeton = request.headers.get("authorization", "").partition(" ")
+    if schema.lower() != "bearer" or not jeton.strip():
+        raise _non_authentifie("Jeton d'accès requis (Authorization: Bearer <jwt>)")
+    return jeton.strip()
+
+
+@lru_cache(maxsize=4096)
+def _decoder(jeton: str, secret: str) -> Tuple[Optional[str], Optional[float]]:
+    """(sub, exp) d'un jeton dont la signature est valide ; les jetons refusés ne sont pas gardés"""
+    charge = jwt.decode(jeton, secret, algorithms=["HS256"], audience="authenticated")
+    return charge.get("sub"), charge.get("exp")
+
+
+def _verifier_localement(jeton: str, secret: str) -> str:
+    # Le décodage (signature HMAC) coûte ~100 µs : fait une fois par jeton
+    try:
+        user_id, expiration = _decoder(jeton, secret)
+    except jwt.PyJWTError as e:
+        raise _non_authentifie(f"Jeton invalide: {e}")
+    if expiration is not None and expiration <= time.time():
+        raise _non_authentifie("Jeton expiré")
+    if not user_id:
+        raise _non_authentifie("Jeton sans utilisateur")
+    return user_id
+
+
+async def _verifier_par_supabase(jeton: str) -> str:
+    async def charger() -> Optional[str]:
+        client = await get_async_supabase()
+        try:
+            reponse = await client.auth.get_user(jeton)
+        except Exception as e:
+            # Jeton refusé par Supabase Auth : 401 ; Auth injoignable : erreur de service (502)
+            if getattr(e, "status", None) in (401, 403):
+                return None
+            raise
+        return reponse.user.id if reponse and reponse.user else None
+
+    # Le jeton lui-même n'est jamais une clé (métriques de regroupement par clé)
+    empreinte = hashlib.blake2b(jeton.encode(), digest_size=16).hexdigest()
+    user_id = await cache.charger_async(("api_jeton", empreinte), [TAG_JETONS], charger)
+    if user_id is None:
+        raise _non_authentifie("Jeton invalide ou expiré")
+    return user_id
+
+
+async def utilisateur_courant(request: Request) -> str:
+    """Dépendance FastAPI : identifiant de l'utilisateur authentifié (401 sinon)"""
+    jeton = _jeton(request)
+    secret = os.getenv("SUPABASE_JWT_SECRET")
+    if secret and jwt is not None:
+        return _verifier_localement(jeton, secret)
+    return await _verifier_par_supabase(jeton)
+
+
+def invalider_jetons():
+    """Oublie les jetons validés par Supabase Auth (après une déconnexion forcée...)"""
+    cache.invalider(TAG_JETONS)
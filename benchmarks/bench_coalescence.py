@@ -0,0 +1,90 @@
+# benchmarks/bench_coalescence.py
+"""
+Rafale de lectures identiques après expiration du cache (services/coalescence.py)
+
+À chaque vague, le cache est vidé puis N appels concurrents demandent les
+mêmes clés (datasets d'un projet, statistiques d'un utilisateur), par un pool
+de threads et par asyncio.gather. Avec et sans regroupement : requêtes
+envoyées au Supabase local par vague et durée de la vague.
+
+Usage : python -m benchmarks.bench_coalescence [--concurrence 32] [--vagues 20]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.supabase_local import SupabaseLocal
+
+
+def mesurer(local: SupabaseLocal, args, actif: bool) -> dict:
+    from services.async_dataset_service import AsyncDatasetService
+    from services.async_projet_service import AsyncProjetService
+    from services.cache import cache
+    from services.coalescence import coalescence
+    from services.dataset_service import DatasetService
+    from services.projet_service import ProjetService
+
+    coalescence.actif = actif
+    projet_id = next(iter(local.table("projets_ia")))
+    utilisateur = local.utilisateurs[0]
+    appels = [
+        lambda: DatasetService.lister_datasets_projet(projet_id),
+        lambda: ProjetService.statistiques_projets(utilisateur),
+    ]
+
+    async def vague_async():
+        await asyncio.gather(*(
+            appel for _ in range(args.concurrence)
+            for appel in (AsyncDatasetService.lister_datasets_projet(projet_id),
+                          AsyncProjetService.statistiques_projets(utilisateur))
+        ))
+
+    resultats = {}
+    with ThreadPoolExecutor(args.concurrence) as pool:
+        for mode in ("threads", "asyncio"):
+            durees = []
+            avant = local.allers_retours()["total"]
+            for _ in range(args.vagues):
+                cache.vider()
+                debut = time.perf_counter()
+                if mode == "threads":
+                    list(pool.map(lambda i: appels[i % len(appels)](), range(2 * args.concurrence)))
+                else:
+                    asyncio.run(vague_async())
+                durees.append(time.perf_counter() - debut)
+            resultats[mode] = {
+                "requetes": (local.allers_retours()["total"] - avant) / args.vagues,
+                "duree_ms": statistics.median(durees) * 1000,
+            }
+    coalescence.actif = True
+    return resultats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrence", type=int, default=32, help="appels concurrents par clé")
+    parser.add_argument("--vagues", type=int, default=20)
+    parser.add_argument("--latence-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    local = SupabaseLocal(latence_ms={"rest": args.latence_ms, "storage": args.latence_ms, "auth": args.latence_ms})
+    local.semer(nb_projets=200, nb_datasets=5000, nb_utilisateurs=5)
+
+    with local.installer():
+        from services.coalescence import coalescence
+
+        print(f"{'mode':<28}{'requêtes/vague':>16}{'durée (médiane)':>18}")
+        for actif in (False, True):
+            for mode, r in mesurer(local, args, actif).items():
+                libelle = f"{mode}, {'regroupement' if actif else 'sans regroupement'}"
+                print(f"{libelle:<28}{r['requetes']:>16.1f}{r['duree_ms']:>15.1f} ms")
+        print("\nClés les plus regroupées :")
+        for ligne in coalescence.par_cle(5):
+            print(f"  {ligne['cle']}: {ligne['appels']} appels, {ligne['executions']} exécutions, "
+                  f"{ligne['regroupes']} regroupés")
+
+
+if __name__ == "__main__":
+    main()
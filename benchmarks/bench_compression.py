@@ -0,0 +1,64 @@
+# benchmarks/bench_compression.py
+"""
+Mesure la compression à l'upload (services/compression.py) sur des fichiers
+synthétiques : octets envoyés sur le réseau par codec et par format, débit
+de compression selon le nombre de threads
+
+Aucune requête réseau : les octets comptés sont ceux que le corps de l'upload
+émettrait (FluxCompresse).
+
+Usage : python -m benchmarks.bench_compression [nb_lignes] [max_workers]
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from benchmarks.bench_conversion_parquet import generer_lignes
+from services.compression import CODECS, FluxCompresse, blocs_compresses
+
+
+def ecrire_fichiers(repertoire: str, nb: int) -> dict:
+    chemins = {
+        "csv": os.path.join(repertoire, "bench.csv"),
+        "json": os.path.join(repertoire, "bench.json"),
+    }
+    colonnes = ["id", "texte", "score", "categorie", "date"]
+    with open(chemins["csv"], "w") as csv_f, open(chemins["json"], "w") as js_f:
+        csv_f.write(",".join(colonnes) + "\n")
+        for ligne in generer_lignes(nb):
+            csv_f.write(",".join(str(ligne[c]) for c in colonnes) + "\n")
+            js_f.write(json.dumps(ligne) + "\n")
+    return chemins
+
+
+def octets_envoyes(chemin: str, codec, max_workers: int) -> tuple:
+    """(octets émis, durée) : lecture complète du corps comme le ferait httpx"""
+    debut = time.perf_counter()
+    flux = FluxCompresse(blocs_compresses(chemin, codec, max_workers=max_workers))
+    with io.BufferedReader(flux) as corps:
+        while corps.read(64 * 1024):
+            pass
+    return flux.octets_emis, time.perf_counter() - debut
+
+
+def bench(nb: int = 1_000_000, max_workers: int = 4):
+    print(f"=== BENCH COMPRESSION À L'UPLOAD ({nb:,} lignes) ===\n")
+
+    with tempfile.TemporaryDirectory() as repertoire:
+        for format_fichier, chemin in ecrire_fichiers(repertoire, nb).items():
+            taille = os.path.getsize(chemin)
+            print(f"📄 {format_fichier} : {taille / 1024 ** 2:.1f} MB non compressés")
+            for codec in CODECS.values():
+                envoyes, duree_1 = octets_envoyes(chemin, codec, 1)
+                _, duree_n = octets_envoyes(chemin, codec, max_workers)
+                print(f"   {codec.nom:<5}: {envoyes / 1024 ** 2:6.1f} MB sur le réseau "
+                      f"(-{100 * (1 - envoyes / taille):.0f} %), "
+                      f"{taille / 1024 ** 2 / duree_1:5.0f} MB/s x1, "
+                      f"{taille / 1024 ** 2 / duree_n:5.0f} MB/s x{max_workers}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    bench(*args)
@@ -0,0 +1,77 @@
+# benchmarks/bench_conversion_parquet.py
+"""
+Mesure la conversion CSV / NDJSON / JSON -> Parquet (services/conversion.py)
+sur des fichiers synthétiques : débit, gain de taille, pic mémoire
+
+Aucune requête réseau : seule l'étape de conversion est mesurée.
+
+Usage : python -m benchmarks.bench_conversion_parquet [nb_lignes] [taille_bloc_mb]
+"""
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+from services.conversion import convertir_en_parquet
+
+CATEGORIES = ["train", "test", "validation", "inconnu"]
+
+
+def generer_lignes(nb: int):
+    aleatoire = random.Random(42)
+    for i in range(nb):
+        yield {
+            "id": i,
+            "texte": f"exemple {aleatoire.randrange(10_000)} du corpus",
+            "score": round(aleatoire.random(), 6),
+            "categorie": aleatoire.choice(CATEGORIES),
+            "date": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}",
+        }
+
+
+def ecrire_fichiers(repertoire: str, nb: int) -> dict:
+    chemins = {
+        "csv": os.path.join(repertoire, "bench.csv"),
+        "ndjson": os.path.join(repertoire, "bench.ndjson"),
+        "json": os.path.join(repertoire, "bench.json"),
+    }
+    colonnes = ["id", "texte", "score", "categorie", "date"]
+    with open(chemins["csv"], "w") as csv_f, open(chemins["ndjson"], "w") as nd_f, open(chemins["json"], "w") as js_f:
+        csv_f.write(",".join(colonnes) + "\n")
+        js_f.write("[")
+        for i, ligne in enumerate(generer_lignes(nb)):
+            csv_f.write(",".join(str(ligne[c]) for c in colonnes) + "\n")
+            encode = json.dumps(ligne)
+            nd_f.write(encode + "\n")
+            js_f.write(("," if i else "") + encode)
+        js_f.write("]")
+    return chemins
+
+
+def pic_memoire_mb() -> float:
+    # ru_maxrss : Ko sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench(nb: int = 1_000_000, taille_bloc_mb: int = 16):
+    print(f"=== BENCH CONVERSION PARQUET ({nb:,} lignes, blocs de {taille_bloc_mb} MB) ===\n")
+
+    with tempfile.TemporaryDirectory() as repertoire:
+        chemins = ecrire_fichiers(repertoire, nb)
+        for format_fichier, chemin in chemins.items():
+            resultat = convertir_en_parquet(
+                chemin, format_fichier,
+                destination=os.path.join(repertoire, f"{format_fichier}.parquet"),
+                taille_bloc=taille_bloc_mb * 1024 * 1024
+            )
+            print(f"⏱️ {format_fichier:<7}: {resultat.octets_source / 1024 ** 2:7.1f} MB -> "
+                  f"{resultat.octets_parquet / 1024 ** 2:6.1f} MB (x{resultat.taux_compression:.1f}) "
+                  f"en {resultat.duree_s:.2f} s, {resultat.debit_mb_s:.0f} MB/s")
+
+    print(f"\n📈 Pic mémoire du processus : {pic_memoire_mb():.0f} MB")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    bench(*args)
@@ -0,0 +1,74 @@
+# benchmarks/bench_creation_datasets.py
+"""
+Compare la création ligne par ligne (creer_dataset) et la création groupée
+(creer_datasets_batch) sur le projet Supabase configuré dans .env
+
+Usage : python -m benchmarks.bench_creation_datasets [nb_datasets] [taille_chunk] [max_workers]
+"""
+import sys
+import time
+from decimal import Decimal
+from config.database import supabase
+from models.dataset import Dataset
+from models.projet import ProjetIA
+from services.dataset_service import DatasetService
+from services.projet_service import ProjetService
+
+
+def generer_datasets(projet_id: str, nb: int, prefixe: str):
+    for i in range(nb):
+        yield Dataset(
+            nom=f"{prefixe} #{i}",
+            projet_id=projet_id,
+            format_fichier="csv",
+            taille_mb=Decimal("1.5"),
+            nb_lignes=1000 + i
+        )
+
+
+def nettoyer(projet_id: str):
+    supabase.table('datasets').delete().eq('projet_id', projet_id).execute()
+
+
+def bench(nb: int = 1000, taille_chunk: int = 500, max_workers: int = 4):
+    print(f"=== BENCH CRÉATION DE {nb} DATASETS ===\n")
+
+    projet = ProjetService.creer_projet_ia(
+        ProjetIA(nom="Bench datasets", description="Projet temporaire de benchmark", type_modele="ML"),
+        None
+    )
+
+    try:
+        # 1. Ligne par ligne
+        debut = time.perf_counter()
+        for dataset in generer_datasets(projet.id, nb, "unitaire"):
+            DatasetService.creer_dataset(dataset)
+        duree_unitaire = time.perf_counter() - debut
+        print(f"⏱️ Ligne par ligne : {duree_unitaire:.2f} s ({nb} requêtes, {nb / duree_unitaire:.0f} lignes/s)")
+        nettoyer(projet.id)
+
+        # 2. Par chunks, séquentiel
+        debut = time.perf_counter()
+        resultat = DatasetService.creer_datasets_batch(generer_datasets(projet.id, nb, "batch"), taille_chunk)
+        duree_batch = time.perf_counter() - debut
+        print(f"⏱️ Batch ({taille_chunk}/chunk) : {duree_batch:.2f} s ({resultat.get_resume()})")
+        nettoyer(projet.id)
+
+        # 3. Par chunks, en parallèle
+        debut = time.perf_counter()
+        resultat = DatasetService.creer_datasets_batch(
+            generer_datasets(projet.id, nb, "parallele"), taille_chunk, max_workers
+        )
+        duree_parallele = time.perf_counter() - debut
+        print(f"⏱️ Batch x{max_workers} workers : {duree_parallele:.2f} s ({resultat.get_resume()})")
+
+        print(f"\n🚀 Gain batch : x{duree_unitaire / duree_batch:.1f}, parallèle : x{duree_unitaire / duree_parallele:.1f}")
+
+    finally:
+        nettoyer(projet.id)
+        supabase.table('projets_ia').delete().eq('id', projet.id).execute()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:4]]
+    bench(*args)
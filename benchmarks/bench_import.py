@@ -0,0 +1,77 @@
+# benchmarks/bench_import.py
+"""
+Mesure le coût au démarrage : import des services, puis création du client
+
+Chaque mesure tourne dans un interpréteur neuf. Avec --avant <révision git>,
+la même mesure est faite sur une copie de cette révision pour comparer.
+
+Usage : python -m benchmarks.bench_import [--repetitions 10] [--avant <rev>]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CODE_IMPORT = (
+    "import time; t = time.perf_counter(); "
+    "import services.projet_service, services.dataset_service, "
+    "services.storage_service, services.auth_service; "
+    "print(time.perf_counter() - t)"
+)
+
+CODE_PREMIER_USAGE = (
+    "import time; t = time.perf_counter(); "
+    "import services.projet_service; "
+    "from config.database import supabase_config; supabase_config.get_client(admin_mode=True); "
+    "print(time.perf_counter() - t)"
+)
+
+# Valeurs factices : aucune requête réseau n'est faite
+ENV_FACTICE = {
+    "SUPABASE_URL": "https://exemple.supabase.co",
+    "SUPABASE_KEY": "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.signature",
+}
+
+
+def mesurer(repertoire: str, code: str, repetitions: int) -> float:
+    """Médiane (ms) du temps mesuré dans des interpréteurs neufs"""
+    env = {**os.environ, **ENV_FACTICE, "PYTHONDONTWRITEBYTECODE": "1"}
+    durees = []
+    for _ in range(repetitions):
+        sortie = subprocess.run(
+            [sys.executable, "-c", code], cwd=repertoire, env=env,
+            capture_output=True, text=True, check=True
+        )
+        durees.append(float(sortie.stdout.strip().splitlines()[-1]) * 1000)
+    return statistics.median(durees)
+
+
+def extraire_revision(revision: str, destination: str):
+    archive = subprocess.run(
+        ["git", "archive", revision], cwd=RACINE, capture_output=True, check=True
+    ).stdout
+    subprocess.run(["tar", "-x", "-C", destination], input=archive, check=True)
+
+
+def afficher(titre: str, repertoire: str, repetitions: int):
+    print(f"📦 {titre}")
+    print(f"   Import des services        : {mesurer(repertoire, CODE_IMPORT, repetitions):8.1f} ms")
+    print(f"   Import + création du client : {mesurer(repertoire, CODE_PREMIER_USAGE, repetitions):8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repetitions", type=int, default=10)
+    parser.add_argument("--avant", help="révision git de référence (ex: HEAD~1)")
+    args = parser.parse_args()
+
+    print("=== BENCH DÉMARRAGE ===\n")
+    if args.avant:
+        with tempfile.TemporaryDirectory() as tmp:
+            extraire_revision(args.avant, tmp)
+            afficher(f"Révision {args.avant}", tmp, args.repetitions)
+    afficher("Arbre courant", RACINE, args.repetitions)
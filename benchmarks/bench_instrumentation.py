@@ -0,0 +1,85 @@
+# benchmarks/bench_instrumentation.py
+"""
+Coût de l'instrumentation (services/instrumentation.py) par appel de service
+
+Mêmes appels, contre le Supabase simulé sans latence (le coût mesuré est celui
+du client et de l'instrumentation), dans trois modes : désactivée, métriques
+seules, métriques + spans.
+
+Usage : python -m benchmarks.bench_instrumentation [--repetitions 2000]
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.supabase_local import SupabaseLocal
+from services.instrumentation import instrumentation
+
+MODES = {
+    "désactivée": None,
+    "métriques": {"traces": False},
+    "métriques + spans": {"traces": True},
+}
+
+
+def configurer(options):
+    if options is None:
+        instrumentation.desactiver()
+    else:
+        instrumentation.activer(**options)
+
+
+def chronometrer(appel, repetitions: int) -> dict:
+    """
+    Médiane (µs) d'un appel dans chaque mode
+    Les modes alternent à chaque répétition : la dérive (caches, GC) les touche tous
+    """
+    durees = {mode: [] for mode in MODES}
+    for _ in range(repetitions):
+        for mode, options in MODES.items():
+            configurer(options)
+            debut = time.perf_counter()
+            appel()
+            durees[mode].append(time.perf_counter() - debut)
+    instrumentation.desactiver()
+    return {mode: statistics.median(d) * 1e6 for mode, d in durees.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repetitions", type=int, default=2000)
+    args = parser.parse_args()
+
+    local = SupabaseLocal(latence_ms=0)
+    local.semer(nb_projets=200, nb_datasets=2000, nb_utilisateurs=5)
+
+    with local.installer():
+        from services.cache import cache
+        from services.dataset_service import DatasetService
+        from services.projet_service import ProjetService
+
+        projet_id = next(iter(local.table("projets_ia")))
+        utilisateur = local.utilisateurs[0]
+        appels = {
+            "ProjetService.lister_projets (sans cache)": lambda: (cache.vider(), ProjetService.lister_projets(utilisateur)),
+            "DatasetService.lister_datasets_projet (sans cache)": lambda: (cache.vider(), DatasetService.lister_datasets_projet(projet_id)),
+            "ProjetService.lister_projets (cache)": lambda: ProjetService.lister_projets(utilisateur),
+        }
+        for appel in appels.values():
+            appel()
+
+        resultats = {nom: chronometrer(appel, args.repetitions) for nom, appel in appels.items()}
+        instrumentation.vider()
+
+    print(f"{'appel':<52}" + "".join(f"{mode:>20}" for mode in MODES))
+    for nom in appels:
+        ligne = f"{nom:<52}"
+        for mode in MODES:
+            duree = resultats[nom][mode]
+            ecart = "" if mode == "désactivée" else f" ({duree - resultats[nom]['désactivée']:+.0f})"
+            ligne += f"{f'{duree:.0f} µs{ecart}':>20}"
+        print(ligne)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_resilience.py
+"""
+Effet de la couche de résilience (config/resilience.py) sur les lectures
+
+Le Supabase local renvoie des 503 (--pannes) et une partie des requêtes tombe
+sur une réplique lente (--lenteurs, --facteur-lenteur). Mêmes lectures dans
+trois modes : sans résilience, réessais + disjoncteur, et avec requêtes
+doublées ; on compare taux d'erreur, p50 / p99 et requêtes envoyées.
+
+Usage : python -m benchmarks.bench_resilience [--appels 1000] [--pannes 0.02] [--lenteurs 0.03]
+"""
+import argparse
+import os
+import statistics
+import time
+
+from benchmarks.supabase_local import SupabaseLocal
+
+MODES = {
+    "sans résilience": {"SUPABASE_RESILIENCE": "false"},
+    "réessais": {"SUPABASE_RESILIENCE": "true", "SUPABASE_HEDGING": "false"},
+    "réessais + doublement": {"SUPABASE_RESILIENCE": "true", "SUPABASE_HEDGING": "true"},
+}
+
+
+def mesurer(args, variables: dict) -> dict:
+    local = SupabaseLocal(
+        latence_ms={"rest": args.latence_ms, "storage": args.latence_ms, "auth": args.latence_ms},
+        pannes=args.pannes, lenteurs=args.lenteurs, facteur_lenteur=args.facteur_lenteur, graine=args.graine
+    )
+    local.semer(nb_projets=200, nb_datasets=2000, nb_utilisateurs=10)
+    # Backoff à l'échelle de la latence simulée
+    variables = {"SUPABASE_REESSAI_BASE_S": str(args.latence_ms / 1000), **variables}
+    anciennes = {nom: os.environ.get(nom) for nom in variables}
+    os.environ.update(variables)
+    try:
+        with local.installer():
+            from services.cache import cache
+            from services.projet_service import ProjetService
+
+            utilisateurs = local.utilisateurs
+            durees, erreurs = [], 0
+            for i in range(args.appels):
+                cache.vider()
+                debut = time.perf_counter()
+                try:
+                    ProjetService.lister_projets(utilisateurs[i % len(utilisateurs)])
+                except Exception:
+                    erreurs += 1
+                durees.append(time.perf_counter() - debut)
+            requetes = local.allers_retours()["total"]
+    finally:
+        for nom, valeur in anciennes.items():
+            if valeur is None:
+                os.environ.pop(nom, None)
+            else:
+                os.environ[nom] = valeur
+
+    centiles = statistics.quantiles(durees, n=100)
+    return {
+        "erreurs": erreurs / args.appels,
+        "p50_ms": centiles[49] * 1000,
+        "p99_ms": centiles[98] * 1000,
+        "requetes_par_appel": requetes / args.appels,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--appels", type=int, default=1000)
+    parser.add_argument("--latence-ms", type=float, default=5.0)
+    parser.add_argument("--pannes", type=float, default=0.02)
+    parser.add_argument("--lenteurs", type=float, default=0.03)
+    parser.add_argument("--facteur-lenteur", type=float, default=20.0)
+    parser.add_argument("--graine", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'mode':<24}{'erreurs':>10}{'p50':>12}{'p99':>12}{'requêtes/appel':>16}")
+    for mode, variables in MODES.items():
+        r = mesurer(args, variables)
+        print(f"{mode:<24}{r['erreurs']:>9.1%}{r['p50_ms']:>9.1f} ms{r['p99_ms']:>9.1f} ms"
+              f"{r['requetes_par_appel']:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
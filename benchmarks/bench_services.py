@@ -0,0 +1,672 @@
+# benchmarks/bench_services.py
+"""
+Latence et nombre d'allers-retours de chaque méthode publique de ProjetService,
+DatasetService, StorageService et AuthService, contre le Supabase local en
+mémoire (benchmarks/supabase_local.py) : aucun projet Supabase nécessaire
+
+Chaque scénario est répété sur des données semées (projets, datasets, objets) ;
+le cache des services est vidé avant chaque appel (mesures à froid). Les
+résultats sont écrits en JSON pour être comparés d'un commit à l'autre.
+
+Usage :
+    python -m benchmarks.bench_services --projets 10000 --datasets 100000 --sortie avant.json
+    python -m benchmarks.bench_services --sortie apres.json --comparer avant.json
+    python -m benchmarks.bench_services --latence-ms rest=20,storage=40,auth=30 --filtre DatasetService
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+from benchmarks.bench_conversion_parquet import generer_lignes
+from benchmarks.supabase_local import SupabaseLocal
+from models.dataset import Dataset
+from models.projet import ProjetIA
+from services import upload_resumable
+from services.auth_service import AuthService
+from services.cache import cache
+from services.cache_fichiers import cache_fichiers
+from services.compression import obtenir_codec
+from services.dataset_service import DatasetService
+from services.projet_service import ProjetService
+from services.storage_service import StorageService
+
+SERVICES = (ProjetService, DatasetService, StorageService, AuthService)
+PERCENTILES = (50, 90, 95, 99)
+BUCKET = "datasets"
+
+# nom -> (préparation, nombre maximum de répétitions) ; la préparation reçoit le
+# contexte, n'est pas mesurée et renvoie l'appel à chronométrer
+SCENARIOS: Dict[str, tuple] = {}
+
+
+def scenario(nom: str, repetitions_max: Optional[int] = None):
+    """Enregistre un scénario ; 'Service.methode[variante]' pour plusieurs mesures d'une méthode"""
+    def enregistrer(preparer: Callable[["Contexte"], Callable[[], Any]]):
+        SCENARIOS[nom] = (preparer, repetitions_max)
+        return preparer
+    return enregistrer
+
+
+class Contexte:
+    """Données semées et fichiers de travail partagés par les scénarios"""
+
+    def __init__(self, local: SupabaseLocal, repertoire: str, taille_fichier_ko: int, graine: int):
+        self.local = local
+        self.repertoire = repertoire
+        self.aleatoire = random.Random(graine)
+        self.projets = list(local.table("projets_ia").values())
+        self.compteur = 0
+
+        # Fichiers d'upload : CSV et JSON de taille_fichier_ko environ
+        self.fichier_csv = os.path.join(repertoire, "bench.csv")
+        self.fichier_json = os.path.join(repertoire, "bench.json")
+        colonnes = ["id", "texte", "score", "categorie", "date"]
+        with open(self.fichier_csv, "w") as csv_f, open(self.fichier_json, "w") as js_f:
+            csv_f.write(",".join(colonnes) + "\n")
+            for ligne in generer_lignes(max(1, taille_fichier_ko * 1024 // 60)):
+                csv_f.write(",".join(str(ligne[c]) for c in colonnes) + "\n")
+                js_f.write(json.dumps(ligne) + "\n")
+
+    def unique(self) -> int:
+        self.compteur += 1
+        return self.compteur
+
+    def projet(self) -> dict:
+        return self.aleatoire.choice(self.projets)
+
+    def utilisateur(self) -> str:
+        return self.aleatoire.choice(self.local.utilisateurs)
+
+    def nouveau_projet(self, nb_datasets: int = 20, avec_fichiers: bool = True) -> dict:
+        """Projet jetable (suppressions), créé sans passer par HTTP"""
+        projet = self.local.inserer("projets_ia", {
+            "nom": f"Jetable {self.unique()}", "description": "", "type_modele": "ML",
+            "created_by": self.utilisateur(),
+        })
+        projet["datasets"] = [self.nouveau_dataset(projet["id"], avec_fichiers) for _ in range(nb_datasets)]
+        return projet
+
+    def nouveau_dataset(self, projet_id: str, avec_fichier: bool = True) -> dict:
+        n = self.unique()
+        ligne = {"projet_id": projet_id, "nom": f"Jetable {n}", "format_fichier": "csv", "taille_mb": 1.5}
+        if avec_fichier:
+            chemin = f"{projet_id}/jetable_{n}.csv"
+            self.local.poser_objet(BUCKET, chemin, b"a,b\n1,2\n", "text/csv")
+            ligne["fichier_url"] = self.local.url_publique(BUCKET, chemin)
+        return self.local.inserer("datasets", ligne)
+
+    def dataset_avec_fichier(self) -> dict:
+        """Dataset semé qui a un fichier (les datasets créés par les scénarios n'en ont pas tous)"""
+        while True:
+            dataset = self.dataset()
+            if dataset.get("fichier_url"):
+                return dataset
+
+    def objet_existant(self) -> str:
+        """Chemin Storage d'un dataset semé"""
+        return StorageService.chemin_depuis_url(self.dataset_avec_fichier()["fichier_url"], BUCKET)
+
+    def dataset(self) -> dict:
+        """Dataset semé tiré au hasard (via un projet : pas de parcours de la table)"""
+        while True:
+            lignes = self.local.selectionner("datasets", "projet_id", self.projet()["id"])
+            if lignes:
+                return self.aleatoire.choice(sorted(lignes, key=lambda l: l["id"]))
+
+    def compte(self, email: str, password: str = "motdepasse-bench") -> str:
+        self.local.creer_utilisateur(email, password)
+        return password
+
+
+def _verifier_auth(resultat):
+    """AuthService renvoie {'success': False} au lieu de lever : échec = erreur du scénario"""
+    if isinstance(resultat, dict) and not resultat.get("success"):
+        raise Exception(resultat.get("message"))
+    return resultat
+
+
+def _consommer(iterateur) -> int:
+    return sum(1 for _ in iterateur)
+
+
+# --- ProjetService ---
+
+@scenario("ProjetService.valider_projet")
+def _(ctx):
+    projet = ProjetIA(nom="Validation", description="", type_modele="NLP", hyperparametres={"lr": 0.1})
+    return lambda: ProjetService.valider_projet(projet)
+
+
+@scenario("ProjetService.creer_projet_ia")
+def _(ctx):
+    projet = ProjetIA(nom=f"Bench {ctx.unique()}", description="Créé par le benchmark", type_modele="ML")
+    return lambda: ProjetService.creer_projet_ia(projet, ctx.utilisateur())
+
+
+@scenario("ProjetService.lister_projets")
+def _(ctx):
+    return lambda: ProjetService.lister_projets(ctx.utilisateur())
+
+
+@scenario("ProjetService.lister_projets[fields]")
+def _(ctx):
+    return lambda: ProjetService.lister_projets(ctx.utilisateur(), fields=["id", "nom", "statut"])
+
+
+@scenario("ProjetService.iter_projets")
+def _(ctx):
+    return lambda: _consommer(ProjetService.iter_projets(ctx.utilisateur(), page_size=100))
+
+
+@scenario("ProjetService.mettre_a_jour_projet")
+def _(ctx):
+    projet = ctx.projet()
+    return lambda: ProjetService.mettre_a_jour_projet(projet["id"], {"statut": "termine"}, projet["created_by"])
+
+
+@scenario("ProjetService.supprimer_projet")
+def _(ctx):
+    projet = ctx.nouveau_projet(nb_datasets=0)
+    return lambda: ProjetService.supprimer_projet(projet["id"], projet["created_by"])
+
+
+@scenario("ProjetService.supprimer_projet_cascade")
+def _(ctx):
+    projet = ctx.nouveau_projet(nb_datasets=20)
+    return lambda: ProjetService.supprimer_projet_cascade(projet["id"], projet["created_by"])
+
+
+@scenario("ProjetService.supprimer_projet_cascade[dry_run]")
+def _(ctx):
+    projet = ctx.projet()
+    return lambda: ProjetService.supprimer_projet_cascade(projet["id"], projet["created_by"], dry_run=True)
+
+
+@scenario("ProjetService.rechercher_projets")
+def _(ctx):
+    return lambda: ProjetService.rechercher_projets(ctx.utilisateur(), "Projet 1")
+
+
+@scenario("ProjetService.statistiques_projets")
+def _(ctx):
+    return lambda: ProjetService.statistiques_projets(ctx.utilisateur())
+
+
+@scenario("ProjetService.statistiques_projets_client")
+def _(ctx):
+    return lambda: ProjetService.statistiques_projets_client(ctx.utilisateur())
+
+
+@scenario("ProjetService.calculer_statistiques")
+def _(ctx):
+    lignes = [{"type_modele": p["type_modele"], "statut": p["statut"]} for p in ctx.projets[:1000]]
+    return lambda: ProjetService.calculer_statistiques(lignes)
+
+
+# --- DatasetService ---
+
+def _dataset(ctx, projet_id: Optional[str] = None) -> Dataset:
+    return Dataset(
+        nom=f"Bench {ctx.unique()}", projet_id=projet_id or ctx.projet()["id"],
+        format_fichier="csv", taille_mb=Decimal("1.5"), nb_lignes=1000
+    )
+
+
+@scenario("DatasetService.creer_dataset")
+def _(ctx):
+    dataset = _dataset(ctx)
+    return lambda: DatasetService.creer_dataset(dataset)
+
+
+@scenario("DatasetService.creer_datasets_batch", repetitions_max=10)
+def _(ctx):
+    projet_id = ctx.projet()["id"]
+    datasets = [_dataset(ctx, projet_id) for _ in range(1000)]
+    return lambda: DatasetService.creer_datasets_batch(datasets, taille_chunk=500)
+
+
+@scenario("DatasetService.creer_datasets_batch[max_workers=4]", repetitions_max=10)
+def _(ctx):
+    projet_id = ctx.projet()["id"]
+    datasets = [_dataset(ctx, projet_id) for _ in range(1000)]
+    return lambda: DatasetService.creer_datasets_batch(datasets, taille_chunk=250, max_workers=4)
+
+
+@scenario("DatasetService.lister_datasets_projet")
+def _(ctx):
+    return lambda: DatasetService.lister_datasets_projet(ctx.projet()["id"])
+
+
+@scenario("DatasetService.iter_datasets_projet")
+def _(ctx):
+    return lambda: _consommer(DatasetService.iter_datasets_projet(ctx.projet()["id"], page_size=5))
+
+
+@scenario("DatasetService.datasets_frame")
+def _(ctx):
+    return lambda: DatasetService.datasets_frame(ctx.projet()["id"])
+
+
+@scenario("DatasetService.calculer_taille_mb")
+def _(ctx):
+    return lambda: DatasetService.calculer_taille_mb(ctx.fichier_csv)
+
+
+@scenario("DatasetService.generer_nom_fichier")
+def _(ctx):
+    return lambda: DatasetService.generer_nom_fichier(ctx.fichier_csv, ctx.projet()["id"])
+
+
+@scenario("DatasetService.calculer_empreinte_sha256")
+def _(ctx):
+    return lambda: DatasetService.calculer_empreinte_sha256(ctx.fichier_csv)
+
+
+@scenario("DatasetService.generer_chemin_contenu")
+def _(ctx):
+    return lambda: DatasetService.generer_chemin_contenu("ab" * 32)
+
+
+@scenario("DatasetService.uploader_et_creer_dataset")
+def _(ctx):
+    projet_id = ctx.projet()["id"]
+    return lambda: DatasetService.uploader_et_creer_dataset(ctx.fichier_csv, "Upload bench", projet_id, "csv")
+
+
+@scenario("DatasetService.uploader_et_creer_dataset[dedupliquer]")
+def _(ctx):
+    projet_id = ctx.projet()["id"]
+    return lambda: DatasetService.uploader_et_creer_dataset(
+        ctx.fichier_csv, "Upload bench", projet_id, "csv", dedupliquer=True
+    )
+
+
+@scenario("DatasetService.uploader_et_creer_dataset[compresser]")
+def _(ctx):
+    projet_id = ctx.projet()["id"]
+    return lambda: DatasetService.uploader_et_creer_dataset(
+        ctx.fichier_json, "Upload bench", projet_id, "json", compresser=True
+    )
+
+
+@scenario("DatasetService.uploader_et_creer_dataset[convertir_parquet]", repetitions_max=10)
+def _(ctx):
+    projet_id = ctx.projet()["id"]
+    return lambda: DatasetService.uploader_et_creer_dataset(
+        ctx.fichier_csv, "Upload bench", projet_id, "csv", convertir_parquet=True
+    )
+
+
+@scenario("DatasetService.supprimer_dataset")
+def _(ctx):
+    dataset = ctx.nouveau_dataset(ctx.projet()["id"])
+    return lambda: DatasetService.supprimer_dataset(dataset["id"])
+
+
+@scenario("DatasetService.supprimer_datasets")
+def _(ctx):
+    projet = ctx.nouveau_projet(nb_datasets=100)
+    return lambda: DatasetService.supprimer_datasets([d["id"] for d in projet["datasets"]])
+
+
+@scenario("DatasetService.statistiques_datasets")
+def _(ctx):
+    return lambda: DatasetService.statistiques_datasets(ctx.projet()["id"])
+
+
+@scenario("DatasetService.statistiques_datasets_client")
+def _(ctx):
+    return lambda: DatasetService.statistiques_datasets_client(ctx.projet()["id"])
+
+
+@scenario("DatasetService.calculer_statistiques")
+def _(ctx):
+    datasets = [Dataset.from_dict(ctx.dataset()) for _ in range(100)]
+    return lambda: DatasetService.calculer_statistiques(datasets)
+
+
+@scenario("DatasetService.rechercher_datasets")
+def _(ctx):
+    return lambda: DatasetService.rechercher_datasets("Dataset 1", ctx.projet()["id"])
+
+
+@scenario("DatasetService.rechercher_datasets[tous_projets]", repetitions_max=10)
+def _(ctx):
+    return lambda: DatasetService.rechercher_datasets("Dataset 12345")
+
+
+@scenario("DatasetService.mettre_a_jour_dataset")
+def _(ctx):
+    dataset = ctx.dataset()
+    return lambda: DatasetService.mettre_a_jour_dataset(dataset["id"], {"nb_lignes": 42})
+
+
+# --- StorageService ---
+
+@scenario("StorageService.uploader_dataset")
+def _(ctx):
+    nom = f"bench/{ctx.unique()}.csv"
+    return lambda: StorageService.uploader_dataset(ctx.fichier_csv, nom)
+
+
+@scenario("StorageService.uploader_dataset[resumable]")
+def _(ctx):
+    nom = f"bench/{ctx.unique()}.csv"
+    return lambda: StorageService.uploader_dataset(ctx.fichier_csv, nom, resumable=True)
+
+
+@scenario("StorageService.uploader_dataset[zstd]")
+def _(ctx):
+    nom = f"bench/{ctx.unique()}.json"
+    codec = obtenir_codec("zstd")
+    return lambda: StorageService.uploader_dataset(ctx.fichier_json, nom, codec=codec)
+
+
+@scenario("StorageService.uploader_contenu")
+def _(ctx):
+    chemin = DatasetService.generer_chemin_contenu(f"{ctx.unique():064x}")
+    return lambda: StorageService.uploader_contenu(ctx.fichier_csv, chemin)
+
+
+@scenario("StorageService.uploader_contenu[existant]")
+def _(ctx):
+    chemin = ctx.objet_existant()
+    return lambda: StorageService.uploader_contenu(ctx.fichier_csv, chemin)
+
+
+@scenario("StorageService.telecharger_flux")
+def _(ctx):
+    chemin = ctx.objet_existant()
+    return lambda: _consommer(StorageService.telecharger_flux(chemin))
+
+
+@scenario("StorageService.telecharger_dataset")
+def _(ctx):
+    chemin = ctx.objet_existant()
+    cache_fichiers.vider()
+    return lambda: StorageService.telecharger_dataset(chemin)
+
+
+@scenario("StorageService.telecharger_dataset[cache]")
+def _(ctx):
+    chemin = ctx.objet_existant()
+    StorageService.telecharger_dataset(chemin)
+    return lambda: StorageService.telecharger_dataset(chemin)
+
+
+@scenario("StorageService.lister_fichiers")
+def _(ctx):
+    return lambda: StorageService.lister_fichiers()
+
+
+@scenario("StorageService.lister_fichiers_recursif")
+def _(ctx):
+    return lambda: StorageService.lister_fichiers_recursif(prefix=ctx.projet()["id"])
+
+
+@scenario("StorageService.iter_fichiers")
+def _(ctx):
+    return lambda: _consommer(StorageService.iter_fichiers(prefix=ctx.projet()["id"], taille_page=5))
+
+
+@scenario("StorageService.rapport_prefixes", repetitions_max=3)
+def _(ctx):
+    return lambda: StorageService.rapport_prefixes(prefix="cas", profondeur=1)
+
+
+@scenario("StorageService.supprimer_fichier")
+def _(ctx):
+    chemin = f"bench/suppression_{ctx.unique()}.csv"
+    ctx.local.poser_objet(BUCKET, chemin, b"a,b\n")
+    return lambda: StorageService.supprimer_fichier(chemin)
+
+
+@scenario("StorageService.supprimer_fichiers")
+def _(ctx):
+    chemins = [f"bench/suppression_{ctx.unique()}.csv" for _ in range(2500)]
+    for chemin in chemins:
+        ctx.local.poser_objet(BUCKET, chemin, b"a,b\n")
+    return lambda: StorageService.supprimer_fichiers(chemins, max_workers=3)
+
+
+@scenario("StorageService.chemin_depuis_url")
+def _(ctx):
+    url = ctx.dataset_avec_fichier()["fichier_url"]
+    return lambda: StorageService.chemin_depuis_url(url)
+
+
+# --- AuthService ---
+
+@scenario("AuthService.inscrire_utilisateur")
+def _(ctx):
+    email = f"inscription{ctx.unique()}@bench.local"
+    return lambda: _verifier_auth(AuthService.inscrire_utilisateur(email, "motdepasse-bench"))
+
+
+@scenario("AuthService.connecter_utilisateur")
+def _(ctx):
+    email = f"connexion{ctx.unique()}@bench.local"
+    password = ctx.compte(email)
+    return lambda: _verifier_auth(AuthService.connecter_utilisateur(email, password))
+
+
+@scenario("AuthService.connexion_anonyme")
+def _(ctx):
+    return lambda: _verifier_auth(AuthService.connexion_anonyme())
+
+
+@scenario("AuthService.utilisateur_actuel")
+def _(ctx):
+    email = f"actuel{ctx.unique()}@bench.local"
+    _verifier_auth(AuthService.connecter_utilisateur(email, ctx.compte(email)))
+    return AuthService.utilisateur_actuel
+
+
+@scenario("AuthService.deconnecter_utilisateur")
+def _(ctx):
+    email = f"deconnexion{ctx.unique()}@bench.local"
+    _verifier_auth(AuthService.connecter_utilisateur(email, ctx.compte(email)))
+    return AuthService.deconnecter_utilisateur
+
+
+# --- Mesure ---
+
+def percentile(valeurs_triees: List[float], p: float) -> float:
+    """Percentile par interpolation linéaire (valeurs triées)"""
+    if len(valeurs_triees) == 1:
+        return valeurs_triees[0]
+    rang = (len(valeurs_triees) - 1) * p / 100
+    bas = int(rang)
+    haut = min(bas + 1, len(valeurs_triees) - 1)
+    return valeurs_triees[bas] + (valeurs_triees[haut] - valeurs_triees[bas]) * (rang - bas)
+
+
+def mesurer(ctx: Contexte, preparer: Callable, repetitions: int) -> dict:
+    durees, allers_retours, par_service = [], [], Counter()
+    for _ in range(repetitions):
+        cache.vider()
+        appel = preparer(ctx)
+        avant = ctx.local.allers_retours()
+        debut = time.perf_counter()
+        appel()
+        durees.append((time.perf_counter() - debut) * 1000)
+        apres = ctx.local.allers_retours()
+        allers_retours.append(apres["total"] - avant["total"])
+        for service, n in apres.items():
+            if service != "total":
+                par_service[service] += n - avant.get(service, 0)
+
+    durees.sort()
+    return {
+        "repetitions": repetitions,
+        "latence_ms": {
+            "min": round(durees[0], 3),
+            **{f"p{p}": round(percentile(durees, p), 3) for p in PERCENTILES},
+            "max": round(durees[-1], 3),
+            "moyenne": round(sum(durees) / len(durees), 3),
+        },
+        "allers_retours": {
+            "moyenne": round(sum(allers_retours) / len(allers_retours), 2),
+            "max": max(allers_retours),
+            "par_service": {s: round(n / repetitions, 2) for s, n in sorted(par_service.items()) if n},
+        },
+    }
+
+
+def methodes_non_couvertes() -> List[str]:
+    """Méthodes publiques des services sans scénario (à ajouter ci-dessus)"""
+    couvertes = {nom.split("[")[0] for nom in SCENARIOS}
+    return [
+        f"{service.__name__}.{nom}"
+        for service in SERVICES
+        for nom, attribut in vars(service).items()
+        if not nom.startswith("_") and isinstance(attribut, (staticmethod, classmethod))
+        and f"{service.__name__}.{nom}" not in couvertes
+    ]
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _latences(texte: str) -> Dict[str, float]:
+    """'5' (tous les services) ou 'rest=2,storage=5,auth=3'"""
+    if "=" not in texte:
+        return {service: float(texte) for service in ("rest", "storage", "auth")}
+    return {service: float(valeur) for service, _, valeur in (t.partition("=") for t in texte.split(","))}
+
+
+def comparer(ancien: dict, nouveau: dict, seuil: float = 0.2) -> int:
+    """
+    Affiche les écarts p50 / allers-retours entre deux exécutions
+    Renvoie le nombre de régressions d'allers-retours (code de sortie)
+    """
+    regressions = 0
+    print(f"\n=== COMPARAISON {ancien.get('commit')} -> {nouveau.get('commit')} ===")
+    for nom, mesure in nouveau["scenarios"].items():
+        reference = ancien["scenarios"].get(nom)
+        if not reference or "erreur" in mesure or "erreur" in reference:
+            continue
+        ar_avant, ar_apres = reference["allers_retours"]["moyenne"], mesure["allers_retours"]["moyenne"]
+        p50_avant, p50_apres = reference["latence_ms"]["p50"], mesure["latence_ms"]["p50"]
+        marque = ""
+        if ar_apres > ar_avant:
+            marque = "❌ allers-retours"
+            regressions += 1
+        elif p50_avant and p50_apres > p50_avant * (1 + seuil):
+            marque = "⚠️ latence"
+        elif ar_apres < ar_avant or (p50_avant and p50_apres < p50_avant * (1 - seuil)):
+            marque = "✅"
+        if marque:
+            print(f"{marque:<18} {nom:<60} p50 {p50_avant:9.2f} -> {p50_apres:9.2f} ms, "
+                  f"allers-retours {ar_avant:g} -> {ar_apres:g}")
+    return regressions
+
+
+def bench(args) -> dict:
+    local = SupabaseLocal(
+        latence_ms=_latences(args.latence_ms), gigue=args.gigue, debit_mo_s=args.debit_mo_s,
+        fonctions_sql=not args.sans_fonctions_sql, graine=args.graine
+    )
+    debut = time.perf_counter()
+    local.semer(args.projets, args.datasets, args.utilisateurs)
+    print(f"=== BENCH SERVICES ({args.projets:,} projets, {args.datasets:,} datasets, "
+          f"semés en {time.perf_counter() - debut:.1f} s) ===\n")
+
+    resultats = {}
+    with tempfile.TemporaryDirectory() as repertoire, local.installer():
+        # Cache disque et état TUS dans le répertoire de travail
+        cache_fichiers.repertoire = os.path.join(repertoire, "cache")
+        upload_resumable.REPERTOIRE_ETAT = os.path.join(repertoire, "uploads")
+        ctx = Contexte(local, repertoire, args.taille_fichier_ko, args.graine)
+        # Préchauffage : création des clients Supabase, hors mesures
+        ProjetService.lister_projets(ctx.utilisateur())
+        StorageService.lister_fichiers_recursif(prefix=ctx.projet()["id"])
+
+        for nom, (preparer, repetitions_max) in SCENARIOS.items():
+            if args.filtre and args.filtre not in nom:
+                continue
+            repetitions = min(args.repetitions, repetitions_max or args.repetitions)
+            try:
+                resultats[nom] = mesurer(ctx, preparer, repetitions)
+            except Exception as e:
+                resultats[nom] = {"erreur": str(e)}
+                print(f"❌ {nom:<60} {e}")
+                continue
+            latence, ar = resultats[nom]["latence_ms"], resultats[nom]["allers_retours"]
+            print(f"   {nom:<60} p50 {latence['p50']:9.2f} ms  p99 {latence['p99']:9.2f} ms  "
+                  f"allers-retours {ar['moyenne']:g}")
+
+        AuthService.deconnecter_utilisateur()
+
+    non_couvertes = methodes_non_couvertes()
+    if non_couvertes:
+        print(f"\n⚠️ Méthodes sans scénario : {', '.join(non_couvertes)}")
+
+    return {
+        "commit": _commit(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "parametres": {
+            "projets": args.projets,
+            "datasets": args.datasets,
+            "utilisateurs": args.utilisateurs,
+            "repetitions": args.repetitions,
+            "latence_ms": local.latence_ms,
+            "gigue": args.gigue,
+            "debit_mo_s": args.debit_mo_s,
+            "fonctions_sql": not args.sans_fonctions_sql,
+            "taille_fichier_ko": args.taille_fichier_ko,
+            "graine": args.graine,
+        },
+        "scenarios": resultats,
+        "non_couvertes": non_couvertes,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark des services contre un Supabase local en mémoire")
+    parser.add_argument("--projets", type=int, default=10_000)
+    parser.add_argument("--datasets", type=int, default=100_000)
+    parser.add_argument("--utilisateurs", type=int, default=100)
+    parser.add_argument("--repetitions", type=int, default=20)
+    parser.add_argument("--latence-ms", default="rest=2,storage=5,auth=3",
+                        help="latence par aller-retour : '5' ou 'rest=2,storage=5,auth=3'")
+    parser.add_argument("--gigue", type=float, default=0.1)
+    parser.add_argument("--debit-mo-s", type=float, default=None)
+    parser.add_argument("--sans-fonctions-sql", action="store_true",
+                        help="projet sans les fonctions de sql/ (replis côté client)")
+    parser.add_argument("--taille-fichier-ko", type=int, default=256)
+    parser.add_argument("--filtre", default=None, help="seulement les scénarios contenant ce texte")
+    parser.add_argument("--graine", type=int, default=42)
+    parser.add_argument("--sortie", default=None, help="fichier JSON des résultats")
+    parser.add_argument("--comparer", default=None, help="JSON d'une exécution précédente")
+    args = parser.parse_args(argv)
+
+    resultats = bench(args)
+    if args.sortie:
+        with open(args.sortie, "w") as f:
+            json.dump(resultats, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Résultats : {args.sortie}")
+    if args.comparer:
+        with open(args.comparer) as f:
+            return 1 if comparer(json.load(f), resultats) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
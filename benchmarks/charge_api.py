@@ -0,0 +1,222 @@
+# benchmarks/charge_api.py
+"""
+Test de charge de l'API (api/app.py) contre le Supabase local
+
+Le serveur est lancé par `python -m api` (uvicorn, --workers processus), chaque
+worker avec son propre Supabase local semé à l'identique. Des processus
+clients (--clients) tiennent chacun --connexions connexions HTTP/1.1
+keep-alive et enchaînent les requêtes d'un mélange de lectures (listes,
+statistiques, santé) pendant --duree secondes, chacune avec le jeton du
+propriétaire (JWT signé par SUPABASE_JWT_SECRET, vérifié localement par les
+workers). Chaque connexion renvoie l'ETag reçu (If-None-Match), comme un
+navigateur ; --sans-etag le désactive.
+
+Usage :
+    python -m benchmarks.charge_api [--workers 2] [--clients 2] [--connexions 64] [--duree 10]
+"""
+import argparse
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import jwt
+
+from benchmarks.supabase_local import SupabaseLocal
+
+# Paramètres du Supabase local des workers (variables d'environnement du serveur)
+ENV_PROJETS, ENV_DATASETS, ENV_UTILISATEURS, ENV_LATENCE = (
+    "CHARGE_API_PROJETS", "CHARGE_API_DATASETS", "CHARGE_API_UTILISATEURS", "CHARGE_API_LATENCE_MS"
+)
+SECRET_JWT = "charge-api-secret-de-test-32-octets-min"
+
+_installation = contextlib.ExitStack()
+
+
+def _local() -> SupabaseLocal:
+    latence = float(os.getenv(ENV_LATENCE, "2"))
+    local = SupabaseLocal(latence_ms={"rest": latence, "storage": latence, "auth": latence})
+    local.semer(int(os.getenv(ENV_PROJETS, "500")), int(os.getenv(ENV_DATASETS, "5000")),
+                int(os.getenv(ENV_UTILISATEURS, "50")))
+    return local
+
+
+def creer_app_locale():
+    """Fabrique uvicorn (--factory) : API branchée sur un Supabase local, pour la durée du worker"""
+    _installation.enter_context(_local().installer())
+    from api.app import creer_app
+    return creer_app()
+
+
+# --- Client HTTP/1.1 minimal (le client ne doit pas être le goulot) ---
+
+async def _lire_reponse(lecteur: asyncio.StreamReader) -> Tuple[int, Dict[str, str], int]:
+    ligne = await lecteur.readline()
+    if not ligne:
+        raise ConnectionError("connexion fermée")
+    statut = int(ligne.split(b" ", 2)[1])
+    entetes = {}
+    while True:
+        ligne = await lecteur.readline()
+        if ligne in (b"\r\n", b""):
+            break
+        nom, _, valeur = ligne.decode("latin-1").partition(":")
+        entetes[nom.strip().lower()] = valeur.strip()
+
+    taille = 0
+    if "content-length" in entetes:
+        taille = int(entetes["content-length"])
+        await lecteur.readexactly(taille)
+    elif entetes.get("transfer-encoding") == "chunked":
+        while True:
+            morceau = int((await lecteur.readline()).split(b";")[0], 16)
+            await lecteur.readexactly(morceau + 2)
+            taille += morceau
+            if morceau == 0:
+                break
+    return statut, entetes, taille
+
+
+async def _connexion(hote: str, port: int, urls: List[Tuple[str, str, str]], fin: float, conditionnel: bool,
+                     graine: int) -> Tuple[List[Tuple[str, int, float]], int]:
+    aleatoire = random.Random(graine)
+    lecteur, ecrivain = await asyncio.open_connection(hote, port)
+    etags: Dict[Tuple[str, str], str] = {}
+    mesures, octets = [], 0
+    try:
+        while time.perf_counter() < fin:
+            type_url, url, jeton = aleatoire.choice(urls)
+            entetes = f"GET {url} HTTP/1.1\r\nHost: {hote}\r\nAccept-Encoding: gzip, br\r\n"
+            if jeton:
+                entetes += f"Authorization: Bearer {jeton}\r\n"
+            if conditionnel and (url, jeton) in etags:
+                entetes += f"If-None-Match: {etags[url, jeton]}\r\n"
+            debut = time.perf_counter()
+            ecrivain.write((entetes + "\r\n").encode())
+            statut, reponse, taille = await _lire_reponse(lecteur)
+            mesures.append((type_url, statut, time.perf_counter() - debut))
+            octets += taille
+            if "etag" in reponse:
+                etags[url, jeton] = reponse["etag"]
+    finally:
+        ecrivain.close()
+    return mesures, octets
+
+
+def _client(args_client) -> Tuple[List[Tuple[str, int, float]], int]:
+    """Processus client : --connexions connexions en parallèle sur une boucle asyncio"""
+    hote, port, urls, fin, connexions, conditionnel, graine = args_client
+
+    async def executer():
+        resultats = await asyncio.gather(*(
+            _connexion(hote, port, urls, fin, conditionnel, graine * 10_000 + i) for i in range(connexions)
+        ))
+        return [m for r in resultats for m in r[0]], sum(r[1] for r in resultats)
+    return asyncio.run(executer())
+
+
+def _jeton(utilisateur: str) -> str:
+    return jwt.encode({"sub": utilisateur, "aud": "authenticated", "role": "authenticated"}, SECRET_JWT, "HS256")
+
+
+def _urls(local: SupabaseLocal) -> List[Tuple[str, str, str]]:
+    """Mélange de lectures (même Supabase local que les workers : mêmes identifiants)"""
+    projets = list(local.table("projets_ia").values())[:100]
+    urls = []
+    for utilisateur in local.utilisateurs:
+        jeton = _jeton(utilisateur)
+        urls += [("liste projets", "/projets", jeton)] * 4
+        urls.append(("stats projets", "/projets/statistiques", jeton))
+    for projet in projets:
+        jeton = _jeton(projet["created_by"])
+        urls += [("liste datasets", f"/projets/{projet['id']}/datasets?fields=nom,taille_mb,format_fichier", jeton)] * 2
+        urls.append(("stats datasets", f"/projets/{projet['id']}/datasets/statistiques", jeton))
+    urls += [("santé", "/sante", "")] * (len(urls) // 10)
+    return urls
+
+
+def _attendre(hote: str, port: int, delai: float = 30.0):
+    async def essayer():
+        lecteur, ecrivain = await asyncio.open_connection(hote, port)
+        ecrivain.write(f"GET /sante HTTP/1.1\r\nHost: {hote}\r\n\r\n".encode())
+        await _lire_reponse(lecteur)
+        ecrivain.close()
+
+    limite = time.monotonic() + delai
+    while True:
+        try:
+            asyncio.run(essayer())
+            return
+        except OSError:
+            if time.monotonic() > limite:
+                raise
+            time.sleep(0.2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--clients", type=int, default=1, help="processus générateurs de charge")
+    parser.add_argument("--connexions", type=int, default=64, help="connexions par processus client")
+    parser.add_argument("--duree", type=float, default=10.0)
+    parser.add_argument("--chauffe", type=float, default=2.0, help="secondes non mesurées (caches)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--projets", type=int, default=500)
+    parser.add_argument("--datasets", type=int, default=5000)
+    parser.add_argument("--utilisateurs", type=int, default=50)
+    parser.add_argument("--latence-ms", type=float, default=2.0)
+    parser.add_argument("--sans-etag", action="store_true", help="pas d'If-None-Match")
+    args = parser.parse_args()
+
+    env = {**os.environ, ENV_PROJETS: str(args.projets), ENV_DATASETS: str(args.datasets),
+           ENV_UTILISATEURS: str(args.utilisateurs), ENV_LATENCE: str(args.latence_ms),
+           "SUPABASE_JWT_SECRET": SECRET_JWT}
+    os.environ.update({k: env[k] for k in (ENV_PROJETS, ENV_DATASETS, ENV_UTILISATEURS, ENV_LATENCE)})
+    urls = _urls(_local())
+    hote = "127.0.0.1"
+
+    serveur = subprocess.Popen(
+        [sys.executable, "-m", "api", "--app", "benchmarks.charge_api:creer_app_locale", "--factory",
+         "--workers", str(args.workers), "--host", hote, "--port", str(args.port)],
+        env=env, stderr=subprocess.DEVNULL
+    )
+    try:
+        _attendre(hote, args.port)
+        with multiprocessing.Pool(args.clients) as pool:
+            # Chauffe : remplit les caches des workers (listes encodées, ETags des clients non gardés)
+            fin = time.perf_counter() + args.chauffe
+            pool.map(_client, [(hote, args.port, urls, fin, 8, False, 1000 + i) for i in range(args.clients)])
+
+            fin = time.perf_counter() + args.duree
+            resultats = pool.map(_client, [
+                (hote, args.port, urls, fin, args.connexions, not args.sans_etag, i) for i in range(args.clients)
+            ])
+    finally:
+        serveur.terminate()
+        serveur.wait()
+
+    mesures = [m for r in resultats for m in r[0]]
+    octets = sum(r[1] for r in resultats)
+    statuts = Counter(statut for _, statut, _ in mesures)
+    print(f"{len(mesures)} requêtes en {args.duree:.0f} s : {len(mesures) / args.duree:,.0f} req/s "
+          f"({args.workers} workers, {args.clients} x {args.connexions} connexions, "
+          f"{octets / args.duree / 1e6:.1f} Mo/s)")
+    print("statuts : " + ", ".join(f"{statut} {n / len(mesures):.0%}" for statut, n in sorted(statuts.items())))
+    print(f"\n{'requête':<18}{'nombre':>9}{'p50':>11}{'p99':>11}")
+    par_type: Dict[str, List[float]] = {}
+    for type_url, _, duree in mesures:
+        par_type.setdefault(type_url, []).append(duree)
+    for type_url, durees in sorted(par_type.items()):
+        centiles = statistics.quantiles(durees, n=100) if len(durees) > 1 else durees * 99
+        print(f"{type_url:<18}{len(durees):>9}{centiles[49] * 1000:>8.2f} ms{centiles[98] * 1000:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
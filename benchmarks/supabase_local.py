@@ -0,0 +1,953 @@
+# benchmarks/supabase_local.py
+"""
+Supabase local en mémoire (PostgREST, Storage, Auth) pour les benchmarks
+
+Les clients de config.database envoient leurs requêtes à un httpx.MockTransport :
+aucun réseau ni projet Supabase. Chaque aller-retour est compté par service
+(rest, storage, auth) et peut être retardé (latence, gigue, débit) pour
+reproduire un déploiement distant.
+
+Seul le sous-ensemble de l'API utilisé par services/ est simulé :
+- PostgREST : select (colonnes), filtres eq/neq/lt/lte/gt/gte/in/like/ilike/is
+  (et not.), or/and imbriqués, order, limit/offset, count=exact, single(),
+  insert/update/delete avec Prefer return=..., contraintes NOT NULL et clé
+  étrangère, ON DELETE CASCADE, fonctions de sql/statistiques.sql et
+  sql/deduplication.sql (les autres répondent PGRST202 : repli côté client)
+- Storage : upload multipart, TUS, HEAD/GET (Range, ETag, If-None-Match,
+  If-Match), list, remove
+- Auth : signup (anonyme compris), token (password, refresh_token), logout, user
+
+Usage :
+    local = SupabaseLocal(latence_ms={"rest": 5, "storage": 10})
+    local.semer(nb_projets=10_000, nb_datasets=100_000)
+    with local.installer():
+        ProjetService.lister_projets(local.utilisateurs[0])
+        print(local.allers_retours())
+"""
+import asyncio
+import base64
+import hashlib
+import heapq
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import httpx
+
+URL = "http://supabase.local"
+CLE_ANON = "cle-anon-locale"
+CLE_SERVICE = "cle-service-locale"
+
+# Schéma des tables (colonnes ajoutées par sql/ comprises)
+TABLES = {
+    "projets_ia": {
+        "colonnes": ("id", "nom", "description", "type_modele", "statut", "hyperparametres",
+                     "created_by", "created_at", "updated_at"),
+        "obligatoires": ("nom", "type_modele"),
+        "defauts": {"statut": "en_cours", "hyperparametres": {}},
+        "index": ("created_by",),
+    },
+    "datasets": {
+        "colonnes": ("id", "projet_id", "nom", "fichier_url", "taille_mb", "format_fichier", "nb_lignes",
+                     "created_at", "updated_at", "empreinte_sha256", "schema_colonnes",
+                     "taille_originale_mb", "compression"),
+        "obligatoires": ("nom", "projet_id"),
+        "defauts": {},
+        "index": ("projet_id", "empreinte_sha256"),
+    },
+}
+
+# Clés étrangères : table -> (colonne, table référencée), avec ON DELETE CASCADE
+CLES_ETRANGERES = {"datasets": ("projet_id", "projets_ia")}
+
+FORMATS = ("csv", "json", "parquet", "xlsx", "zip")
+TYPES_MODELE = ("NLP", "Computer Vision", "ML", "Deep Learning")
+STATUTS = ("en_cours", "termine", "en_pause")
+
+
+def _maintenant() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+class _Erreur(Exception):
+    """Réponse d'erreur au format du service simulé"""
+
+    def __init__(self, statut: int, corps: Optional[dict] = None):
+        super().__init__(corps)
+        self.statut = statut
+        self.corps = corps
+
+    def reponse(self) -> httpx.Response:
+        if self.corps is None:
+            return httpx.Response(self.statut)
+        return httpx.Response(self.statut, json=self.corps)
+
+
+def _erreur_postgrest(statut: int, code: str, message: str, details: str = None) -> _Erreur:
+    return _Erreur(statut, {"code": code, "message": message, "details": details, "hint": None})
+
+
+def _erreur_storage(statut: int, erreur: str, message: str) -> _Erreur:
+    return _Erreur(statut, {"statusCode": str(statut), "error": erreur, "message": message})
+
+
+# --- Grammaire des filtres PostgREST ---
+
+def _decouper(texte: str) -> List[str]:
+    """Sépare sur les virgules de premier niveau (hors parenthèses et guillemets)"""
+    termes, profondeur, guillemets, debut = [], 0, False, 0
+    for i, c in enumerate(texte):
+        if c == '"':
+            guillemets = not guillemets
+        elif not guillemets and c == '(':
+            profondeur += 1
+        elif not guillemets and c == ')':
+            profondeur -= 1
+        elif not guillemets and c == ',' and profondeur == 0:
+            termes.append(texte[debut:i])
+            debut = i + 1
+    termes.append(texte[debut:])
+    return [t for t in termes if t]
+
+
+def _sans_guillemets(valeur: str) -> str:
+    if len(valeur) >= 2 and valeur[0] == valeur[-1] == '"':
+        return valeur[1:-1]
+    return valeur
+
+
+@lru_cache(maxsize=256)
+def _motif(motif: str, casse: bool) -> "re.Pattern":
+    regex = "".join(".*" if c in "%*" else "." if c == "_" else re.escape(c) for c in motif)
+    return re.compile(regex, 0 if casse else re.IGNORECASE | re.DOTALL)
+
+
+def _comparables(valeur, texte: str) -> Tuple[Any, Any]:
+    if isinstance(valeur, bool):
+        return valeur, texte.lower() == "true"
+    if isinstance(valeur, (int, float)):
+        return valeur, float(texte)
+    return str(valeur), texte
+
+
+OPERATEURS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": lambda v, t: (lambda a, b: a == b)(*_comparables(v, t)),
+    "neq": lambda v, t: (lambda a, b: a != b)(*_comparables(v, t)),
+    "lt": lambda v, t: (lambda a, b: a < b)(*_comparables(v, t)),
+    "lte": lambda v, t: (lambda a, b: a <= b)(*_comparables(v, t)),
+    "gt": lambda v, t: (lambda a, b: a > b)(*_comparables(v, t)),
+    "gte": lambda v, t: (lambda a, b: a >= b)(*_comparables(v, t)),
+    "in": lambda v, t: any(OPERATEURS["eq"](v, x) for x in t),
+    "like": lambda v, t: _motif(t, True).fullmatch(str(v)) is not None,
+    "ilike": lambda v, t: _motif(t, False).fullmatch(str(v)) is not None,
+    "is": lambda v, t: v is None if t == "null" else v is (t == "true"),
+}
+
+
+def _condition(colonne: str, expression: str) -> tuple:
+    """'eq.valeur', 'not.is.null', 'in.(a,b)' -> ('cond', colonne, operateur, valeur, negation)"""
+    negation = expression.startswith("not.")
+    if negation:
+        expression = expression[4:]
+    operateur, _, valeur = expression.partition(".")
+    if operateur not in OPERATEURS:
+        raise _erreur_postgrest(400, "PGRST100", f"Opérateur inconnu : {operateur}")
+    if operateur == "in":
+        valeur = [_sans_guillemets(v) for v in _decouper(valeur.strip()[1:-1])]
+    else:
+        valeur = _sans_guillemets(valeur)
+    return ("cond", colonne, operateur, valeur, negation)
+
+
+def _arbre(operateur: str, texte: str) -> tuple:
+    """'(a.eq.1,and(b.lt.2,c.is.null))' -> ('or'|'and', [noeuds])"""
+    noeuds = []
+    for terme in _decouper(texte.strip()[1:-1]):
+        if terme.startswith(("and(", "or(")):
+            nom, _, reste = terme.partition("(")
+            noeuds.append(_arbre(nom, "(" + reste))
+        else:
+            colonne, _, expression = terme.partition(".")
+            noeuds.append(_condition(colonne, expression))
+    return (operateur, noeuds)
+
+
+def _evaluer(noeud: tuple, ligne: dict) -> bool:
+    if noeud[0] == "or":
+        return any(_evaluer(n, ligne) for n in noeud[1])
+    if noeud[0] == "and":
+        return all(_evaluer(n, ligne) for n in noeud[1])
+    _, colonne, operateur, valeur, negation = noeud
+    actuelle = ligne.get(colonne)
+    # Comparaison avec NULL : ni vraie ni fausse, la ligne est écartée
+    if actuelle is None and operateur != "is":
+        return False
+    return OPERATEURS[operateur](actuelle, valeur) != negation
+
+
+class _Table:
+    """Lignes d'une table, indexées par id et par les colonnes de filtrage fréquentes"""
+
+    def __init__(self, nom: str):
+        definition = TABLES[nom]
+        self.nom = nom
+        self.colonnes = definition["colonnes"]
+        self.obligatoires = definition["obligatoires"]
+        self.defauts = definition["defauts"]
+        self.lignes: Dict[str, dict] = {}
+        self.index: Dict[str, Dict[Any, set]] = {colonne: {} for colonne in definition["index"]}
+
+    def ajouter(self, ligne: dict):
+        self.lignes[ligne["id"]] = ligne
+        for colonne, index in self.index.items():
+            valeur = ligne.get(colonne)
+            if valeur is not None:
+                index.setdefault(valeur, set()).add(ligne["id"])
+
+    def retirer(self, id_: str) -> dict:
+        ligne = self.lignes.pop(id_)
+        for colonne, index in self.index.items():
+            ids = index.get(ligne.get(colonne))
+            if ids is not None:
+                ids.discard(id_)
+                if not ids:
+                    del index[ligne[colonne]]
+        return ligne
+
+    def candidates(self, filtres: List[tuple]) -> List[dict]:
+        """Lignes à examiner : par index si un filtre eq/in porte sur une colonne indexée"""
+        for noeud in filtres:
+            if noeud[0] != "cond":
+                continue
+            _, colonne, operateur, valeur, negation = noeud
+            if colonne == "id" and operateur == "eq" and not negation:
+                return [self.lignes[valeur]] if valeur in self.lignes else []
+            if colonne == "id" and operateur == "in" and not negation:
+                return [self.lignes[v] for v in dict.fromkeys(valeur) if v in self.lignes]
+            if colonne in self.index and not negation and operateur in ("eq", "in"):
+                valeurs = [valeur] if operateur == "eq" else valeur
+                ids = set()
+                for v in valeurs:
+                    ids.update(self.index[colonne].get(v, ()))
+                return [self.lignes[i] for i in ids]
+        return list(self.lignes.values())
+
+    def verifier_colonnes(self, colonnes):
+        for colonne in colonnes:
+            if colonne not in self.colonnes:
+                raise _erreur_postgrest(
+                    400, "PGRST204", f"Could not find the '{colonne}' column of '{self.nom}' in the schema cache"
+                )
+
+
+class _Objet:
+    __slots__ = ("contenu", "content_type", "etag", "metadata", "modifie_le")
+
+    def __init__(self, contenu: bytes, content_type: str, metadata: Optional[dict] = None,
+                 etag: Optional[str] = None):
+        self.contenu = contenu
+        self.content_type = content_type
+        self.etag = etag or f'"{hashlib.md5(contenu).hexdigest()}"'
+        self.metadata = metadata or {}
+        self.modifie_le = _maintenant()
+
+
+class SupabaseLocal:
+    """
+    Projet Supabase simulé en mémoire
+    latence_ms: délai par aller-retour et par service ({'rest': 2, 'storage': 5, 'auth': 3})
+    gigue: variation relative de la latence (0.1 = ±10 %)
+    debit_mo_s: bande passante simulée (octets envoyés + reçus), None = illimitée
+    fonctions_sql: False pour simuler un projet sans les fonctions de sql/
+    pannes: probabilité qu'une requête reçoive un 503 sans être traitée
+    lenteurs, facteur_lenteur: probabilité qu'une requête tombe sur une réplique
+    lente, et multiplication de sa latence (queue de distribution)
+    """
+
+    def __init__(
+        self,
+        latence_ms: Optional[Dict[str, float]] = None,
+        gigue: float = 0.1,
+        debit_mo_s: Optional[float] = None,
+        fonctions_sql: bool = True,
+        graine: int = 42,
+        pannes: float = 0.0,
+        lenteurs: float = 0.0,
+        facteur_lenteur: float = 10.0
+    ):
+        self.latence_ms = {"rest": 0.0, "storage": 0.0, "auth": 0.0, **(latence_ms or {})}
+        self.gigue = gigue
+        self.debit_mo_s = debit_mo_s
+        self.fonctions_sql = fonctions_sql
+        self.pannes = pannes
+        self.lenteurs = lenteurs
+        self.facteur_lenteur = facteur_lenteur
+        self._aleatoire = random.Random(graine)
+
+        self._lock = threading.RLock()
+        self._tables = {nom: _Table(nom) for nom in TABLES}
+        self._objets: Dict[str, Dict[str, _Objet]] = {}
+        # bucket -> dossier -> {nom: None (fichier) | nombre d'objets sous le sous-dossier}
+        self._dossiers: Dict[str, Dict[str, Dict[str, Optional[int]]]] = {}
+        self._uploads_tus: Dict[str, dict] = {}
+        self._utilisateurs: Dict[str, dict] = {}  # email (ou id si anonyme) -> utilisateur
+        self._sessions: Dict[str, dict] = {}      # access_token / refresh_token -> utilisateur
+
+        self._compteurs: Counter = Counter()
+        self.utilisateurs: List[str] = []  # created_by des projets semés
+
+    # --- Données ---
+
+    def table(self, nom: str) -> Dict[str, dict]:
+        """Lignes d'une table (id -> ligne), pour les vérifications"""
+        return self._tables[nom].lignes
+
+    def selectionner(self, nom_table: str, colonne: str, valeur) -> List[dict]:
+        """Lignes où colonne = valeur (par index quand il existe)"""
+        with self._lock:
+            table = self._tables[nom_table]
+            return [l for l in table.candidates([("cond", colonne, "eq", valeur, False)]) if l.get(colonne) == valeur]
+
+    def inserer(self, nom_table: str, ligne: dict, horodatage: Optional[str] = None) -> dict:
+        """Insère une ligne sans passer par HTTP (préparation, non comptée)"""
+        with self._lock:
+            return self._inserer(self._tables[nom_table], [ligne], horodatage or _maintenant())[0]
+
+    def poser_objet(self, bucket: str, chemin: str, contenu: bytes,
+                    content_type: str = "application/octet-stream", etag: Optional[str] = None):
+        """Dépose un objet sans passer par HTTP (préparation, non comptée)"""
+        with self._lock:
+            self._poser(bucket, chemin, _Objet(contenu, content_type, etag=etag))
+
+    def objet(self, bucket: str, chemin: str) -> Optional[bytes]:
+        objet = self._objets.get(bucket, {}).get(chemin)
+        return objet.contenu if objet else None
+
+    def creer_utilisateur(self, email: str, password: str) -> dict:
+        with self._lock:
+            return self._nouvel_utilisateur(email, password)
+
+    def url_publique(self, bucket: str, chemin: str) -> str:
+        return f"{URL}/storage/v1/object/public/{bucket}/{chemin}"
+
+    def semer(
+        self,
+        nb_projets: int = 10_000,
+        nb_datasets: int = 100_000,
+        nb_utilisateurs: int = 100,
+        taille_objet: int = 1024,
+        bucket: str = "datasets",
+        part_dedupliques: float = 0.1
+    ) -> "SupabaseLocal":
+        """
+        Projets répartis entre nb_utilisateurs, datasets répartis entre les projets,
+        un objet Storage par dataset (contenu partagé : la mémoire ne dépend que du
+        nombre d'objets). part_dedupliques des datasets pointent vers cas/
+        """
+        aleatoire = self._aleatoire
+        contenu = aleatoire.randbytes(taille_objet)
+        etag = f'"{hashlib.md5(contenu).hexdigest()}"'
+        base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+        def identifiant() -> str:
+            return str(uuid.UUID(int=aleatoire.getrandbits(128), version=4))
+
+        with self._lock:
+            self.utilisateurs = [identifiant() for _ in range(nb_utilisateurs)]
+            projets = self._tables["projets_ia"]
+            ids_projets = []
+            for i in range(nb_projets):
+                horodatage = (base + timedelta(seconds=i)).isoformat(timespec="microseconds")
+                ligne = {
+                    "id": identifiant(),
+                    "nom": f"Projet {i}",
+                    "description": f"Projet de benchmark numéro {i}",
+                    "type_modele": TYPES_MODELE[i % len(TYPES_MODELE)],
+                    "statut": STATUTS[i % len(STATUTS)],
+                    "hyperparametres": {"learning_rate": 0.001, "epochs": 10 + i % 90},
+                    "created_by": self.utilisateurs[i % nb_utilisateurs],
+                    "created_at": horodatage,
+                    "updated_at": horodatage,
+                }
+                projets.ajouter(ligne)
+                ids_projets.append(ligne["id"])
+
+            datasets = self._tables["datasets"]
+            for i in range(nb_datasets if ids_projets else 0):
+                projet_id = ids_projets[aleatoire.randrange(len(ids_projets))]
+                format_fichier = FORMATS[i % len(FORMATS)]
+                ligne = {
+                    "id": identifiant(),
+                    "projet_id": projet_id,
+                    "nom": f"Dataset {i}",
+                    "taille_mb": round(aleatoire.uniform(0.1, 500), 2),
+                    "format_fichier": format_fichier,
+                    "nb_lignes": aleatoire.randrange(100, 1_000_000),
+                    "created_at": (base + timedelta(seconds=i)).isoformat(timespec="microseconds"),
+                }
+                ligne["updated_at"] = ligne["created_at"]
+                if aleatoire.random() < part_dedupliques:
+                    empreinte = hashlib.sha256(str(i).encode()).hexdigest()
+                    chemin = f"cas/{empreinte[:2]}/{empreinte}"
+                    ligne["empreinte_sha256"] = empreinte
+                else:
+                    chemin = f"{projet_id}/{i}_dataset_{i}.{format_fichier}"
+                ligne["fichier_url"] = self.url_publique(bucket, chemin)
+                datasets.ajouter(ligne)
+                self._poser(bucket, chemin, _Objet(contenu, "text/plain", etag=etag))
+
+        return self
+
+    # --- Installation dans config.database ---
+
+    @contextmanager
+    def installer(self) -> Iterator["SupabaseLocal"]:
+        """
+        Fait pointer supabase_config (clients sync et async) vers ce Supabase local
+        Les clients existants sont mis de côté et restaurés à la sortie
+        """
+        from config.database import supabase_config
+        from services.cache import cache
+        from services.rpc import reinitialiser_rpc
+
+        variables = {"SUPABASE_URL": URL, "SUPABASE_KEY": CLE_ANON, "SUPABASE_SERVICE_ROLE_KEY": CLE_SERVICE}
+        anciennes = {nom: os.environ.get(nom) for nom in variables}
+        etat = dict(supabase_config.__dict__)
+
+        os.environ.update(variables)
+        supabase_config._env_charge = False
+        supabase_config._clients = {}
+        supabase_config._http_client = None
+        supabase_config._resilience = None
+        supabase_config._transport = httpx.MockTransport(self.traiter)
+        supabase_config._async_boucles = weakref.WeakKeyDictionary()
+        supabase_config._async_transport = httpx.MockTransport(self.traiter_async)
+        reinitialiser_rpc()
+        cache.vider()
+        try:
+            yield self
+        finally:
+            supabase_config.__dict__.clear()
+            supabase_config.__dict__.update(etat)
+            for nom, valeur in anciennes.items():
+                if valeur is None:
+                    os.environ.pop(nom, None)
+                else:
+                    os.environ[nom] = valeur
+            reinitialiser_rpc()
+            cache.vider()
+
+    # --- Comptage et latence ---
+
+    def allers_retours(self) -> Dict[str, int]:
+        """Requêtes reçues depuis la création (ou la dernière remise à zéro), par service"""
+        with self._lock:
+            compteurs = dict(self._compteurs)
+        compteurs["total"] = sum(compteurs.values())
+        return compteurs
+
+    def reinitialiser_compteurs(self):
+        with self._lock:
+            self._compteurs.clear()
+
+    def _delai(self, service: str, octets: int) -> float:
+        delai = self.latence_ms.get(service, 0.0) / 1000
+        if delai and self.gigue:
+            delai *= self._aleatoire.uniform(1 - self.gigue, 1 + self.gigue)
+        if self.debit_mo_s:
+            delai += octets / (self.debit_mo_s * 1024 * 1024)
+        return delai
+
+    def _repondre(self, requete: httpx.Request) -> Tuple[httpx.Response, float]:
+        chemin = requete.url.path
+        corps = requete.content
+        service = chemin.split("/")[1] if chemin.count("/") >= 2 else ""
+        try:
+            with self._lock:
+                self._compteurs[service] += 1
+                lente = bool(self.lenteurs) and self._aleatoire.random() < self.lenteurs
+                if self.pannes and self._aleatoire.random() < self.pannes:
+                    raise _Erreur(503, {"message": "Service temporairement indisponible"})
+                if service == "rest":
+                    reponse = self._rest(requete, chemin[len("/rest/v1/"):], corps)
+                elif service == "storage":
+                    reponse = self._storage(requete, chemin[len("/storage/v1/"):], corps)
+                elif service == "auth":
+                    reponse = self._auth(requete, chemin[len("/auth/v1/"):], corps)
+                else:
+                    raise _Erreur(404, {"message": f"Service inconnu : {chemin}"})
+        except _Erreur as e:
+            reponse = e.reponse()
+        delai = self._delai(service, len(corps) + len(reponse.content))
+        return reponse, delai * self.facteur_lenteur if lente else delai
+
+    def traiter(self, requete: httpx.Request) -> httpx.Response:
+        """Gestionnaire du MockTransport synchrone"""
+        requete.read()
+        reponse, delai = self._repondre(requete)
+        if delai > 0:
+            time.sleep(delai)
+        return reponse
+
+    async def traiter_async(self, requete: httpx.Request) -> httpx.Response:
+        """Gestionnaire du MockTransport asynchrone (la latence ne bloque pas la boucle)"""
+        await requete.aread()
+        reponse, delai = self._repondre(requete)
+        if delai > 0:
+            await asyncio.sleep(delai)
+        return reponse
+
+    # --- PostgREST ---
+
+    def _rest(self, requete: httpx.Request, chemin: str, corps: bytes) -> httpx.Response:
+        if chemin.startswith("rpc/"):
+            return self._rpc(chemin[4:], json.loads(corps) if corps else {})
+
+        table = self._tables.get(chemin)
+        if table is None:
+            raise _erreur_postgrest(404, "42P01", f'relation "public.{chemin}" does not exist')
+
+        prefer = requete.headers.get("prefer", "")
+        parametres = requete.url.params
+        filtres = []
+        for nom, valeur in parametres.multi_items():
+            if nom in ("select", "order", "limit", "offset", "columns", "on_conflict"):
+                continue
+            if nom in ("or", "and"):
+                filtres.append(_arbre(nom, valeur))
+            else:
+                table.verifier_colonnes([nom])
+                filtres.append(_condition(nom, valeur))
+
+        methode = requete.method
+        if methode in ("GET", "HEAD"):
+            lignes = [l for l in table.candidates(filtres) if all(_evaluer(f, l) for f in filtres)]
+            total = len(lignes)
+            lignes = self._trier(
+                lignes, parametres.get("order"),
+                int(parametres["limit"]) if "limit" in parametres else None,
+                int(parametres.get("offset", 0))
+            )
+        elif methode == "POST":
+            donnees = json.loads(corps)
+            lignes = self._inserer(table, donnees if isinstance(donnees, list) else [donnees], _maintenant())
+            total = len(lignes)
+        elif methode == "PATCH":
+            lignes = self._modifier(table, filtres, json.loads(corps))
+            total = len(lignes)
+        elif methode == "DELETE":
+            lignes = self._supprimer(table, filtres)
+            total = len(lignes)
+        else:
+            raise _erreur_postgrest(405, "PGRST117", f"Méthode {methode} non prise en charge")
+
+        statut = 201 if methode == "POST" else 200
+        # Comme PostgREST : plage toujours renvoyée, total seulement avec count=exact
+        total = total if "count=exact" in prefer else "*"
+        headers = {"content-range": f"0-{len(lignes) - 1}/{total}" if lignes else f"*/{total}"}
+        if methode == "HEAD" or "return=minimal" in prefer:
+            return httpx.Response(204 if methode != "HEAD" else 200, headers=headers)
+
+        lignes = self._projeter(table, lignes, parametres.get("select", "*"))
+        if "vnd.pgrst.object" in requete.headers.get("accept", ""):
+            if len(lignes) != 1:
+                raise _erreur_postgrest(
+                    406, "PGRST116", "JSON object requested, multiple (or no) rows returned",
+                    f"The result contains {len(lignes)} rows"
+                )
+            return httpx.Response(statut, json=lignes[0], headers=headers)
+        return httpx.Response(statut, json=lignes, headers=headers)
+
+    @staticmethod
+    def _projeter(table: _Table, lignes: List[dict], select: str) -> List[dict]:
+        colonnes = [c.strip() for c in select.split(",") if c.strip()]
+        if not colonnes or "*" in colonnes:
+            colonnes = list(table.colonnes)
+        else:
+            for colonne in colonnes:
+                if colonne not in table.colonnes:
+                    raise _erreur_postgrest(400, "42703", f"column {table.nom}.{colonne} does not exist")
+        return [{c: ligne.get(c) for c in colonnes} for ligne in lignes]
+
+    @staticmethod
+    def _trier(lignes: List[dict], order: Optional[str], limite: Optional[int], offset: int) -> List[dict]:
+        """order=col.desc,col2.asc (NULL en tête en décroissant, en fin en croissant)"""
+        fin = offset + limite if limite is not None else None
+        if not order:
+            return lignes[offset:fin]
+
+        criteres = []
+        for terme in order.split(","):
+            colonne, _, sens = terme.partition(".")
+            criteres.append((colonne, sens.startswith("desc")))
+
+        def cle(ligne):
+            return tuple((ligne.get(c) is None, ligne.get(c)) for c, _ in criteres)
+
+        sens = {desc for _, desc in criteres}
+        if fin is not None and len(sens) == 1:
+            # Sens unique : sélection partielle (keyset, top-N) plutôt qu'un tri complet
+            selection = heapq.nlargest if sens.pop() else heapq.nsmallest
+            return selection(fin, lignes, key=cle)[offset:]
+
+        for colonne, desc in reversed(criteres):
+            lignes.sort(key=lambda l: (l.get(colonne) is None, l.get(colonne)), reverse=desc)
+        return lignes[offset:fin]
+
+    def _inserer(self, table: _Table, donnees: List[dict], horodatage: str) -> List[dict]:
+        """INSERT atomique : toutes les lignes sont validées avant d'être ajoutées"""
+        nouvelles = []
+        for donnee in donnees:
+            table.verifier_colonnes(donnee)
+            ligne = {**table.defauts, **donnee}
+            for colonne, valeur in ligne.items():
+                if valeur == "now()":
+                    ligne[colonne] = horodatage
+            ligne.setdefault("id", str(uuid.uuid4()))
+            ligne.setdefault("created_at", horodatage)
+            if "updated_at" in table.colonnes:
+                ligne.setdefault("updated_at", horodatage)
+            self._verifier_contraintes(table, ligne)
+            if ligne["id"] in table.lignes:
+                raise _erreur_postgrest(
+                    409, "23505", f'duplicate key value violates unique constraint "{table.nom}_pkey"'
+                )
+            nouvelles.append(ligne)
+        for ligne in nouvelles:
+            table.ajouter(ligne)
+        return nouvelles
+
+    def _verifier_contraintes(self, table: _Table, ligne: dict):
+        for colonne in table.obligatoires:
+            if ligne.get(colonne) is None:
+                raise _erreur_postgrest(
+                    400, "23502", f'null value in column "{colonne}" of relation "{table.nom}" violates not-null constraint'
+                )
+        if table.nom in CLES_ETRANGERES:
+            colonne, reference = CLES_ETRANGERES[table.nom]
+            if ligne.get(colonne) is not None and ligne[colonne] not in self._tables[reference].lignes:
+                raise _erreur_postgrest(
+                    409, "23503",
+                    f'insert or update on table "{table.nom}" violates foreign key constraint "{table.nom}_{colonne}_fkey"'
+                )
+
+    def _modifier(self, table: _Table, filtres: List[tuple], modifications: dict) -> List[dict]:
+        table.verifier_colonnes(modifications)
+        horodatage = _maintenant()
+        modifications = {c: horodatage if v == "now()" else v for c, v in modifications.items()}
+        cibles = [l for l in table.candidates(filtres) if all(_evaluer(f, l) for f in filtres)]
+        for ligne in cibles:
+            self._verifier_contraintes(table, {**ligne, **modifications})
+        resultat = []
+        for ligne in cibles:
+            # Retirée puis remise : les index suivent les colonnes modifiées
+            table.retirer(ligne["id"])
+            ligne = {**ligne, **modifications}
+            table.ajouter(ligne)
+            resultat.append(ligne)
+        return resultat
+
+    def _supprimer(self, table: _Table, filtres: List[tuple]) -> List[dict]:
+        cibles = [l for l in table.candidates(filtres) if all(_evaluer(f, l) for f in filtres)]
+        supprimees = [table.retirer(ligne["id"]) for ligne in cibles]
+        for nom_enfant, (colonne, reference) in CLES_ETRANGERES.items():
+            if reference != table.nom or not supprimees:
+                continue
+            enfant = self._tables[nom_enfant]
+            filtre = ("cond", colonne, "in", [l["id"] for l in supprimees], False)
+            self._supprimer(enfant, [filtre])
+        return supprimees
+
+    # --- Fonctions SQL (sql/statistiques.sql, sql/deduplication.sql) ---
+
+    def _rpc(self, nom: str, params: dict) -> httpx.Response:
+        fonction = getattr(self, f"_rpc_{nom}", None) if self.fonctions_sql else None
+        if fonction is None:
+            raise _erreur_postgrest(
+                404, "PGRST202", f"Could not find the function public.{nom} in the schema cache"
+            )
+        return httpx.Response(200, json=fonction(**params))
+
+    def _rpc_statistiques_datasets(self, p_projet_id: str) -> dict:
+        table = self._tables["datasets"]
+        lignes = table.candidates([("cond", "projet_id", "eq", p_projet_id, False)])
+        formats = Counter(l.get("format_fichier") or "inconnu" for l in lignes)
+        plus_gros = max(
+            (l for l in lignes if (l.get("taille_mb") or 0) > 0), key=lambda l: l["taille_mb"], default=None
+        )
+        return {
+            "nombre_datasets": len(lignes),
+            "taille_totale_mb": sum(l.get("taille_mb") or 0 for l in lignes),
+            "formats": dict(formats),
+            "dataset_plus_gros": {"nom": plus_gros["nom"], "taille_mb": plus_gros["taille_mb"]} if plus_gros else None,
+        }
+
+    def _rpc_statistiques_projets(self, p_user_id: Optional[str] = None) -> dict:
+        table = self._tables["projets_ia"]
+        if p_user_id:
+            lignes = table.candidates([("cond", "created_by", "eq", p_user_id, False)])
+        else:
+            lignes = heapq.nlargest(10, table.lignes.values(), key=lambda l: l["created_at"])
+        return {
+            "total": len(lignes),
+            "par_type": dict(Counter(l["type_modele"] for l in lignes)),
+            "par_statut": dict(Counter(l["statut"] for l in lignes)),
+        }
+
+    def _rpc_empreintes_referencees(self, p_empreintes: List[str], p_exclure_projet: Optional[str] = None) -> list:
+        table = self._tables["datasets"]
+        lignes = table.candidates([("cond", "empreinte_sha256", "in", p_empreintes, False)])
+        return [
+            {"empreinte": e}
+            for e in dict.fromkeys(l["empreinte_sha256"] for l in lignes if l.get("projet_id") != p_exclure_projet)
+        ]
+
+    # --- Storage ---
+
+    def _poser(self, bucket: str, chemin: str, objet: _Objet):
+        objets = self._objets.setdefault(bucket, {})
+        nouveau = chemin not in objets
+        objets[chemin] = objet
+        if not nouveau:
+            return
+        dossiers = self._dossiers.setdefault(bucket, {})
+        parties = chemin.split("/")
+        for i, nom in enumerate(parties):
+            enfants = dossiers.setdefault("/".join(parties[:i]), {})
+            enfants[nom] = None if i == len(parties) - 1 else (enfants.get(nom) or 0) + 1
+
+    def _enlever(self, bucket: str, chemin: str) -> Optional[_Objet]:
+        objet = self._objets.get(bucket, {}).pop(chemin, None)
+        if objet is None:
+            return None
+        dossiers = self._dossiers[bucket]
+        parties = chemin.split("/")
+        for i, nom in enumerate(parties):
+            dossier = "/".join(parties[:i])
+            enfants = dossiers[dossier]
+            if enfants[nom] is None or enfants[nom] == 1:
+                del enfants[nom]
+            else:
+                enfants[nom] -= 1
+            if not enfants and dossier:
+                del dossiers[dossier]
+        return objet
+
+    def _storage(self, requete: httpx.Request, chemin: str, corps: bytes) -> httpx.Response:
+        methode = requete.method
+        if chemin.startswith("upload/resumable"):
+            return self._tus(requete, chemin[len("upload/resumable"):].strip("/"), corps)
+        if not chemin.startswith("object/"):
+            raise _erreur_storage(400, "invalid_request", f"Route inconnue : {chemin}")
+
+        chemin = chemin[len("object/"):]
+        if chemin.startswith("list/") and methode == "POST":
+            return self._lister(chemin[len("list/"):], json.loads(corps or b"{}"))
+        for acces in ("public/", "authenticated/"):
+            if chemin.startswith(acces):
+                chemin = chemin[len(acces):]
+        bucket, _, nom = chemin.partition("/")
+
+        if methode == "DELETE" and not nom:
+            prefixes = json.loads(corps or b"{}").get("prefixes", [])
+            supprimes = []
+            for prefixe in prefixes:
+                if self._enlever(bucket, prefixe) is not None:
+                    supprimes.append({"name": prefixe, "bucket_id": bucket})
+            return httpx.Response(200, json=supprimes)
+        if methode in ("POST", "PUT"):
+            return self._uploader(requete, bucket, nom, corps, upsert=methode == "PUT")
+        if methode in ("GET", "HEAD"):
+            return self._lire(requete, bucket, nom)
+        raise _erreur_storage(400, "invalid_request", f"Méthode {methode} non prise en charge")
+
+    def _uploader(self, requete: httpx.Request, bucket: str, nom: str, corps: bytes, upsert: bool) -> httpx.Response:
+        upsert = upsert or requete.headers.get("x-upsert") == "true"
+        if nom in self._objets.get(bucket, {}) and not upsert:
+            raise _erreur_storage(409, "Duplicate", "The resource already exists")
+
+        content_type = requete.headers.get("content-type", "")
+        contenu = corps
+        if content_type.startswith("multipart/form-data"):
+            frontiere = content_type.split("boundary=", 1)[1].strip('"').encode()
+            for partie in corps.split(b"--" + frontiere):
+                entetes, _, donnees = partie.partition(b"\r\n\r\n")
+                if b'name="file"' in entetes:
+                    contenu = donnees[:-2] if donnees.endswith(b"\r\n") else donnees
+                    type_partie = re.search(rb"content-type:\s*([^\r\n]+)", entetes, re.IGNORECASE)
+                    content_type = type_partie.group(1).decode() if type_partie else "application/octet-stream"
+        metadata = {}
+        if requete.headers.get("x-metadata"):
+            metadata = json.loads(base64.b64decode(requete.headers["x-metadata"]))
+
+        self._poser(bucket, nom, _Objet(contenu, content_type, metadata))
+        return httpx.Response(200, json={"Key": f"{bucket}/{nom}", "Id": str(uuid.uuid4())})
+
+    def _lire(self, requete: httpx.Request, bucket: str, nom: str) -> httpx.Response:
+        objet = self._objets.get(bucket, {}).get(nom)
+        if objet is None:
+            if requete.method == "HEAD":
+                raise _Erreur(404)
+            raise _erreur_storage(404, "not_found", "Object not found")
+
+        headers = {"etag": objet.etag, "accept-ranges": "bytes", "content-type": objet.content_type}
+        if requete.headers.get("if-none-match") == objet.etag:
+            return httpx.Response(304, headers=headers)
+        if requete.headers.get("if-match") not in (None, objet.etag):
+            raise _erreur_storage(412, "precondition_failed", "ETag mismatch")
+
+        contenu, statut = objet.contenu, 200
+        plage = requete.headers.get("range")
+        if plage and plage.startswith("bytes="):
+            debut, _, fin = plage[len("bytes="):].partition("-")
+            debut, fin = int(debut), min(int(fin) if fin else len(contenu) - 1, len(contenu) - 1)
+            headers["content-range"] = f"bytes {debut}-{fin}/{len(contenu)}"
+            contenu, statut = contenu[debut:fin + 1], 206
+        headers["content-length"] = str(len(contenu))
+        if requete.method == "HEAD":
+            return httpx.Response(statut, headers=headers)
+        return httpx.Response(statut, content=contenu, headers=headers)
+
+    def _lister(self, bucket: str, options: dict) -> httpx.Response:
+        dossier = (options.get("prefix") or "").strip("/")
+        enfants = self._dossiers.get(bucket, {}).get(dossier, {})
+        tri = options.get("sortBy") or {}
+        noms = sorted(enfants, reverse=tri.get("order") == "desc")
+        offset, limite = int(options.get("offset", 0)), int(options.get("limit", 100))
+
+        entrees = []
+        for nom in noms[offset:offset + limite]:
+            if enfants[nom] is not None:
+                entrees.append({"name": nom, "id": None, "updated_at": None, "created_at": None,
+                                "last_accessed_at": None, "metadata": None})
+                continue
+            objet = self._objets[bucket][f"{dossier}/{nom}" if dossier else nom]
+            entrees.append({
+                "name": nom,
+                "id": objet.etag.strip('"'),
+                "updated_at": objet.modifie_le,
+                "created_at": objet.modifie_le,
+                "last_accessed_at": objet.modifie_le,
+                "metadata": {"size": len(objet.contenu), "mimetype": objet.content_type, "eTag": objet.etag,
+                             "lastModified": objet.modifie_le, **objet.metadata},
+            })
+        return httpx.Response(200, json=entrees)
+
+    def _tus(self, requete: httpx.Request, upload_id: str, corps: bytes) -> httpx.Response:
+        methode = requete.method
+        if methode == "POST" and not upload_id:
+            metadata = {}
+            for element in requete.headers.get("upload-metadata", "").split(","):
+                cle, _, valeur = element.strip().partition(" ")
+                if cle:
+                    metadata[cle] = base64.b64decode(valeur).decode()
+            bucket, nom = metadata.get("bucketName"), metadata.get("objectName")
+            if nom in self._objets.get(bucket, {}) and requete.headers.get("x-upsert") != "true":
+                raise _erreur_storage(409, "Duplicate", "The resource already exists")
+            upload_id = uuid.uuid4().hex
+            self._uploads_tus[upload_id] = {
+                "bucket": bucket, "nom": nom, "content_type": metadata.get("contentType", "application/octet-stream"),
+                "taille": int(requete.headers["upload-length"]), "donnees": bytearray(),
+            }
+            return httpx.Response(201, headers={
+                "Location": f"{URL}/storage/v1/upload/resumable/{upload_id}", "Tus-Resumable": "1.0.0"
+            })
+
+        upload = self._uploads_tus.get(upload_id)
+        if upload is None:
+            raise _Erreur(404)
+        if methode == "HEAD":
+            return httpx.Response(200, headers={
+                "Upload-Offset": str(len(upload["donnees"])), "Upload-Length": str(upload["taille"])
+            })
+        if methode == "PATCH":
+            if int(requete.headers.get("upload-offset", -1)) != len(upload["donnees"]):
+                raise _Erreur(409, {"message": "Upload-Offset ne correspond pas"})
+            upload["donnees"] += corps
+            if len(upload["donnees"]) >= upload["taille"]:
+                self._poser(upload["bucket"], upload["nom"], _Objet(bytes(upload["donnees"]), upload["content_type"]))
+            return httpx.Response(204, headers={"Upload-Offset": str(len(upload["donnees"]))})
+        raise _Erreur(405)
+
+    # --- Auth ---
+
+    def _nouvel_utilisateur(self, email: Optional[str], password: Optional[str]) -> dict:
+        maintenant = _maintenant()
+        utilisateur = {
+            "id": str(uuid.uuid4()),
+            "aud": "authenticated",
+            "role": "authenticated",
+            "email": email,
+            "app_metadata": {"provider": "email" if email else "anonymous"},
+            "user_metadata": {},
+            "created_at": maintenant,
+            "updated_at": maintenant,
+            "is_anonymous": email is None,
+        }
+        self._utilisateurs[email or utilisateur["id"]] = {
+            "utilisateur": utilisateur,
+            "password": hashlib.sha256((password or "").encode()).hexdigest(),
+        }
+        return utilisateur
+
+    def _session(self, utilisateur: dict) -> dict:
+        expiration = int(time.time()) + 3600
+        charge = base64.urlsafe_b64encode(json.dumps({
+            "sub": utilisateur["id"], "role": "authenticated", "exp": expiration
+        }).encode()).rstrip(b"=").decode()
+        access_token = f"eyJhbGciOiJub25lIn0.{charge}.{uuid.uuid4().hex}"
+        refresh_token = uuid.uuid4().hex
+        self._sessions[access_token] = self._sessions[refresh_token] = utilisateur
+        return {
+            "access_token": access_token,
+            "token_type": "bearer",
+            "expires_in": 3600,
+            "expires_at": expiration,
+            "refresh_token": refresh_token,
+            "user": utilisateur,
+        }
+
+    def _auth(self, requete: httpx.Request, chemin: str, corps: bytes) -> httpx.Response:
+        donnees = json.loads(corps) if corps else {}
+        if chemin == "signup":
+            email = donnees.get("email")
+            if email and email in self._utilisateurs:
+                raise _Erreur(422, {"code": 422, "error_code": "user_already_exists", "msg": "User already registered"})
+            return httpx.Response(200, json=self._session(self._nouvel_utilisateur(email, donnees.get("password"))))
+
+        if chemin == "token":
+            type_grant = requete.url.params.get("grant_type")
+            if type_grant == "password":
+                compte = self._utilisateurs.get(donnees.get("email"))
+                empreinte = hashlib.sha256((donnees.get("password") or "").encode()).hexdigest()
+                if compte is None or compte["password"] != empreinte:
+                    raise _Erreur(400, {"code": 400, "error_code": "invalid_credentials",
+                                        "msg": "Invalid login credentials"})
+                return httpx.Response(200, json=self._session(compte["utilisateur"]))
+            if type_grant == "refresh_token":
+                utilisateur = self._sessions.pop(donnees.get("refresh_token"), None)
+                if utilisateur is None:
+                    raise _Erreur(400, {"code": 400, "error_code": "refresh_token_not_found",
+                                        "msg": "Invalid Refresh Token"})
+                return httpx.Response(200, json=self._session(utilisateur))
+            raise _Erreur(400, {"code": 400, "error_code": "validation_failed", "msg": "grant_type inconnu"})
+
+        jeton = requete.headers.get("authorization", "").removeprefix("Bearer ").strip()
+        if chemin == "logout":
+            self._sessions.pop(jeton, None)
+            return httpx.Response(204)
+        if chemin == "user":
+            utilisateur = self._sessions.get(jeton)
+            if utilisateur is None:
+                raise _Erreur(401, {"code": 401, "error_code": "bad_jwt", "msg": "invalid JWT"})
+            return httpx.Response(200, json=utilisateur)
+        raise _Erreur(404, {"code": 404, "error_code": "not_found", "msg": f"Route inconnue : {chemin}"})
@@ -0,0 +1,122 @@
+# benchmarks/verifier_budgets.py
+"""
+Vérifie les budgets d'allers-retours des parcours de haut niveau contre le
+Supabase local (benchmarks/supabase_local.py) : à lancer en CI
+
+Chaque parcours (scénario de bench_services ou démo de main.py) est exécuté
+une fois dans tracer_allers_retours ; le script sort en erreur si un budget
+(total, chaîne séquentielle, doublons) est dépassé, avec la chaîne de requêtes
+et les doublons du parcours fautif.
+
+Usage :
+    python -m benchmarks.verifier_budgets
+    python -m benchmarks.verifier_budgets --detail --filtre supprimer
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.bench_services import SCENARIOS, Contexte
+from benchmarks.supabase_local import SupabaseLocal
+from services import upload_resumable
+from services.allers_retours import BudgetAllersRetoursDepasse, tracer_allers_retours
+from services.cache_fichiers import cache_fichiers
+from services.projet_service import ProjetService
+from services.storage_service import StorageService
+
+# parcours -> (allers-retours, chaîne séquentielle, doublons) ; None : non vérifié
+BUDGETS: Dict[str, Tuple[Optional[int], Optional[int], Optional[int]]] = {
+    "main.demo_complete": (11, 11, 0),
+    "ProjetService.lister_projets": (1, 1, 0),
+    "ProjetService.statistiques_projets": (1, 1, 0),
+    "ProjetService.supprimer_projet_cascade": (7, 7, 0),
+    "DatasetService.creer_datasets_batch": (2, 2, 0),
+    "DatasetService.statistiques_datasets": (1, 1, 0),
+    "DatasetService.supprimer_dataset": (2, 2, 0),
+    "DatasetService.supprimer_datasets": (2, 2, 0),
+    "DatasetService.uploader_et_creer_dataset": (2, 2, 0),
+    "DatasetService.uploader_et_creer_dataset[dedupliquer]": (3, 3, 0),
+    "DatasetService.rechercher_datasets": (1, 1, 0),
+    "StorageService.telecharger_dataset": (2, 2, 0),
+    "StorageService.telecharger_dataset[cache]": (1, 1, 0),
+    "StorageService.iter_fichiers": (None, 4, 0),
+    "AuthService.connecter_utilisateur": (1, 1, 0),
+}
+
+
+def _demo_complete(ctx: Contexte) -> Callable[[], None]:
+    """main.demo_complete, sortie masquée (inscription puis connexion de l'utilisateur démo)"""
+    import main
+
+    def executer():
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.demo_complete()
+    return executer
+
+
+def parcours(nom: str) -> Callable[[Contexte], Callable[[], None]]:
+    if nom == "main.demo_complete":
+        return _demo_complete
+    if nom not in SCENARIOS:
+        raise KeyError(f"Parcours inconnu : {nom}")
+    return SCENARIOS[nom][0]
+
+
+def verifier(args) -> List[str]:
+    """Noms des parcours hors budget"""
+    latences = {service: args.latence_ms for service in ("rest", "storage", "auth")}
+    local = SupabaseLocal(latence_ms=latences, gigue=0.0, graine=args.graine)
+    local.semer(args.projets, args.datasets, args.utilisateurs)
+    echecs = []
+    with tempfile.TemporaryDirectory() as repertoire, local.installer():
+        cache_fichiers.repertoire = os.path.join(repertoire, "cache")
+        upload_resumable.REPERTOIRE_ETAT = os.path.join(repertoire, "uploads")
+        ctx = Contexte(local, repertoire, args.taille_fichier_ko, args.graine)
+        ProjetService.lister_projets(ctx.utilisateur())
+        StorageService.lister_fichiers_recursif(prefix=ctx.projet()["id"])
+
+        for nom, (max_total, max_sequentiels, max_doublons) in BUDGETS.items():
+            if args.filtre and args.filtre not in nom:
+                continue
+            appel = parcours(nom)(ctx)
+            try:
+                with tracer_allers_retours(nom, max_total, max_sequentiels, max_doublons) as trace:
+                    appel()
+            except BudgetAllersRetoursDepasse as e:
+                echecs.append(nom)
+                print(f"❌ {e}\n")
+                continue
+            budget = "/".join("-" if b is None else str(b) for b in (max_total, max_sequentiels, max_doublons))
+            print(f"✅ {nom:<56} {trace.nombre:>4} allers-retours, {trace.sequentiels:>3} séquentiels, "
+                  f"{trace.nb_doublons} doublons (budget {budget})")
+            if args.detail:
+                print(trace.rapport() + "\n")
+    return echecs
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Budgets d'allers-retours contre un Supabase local")
+    parser.add_argument("--projets", type=int, default=500)
+    parser.add_argument("--datasets", type=int, default=5000)
+    parser.add_argument("--utilisateurs", type=int, default=20)
+    # Latence non nulle : sans elle, des requêtes parallèles paraîtraient séquentielles
+    parser.add_argument("--latence-ms", type=float, default=2.0)
+    parser.add_argument("--taille-fichier-ko", type=int, default=64)
+    parser.add_argument("--filtre", default=None, help="seulement les parcours contenant ce texte")
+    parser.add_argument("--detail", action="store_true", help="rapport de chaque parcours")
+    parser.add_argument("--graine", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    echecs = verifier(args)
+    if echecs:
+        print(f"\n{len(echecs)} parcours hors budget : {', '.join(echecs)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,38 +1,287 @@
 # config/database.py
 import os
-from supabase import create_client, Client
+import asyncio
+import threading
+import weakref
+from typing import Optional, TYPE_CHECKING
 from dotenv import load_dotenv
 
-load_dotenv()
+if TYPE_CHECKING:
+    import httpx
+    from supabase import Client, AsyncClient
+    from config.resilience import PolitiqueResilience, Resilience
+
+
+def _env_bool(nom: str, defaut: str) -> bool:
+    return os.getenv(nom, defaut).strip().lower() in ("1", "true", "yes", "oui")
+
 
 class SupabaseConfig:
+    """
+    Configuration et clients Supabase, créés paresseusement
+    Rien n'est lu ni construit à l'import : le .env est chargé et les clients
+    sont créés au premier appel qui en a besoin.
+    """
+
     def __init__(self):
-        self.url = os.getenv("SUPABASE_URL")
-        self.anon_key = os.getenv("SUPABASE_KEY")
-        self.service_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-        
-        if not self.url or not self.anon_key:
+        self._lock = threading.Lock()
+        self._env_charge = False
+        self._clients = {}
+        self._transport: Optional["httpx.HTTPTransport"] = None
+        self._http_client: Optional["httpx.Client"] = None
+        self._resilience: Optional["Resilience"] = None
+
+        # Clients asynchrones par boucle asyncio, créés au premier appel de
+        # get_async_client : un pool httpx async est lié à la boucle qui l'utilise
+        # (un second asyncio.run() ou la boucle d'un autre thread a les siens)
+        self._async_boucles = weakref.WeakKeyDictionary()
+        # Transport async imposé (Supabase local des benchmarks) ; None : un pool par boucle
+        self._async_transport = None
+
+    # --- Variables d'environnement ---
+
+    def _charger_env(self):
+        if self._env_charge:
+            return
+        load_dotenv()
+
+        url = os.getenv("SUPABASE_URL")
+        anon_key = os.getenv("SUPABASE_KEY")
+        if not url or not anon_key:
             raise ValueError("SUPABASE_URL et SUPABASE_KEY sont obligatoires")
-            
-        # Client normal (avec RLS)
-        self.client: Client = create_client(self.url, self.anon_key)
-        
-        # Client admin (bypass RLS)
-        if self.service_key:
-            self.admin_client: Client = create_client(self.url, self.service_key)
-        else:
-            self.admin_client = self.client  # Fallback
-    
-    def get_client(self, admin_mode=False) -> Client:
+
+        self._url = url
+        self._anon_key = anon_key
+        self._service_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+        # Pool HTTP partagé par tous les clients
+        self.http_max_connexions = int(os.getenv("SUPABASE_HTTP_MAX_CONNEXIONS", "100"))
+        self.http_max_keepalive = int(os.getenv("SUPABASE_HTTP_MAX_KEEPALIVE", "20"))
+        self.http_keepalive_s = float(os.getenv("SUPABASE_HTTP_KEEPALIVE_S", "30"))
+        self.http2 = _env_bool("SUPABASE_HTTP2", "true")
+        self.timeout_s = float(os.getenv("SUPABASE_HTTP_TIMEOUT_S", "30"))
+        self.timeout_connexion_s = float(os.getenv("SUPABASE_HTTP_TIMEOUT_CONNEXION_S", "10"))
+
+        # Résilience (config/resilience.py) : réessais, requêtes doublées, disjoncteurs
+        self.resilience_active = _env_bool("SUPABASE_RESILIENCE", "true")
+        self.reessais = int(os.getenv("SUPABASE_REESSAIS", "3"))
+        self.reessai_base_s = float(os.getenv("SUPABASE_REESSAI_BASE_S", "0.1"))
+        self.reessai_max_s = float(os.getenv("SUPABASE_REESSAI_MAX_S", "2"))
+        self.reessai_statuts = tuple(
+            int(statut) for statut in os.getenv("SUPABASE_REESSAI_STATUTS", "429,502,503,504").split(",") if statut.strip()
+        )
+        self.retry_after_max_s = float(os.getenv("SUPABASE_RETRY_AFTER_MAX_S", "10"))
+        self.hedging = _env_bool("SUPABASE_HEDGING", "false")
+        self.hedging_percentile = float(os.getenv("SUPABASE_HEDGING_PERCENTILE", "95"))
+        self.hedging_min_s = float(os.getenv("SUPABASE_HEDGING_MIN_S", "0.05"))
+        self.disjoncteur_seuil = int(os.getenv("SUPABASE_DISJONCTEUR_SEUIL", "5"))
+        self.disjoncteur_ouverture_s = float(os.getenv("SUPABASE_DISJONCTEUR_OUVERTURE_S", "30"))
+        self._env_charge = True
+
+    @property
+    def url(self) -> str:
+        self._charger_env()
+        return self._url
+
+    @property
+    def anon_key(self) -> str:
+        self._charger_env()
+        return self._anon_key
+
+    @property
+    def service_key(self) -> Optional[str]:
+        self._charger_env()
+        return self._service_key
+
+    # --- Pool HTTP ---
+
+    def _limites(self):
+        import httpx
+        return httpx.Limits(
+            max_connections=self.http_max_connexions,
+            max_keepalive_connections=self.http_max_keepalive,
+            keepalive_expiry=self.http_keepalive_s,
+        )
+
+    def _timeout(self):
+        import httpx
+        return httpx.Timeout(self.timeout_s, connect=self.timeout_connexion_s)
+
+    def get_transport(self) -> "httpx.HTTPTransport":
+        """Transport (pool de connexions) partagé par tous les clients synchrones"""
+        with self._lock:
+            if self._transport is None:
+                import httpx
+                self._charger_env()
+                self._transport = httpx.HTTPTransport(http2=self.http2, limits=self._limites())
+            return self._transport
+
+    # --- Résilience ---
+
+    def politique_resilience(self) -> "PolitiqueResilience":
+        from config.resilience import PolitiqueResilience
+        self._charger_env()
+        return PolitiqueResilience(
+            reessais=self.reessais,
+            reessai_base_s=self.reessai_base_s,
+            reessai_max_s=self.reessai_max_s,
+            statuts_reessai=self.reessai_statuts,
+            retry_after_max_s=self.retry_after_max_s,
+            hedging=self.hedging,
+            hedging_percentile=self.hedging_percentile,
+            hedging_min_s=self.hedging_min_s,
+            seuil_echecs=self.disjoncteur_seuil,
+            ouverture_s=self.disjoncteur_ouverture_s,
+        )
+
+    @property
+    def resilience(self) -> Optional["Resilience"]:
+        """Disjoncteurs et compteurs partagés par tous les clients (None si SUPABASE_RESILIENCE=false)"""
+        self._charger_env()
+        if not self.resilience_active:
+            return None
+        if self._resilience is None:
+            from config.resilience import Resilience
+            with self._lock:
+                if self._resilience is None:
+                    self._resilience = Resilience(self.politique_resilience())
+        return self._resilience
+
+    def _envelopper(self, transport, asynchrone: bool = False):
+        """Transport mesuré (instrumentation), sous la couche de résilience : chaque tentative est mesurée"""
+        from config.transport import TransportSupabase, TransportSupabaseAsync
+        transport = TransportSupabaseAsync(transport) if asynchrone else TransportSupabase(transport)
+        resilience = self.resilience
+        if resilience is None:
+            return transport
+        from config.resilience import TransportResilient, TransportResilientAsync
+        return TransportResilientAsync(transport, resilience) if asynchrone else TransportResilient(transport, resilience)
+
+    def _nouveau_client_http(self) -> "httpx.Client":
+        import httpx
+        return httpx.Client(
+            transport=self._envelopper(self.get_transport()), timeout=self._timeout(), follow_redirects=True
+        )
+
+    def get_http_client(self) -> "httpx.Client":
+        """Client HTTP brut (uploads TUS, téléchargements) sur le pool partagé"""
+        if self._http_client is None:
+            client = self._nouveau_client_http()
+            with self._lock:
+                if self._http_client is None:
+                    self._http_client = client
+        return self._http_client
+
+    # --- Clients Supabase ---
+
+    def _creer_client(self, key: str) -> "Client":
+        from supabase import create_client, ClientOptions
+        # Un httpx.Client par client Supabase (en-têtes propres) sur le même pool
+        options = ClientOptions(httpx_client=self._nouveau_client_http())
+        client = create_client(self.url, key, options=options)
+        self._separer_clients_http(client, self._nouveau_client_http)
+        return client
+
+    @staticmethod
+    def _separer_clients_http(client, nouveau_client_http):
+        """
+        PostgREST et Storage fixent base_url (et leurs en-têtes) sur le client httpx
+        reçu : partagé, le dernier initialisé redirigerait les requêtes de l'autre.
+        Chacun reçoit donc son propre httpx.Client, sur le même pool, y compris
+        quand supabase-py les recrée après un changement de session.
+        """
+        for nom in ("_init_postgrest_client", "_init_storage_client"):
+            initialiser = getattr(client, nom)
+            setattr(client, nom, lambda *args, _initialiser=initialiser, **kwargs: _initialiser(
+                *args, **{**kwargs, "http_client": nouveau_client_http()}
+            ))
+
+    def get_client(self, admin_mode=False) -> "Client":
         """
         Récupère le client Supabase
         admin_mode: True pour bypass RLS (démo uniquement)
         """
-        if admin_mode and hasattr(self, 'admin_client'):
-            return self.admin_client
-        return self.client
+        cle = "admin" if admin_mode and self.service_key else "anon"
+        client = self._clients.get(cle)
+        if client is None:
+            key = self.service_key if cle == "admin" else self.anon_key
+            nouveau = self._creer_client(key)
+            with self._lock:
+                client = self._clients.setdefault(cle, nouveau)
+        return client
+
+    @property
+    def client(self) -> "Client":
+        """Client normal (avec RLS)"""
+        return self.get_client(admin_mode=False)
+
+    @property
+    def admin_client(self) -> "Client":
+        """Client admin (bypass RLS), ou client normal sans clé de service"""
+        return self.get_client(admin_mode=True)
+
+    async def get_async_client(self, admin_mode=False) -> "AsyncClient":
+        """
+        Récupère le client Supabase asynchrone de la boucle courante (créé au premier appel)
+        admin_mode: True pour bypass RLS (démo uniquement)
+        """
+        cle = "admin" if admin_mode and self.service_key else "anon"
+        loop = asyncio.get_running_loop()
+        boucle = self._async_boucles.get(loop)
+        if boucle is None:
+            with self._lock:
+                boucle = self._async_boucles.setdefault(
+                    loop, {"clients": {}, "transport": None, "lock": asyncio.Lock()}
+                )
+        client = boucle["clients"].get(cle)
+        if client is not None:
+            return client
+
+        async with boucle["lock"]:
+            if cle not in boucle["clients"]:
+                import httpx
+                from supabase import acreate_client, AsyncClientOptions
+
+                transport = self._async_transport or boucle["transport"]
+                if transport is None:
+                    transport = boucle["transport"] = httpx.AsyncHTTPTransport(
+                        http2=self.http2, limits=self._limites()
+                    )
+
+                def nouveau_client_http():
+                    return httpx.AsyncClient(
+                        transport=self._envelopper(transport, asynchrone=True), timeout=self._timeout(), follow_redirects=True
+                    )
+
+                key = self.service_key if cle == "admin" else self.anon_key
+                client = await acreate_client(
+                    self.url, key, options=AsyncClientOptions(httpx_client=nouveau_client_http())
+                )
+                self._separer_clients_http(client, nouveau_client_http)
+                boucle["clients"][cle] = client
+            return boucle["clients"][cle]
+
+
+class _ClientParesseux:
+    """Proxy du client Supabase : le vrai client est créé au premier usage"""
+
+    __slots__ = ("_admin_mode",)
+
+    def __init__(self, admin_mode: bool):
+        self._admin_mode = admin_mode
+
+    def __getattr__(self, nom):
+        return getattr(supabase_config.get_client(admin_mode=self._admin_mode), nom)
+
+    def __repr__(self) -> str:
+        return f"<client Supabase paresseux admin_mode={self._admin_mode}>"
+
 
 # Instance globale
 supabase_config = SupabaseConfig()
 # Pour la démo, on utilise le mode admin
-supabase = supabase_config.get_client(admin_mode=True)
\ No newline at end of file
+supabase = _ClientParesseux(admin_mode=True)
+
+async def get_async_supabase() -> "AsyncClient":
+    """Client asynchrone global (même mode que `supabase`)"""
+    return await supabase_config.get_async_client(admin_mode=True)
@@ -0,0 +1,482 @@
+# config/instrumentation.py
+"""
+Instrumentation des appels Supabase (PostgREST, Storage, Auth)
+
+Deux niveaux, reliés par des spans parent/enfant :
+- requêtes : chaque échange HTTP passe par config/transport.py (transport de
+  tous les clients de config.database, uploads TUS et téléchargements compris) :
+  durée, octets envoyés et reçus, lignes (Content-Range de PostgREST), classe
+  d'erreur (statut + code PostgREST / Storage / Auth, ou exception réseau)
+- opérations : méthodes publiques des services (instrumenter_service, dans
+  services/instrumentation.py) ; les requêtes faites pendant une opération lui
+  sont rattachées, y compris depuis les threads lancés par les services (propager)
+
+Primitives (spans, histogrammes, instance globale) dans config/ : les transports
+de config/ les utilisent sans dépendre de la couche services.
+
+Export : texte Prometheus (exporter_prometheus) et spans au format
+OpenTelemetry (spans, spans_otlp, ajouter_exportateur pour les transmettre à
+un SDK au fil de l'eau).
+
+Désactivée par défaut (INSTRUMENTATION=1 ou instrumentation.activer()) : le coût
+est alors un test de booléen par appel.
+"""
+import contextvars
+import hashlib
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Bornes des histogrammes de durée (secondes), comme les buckets Prometheus par défaut
+BORNES_DUREE = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Span en cours (opération ou requête) dans ce contexte
+_span_courant: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("span_courant", default=None)
+
+# Traces d'allers-retours ouvertes dans ce contexte (services/allers_retours.py)
+_traces: contextvars.ContextVar[tuple] = contextvars.ContextVar("traces_allers_retours", default=())
+
+
+class Histogramme:
+    """Histogramme cumulatif à bornes fixes (format Prometheus)"""
+
+    __slots__ = ("bornes", "compteurs", "somme", "nombre")
+
+    def __init__(self, bornes: Tuple[float, ...] = BORNES_DUREE):
+        self.bornes = bornes
+        self.compteurs = [0] * (len(bornes) + 1)
+        self.somme = 0.0
+        self.nombre = 0
+
+    def observer(self, valeur: float):
+        self.compteurs[bisect_left(self.bornes, valeur)] += 1
+        self.somme += valeur
+        self.nombre += 1
+
+    def cumuls(self) -> List[Tuple[str, int]]:
+        """[(le, nombre d'observations <= le)], +Inf compris"""
+        total, resultat = 0, []
+        for borne, compteur in zip(self.bornes + (float("inf"),), self.compteurs):
+            total += compteur
+            resultat.append(("+Inf" if borne == float("inf") else repr(borne), total))
+        return resultat
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimation par la borne du bucket atteint (None sans observation)"""
+        if not self.nombre:
+            return None
+        rang = q * self.nombre
+        for (le, cumul), borne in zip(self.cumuls(), self.bornes + (float("inf"),)):
+            if cumul >= rang:
+                return borne
+        return None
+
+
+class _SerieRequetes:
+    __slots__ = ("durees", "octets_envoyes", "octets_recus", "lignes")
+
+    def __init__(self):
+        self.durees = Histogramme()
+        self.octets_envoyes = 0
+        self.octets_recus = 0
+        self.lignes = 0
+
+
+class Span:
+    """Span au format OpenTelemetry (INTERNAL : opération, CLIENT : requête HTTP)"""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "nom", "type", "operation",
+                 "debut_ns", "fin_ns", "attributs", "erreur", "requete", "_debut")
+
+    def __init__(self, nom: str, type_span: str, parent: Optional["Span"], operation: str):
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.nom = nom
+        self.type = type_span
+        self.operation = operation
+        self.debut_ns = time.time_ns()
+        self.fin_ns: Optional[int] = None
+        self.attributs: Dict[str, Any] = {}
+        self.erreur: Optional[str] = None
+        # (URL complète, empreinte du corps) : seulement pendant une trace d'allers-retours
+        self.requete: Optional[Tuple[str, Optional[str]]] = None
+        self._debut = time.perf_counter()
+
+    @property
+    def duree(self) -> float:
+        """Secondes écoulées (durée totale une fois terminé)"""
+        if self.fin_ns is not None:
+            return (self.fin_ns - self.debut_ns) / 1e9
+        return time.perf_counter() - self._debut
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.nom,
+            "kind": self.type,
+            "start_time_unix_nano": self.debut_ns,
+            "end_time_unix_nano": self.fin_ns,
+            "attributes": dict(self.attributs),
+            "status": {"code": "ERROR", "message": self.erreur} if self.erreur else {"code": "OK"},
+        }
+
+
+def decrire_url(chemin: str) -> Tuple[str, str]:
+    """
+    (service, cible) d'une URL Supabase, sans identifiant (cardinalité bornée)
+    /rest/v1/datasets -> ('rest', 'datasets') ; /rest/v1/rpc/f -> ('rest', 'rpc/f')
+    /storage/v1/object/list/b -> ('storage', 'object/list') ; /auth/v1/token -> ('auth', 'token')
+    """
+    parties = chemin.strip("/").split("/")
+    service, reste = parties[0], parties[2:]
+    if service == "rest":
+        cible = "/".join(reste[:2]) if reste[:1] == ["rpc"] else "/".join(reste[:1])
+    elif service == "storage":
+        if reste[:1] == ["object"] and len(reste) > 2 and reste[1] in ("list", "public", "authenticated", "sign", "info"):
+            cible = f"object/{reste[1]}"
+        else:
+            cible = "/".join(reste[:2]) if reste[:1] == ["upload"] else "/".join(reste[:1])
+    else:
+        cible = "/".join(reste[:1])
+    return service, cible
+
+
+def lignes_content_range(valeur: Optional[str]) -> Optional[int]:
+    """Lignes renvoyées d'après Content-Range ('0-24/*' -> 25, '*/0' -> 0)"""
+    if not valeur:
+        return None
+    plage = valeur.split("/", 1)[0]
+    if plage == "*":
+        return 0
+    debut, _, fin = plage.partition("-")
+    try:
+        return int(fin) - int(debut) + 1
+    except ValueError:
+        return None
+
+
+def _echapper(valeur: str) -> str:
+    return str(valeur).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{cle}="{_echapper(valeur)}"' for cle, valeur in labels.items()) + "}"
+
+
+class Instrumentation:
+    """Métriques et spans des opérations et des requêtes Supabase"""
+
+    def __init__(self, max_spans: int = 10_000):
+        # actif : métriques activées ou trace d'allers-retours ouverte quelque part
+        self.actif = False
+        self.metriques = False
+        self.traces = True
+        self._nb_traces = 0
+        self._lock = threading.Lock()
+        self._requetes: Dict[Tuple[str, str, str, str], _SerieRequetes] = {}
+        self._operations: Dict[str, Histogramme] = {}
+        self._erreurs_requetes: Counter = Counter()
+        self._erreurs_operations: Counter = Counter()
+        self._spans: deque = deque(maxlen=max_spans)
+        self._exportateurs: List[Callable[[dict], None]] = []
+        self._collecteurs: Dict[str, Callable[[], str]] = {}
+
+    def activer(self, traces: bool = True, max_spans: Optional[int] = None):
+        """
+        traces: garde les spans terminés (les max_spans derniers) et les transmet
+        aux exportateurs ; False = métriques seules
+        """
+        self.traces = traces
+        if max_spans is not None:
+            with self._lock:
+                self._spans = deque(self._spans, maxlen=max_spans)
+        self.metriques = self.actif = True
+
+    def desactiver(self):
+        self.metriques = False
+        self.actif = self._nb_traces > 0
+
+    def vider(self):
+        with self._lock:
+            self._requetes.clear()
+            self._operations.clear()
+            self._erreurs_requetes.clear()
+            self._erreurs_operations.clear()
+            self._spans.clear()
+
+    def enregistrer_collecteur(self, nom: str, collecteur: Callable[[], str]):
+        """collecteur() renvoie des métriques Prometheus ajoutées à l'export (remplace celui du même nom)"""
+        self._collecteurs[nom] = collecteur
+
+    def ajouter_exportateur(self, exportateur: Callable[[dict], None]):
+        """exportateur(span) appelé à la fin de chaque span (dict de Span.to_dict)"""
+        self._exportateurs.append(exportateur)
+
+    # --- Traces d'allers-retours ---
+
+    def ouvrir_trace(self, trace) -> contextvars.Token:
+        """trace._enregistrer(span) recevra chaque requête terminée dans ce contexte"""
+        with self._lock:
+            self._nb_traces += 1
+            self.actif = True
+        return _traces.set(_traces.get() + (trace,))
+
+    def fermer_trace(self, jeton: contextvars.Token):
+        _traces.reset(jeton)
+        with self._lock:
+            self._nb_traces -= 1
+            self.actif = self.metriques or self._nb_traces > 0
+
+    @staticmethod
+    def requetes_tracees() -> bool:
+        """Une trace est ouverte dans ce contexte (le transport fournit alors URL et corps)"""
+        return bool(_traces.get())
+
+    # --- Spans ---
+
+    def _ouvrir(self, nom: str, type_span: str, operation: Optional[str] = None) -> Span:
+        parent = _span_courant.get()
+        if operation is None:
+            operation = parent.operation if parent else ""
+        return Span(nom, type_span, parent, operation)
+
+    def _terminer(self, span: Span):
+        span.fin_ns = span.debut_ns + int((time.perf_counter() - span._debut) * 1e9)
+        if not (self.metriques and self.traces):
+            return
+        self._spans.append(span)
+        if self._exportateurs:
+            donnees = span.to_dict()
+            for exportateur in self._exportateurs:
+                try:
+                    exportateur(donnees)
+                except Exception:
+                    pass
+
+    @contextmanager
+    def operation(self, nom: str) -> Iterator[Span]:
+        """Span d'opération : les requêtes faites dans le bloc lui sont rattachées"""
+        span = self._ouvrir(nom, "INTERNAL", operation=nom)
+        jeton = _span_courant.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            self._fin_operation(span, e)
+            raise
+        else:
+            self._fin_operation(span, None)
+        finally:
+            _span_courant.reset(jeton)
+
+    def _fin_operation(self, span: Span, erreur: Optional[BaseException]):
+        if isinstance(erreur, GeneratorExit):
+            erreur = None
+        if erreur is not None:
+            # Les services enveloppent les erreurs dans Exception(str) : la classe
+            # de la requête en échec est plus parlante que celle de l'exception
+            span.erreur = span.erreur or type(erreur).__name__
+            span.attributs.setdefault("error.type", span.erreur)
+            parent = _span_courant.get()
+            if parent is not None and parent is not span and parent.erreur is None:
+                parent.erreur = span.erreur
+        else:
+            # Erreur de requête rattrapée par le service (ex. repli sans RPC)
+            span.erreur = None
+        self._terminer(span)
+        if not self.metriques:
+            return
+        with self._lock:
+            histogramme = self._operations.get(span.operation)
+            if histogramme is None:
+                histogramme = self._operations[span.operation] = Histogramme()
+            histogramme.observer(span.duree)
+            if span.erreur:
+                self._erreurs_operations[(span.operation, span.erreur)] += 1
+
+    def debut_requete(self, methode: str, url, corps: Optional[bytes] = None) -> Span:
+        """
+        Span de requête HTTP (appelé par config/transport.py)
+        corps: fourni pendant une trace d'allers-retours (détection des doublons)
+        """
+        service, cible = decrire_url(url.path)
+        span = self._ouvrir(f"{methode} {service}/{cible}", "CLIENT")
+        span.attributs.update({
+            "http.request.method": methode,
+            "server.address": url.host,
+            "url.path": url.path,
+            "supabase.service": service,
+            "supabase.cible": cible,
+        })
+        if _traces.get():
+            empreinte = hashlib.blake2b(corps, digest_size=8).hexdigest() if corps else None
+            span.requete = (f"{methode} {url}", empreinte)
+        return span
+
+    def fin_requete(
+        self,
+        span: Span,
+        statut: Optional[int],
+        octets_envoyes: int,
+        octets_recus: int,
+        lignes: Optional[int] = None,
+        classe_erreur: Optional[str] = None
+    ):
+        attributs = span.attributs
+        if statut is not None:
+            attributs["http.response.status_code"] = statut
+        attributs["http.request.body.size"] = octets_envoyes
+        attributs["http.response.body.size"] = octets_recus
+        if lignes is not None:
+            attributs["supabase.lignes"] = lignes
+        if classe_erreur:
+            span.erreur = attributs["error.type"] = classe_erreur
+            parent = _span_courant.get()
+            if parent is not None:
+                parent.erreur = classe_erreur
+        self._terminer(span)
+        for trace in _traces.get():
+            trace._enregistrer(span)
+        if not self.metriques:
+            return
+
+        cle = (span.operation, attributs["supabase.service"], attributs["http.request.method"], attributs["supabase.cible"])
+        with self._lock:
+            serie = self._requetes.get(cle)
+            if serie is None:
+                serie = self._requetes[cle] = _SerieRequetes()
+            serie.durees.observer(span.duree)
+            serie.octets_envoyes += octets_envoyes
+            serie.octets_recus += octets_recus
+            serie.lignes += lignes or 0
+            if classe_erreur:
+                self._erreurs_requetes[cle + (classe_erreur,)] += 1
+
+    # --- Export ---
+
+    def exporter_prometheus(self) -> str:
+        """Métriques au format texte d'exposition Prometheus"""
+        with self._lock:
+            requetes = sorted(self._requetes.items())
+            operations = sorted(self._operations.items())
+            erreurs_requetes = sorted(self._erreurs_requetes.items())
+            erreurs_operations = sorted(self._erreurs_operations.items())
+
+        lignes = []
+
+        def histogramme(nom: str, aide: str, series):
+            lignes.append(f"# HELP {nom} {aide}")
+            lignes.append(f"# TYPE {nom} histogram")
+            for labels, h in series:
+                for le, cumul in h.cumuls():
+                    lignes.append(f"{nom}_bucket{_labels(**labels, le=le)} {cumul}")
+                lignes.append(f"{nom}_sum{_labels(**labels)} {h.somme!r}")
+                lignes.append(f"{nom}_count{_labels(**labels)} {h.nombre}")
+
+        def compteur(nom: str, aide: str, series):
+            lignes.append(f"# HELP {nom} {aide}")
+            lignes.append(f"# TYPE {nom} counter")
+            for labels, valeur in series:
+                lignes.append(f"{nom}{_labels(**labels)} {valeur}")
+
+        def labels_requete(cle):
+            operation, service, methode, cible = cle
+            return {"operation": operation, "service": service, "methode": methode, "cible": cible}
+
+        histogramme("supabase_requete_duree_secondes", "Durée des requêtes HTTP vers Supabase",
+                    [(labels_requete(cle), serie.durees) for cle, serie in requetes])
+        compteur("supabase_requete_octets_envoyes_total", "Octets envoyés (corps des requêtes)",
+                 [(labels_requete(cle), serie.octets_envoyes) for cle, serie in requetes])
+        compteur("supabase_requete_octets_recus_total", "Octets reçus (corps des réponses)",
+                 [(labels_requete(cle), serie.octets_recus) for cle, serie in requetes])
+        compteur("supabase_requete_lignes_total", "Lignes renvoyées par PostgREST (Content-Range)",
+                 [(labels_requete(cle), serie.lignes) for cle, serie in requetes if cle[1] == "rest"])
+        compteur("supabase_requete_erreurs_total", "Requêtes en erreur par classe",
+                 [({**labels_requete(cle[:4]), "classe": cle[4]}, n) for cle, n in erreurs_requetes])
+        histogramme("services_operation_duree_secondes", "Durée des opérations des services",
+                    [({"operation": operation}, h) for operation, h in operations])
+        compteur("services_operation_erreurs_total", "Opérations en erreur par classe",
+                 [({"operation": operation, "classe": classe}, n) for (operation, classe), n in erreurs_operations])
+        texte = "\n".join(lignes) + "\n"
+        for collecteur in list(self._collecteurs.values()):
+            texte += collecteur()
+        return texte
+
+    def spans(self) -> List[dict]:
+        """Spans terminés (les plus anciens d'abord)"""
+        with self._lock:
+            spans = list(self._spans)
+        return [span.to_dict() for span in spans]
+
+    def spans_otlp(self, service: str = "tutorial_supabase") -> dict:
+        """Spans au format OTLP/JSON (POST /v1/traces d'un collecteur OpenTelemetry)"""
+        types = {"INTERNAL": 1, "CLIENT": 3}
+
+        def valeur(v):
+            if isinstance(v, bool):
+                return {"boolValue": v}
+            if isinstance(v, int):
+                return {"intValue": str(v)}
+            if isinstance(v, float):
+                return {"doubleValue": v}
+            return {"stringValue": str(v)}
+
+        def attributs(d: dict) -> list:
+            return [{"key": k, "value": valeur(v)} for k, v in d.items()]
+
+        return {"resourceSpans": [{
+            "resource": {"attributes": attributs({"service.name": service})},
+            "scopeSpans": [{
+                "scope": {"name": "services.instrumentation"},
+                "spans": [
+                    {
+                        "traceId": s["trace_id"],
+                        "spanId": s["span_id"],
+                        **({"parentSpanId": s["parent_span_id"]} if s["parent_span_id"] else {}),
+                        "name": s["name"],
+                        "kind": types[s["kind"]],
+                        "startTimeUnixNano": str(s["start_time_unix_nano"]),
+                        "endTimeUnixNano": str(s["end_time_unix_nano"]),
+                        "attributes": attributs(s["attributes"]),
+                        "status": {"code": 2, "message": s["status"]["message"]}
+                        if s["status"]["code"] == "ERROR" else {"code": 1},
+                    }
+                    for s in self.spans()
+                ],
+            }],
+        }]}
+
+    def statistiques(self) -> Dict[str, dict]:
+        """Résumé par opération : appels, erreurs, p50/p99 estimés (s), requêtes et octets"""
+        with self._lock:
+            resume = {
+                operation: {
+                    "appels": h.nombre, "erreurs": 0, "duree_p50_s": h.quantile(0.5), "duree_p99_s": h.quantile(0.99),
+                    "requetes": 0, "octets_envoyes": 0, "octets_recus": 0, "lignes": 0,
+                }
+                for operation, h in self._operations.items()
+            }
+            for (operation, classe), n in self._erreurs_operations.items():
+                resume[operation]["erreurs"] += n
+            for (operation, *_), serie in self._requetes.items():
+                entree = resume.setdefault(operation, {
+                    "appels": 0, "erreurs": 0, "duree_p50_s": None, "duree_p99_s": None,
+                    "requetes": 0, "octets_envoyes": 0, "octets_recus": 0, "lignes": 0,
+                })
+                entree["requetes"] += serie.durees.nombre
+                entree["octets_envoyes"] += serie.octets_envoyes
+                entree["octets_recus"] += serie.octets_recus
+                entree["lignes"] += serie.lignes
+        return resume
+
+
+# Instance globale (utilisée par config/transport.py, config/resilience.py et les services)
+instrumentation = Instrumentation(int(os.getenv("INSTRUMENTATION_MAX_SPANS", "10000")))
+if os.getenv("INSTRUMENTATION", "").strip().lower() in ("1", "true", "yes", "oui"):
+    instrumentation.activer()
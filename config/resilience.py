@@ -0,0 +1,492 @@
+# config/resilience.py
+"""
+Résilience des requêtes Supabase, sous le client httpx partagé
+
+- réessais : lectures idempotentes (GET, HEAD, listage Storage) sur 429, 502,
+  503, 504 et erreurs réseau, avec backoff exponentiel à gigue complète ;
+  Retry-After est respecté (au-delà de retry_after_max_s, la réponse est
+  rendue telle quelle). Les écritures ne sont rejouées que si la connexion a
+  échoué avant l'envoi.
+- requêtes doublées (hedging, désactivé par défaut) : une lecture sans réponse
+  après le percentile de latence de son endpoint est envoyée une seconde fois ;
+  la première réponse l'emporte.
+- disjoncteur par endpoint (service + table / fonction / route) : après
+  seuil_echecs échecs consécutifs (5xx, erreurs réseau), les requêtes échouent
+  immédiatement (CircuitOuvert) pendant ouverture_s, puis une requête d'essai
+  décide de la fermeture.
+
+Réglages : variables SUPABASE_REESSAI_*, SUPABASE_HEDGING_*,
+SUPABASE_DISJONCTEUR_* (voir SupabaseConfig.politique_resilience). Compteurs
+et état des disjoncteurs : Resilience.statistiques() et l'export Prometheus de
+config.instrumentation.
+"""
+import asyncio
+import contextvars
+import random
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FuturTimeout, wait
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+import httpx
+
+from config.instrumentation import decrire_url, instrumentation
+
+METHODES_IDEMPOTENTES = ("GET", "HEAD", "OPTIONS")
+# POST en lecture seule : listage Storage
+ROUTES_LECTURE = (("storage", "object/list"),)
+# Erreurs survenues avant l'envoi de la requête : rejouables même pour une écriture
+ERREURS_AVANT_ENVOI = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+FERME, SEMI_OUVERT, OUVERT = "ferme", "semi_ouvert", "ouvert"
+
+
+class CircuitOuvert(httpx.TransportError):
+    """Endpoint en échec répété : requête refusée sans appel réseau"""
+
+
+@dataclass
+class PolitiqueResilience:
+    reessais: int = 3
+    reessai_base_s: float = 0.1
+    reessai_max_s: float = 2.0
+    statuts_reessai: Tuple[int, ...] = (429, 502, 503, 504)
+    retry_after_max_s: float = 10.0
+    hedging: bool = False
+    hedging_percentile: float = 95.0
+    hedging_min_s: float = 0.05
+    hedging_echantillons: int = 50
+    seuil_echecs: int = 5
+    ouverture_s: float = 30.0
+
+
+class Disjoncteur:
+    """
+    Disjoncteur d'un endpoint : fermé -> ouvert -> semi-ouvert (une requête d'essai)
+    L'essai est un bail : s'il n'a rendu ni succès ni échec après ouverture_s
+    (requête bloquée, ou abandonnée sans appel à abandonner()), un autre est accordé
+    """
+
+    __slots__ = ("seuil", "ouverture_s", "etat", "echecs", "ouvert_le", "essai_en_cours", "essai_le", "_lock")
+
+    def __init__(self, seuil: int, ouverture_s: float):
+        self.seuil = seuil
+        self.ouverture_s = ouverture_s
+        self.etat = FERME
+        self.echecs = 0
+        self.ouvert_le = 0.0
+        self.essai_en_cours = False
+        self.essai_le = 0.0
+        self._lock = threading.Lock()
+
+    def autoriser(self) -> Optional[str]:
+        """None si la requête est refusée, sinon FERME, ou SEMI_OUVERT pour la requête d'essai"""
+        if self.etat == FERME:
+            return FERME
+        with self._lock:
+            maintenant = time.monotonic()
+            if self.etat == OUVERT and maintenant - self.ouvert_le >= self.ouverture_s:
+                self.etat = SEMI_OUVERT
+            if self.etat == SEMI_OUVERT and (
+                not self.essai_en_cours or maintenant - self.essai_le >= self.ouverture_s
+            ):
+                self.essai_en_cours, self.essai_le = True, maintenant
+                return SEMI_OUVERT
+            return FERME if self.etat == FERME else None
+
+    def succes(self):
+        if self.etat == FERME and not self.echecs:
+            return
+        with self._lock:
+            self.etat, self.echecs, self.essai_en_cours = FERME, 0, False
+
+    def echec(self) -> bool:
+        """True si le disjoncteur vient de s'ouvrir"""
+        with self._lock:
+            self.echecs += 1
+            self.essai_en_cours = False
+            if self.etat == SEMI_OUVERT or (self.etat == FERME and self.echecs >= self.seuil):
+                self.etat, self.ouvert_le = OUVERT, time.monotonic()
+                return True
+            return False
+
+    def abandonner(self) -> bool:
+        """
+        Requête d'essai interrompue sans réponse (annulation, erreur hors
+        transport) : comptée comme un échec, le disjoncteur se rouvre
+        """
+        with self._lock:
+            if self.etat != SEMI_OUVERT or not self.essai_en_cours:
+                return False
+        return self.echec()
+
+
+class _Latences:
+    """Dernières latences d'un endpoint (jusqu'aux en-têtes), pour le seuil de doublement"""
+
+    __slots__ = ("valeurs", "seuil", "nouvelles")
+
+    def __init__(self, taille: int = 200):
+        self.valeurs: Deque[float] = deque(maxlen=taille)
+        self.seuil: Optional[float] = None
+        self.nouvelles = 0
+
+    def ajouter(self, duree: float, percentile: float, minimum: int):
+        self.valeurs.append(duree)
+        self.nouvelles += 1
+        # Recalculé toutes les 10 mesures : le tri reste hors du chemin courant
+        if len(self.valeurs) >= minimum and self.nouvelles >= 10:
+            triees = sorted(self.valeurs)
+            self.seuil = triees[min(len(triees) - 1, int(len(triees) * percentile / 100))]
+            self.nouvelles = 0
+
+
+def delai_retry_after(valeur: Optional[str]) -> Optional[float]:
+    """Secondes demandées par Retry-After (nombre ou date HTTP)"""
+    if not valeur:
+        return None
+    try:
+        return max(0.0, float(valeur))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valeur).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Resilience:
+    """État partagé par tous les transports d'une configuration : disjoncteurs, latences, compteurs"""
+
+    def __init__(self, politique: PolitiqueResilience):
+        self.politique = politique
+        self._lock = threading.Lock()
+        self._disjoncteurs: Dict[Tuple[str, str], Disjoncteur] = {}
+        self._latences: Dict[Tuple[str, str], _Latences] = {}
+        self._compteurs: Counter = Counter()  # (métrique, service, cible, motif) -> n
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._aleatoire = random.Random()
+        instrumentation.enregistrer_collecteur("resilience", self.exporter_prometheus)
+
+    # --- État par endpoint ---
+
+    def disjoncteur(self, endpoint: Tuple[str, str]) -> Disjoncteur:
+        disjoncteur = self._disjoncteurs.get(endpoint)
+        if disjoncteur is None:
+            with self._lock:
+                disjoncteur = self._disjoncteurs.setdefault(
+                    endpoint, Disjoncteur(self.politique.seuil_echecs, self.politique.ouverture_s)
+                )
+        return disjoncteur
+
+    def observer_latence(self, endpoint: Tuple[str, str], duree: float):
+        latences = self._latences.get(endpoint)
+        if latences is None:
+            with self._lock:
+                latences = self._latences.setdefault(endpoint, _Latences())
+        latences.ajouter(duree, self.politique.hedging_percentile, self.politique.hedging_echantillons)
+
+    def seuil_doublement(self, endpoint: Tuple[str, str]) -> Optional[float]:
+        latences = self._latences.get(endpoint)
+        if latences is None or latences.seuil is None:
+            return None
+        return max(latences.seuil, self.politique.hedging_min_s)
+
+    def compter(self, metrique: str, endpoint: Tuple[str, str], motif: str = ""):
+        with self._lock:
+            self._compteurs[(metrique, *endpoint, motif)] += 1
+
+    def delai_reessai(self, tentative: int, response: Optional[httpx.Response] = None) -> Optional[float]:
+        """Attente avant la tentative suivante ; None si Retry-After dépasse le plafond"""
+        p = self.politique
+        delai = self._aleatoire.uniform(0, min(p.reessai_max_s, p.reessai_base_s * 2 ** tentative))
+        if response is not None:
+            demande = delai_retry_after(response.headers.get("retry-after"))
+            if demande is not None:
+                if demande > p.retry_after_max_s:
+                    return None
+                delai = max(delai, demande)
+        return delai
+
+    def pool(self) -> ThreadPoolExecutor:
+        """Threads des requêtes doublées (synchrones)"""
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedging")
+        return self._pool
+
+    # --- Export ---
+
+    def statistiques(self) -> dict:
+        with self._lock:
+            compteurs = dict(self._compteurs)
+            disjoncteurs = {f"{s}/{c}": d.etat for (s, c), d in self._disjoncteurs.items()}
+        resume: Dict[str, int] = Counter()
+        for (metrique, _, _, motif), n in compteurs.items():
+            resume[f"{metrique}_{motif}" if motif else metrique] += n
+        return {"compteurs": dict(resume), "disjoncteurs": disjoncteurs}
+
+    def exporter_prometheus(self) -> str:
+        with self._lock:
+            compteurs = sorted(self._compteurs.items())
+            disjoncteurs = sorted((cle, d.etat) for cle, d in self._disjoncteurs.items())
+        descriptions = {
+            "reessais": ("supabase_reessais_total", "Requêtes rejouées, par motif (statut ou erreur)"),
+            "doublements": ("supabase_requetes_doublees_total", "Requêtes doublées (lancee, gagnee)"),
+            "rejets": ("supabase_disjoncteur_rejets_total", "Requêtes refusées par un disjoncteur ouvert"),
+            "ouvertures": ("supabase_disjoncteur_ouvertures_total", "Ouvertures de disjoncteur"),
+        }
+        lignes = []
+        for metrique, (nom, aide) in descriptions.items():
+            lignes.append(f"# HELP {nom} {aide}")
+            lignes.append(f"# TYPE {nom} counter")
+            for (m, service, cible, motif), n in compteurs:
+                if m == metrique:
+                    labels = f'service="{service}",cible="{cible}"' + (f',motif="{motif}"' if motif else "")
+                    lignes.append(f"{nom}{{{labels}}} {n}")
+        lignes.append("# HELP supabase_disjoncteur_etat État du disjoncteur (0 fermé, 1 semi-ouvert, 2 ouvert)")
+        lignes.append("# TYPE supabase_disjoncteur_etat gauge")
+        valeurs = {FERME: 0, SEMI_OUVERT: 1, OUVERT: 2}
+        for (service, cible), etat in disjoncteurs:
+            lignes.append(f'supabase_disjoncteur_etat{{service="{service}",cible="{cible}"}} {valeurs[etat]}')
+        return "\n".join(lignes) + "\n"
+
+
+def _decrire(request: httpx.Request) -> Tuple[Tuple[str, str], bool]:
+    """(endpoint, lecture idempotente)"""
+    endpoint = decrire_url(request.url.path)
+    return endpoint, request.method in METHODES_IDEMPOTENTES or endpoint in ROUTES_LECTURE
+
+
+def _rejouable(request: httpx.Request) -> bool:
+    """Corps en mémoire (un flux déjà consommé ne peut pas être renvoyé)"""
+    try:
+        request.content
+        return True
+    except httpx.RequestNotRead:
+        return False
+
+
+def _motif_transitoire(response: httpx.Response, politique: PolitiqueResilience) -> Optional[str]:
+    return str(response.status_code) if response.status_code in politique.statuts_reessai else None
+
+
+class TransportResilient(httpx.BaseTransport):
+    """Réessais, doublement et disjoncteur autour d'un transport synchrone"""
+
+    def __init__(self, transport: httpx.BaseTransport, resilience: Resilience):
+        self.transport = transport
+        self.resilience = resilience
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        r, p = self.resilience, self.resilience.politique
+        endpoint, lecture = _decrire(request)
+        disjoncteur = r.disjoncteur(endpoint)
+        admission = disjoncteur.autoriser()
+        if admission is None:
+            r.compter("rejets", endpoint)
+            raise CircuitOuvert(f"Circuit ouvert pour {endpoint[0]}/{endpoint[1]}", request=request)
+
+        # essai : cette requête détient l'essai du disjoncteur semi-ouvert, sans résultat encore
+        essai = admission == SEMI_OUVERT
+        tentative = 0
+        try:
+            while True:
+                try:
+                    response = self._envoyer(request, endpoint, lecture)
+                except httpx.TransportError as e:
+                    essai = False
+                    if disjoncteur.echec():
+                        r.compter("ouvertures", endpoint)
+                    rejouable = lecture or (isinstance(e, ERREURS_AVANT_ENVOI) and _rejouable(request))
+                    admission = disjoncteur.autoriser() if tentative < p.reessais and rejouable else None
+                    if admission is None:
+                        raise
+                    essai = admission == SEMI_OUVERT
+                    r.compter("reessais", endpoint, type(e).__name__)
+                    time.sleep(r.delai_reessai(tentative))
+                    tentative += 1
+                    continue
+
+                essai = False
+                if response.status_code >= 500:
+                    if disjoncteur.echec():
+                        r.compter("ouvertures", endpoint)
+                else:
+                    disjoncteur.succes()
+                motif = _motif_transitoire(response, p)
+                if motif is None or not lecture or tentative >= p.reessais:
+                    return response
+                delai = r.delai_reessai(tentative, response)
+                admission = disjoncteur.autoriser() if delai is not None else None
+                if admission is None:
+                    return response
+                essai = admission == SEMI_OUVERT
+                response.close()
+                r.compter("reessais", endpoint, motif)
+                time.sleep(delai)
+                tentative += 1
+        except BaseException:
+            # Annulation, interruption ou erreur hors transport : l'essai ne doit pas rester pris
+            if essai and disjoncteur.abandonner():
+                r.compter("ouvertures", endpoint)
+            raise
+
+    def _tenter(self, request: httpx.Request, endpoint: Tuple[str, str]) -> httpx.Response:
+        debut = time.perf_counter()
+        response = self.transport.handle_request(request)
+        if self.resilience.politique.hedging:
+            self.resilience.observer_latence(endpoint, time.perf_counter() - debut)
+        return response
+
+    def _envoyer(self, request: httpx.Request, endpoint: Tuple[str, str], lecture: bool) -> httpx.Response:
+        seuil = self.resilience.seuil_doublement(endpoint) if lecture and self.resilience.politique.hedging else None
+        if seuil is None:
+            return self._tenter(request, endpoint)
+
+        # Chaque tentative dans une copie du contexte (opération en cours pour l'instrumentation)
+        pool = self.resilience.pool()
+        premiere = pool.submit(contextvars.copy_context().run, self._tenter, request, endpoint)
+        try:
+            return premiere.result(timeout=seuil)
+        except FuturTimeout:
+            pass
+        self.resilience.compter("doublements", endpoint, "lancee")
+        seconde = pool.submit(contextvars.copy_context().run, self._tenter, request, endpoint)
+        termines, _ = wait((premiere, seconde), return_when=FIRST_COMPLETED)
+        gagnante = premiere if premiere in termines else seconde
+        perdante = seconde if gagnante is premiere else premiere
+        if gagnante.exception() is not None:
+            # La première à finir a échoué : l'autre a encore sa chance
+            gagnante, perdante = perdante, gagnante
+        elif gagnante is seconde:
+            self.resilience.compter("doublements", endpoint, "gagnee")
+        perdante.add_done_callback(_fermer_perdante)
+        return gagnante.result()
+
+    def close(self):
+        self.transport.close()
+
+
+def _fermer_perdante(futur):
+    if futur.exception() is None:
+        futur.result().close()
+
+
+class TransportResilientAsync(httpx.AsyncBaseTransport):
+    """Réessais, doublement et disjoncteur autour d'un transport asynchrone"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, resilience: Resilience):
+        self.transport = transport
+        self.resilience = resilience
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        r, p = self.resilience, self.resilience.politique
+        endpoint, lecture = _decrire(request)
+        disjoncteur = r.disjoncteur(endpoint)
+        admission = disjoncteur.autoriser()
+        if admission is None:
+            r.compter("rejets", endpoint)
+            raise CircuitOuvert(f"Circuit ouvert pour {endpoint[0]}/{endpoint[1]}", request=request)
+
+        # essai : cette requête détient l'essai du disjoncteur semi-ouvert, sans résultat encore
+        essai = admission == SEMI_OUVERT
+        tentative = 0
+        try:
+            while True:
+                try:
+                    response = await self._envoyer(request, endpoint, lecture)
+                except httpx.TransportError as e:
+                    essai = False
+                    if disjoncteur.echec():
+                        r.compter("ouvertures", endpoint)
+                    rejouable = lecture or (isinstance(e, ERREURS_AVANT_ENVOI) and _rejouable(request))
+                    admission = disjoncteur.autoriser() if tentative < p.reessais and rejouable else None
+                    if admission is None:
+                        raise
+                    essai = admission == SEMI_OUVERT
+                    r.compter("reessais", endpoint, type(e).__name__)
+                    await asyncio.sleep(r.delai_reessai(tentative))
+                    tentative += 1
+                    continue
+
+                essai = False
+                if response.status_code >= 500:
+                    if disjoncteur.echec():
+                        r.compter("ouvertures", endpoint)
+                else:
+                    disjoncteur.succes()
+                motif = _motif_transitoire(response, p)
+                if motif is None or not lecture or tentative >= p.reessais:
+                    return response
+                delai = r.delai_reessai(tentative, response)
+                admission = disjoncteur.autoriser() if delai is not None else None
+                if admission is None:
+                    return response
+                essai = admission == SEMI_OUVERT
+                await response.aclose()
+                r.compter("reessais", endpoint, motif)
+                await asyncio.sleep(delai)
+                tentative += 1
+        except BaseException:
+            # Annulation, interruption ou erreur hors transport : l'essai ne doit pas rester pris
+            if essai and disjoncteur.abandonner():
+                r.compter("ouvertures", endpoint)
+            raise
+
+    async def _tenter(self, request: httpx.Request, endpoint: Tuple[str, str]) -> httpx.Response:
+        debut = time.perf_counter()
+        response = await self.transport.handle_async_request(request)
+        if self.resilience.politique.hedging:
+            self.resilience.observer_latence(endpoint, time.perf_counter() - debut)
+        return response
+
+    async def _envoyer(self, request: httpx.Request, endpoint: Tuple[str, str], lecture: bool) -> httpx.Response:
+        seuil = self.resilience.seuil_doublement(endpoint) if lecture and self.resilience.politique.hedging else None
+        if seuil is None:
+            return await self._tenter(request, endpoint)
+
+        premiere = asyncio.ensure_future(self._tenter(request, endpoint))
+        taches, en_cours, delai = [premiere], {premiere}, seuil
+        gagnante = None
+        try:
+            while en_cours:
+                termines, en_cours = await asyncio.wait(en_cours, timeout=delai, return_when=asyncio.FIRST_COMPLETED)
+                if not termines:
+                    # Pas de réponse dans le seuil : requête doublée
+                    self.resilience.compter("doublements", endpoint, "lancee")
+                    seconde = asyncio.ensure_future(self._tenter(request, endpoint))
+                    taches.append(seconde)
+                    en_cours.add(seconde)
+                    delai = None
+                    continue
+                gagnante = next((t for t in taches if t in termines and t.exception() is None), None)
+                if gagnante is not None:
+                    if gagnante is not premiere:
+                        self.resilience.compter("doublements", endpoint, "gagnee")
+                    return gagnante.result()
+            # Toutes ont échoué : erreur de la première
+            return premiere.result()
+        finally:
+            await self._liberer(taches, gagnante)
+
+    @staticmethod
+    async def _liberer(taches: List["asyncio.Future"], gagnante: Optional["asyncio.Future"]):
+        """
+        Requêtes perdantes (ou toutes, si l'appelant est annulé) annulées puis attendues :
+        connexions rendues au pool, aucune exception de tâche laissée sans lecture ;
+        une réponse arrivée en même temps que la gagnante est fermée
+        """
+        perdantes = [tache for tache in taches if tache is not gagnante]
+        for tache in perdantes:
+            tache.cancel()
+        for resultat in await asyncio.gather(*perdantes, return_exceptions=True):
+            if isinstance(resultat, httpx.Response):
+                await resultat.aclose()
+
+    async def aclose(self):
+        await self.transport.aclose()
@@ -0,0 +1,215 @@
+# config/transport.py
+"""
+Transport httpx des clients Supabase : point de passage unique de toutes les
+requêtes (PostgREST, Storage, Auth, uploads TUS, téléchargements), où elles
+sont mesurées pour config.instrumentation.
+"""
+import json
+from typing import Optional
+
+import httpx
+
+from config.instrumentation import instrumentation, lignes_content_range
+
+
+def classe_erreur(statut: int, corps: bytes) -> str:
+    """'statut code' : code PostgREST (23505...), Auth (error_code) ou Storage (error)"""
+    try:
+        donnees = json.loads(corps)
+    except ValueError:
+        return str(statut)
+    if isinstance(donnees, dict):
+        code = donnees.get("code") if not isinstance(donnees.get("code"), int) else None
+        code = code or donnees.get("error_code") or donnees.get("error")
+        if code:
+            return f"{statut} {code}"
+    return str(statut)
+
+
+def _corps(request: httpx.Request) -> Optional[bytes]:
+    """Corps de la requête s'il est en mémoire (None pour un envoi en flux)"""
+    try:
+        return request.content
+    except httpx.RequestNotRead:
+        return None
+
+
+def _octets_requete(request: httpx.Request) -> Optional[int]:
+    longueur = request.headers.get("content-length")
+    return int(longueur) if longueur is not None else None
+
+
+class _Mesure:
+    """Compte les octets d'un échange et l'enregistre une seule fois, à la fermeture"""
+
+    __slots__ = ("span", "envoyes", "recus", "statut", "lignes", "corps_erreur", "fini")
+
+    def __init__(self, span, envoyes: int):
+        self.span = span
+        self.envoyes = envoyes
+        self.recus = 0
+        self.statut: Optional[int] = None
+        self.lignes: Optional[int] = None
+        self.corps_erreur: Optional[list] = None
+        self.fini = False
+
+    def reponse(self, response: httpx.Response):
+        self.statut = response.status_code
+        self.lignes = lignes_content_range(response.headers.get("content-range"))
+        if self.statut >= 400:
+            self.corps_erreur = []
+
+    def morceau(self, morceau: bytes):
+        self.recus += len(morceau)
+        if self.corps_erreur is not None:
+            self.corps_erreur.append(morceau)
+
+    def terminer(self, erreur: Optional[BaseException] = None):
+        if self.fini:
+            return
+        self.fini = True
+        if erreur is not None:
+            classe = type(erreur).__name__
+        elif self.corps_erreur is not None:
+            classe = classe_erreur(self.statut, b"".join(self.corps_erreur))
+        else:
+            classe = None
+        instrumentation.fin_requete(self.span, self.statut, self.envoyes, self.recus, self.lignes, classe)
+
+
+class _FluxRequete(httpx.SyncByteStream):
+    """Corps de requête sans Content-Length (flux) : octets comptés à l'envoi"""
+
+    def __init__(self, flux, mesure: _Mesure):
+        self._flux = flux
+        self._mesure = mesure
+
+    def __iter__(self):
+        for morceau in self._flux:
+            self._mesure.envoyes += len(morceau)
+            yield morceau
+
+
+class _FluxRequeteAsync(httpx.AsyncByteStream):
+    def __init__(self, flux, mesure: _Mesure):
+        self._flux = flux
+        self._mesure = mesure
+
+    async def __aiter__(self):
+        async for morceau in self._flux:
+            self._mesure.envoyes += len(morceau)
+            yield morceau
+
+
+class _FluxReponse(httpx.SyncByteStream):
+    """Corps de réponse : octets comptés à la lecture, échange enregistré à la fermeture"""
+
+    def __init__(self, flux, mesure: _Mesure):
+        self._flux = flux
+        self._mesure = mesure
+
+    def __iter__(self):
+        try:
+            for morceau in self._flux:
+                self._mesure.morceau(morceau)
+                yield morceau
+        except Exception as e:
+            self._mesure.terminer(e)
+            raise
+
+    def close(self):
+        try:
+            self._flux.close()
+        finally:
+            self._mesure.terminer()
+
+
+class _FluxReponseAsync(httpx.AsyncByteStream):
+    def __init__(self, flux, mesure: _Mesure):
+        self._flux = flux
+        self._mesure = mesure
+
+    async def __aiter__(self):
+        try:
+            async for morceau in self._flux:
+                self._mesure.morceau(morceau)
+                yield morceau
+        except Exception as e:
+            self._mesure.terminer(e)
+            raise
+
+    async def aclose(self):
+        try:
+            await self._flux.aclose()
+        finally:
+            self._mesure.terminer()
+
+
+class TransportSupabase(httpx.BaseTransport):
+    """Transport synchrone mesuré (délègue au pool partagé)"""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if not instrumentation.actif:
+            return self.transport.handle_request(request)
+
+        span = instrumentation.debut_requete(
+            request.method, request.url, _corps(request) if instrumentation.requetes_tracees() else None
+        )
+        envoyes = _octets_requete(request)
+        mesure = _Mesure(span, envoyes or 0)
+        if envoyes is None:
+            request.stream = _FluxRequete(request.stream, mesure)
+        try:
+            response = self.transport.handle_request(request)
+        except Exception as e:
+            mesure.terminer(e)
+            raise
+        mesure.reponse(response)
+        if response.is_closed:
+            # Corps déjà chargé (réponse construite avec content=, ex. MockTransport)
+            mesure.morceau(response.content)
+            mesure.terminer()
+        else:
+            response.stream = _FluxReponse(response.stream, mesure)
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+class TransportSupabaseAsync(httpx.AsyncBaseTransport):
+    """Transport asynchrone mesuré (délègue au pool partagé)"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not instrumentation.actif:
+            return await self.transport.handle_async_request(request)
+
+        span = instrumentation.debut_requete(
+            request.method, request.url, _corps(request) if instrumentation.requetes_tracees() else None
+        )
+        envoyes = _octets_requete(request)
+        mesure = _Mesure(span, envoyes or 0)
+        if envoyes is None:
+            request.stream = _FluxRequeteAsync(request.stream, mesure)
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception as e:
+            mesure.terminer(e)
+            raise
+        mesure.reponse(response)
+        if response.is_closed:
+            # Corps déjà chargé (réponse construite avec content=, ex. MockTransport)
+            mesure.morceau(response.content)
+            mesure.terminer()
+        else:
+            response.stream = _FluxReponseAsync(response.stream, mesure)
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
@@ -177,11 +177,6 @@ def demo_complete():
                 nb_lignes=8000
             )
             
-            dataset_cree = DatasetService.creer_dataset(dataset_train)
-            print(f"✅ Dataset créé: {dataset_cree.nom}")
-            print(f"   Taille: {dataset_cree.get_taille_formatee()}")
-            print(f"   Format: {dataset_cree.format_fichier}")
-            
             # Dataset 2 : Images de validation
             dataset_val = Dataset(
                 nom="Images de validation",
@@ -191,10 +186,6 @@ def demo_complete():
                 nb_lignes=2000
             )
             
-            dataset_cree2 = DatasetService.creer_dataset(dataset_val)
-            print(f"✅ Dataset 2 créé: {dataset_cree2.nom}")
-            print(f"   Taille: {dataset_cree2.get_taille_formatee()}")
-            
             # Dataset 3 : Métadonnées
             dataset_meta = Dataset(
                 nom="Métadonnées et annotations",
@@ -204,8 +195,15 @@ def demo_complete():
                 nb_lignes=10000
             )
             
-            dataset_cree3 = DatasetService.creer_dataset(dataset_meta)
-            print(f"✅ Dataset 3 créé: {dataset_cree3.nom}")
+            # Création groupée : un seul INSERT pour les 3 datasets
+            resultat = DatasetService.creer_datasets_batch([dataset_train, dataset_val, dataset_meta])
+            for dataset_cree in resultat.reussis:
+                print(f"✅ Dataset créé: {dataset_cree.nom}")
+                print(f"   Taille: {dataset_cree.get_taille_formatee()}")
+                print(f"   Format: {dataset_cree.format_fichier}")
+            for echec in resultat.echecs:
+                print(f"❌ Dataset '{echec.element.nom}' non créé: {echec.erreur}")
+            print(f"   ({resultat.get_resume()})")
             
             # Statistiques des datasets
             datasets = DatasetService.lister_datasets_projet(projet_cree.id)
@@ -0,0 +1,149 @@
+# models/chargement.py
+"""
+Instances partiellement chargées (projection de colonnes)
+
+Quand un service ne sélectionne que certaines colonnes, il renvoie une instance
+d'une sous-classe "partielle" du modèle. Les champs absents y sont des
+descripteurs : au premier accès, les colonnes manquantes sont chargées via le
+chargeur fourni par le service. Les champs lourds (ex: hyperparamètres JSONB)
+ne sont chargés que lorsqu'on y accède directement.
+
+Les instances complètes (select('*')) restent de la classe normale et ne
+paient aucun surcoût.
+"""
+from dataclasses import fields
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# chargeur(instance, colonnes) -> {colonne: valeur}
+Chargeur = Callable[[Any, Iterable[str]], Dict[str, Any]]
+
+
+class _ChampParesseux:
+    """Descripteur d'un champ chargé à la demande"""
+
+    def __init__(self, nom: str, stockage):
+        self.nom = nom
+        # Descripteur de slot de la classe de base, ou None (stockage dans __dict__)
+        self.stockage = stockage
+
+    def _lire(self, obj):
+        if self.stockage is not None:
+            return self.stockage.__get__(obj, type(obj))
+        try:
+            return obj.__dict__[self.nom]
+        except KeyError:
+            raise AttributeError(self.nom)
+
+    def __get__(self, obj, type_=None):
+        if obj is None:
+            return self
+        try:
+            return self._lire(obj)
+        except AttributeError:
+            obj._charger_champs(self.nom)
+            return self._lire(obj)
+
+    def __set__(self, obj, valeur):
+        if self.stockage is not None:
+            self.stockage.__set__(obj, valeur)
+        else:
+            obj.__dict__[self.nom] = valeur
+
+
+class ChargementPartiel:
+    """Mixin des modèles : création d'instances partielles"""
+
+    # Pas de __dict__ : les modèles à __slots__ le restent
+    __slots__ = ()
+
+    # Champs coûteux, chargés uniquement quand on y accède
+    CHAMPS_LOURDS = ()
+
+    @classmethod
+    def champs(cls):
+        """Noms des colonnes du modèle"""
+        return [f.name for f in fields(cls)]
+
+    @classmethod
+    def _classe_partielle(cls):
+        partielle = cls.__dict__.get("_partielle")
+        if partielle is None:
+            attributs = {"__slots__": ("_chargeur",), "__repr__": _repr_partiel}
+            for nom in cls.champs():
+                attributs[nom] = _ChampParesseux(nom, _descripteur_slot(cls, nom))
+            partielle = type(f"{cls.__name__}Partiel", (cls,), attributs)
+            cls._partielle = partielle
+        return partielle
+
+    @classmethod
+    def partiel(cls, data: dict, chargeur: Optional[Chargeur] = None):
+        """
+        Instance ne contenant que les colonnes présentes dans data
+        chargeur: appelé pour charger les colonnes manquantes (None : AttributeError)
+        """
+        obj = object.__new__(cls._classe_partielle())
+        obj._chargeur = chargeur
+        for nom, valeur in cls._valeurs_depuis_dict(data).items():
+            setattr(obj, nom, valeur)
+        return obj
+
+    @classmethod
+    def _valeurs_depuis_dict(cls, data: dict) -> Dict[str, Any]:
+        """Conversion colonne -> valeur de champ (surchargée par les modèles)"""
+        noms = set(cls.champs())
+        return {nom: valeur for nom, valeur in data.items() if nom in noms}
+
+    def est_partiel(self) -> bool:
+        """True si certaines colonnes ne sont pas chargées"""
+        return bool(self.champs_manquants())
+
+    def champs_manquants(self):
+        """Colonnes pas encore chargées"""
+        if not hasattr(type(self), "_chargeur"):
+            return []
+        manquants = []
+        for nom in self.champs():
+            try:
+                type(self).__dict__[nom]._lire(self)
+            except AttributeError:
+                manquants.append(nom)
+        return manquants
+
+    def _charger_champs(self, nom: str):
+        """Charge le champ demandé et les autres champs manquants non lourds"""
+        chargeur = self._chargeur
+        if chargeur is None:
+            raise AttributeError(f"Champ '{nom}' non chargé (projection de colonnes)")
+
+        a_charger = [
+            champ for champ in self.champs_manquants()
+            if champ == nom or champ not in self.CHAMPS_LOURDS
+        ]
+        for colonne, valeur in self._valeurs_depuis_dict(chargeur(self, a_charger)).items():
+            setattr(self, colonne, valeur)
+
+        # Colonne absente de la réponse : valeur par défaut None plutôt qu'une boucle
+        for champ in a_charger:
+            try:
+                type(self).__dict__[champ]._lire(self)
+            except AttributeError:
+                setattr(self, champ, None)
+
+
+def _descripteur_slot(cls, nom: str):
+    for base in cls.__mro__:
+        descripteur = base.__dict__.get(nom)
+        if descripteur is not None and type(descripteur).__name__ == "member_descriptor":
+            return descripteur
+    return None
+
+
+def _repr_partiel(self) -> str:
+    """repr sans déclencher de chargement"""
+    valeurs = []
+    for nom in self.champs():
+        try:
+            valeurs.append(f"{nom}={type(self).__dict__[nom]._lire(self)!r}")
+        except AttributeError:
+            pass
+    return f"{type(self).__name__}({', '.join(valeurs)})"
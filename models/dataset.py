@@ -1,11 +1,12 @@
 # models/dataset.py
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Iterable, List, Dict, Any
 from decimal import Decimal
+from models.chargement import ChargementPartiel
 
-@dataclass
-class Dataset:
+@dataclass(slots=True)
+class Dataset(ChargementPartiel):
     nom: str
     projet_id: str
     fichier_url: Optional[str] = None
@@ -14,6 +15,18 @@ class Dataset:
     nb_lignes: Optional[int] = None
     id: Optional[str] = None
     created_at: Optional[datetime] = None
+    # SHA-256 du contenu (uploads dédupliqués, fichier stocké sous cas/)
+    empreinte_sha256: Optional[str] = None
+    # Profil du fichier (format, colonnes et types, contenu d'une archive)
+    schema_colonnes: Optional[Dict[str, Any]] = None
+    # Taille du fichier reçu quand il a été converti (ex: CSV -> Parquet) ; taille_mb = taille stockée
+    taille_originale_mb: Optional[Decimal] = None
+    # Codec de l'objet stocké (gzip, zstd) ; None = stocké tel quel
+    compression: Optional[str] = None
+    updated_at: Optional[datetime] = None
+    
+    # JSONB potentiellement volumineux : chargé uniquement à l'accès (instances partielles)
+    CHAMPS_LOURDS = ('schema_colonnes',)
     
     def to_dict(self) -> dict:
         """Conversion en dictionnaire pour Supabase"""
@@ -31,6 +44,14 @@ class Dataset:
             data["format_fichier"] = self.format_fichier
         if self.nb_lignes is not None:
             data["nb_lignes"] = self.nb_lignes
+        if self.empreinte_sha256:
+            data["empreinte_sha256"] = self.empreinte_sha256
+        if self.schema_colonnes:
+            data["schema_colonnes"] = self.schema_colonnes
+        if self.taille_originale_mb:
+            data["taille_originale_mb"] = float(self.taille_originale_mb)
+        if self.compression:
+            data["compression"] = self.compression
             
         return data
     
@@ -45,9 +66,50 @@ class Dataset:
             taille_mb=Decimal(str(data['taille_mb'])) if data.get('taille_mb') else None,
             format_fichier=data.get('format_fichier'),
             nb_lignes=data.get('nb_lignes'),  # ← AJOUTÉ !
-            created_at=data.get('created_at')
+            created_at=data.get('created_at'),
+            empreinte_sha256=data.get('empreinte_sha256'),
+            schema_colonnes=data.get('schema_colonnes'),
+            taille_originale_mb=Decimal(str(data['taille_originale_mb'])) if data.get('taille_originale_mb') else None,
+            compression=data.get('compression'),
+            updated_at=data.get('updated_at')
         )
     
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict]) -> List['Dataset']:
+        """
+        Création en masse depuis des lignes Supabase
+        taille_mb est gardé en float (pas de Decimal par ligne) : à privilégier
+        pour les traitements analytiques sur de gros volumes
+        """
+        return [
+            cls(
+                row['nom'],
+                row['projet_id'],
+                row.get('fichier_url'),
+                row.get('taille_mb') or None,
+                row.get('format_fichier'),
+                row.get('nb_lignes'),
+                row.get('id'),
+                row.get('created_at'),
+                row.get('empreinte_sha256'),
+                row.get('schema_colonnes'),
+                row.get('taille_originale_mb') or None,
+                row.get('compression'),
+                row.get('updated_at')
+            )
+            for row in rows
+        ]
+    
+    @classmethod
+    def _valeurs_depuis_dict(cls, data: dict) -> dict:
+        """Conversion des colonnes présentes (instances partielles)"""
+        # super() explicite : requis avec dataclass(slots=True)
+        valeurs = super(Dataset, cls)._valeurs_depuis_dict(data)
+        for colonne in ('taille_mb', 'taille_originale_mb'):
+            if colonne in valeurs:
+                valeurs[colonne] = Decimal(str(valeurs[colonne])) if valeurs[colonne] else None
+        return valeurs
+    
     def get_taille_formatee(self) -> str:
         """Retourne la taille formatée (ex: '125.5 MB')"""
         if self.taille_mb:
@@ -57,6 +119,12 @@ class Dataset:
                 return f"{self.taille_mb:.1f} MB"
         return "Taille inconnue"
     
+    def get_gain_conversion(self) -> Optional[float]:
+        """Facteur de réduction obtenu par la conversion (taille originale / taille stockée)"""
+        if self.taille_originale_mb and self.taille_mb:
+            return round(float(self.taille_originale_mb) / float(self.taille_mb), 2)
+        return None
+    
     def est_gros_fichier(self, seuil_mb: float = 100.0) -> bool:
         """Vérifie si le dataset est considéré comme gros"""
         return self.taille_mb and self.taille_mb > seuil_mb
@@ -0,0 +1,138 @@
+# models/dataset_frame.py
+"""
+DatasetFrame : datasets stockés en colonnes NumPy
+
+Pour les traitements analytiques sur des centaines de milliers de datasets,
+une colonne par attribut remplace un objet par ligne. Les helpers de Dataset
+(taille formatée, taille par ligne, statistiques) y sont vectorisés.
+"""
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from models.dataset import Dataset
+
+
+class DatasetFrame:
+    """Collection de datasets en colonnes (une ligne = un dataset)"""
+
+    __slots__ = ("ids", "noms", "projet_ids", "formats", "taille_mb", "nb_lignes")
+
+    def __init__(self, ids, noms, projet_ids, formats, taille_mb, nb_lignes):
+        self.ids = np.asarray(ids, dtype=object)
+        self.noms = np.asarray(noms, dtype=object)
+        self.projet_ids = np.asarray(projet_ids, dtype=object)
+        self.formats = np.asarray(formats, dtype=object)
+        # Valeurs manquantes : NaN
+        self.taille_mb = np.asarray(taille_mb, dtype=np.float64)
+        self.nb_lignes = np.asarray(nb_lignes, dtype=np.float64)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict]) -> 'DatasetFrame':
+        """Construction depuis des lignes Supabase (itérable consommé une fois)"""
+        ids, noms, projet_ids, formats, tailles, lignes = [], [], [], [], [], []
+        nan = float("nan")
+        for row in rows:
+            ids.append(row.get('id'))
+            noms.append(row.get('nom'))
+            projet_ids.append(row.get('projet_id'))
+            formats.append(row.get('format_fichier'))
+            taille = row.get('taille_mb')
+            tailles.append(nan if taille is None else taille)
+            nb = row.get('nb_lignes')
+            lignes.append(nan if nb is None else nb)
+        return cls(ids, noms, projet_ids, formats, tailles, lignes)
+
+    @classmethod
+    def from_datasets(cls, datasets: Iterable[Dataset]) -> 'DatasetFrame':
+        """Construction depuis des instances Dataset"""
+        return cls.from_rows(
+            {
+                'id': d.id,
+                'nom': d.nom,
+                'projet_id': d.projet_id,
+                'format_fichier': d.format_fichier,
+                'taille_mb': None if d.taille_mb is None else float(d.taille_mb),
+                'nb_lignes': d.nb_lignes,
+            }
+            for d in datasets
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def to_datasets(self) -> List[Dataset]:
+        """Retour aux instances Dataset (taille_mb en float)"""
+        return [
+            Dataset(
+                nom=self.noms[i],
+                projet_id=self.projet_ids[i],
+                taille_mb=None if np.isnan(self.taille_mb[i]) else float(self.taille_mb[i]),
+                format_fichier=self.formats[i],
+                nb_lignes=None if np.isnan(self.nb_lignes[i]) else int(self.nb_lignes[i]),
+                id=self.ids[i]
+            )
+            for i in range(len(self))
+        ]
+
+    def taille_totale_mb(self) -> float:
+        """Somme des tailles connues"""
+        return float(np.nansum(self.taille_mb))
+
+    def get_taille_formatee(self) -> np.ndarray:
+        """Version vectorisée de Dataset.get_taille_formatee"""
+        tailles = np.nan_to_num(self.taille_mb, nan=0.0)
+        en_gb = tailles >= 1024
+        valeurs = np.where(en_gb, tailles / 1024, tailles)
+        textes = np.char.add(
+            np.char.mod("%.1f", valeurs),
+            np.where(en_gb, " GB", " MB")
+        ).astype(object)
+        textes[tailles == 0] = "Taille inconnue"
+        return textes
+
+    def est_gros_fichier(self, seuil_mb: float = 100.0) -> np.ndarray:
+        """Version vectorisée de Dataset.est_gros_fichier"""
+        return np.nan_to_num(self.taille_mb, nan=0.0) > seuil_mb
+
+    def calculer_taille_par_ligne(self) -> np.ndarray:
+        """Version vectorisée de Dataset.calculer_taille_par_ligne (NaN si inconnue)"""
+        valide = (np.nan_to_num(self.taille_mb, nan=0.0) > 0) & (np.nan_to_num(self.nb_lignes, nan=0.0) > 0)
+        resultat = np.full(len(self), np.nan)
+        resultat[valide] = np.round(self.taille_mb[valide] * 1024 / self.nb_lignes[valide], 2)
+        return resultat
+
+    def compter_formats(self) -> Dict[str, int]:
+        """Nombre de datasets par format (ordre de première apparition)"""
+        if not len(self):
+            return {}
+        formats = np.array(["inconnu" if f is None else f for f in self.formats], dtype=object)
+        valeurs, premiers, comptes = np.unique(formats, return_index=True, return_counts=True)
+        ordre = np.argsort(premiers)
+        return {str(valeurs[i]): int(comptes[i]) for i in ordre}
+
+    def statistiques(self) -> Dict:
+        """Même résultat que DatasetService.statistiques_datasets"""
+        from services.statistiques import formater_taille_mb
+
+        if not len(self):
+            return {
+                "nombre_datasets": 0,
+                "taille_totale_mb": 0,
+                "taille_totale_formatee": "0 MB",
+                "formats": {},
+                "dataset_plus_gros": None
+            }
+
+        tailles = np.nan_to_num(self.taille_mb, nan=0.0)
+        taille_totale = float(tailles.sum())
+        index_max: Optional[int] = int(np.argmax(tailles))
+
+        return {
+            "nombre_datasets": len(self),
+            "taille_totale_mb": round(taille_totale, 2),
+            "taille_totale_formatee": formater_taille_mb(taille_totale),
+            "formats": self.compter_formats(),
+            "dataset_plus_gros": {
+                "nom": self.noms[index_max],
+                "taille": formater_taille_mb(float(tailles[index_max]))
+            } if tailles[index_max] else None
+        }
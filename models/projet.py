@@ -1,11 +1,12 @@
 # models/projet.py
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, List
 import uuid
+from models.chargement import ChargementPartiel
 
-@dataclass
-class ProjetIA:
+@dataclass(slots=True)
+class ProjetIA(ChargementPartiel):
     nom: str
     description: str
     type_modele: str  # 'NLP', 'Computer Vision', 'ML', 'Deep Learning'
@@ -16,6 +17,9 @@ class ProjetIA:
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     
+    # JSONB potentiellement volumineux : chargé seulement à l'accès
+    CHAMPS_LOURDS = ('hyperparametres',)
+    
     def to_dict(self) -> dict:
         """Conversion en dictionnaire pour Supabase"""
         return {
@@ -41,6 +45,24 @@ class ProjetIA:
             updated_at=data.get('updated_at')
         )
     
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict]) -> List['ProjetIA']:
+        """Création en masse depuis des lignes Supabase"""
+        return [
+            cls(
+                row['nom'],
+                row['description'],
+                row['type_modele'],
+                row.get('hyperparametres', {}),
+                row.get('id'),
+                row.get('statut', 'en_cours'),
+                row.get('created_by'),
+                row.get('created_at'),
+                row.get('updated_at')
+            )
+            for row in rows
+        ]
+    
     def ajouter_hyperparametre(self, nom: str, valeur: Any):
         """Ajouter un hyperparamètre au projet"""
         if self.hyperparametres is None:
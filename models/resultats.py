@@ -0,0 +1,149 @@
+# models/resultats.py
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Tuple
+
+@dataclass
+class EchecLigne:
+    """Échec d'une ligne dans une opération groupée"""
+    index: int
+    element: Any
+    erreur: str
+
+@dataclass
+class ResultatBatch:
+    """Résultat d'une opération groupée (lignes réussies + échecs par ligne)"""
+    reussis: List[Any] = field(default_factory=list)
+    echecs: List[EchecLigne] = field(default_factory=list)
+    nb_requetes: int = 0
+
+    @property
+    def succes(self) -> bool:
+        """True si aucune ligne n'a échoué"""
+        return not self.echecs
+
+    def get_resume(self) -> str:
+        """Résumé pour l'affichage"""
+        return f"{len(self.reussis)} réussi(s), {len(self.echecs)} échec(s) en {self.nb_requetes} requête(s)"
+
+@dataclass
+class ResultatRecherche:
+    """Page de résultats d'une recherche classée"""
+    resultats: List[Any] = field(default_factory=list)
+    scores: List[float] = field(default_factory=list)
+    total: int = 0
+    limite: int = 20
+    offset: int = 0
+    mode: str = "serveur"  # "serveur" (PostgreSQL) ou "local" (index en mémoire)
+
+    @property
+    def a_suivante(self) -> bool:
+        """True s'il reste des résultats après cette page"""
+        return self.offset + len(self.resultats) < self.total
+
+    def get_resume(self) -> str:
+        """Résumé pour l'affichage"""
+        if not self.resultats:
+            return f"Aucun résultat ({self.mode})"
+        return (f"Résultats {self.offset + 1}-{self.offset + len(self.resultats)} "
+                f"sur {self.total} ({self.mode})")
+
+@dataclass
+class ResultatSuppression(ResultatBatch):
+    """
+    Résultat d'une suppression groupée
+    reussis: identifiants supprimés en base ; echecs: lignes non supprimées
+    echecs_fichiers: lignes supprimées dont le fichier n'a pas pu l'être
+    """
+    fichiers_supprimes: List[str] = field(default_factory=list)
+    echecs_fichiers: List[EchecLigne] = field(default_factory=list)
+
+    def get_resume(self) -> str:
+        """Résumé pour l'affichage"""
+        return (f"{len(self.reussis)} supprimé(s), {len(self.echecs)} échec(s), "
+                f"{len(self.fichiers_supprimes)} fichier(s) supprimé(s), "
+                f"{len(self.echecs_fichiers)} échec(s) fichier en {self.nb_requetes} requête(s)")
+
+@dataclass
+class RapportSuppressionProjet:
+    """
+    Rapport d'une suppression de projet en cascade (ou de sa simulation)
+    nb_requetes: requêtes base et suppressions de fichiers (hors listage du stockage)
+    """
+    projet_id: str
+    dry_run: bool = False
+    projet_trouve: bool = False
+    nb_datasets: int = 0
+    nb_fichiers: int = 0
+    octets: int = 0
+    fichiers_supprimes: int = 0
+    echecs_fichiers: List[EchecLigne] = field(default_factory=list)
+    projet_supprime: bool = False
+    nb_requetes: int = 0
+
+    def get_resume(self) -> str:
+        """Résumé pour l'affichage"""
+        if not self.projet_trouve:
+            return f"Projet {self.projet_id} introuvable"
+        taille = f"{self.octets / (1024 * 1024):.1f} MB"
+        if self.dry_run:
+            return (f"Simulation : {self.nb_datasets} dataset(s), {self.nb_fichiers} fichier(s) "
+                    f"({taille}) seraient supprimés")
+        etat = "supprimé" if self.projet_supprime else "conservé (échecs de suppression de fichiers)"
+        return (f"Projet {etat} : {self.nb_datasets} dataset(s), "
+                f"{self.fichiers_supprimes}/{self.nb_fichiers} fichier(s) ({taille}), "
+                f"{len(self.echecs_fichiers)} échec(s) en {self.nb_requetes} requête(s)")
+
+@dataclass
+class ResultatConversion:
+    """Fichier Parquet produit par la conversion à l'ingestion"""
+    chemin_parquet: str
+    format_source: str
+    octets_source: int
+    octets_parquet: int
+    nb_lignes: int
+    duree_s: float
+
+    @property
+    def taux_compression(self) -> float:
+        """Taille source / taille Parquet"""
+        return self.octets_source / self.octets_parquet if self.octets_parquet else 0.0
+
+    @property
+    def debit_mb_s(self) -> float:
+        """Débit de conversion (MB source lus par seconde)"""
+        return self.octets_source / (1024 * 1024) / self.duree_s if self.duree_s else 0.0
+
+    def get_resume(self) -> str:
+        """Résumé pour l'affichage"""
+        return (f"{self.format_source} -> parquet : {self.nb_lignes} ligne(s), "
+                f"x{self.taux_compression:.1f} plus petit, {self.debit_mb_s:.0f} MB/s")
+
+@dataclass
+class RapportStockage:
+    """Occupation d'un bucket par préfixe (StorageService.rapport_prefixes)"""
+    bucket: str
+    prefixe: str = ""
+    profondeur: int = 1
+    octets_par_prefixe: Dict[str, int] = field(default_factory=dict)
+    objets_par_prefixe: Dict[str, int] = field(default_factory=dict)
+
+    def ajouter(self, prefixe: str, taille: int):
+        self.octets_par_prefixe[prefixe] = self.octets_par_prefixe.get(prefixe, 0) + taille
+        self.objets_par_prefixe[prefixe] = self.objets_par_prefixe.get(prefixe, 0) + 1
+
+    @property
+    def octets(self) -> int:
+        return sum(self.octets_par_prefixe.values())
+
+    @property
+    def nb_objets(self) -> int:
+        return sum(self.objets_par_prefixe.values())
+
+    def plus_gros(self, n: int = 10) -> List[Tuple[str, int]]:
+        """Les n préfixes les plus volumineux, (préfixe, octets)"""
+        return sorted(self.octets_par_prefixe.items(), key=lambda item: item[1], reverse=True)[:n]
+
+    def get_resume(self) -> str:
+        """Résumé pour l'affichage"""
+        return (f"{self.bucket}/{self.prefixe} : {self.nb_objets} objet(s), "
+                f"{self.octets / (1024 * 1024):.1f} MB dans {len(self.octets_par_prefixe)} préfixe(s)")
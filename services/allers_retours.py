@@ -0,0 +1,224 @@
+# services/allers_retours.py
+"""
+Budget d'allers-retours des parcours de haut niveau
+
+Enregistre chaque requête PostgREST / Storage / Auth faite dans un bloc (même
+depuis les threads des services) et en déduit :
+- la chaîne séquentielle : la plus longue suite de requêtes dont chacune
+  commence après la fin de la précédente, c'est-à-dire les latences réseau
+  qui s'additionnent (N+1, lecture puis écriture...)
+- les doublons : requêtes identiques (méthode, URL, corps) répétées
+
+    with tracer_allers_retours("statistiques", max_allers_retours=1) as trace:
+        DatasetService.statistiques_datasets(projet_id)
+    print(trace.rapport())
+
+    @budget_allers_retours(3, max_sequentiels=2)
+    def supprimer(dataset_id): ...
+
+Au-delà du budget déclaré, BudgetAllersRetoursDepasse (une AssertionError :
+un test échoue) est levée à la sortie du bloc. Voir benchmarks/verifier_budgets.py
+pour les budgets vérifiés contre le Supabase local.
+"""
+import functools
+import heapq
+import inspect
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from services.instrumentation import instrumentation
+
+
+class BudgetAllersRetoursDepasse(AssertionError):
+    """Un parcours a fait plus d'allers-retours que son budget"""
+
+    def __init__(self, trace: "TraceAllersRetours", depassements: List[str]):
+        self.trace = trace
+        self.depassements = depassements
+        super().__init__(f"Budget d'allers-retours dépassé ({'; '.join(depassements)})\n{trace.rapport()}")
+
+
+class RequeteTracee:
+    """Requête enregistrée par une trace (instants en secondes depuis le début de la trace)"""
+
+    __slots__ = ("operation", "methode", "url", "empreinte", "statut", "debut", "fin")
+
+    def __init__(self, operation: str, methode: str, url: str, empreinte: Optional[str],
+                 statut: Optional[int], debut: float, fin: float):
+        self.operation = operation
+        self.methode = methode
+        self.url = url
+        self.empreinte = empreinte
+        self.statut = statut
+        self.debut = debut
+        self.fin = fin
+
+    @property
+    def cle(self) -> Tuple[str, str, Optional[str]]:
+        """Identité de la requête pour les doublons"""
+        return self.methode, self.url, self.empreinte
+
+    def __repr__(self) -> str:
+        url = self.url if len(self.url) <= 160 else self.url[:157] + "..."
+        return f"{url} [{self.statut}] ({self.operation or 'hors service'})"
+
+
+class TraceAllersRetours:
+    """
+    Requêtes faites dans un bloc with (ou un appel décoré)
+    max_allers_retours: budget total de requêtes
+    max_sequentiels: budget de la chaîne séquentielle
+    max_doublons: requêtes identiques en trop tolérées (None : non vérifié)
+    """
+
+    def __init__(
+        self,
+        nom: str = "",
+        max_allers_retours: Optional[int] = None,
+        max_sequentiels: Optional[int] = None,
+        max_doublons: Optional[int] = None
+    ):
+        self.nom = nom
+        self.max_allers_retours = max_allers_retours
+        self.max_sequentiels = max_sequentiels
+        self.max_doublons = max_doublons
+        self.requetes: List[RequeteTracee] = []
+        self._lock = threading.Lock()
+        self._origine = 0.0
+        self._jeton = None
+
+    def __enter__(self) -> "TraceAllersRetours":
+        self._origine = time.perf_counter()
+        self._jeton = instrumentation.ouvrir_trace(self)
+        return self
+
+    def __exit__(self, type_erreur, erreur, tb):
+        instrumentation.fermer_trace(self._jeton)
+        if type_erreur is None:
+            self.verifier()
+        return False
+
+    def _enregistrer(self, span):
+        url, empreinte = span.requete or (span.nom, None)
+        debut = span._debut - self._origine
+        requete = RequeteTracee(
+            span.operation, span.attributs["http.request.method"], url, empreinte,
+            span.attributs.get("http.response.status_code"), debut, debut + span.duree
+        )
+        with self._lock:
+            self.requetes.append(requete)
+
+    # --- Analyse ---
+
+    @property
+    def nombre(self) -> int:
+        return len(self.requetes)
+
+    def chaine_sequentielle(self) -> List[RequeteTracee]:
+        """Plus longue suite de requêtes qui ne se chevauchent pas (ordre chronologique)"""
+        requetes = sorted(self.requetes, key=lambda r: r.debut)
+        longueurs: List[int] = []
+        precedentes: List[Optional[int]] = []
+        # Les débuts étant croissants, une requête terminée avant un début l'est
+        # aussi avant tous les suivants : on ne garde que la plus longue chaîne close
+        en_cours: List[Tuple[float, int]] = []
+        meilleure, fin_meilleure = 0, None
+        for i, requete in enumerate(requetes):
+            while en_cours and en_cours[0][0] <= requete.debut:
+                _, j = heapq.heappop(en_cours)
+                if longueurs[j] > meilleure:
+                    meilleure, fin_meilleure = longueurs[j], j
+            longueurs.append(meilleure + 1)
+            precedentes.append(fin_meilleure)
+            heapq.heappush(en_cours, (requete.fin, i))
+        if not requetes:
+            return []
+        i = max(range(len(requetes)), key=longueurs.__getitem__)
+        chaine = []
+        while i is not None:
+            chaine.append(requetes[i])
+            i = precedentes[i]
+        return chaine[::-1]
+
+    @property
+    def sequentiels(self) -> int:
+        return len(self.chaine_sequentielle())
+
+    def doublons(self) -> Dict[Tuple[str, str, Optional[str]], int]:
+        """{(méthode, URL, empreinte du corps): nombre d'envois} des requêtes répétées"""
+        compteur = Counter(requete.cle for requete in self.requetes)
+        return {cle: n for cle, n in compteur.items() if n > 1}
+
+    @property
+    def nb_doublons(self) -> int:
+        """Requêtes en trop (une requête envoyée 3 fois compte pour 2)"""
+        return sum(n - 1 for n in self.doublons().values())
+
+    def par_operation(self) -> Dict[str, int]:
+        return dict(Counter(requete.operation or "hors service" for requete in self.requetes))
+
+    def depassements(self) -> List[str]:
+        depassements = []
+        if self.max_allers_retours is not None and self.nombre > self.max_allers_retours:
+            depassements.append(f"{self.nombre} allers-retours > {self.max_allers_retours}")
+        if self.max_sequentiels is not None and self.sequentiels > self.max_sequentiels:
+            depassements.append(f"{self.sequentiels} séquentiels > {self.max_sequentiels}")
+        if self.max_doublons is not None and self.nb_doublons > self.max_doublons:
+            depassements.append(f"{self.nb_doublons} doublons > {self.max_doublons}")
+        return depassements
+
+    def verifier(self):
+        """Lève BudgetAllersRetoursDepasse si un budget est dépassé"""
+        depassements = self.depassements()
+        if depassements:
+            raise BudgetAllersRetoursDepasse(self, depassements)
+
+    def rapport(self) -> str:
+        chaine = self.chaine_sequentielle()
+        lignes = [
+            f"{self.nom or 'trace'} : {self.nombre} allers-retours, "
+            f"{len(chaine)} séquentiels, {self.nb_doublons} doublons",
+            "  par opération : " + ", ".join(f"{op} {n}" for op, n in sorted(self.par_operation().items())),
+        ]
+        if len(chaine) > 1:
+            lignes.append("  chaîne séquentielle :")
+            lignes.extend(f"    {i}. {requete!r}" for i, requete in enumerate(chaine, 1))
+        for (methode, url, _), n in sorted(self.doublons().items(), key=lambda e: -e[1]):
+            lignes.append(f"  doublon x{n} : {url if len(url) <= 160 else url[:157] + '...'}")
+        return "\n".join(lignes)
+
+
+def tracer_allers_retours(
+    nom: str = "",
+    max_allers_retours: Optional[int] = None,
+    max_sequentiels: Optional[int] = None,
+    max_doublons: Optional[int] = None
+) -> TraceAllersRetours:
+    """Context manager : trace (et budget, si déclaré) des requêtes du bloc"""
+    return TraceAllersRetours(nom, max_allers_retours, max_sequentiels, max_doublons)
+
+
+def budget_allers_retours(
+    max_allers_retours: Optional[int] = None,
+    max_sequentiels: Optional[int] = None,
+    max_doublons: Optional[int] = None
+):
+    """Décorateur : chaque appel (fonction ou coroutine) est tracé et vérifié contre le budget"""
+    def decorer(fonction):
+        nom = getattr(fonction, "__qualname__", str(fonction))
+
+        if inspect.iscoroutinefunction(fonction):
+            @functools.wraps(fonction)
+            async def coroutine(*args, **kwargs):
+                with TraceAllersRetours(nom, max_allers_retours, max_sequentiels, max_doublons):
+                    return await fonction(*args, **kwargs)
+            return coroutine
+
+        @functools.wraps(fonction)
+        def appel(*args, **kwargs):
+            with TraceAllersRetours(nom, max_allers_retours, max_sequentiels, max_doublons):
+                return fonction(*args, **kwargs)
+        return appel
+    return decorer
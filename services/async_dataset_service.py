@@ -0,0 +1,192 @@
+# services/async_dataset_service.py
+import asyncio
+from typing import List, Dict, Optional, Iterable
+from decimal import Decimal
+from config.database import get_async_supabase
+from models.dataset import Dataset
+from services.cache import cache, tag_projet, tags_datasets, TAG_TOUS_DATASETS
+from services.concurrence import executer_async
+from services.dataset_service import DatasetService
+from services.async_storage_service import AsyncStorageService
+from services.projection import normaliser_fields, colonnes_select, hydrater
+from services.rpc import appeler_rpc_async
+from services.statistiques import CompteurDatasets
+from services.statistiques_store import statistiques_store
+from services.instrumentation import instrumenter_service
+
+@instrumenter_service
+class AsyncDatasetService:
+    """Version asynchrone de DatasetService (mêmes modèles)"""
+
+    @staticmethod
+    async def creer_dataset(dataset: Dataset) -> Dataset:
+        """Créer un nouveau dataset"""
+        try:
+            client = await get_async_supabase()
+            response = await executer_async(client.table('datasets').insert(dataset.to_dict()))
+
+            if response.data:
+                cache.invalider(*tags_datasets(dataset.projet_id))
+                statistiques_store.publier_lignes('datasets', 'INSERT', response.data)
+                return Dataset.from_dict(response.data[0])
+            else:
+                raise Exception("Erreur lors de la création du dataset")
+
+        except Exception as e:
+            raise Exception(f"Erreur service dataset: {str(e)}")
+
+    @staticmethod
+    async def lister_datasets_projet(projet_id: str, fields: Optional[Iterable[str]] = None) -> List[Dataset]:
+        """
+        Lister tous les datasets d'un projet
+        fields: colonnes à récupérer (instances partielles, sans chargement à la demande)
+        """
+        try:
+            fields = normaliser_fields(Dataset, fields)
+
+            async def charger():
+                client = await get_async_supabase()
+                response = await executer_async(
+                    client.table('datasets')
+                    .select(colonnes_select(fields))
+                    .eq('projet_id', projet_id)
+                    .order('created_at', desc=True)
+                )
+                return response.data
+
+            lignes = await cache.charger_async(
+                ("datasets", projet_id, fields), [tag_projet(projet_id), TAG_TOUS_DATASETS], charger
+            )
+            return [hydrater(Dataset, item, fields) for item in lignes]
+
+        except Exception as e:
+            raise Exception(f"Erreur récupération datasets: {str(e)}")
+
+    @staticmethod
+    async def obtenir_dataset(dataset_id: str, fields: Optional[Iterable[str]] = None) -> Optional[Dataset]:
+        """Dataset par identifiant, None s'il n'existe pas"""
+        try:
+            fields = normaliser_fields(Dataset, fields)
+            client = await get_async_supabase()
+            response = await executer_async(
+                client.table('datasets')
+                .select(colonnes_select(fields))
+                .eq('id', dataset_id)
+                .limit(1)
+            )
+            return hydrater(Dataset, response.data[0], fields) if response.data else None
+
+        except Exception as e:
+            raise Exception(f"Erreur récupération dataset: {str(e)}")
+
+    @staticmethod
+    async def uploader_et_creer_dataset(
+        fichier_path: str,
+        nom_dataset: str,
+        projet_id: str,
+        format_fichier: str
+    ) -> Dataset:
+        """Upload un fichier et crée le dataset correspondant"""
+        try:
+            taille_mb = DatasetService.calculer_taille_mb(fichier_path)
+            nom_fichier = DatasetService.generer_nom_fichier(fichier_path, projet_id)
+
+            fichier_url = await AsyncStorageService.uploader_dataset(fichier_path, nom_fichier)
+
+            if not fichier_url:
+                raise Exception("Erreur lors de l'upload du fichier")
+
+            dataset = Dataset(
+                nom=nom_dataset,
+                projet_id=projet_id,
+                fichier_url=fichier_url,
+                taille_mb=Decimal(str(taille_mb)),
+                format_fichier=format_fichier
+            )
+
+            return await AsyncDatasetService.creer_dataset(dataset)
+
+        except Exception as e:
+            raise Exception(f"Erreur upload dataset: {str(e)}")
+
+    @staticmethod
+    async def supprimer_dataset(dataset_id: str, supprimer_fichier: bool = True) -> bool:
+        """
+        Supprimer un dataset et optionnellement son fichier (False s'il n'existe pas)
+        Même chemin que DatasetService.supprimer_dataset, dans un thread : un fichier
+        dédupliqué (cas/) n'est supprimé que si plus aucun dataset ne le référence
+        """
+        return await asyncio.to_thread(DatasetService.supprimer_dataset, dataset_id, supprimer_fichier)
+
+    @staticmethod
+    async def statistiques_datasets(projet_id: str) -> Dict:
+        """Récupère les statistiques des datasets d'un projet (agrégées par PostgreSQL)"""
+        try:
+            if statistiques_store.actif:
+                stats = statistiques_store.statistiques_datasets(projet_id, charger=False)
+                if stats is None:
+                    stats = await asyncio.to_thread(statistiques_store.statistiques_datasets, projet_id)
+                return stats
+
+            async def charger():
+                agregat = await appeler_rpc_async('statistiques_datasets', {'p_projet_id': projet_id})
+                if agregat is not None:
+                    return CompteurDatasets.depuis_agregat(agregat)
+                # Fonction SQL non déployée : calcul côté client dans un thread
+                return await asyncio.to_thread(DatasetService.statistiques_datasets_client, projet_id)
+
+            return await cache.charger_async(
+                ("stats_datasets", projet_id), [tag_projet(projet_id), TAG_TOUS_DATASETS], charger
+            )
+
+        except Exception as e:
+            raise Exception(f"Erreur calcul statistiques: {str(e)}")
+
+    @staticmethod
+    async def rechercher_datasets(
+        terme: str,
+        projet_id: str = None,
+        fields: Optional[Iterable[str]] = None
+    ) -> List[Dataset]:
+        """Recherche des datasets par nom ou description"""
+        try:
+            fields = normaliser_fields(Dataset, fields)
+            client = await get_async_supabase()
+            requete = client.table('datasets').select(colonnes_select(fields)).ilike('nom', f'%{terme}%')
+
+            if projet_id:
+                requete = requete.eq('projet_id', projet_id)
+
+            response = await executer_async(requete)
+
+            return [hydrater(Dataset, item, fields) for item in response.data]
+
+        except Exception as e:
+            raise Exception(f"Erreur recherche datasets: {str(e)}")
+
+    @staticmethod
+    async def mettre_a_jour_dataset(dataset_id: str, updates: Dict) -> Dataset:
+        """Mettre à jour un dataset"""
+        try:
+            updates['updated_at'] = 'now()'
+
+            client = await get_async_supabase()
+            response = await executer_async(
+                client.table('datasets')
+                .update(updates)
+                .eq('id', dataset_id)
+            )
+
+            if response.data:
+                # Un dataset déplacé invalide aussi son ancien projet (inconnu ici)
+                cache.invalider(*(
+                    (TAG_TOUS_DATASETS,) if 'projet_id' in updates
+                    else tags_datasets(response.data[0].get('projet_id'))
+                ))
+                statistiques_store.publier_lignes('datasets', 'UPDATE', response.data)
+                return Dataset.from_dict(response.data[0])
+            else:
+                raise Exception("Dataset non trouvé")
+
+        except Exception as e:
+            raise Exception(f"Erreur mise à jour dataset: {str(e)}")
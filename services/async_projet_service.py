@@ -0,0 +1,153 @@
+# services/async_projet_service.py
+import asyncio
+from typing import List, Optional, Iterable
+from config.database import get_async_supabase
+from models.projet import ProjetIA
+from services.cache import cache, tag_utilisateur, tags_datasets, TAG_TOUS_PROJETS
+from services.concurrence import executer_async
+from services.projection import normaliser_fields, colonnes_select, hydrater
+from services.projet_service import ProjetService
+from services.rpc import appeler_rpc_async
+from services.statistiques import CompteurProjets
+from services.statistiques_store import statistiques_store
+from services.instrumentation import instrumenter_service
+
+@instrumenter_service
+class AsyncProjetService:
+    """Version asynchrone de ProjetService (mêmes modèles, même validation)"""
+
+    @staticmethod
+    async def creer_projet_ia(projet: ProjetIA, user_id: str) -> ProjetIA:
+        """Création avec validation métier"""
+        try:
+            ProjetService.valider_projet(projet)
+
+            data = projet.to_dict()
+            data['created_by'] = user_id
+
+            client = await get_async_supabase()
+            response = await executer_async(client.table('projets_ia').insert(data))
+
+            if response.data:
+                cache.invalider(tag_utilisateur(user_id), TAG_TOUS_PROJETS)
+                statistiques_store.publier_lignes('projets_ia', 'INSERT', response.data)
+                return ProjetIA.from_dict(response.data[0])
+            else:
+                raise Exception("Erreur lors de la création")
+
+        except Exception as e:
+            raise Exception(f"Erreur service création: {str(e)}")
+
+    @staticmethod
+    async def lister_projets(user_id: str, fields: Optional[Iterable[str]] = None) -> List[ProjetIA]:
+        """
+        Lister tous les projets d'un utilisateur
+        fields: colonnes à récupérer (instances partielles, sans chargement à la demande)
+        """
+        try:
+            fields = normaliser_fields(ProjetIA, fields)
+
+            async def charger():
+                client = await get_async_supabase()
+                response = await executer_async(
+                    client.table('projets_ia')
+                    .select(colonnes_select(fields))
+                    .eq('created_by', user_id)
+                    .order('created_at', desc=True)
+                )
+                return response.data
+
+            lignes = await cache.charger_async(("projets", user_id, fields), [tag_utilisateur(user_id)], charger)
+            return [hydrater(ProjetIA, item, fields) for item in lignes]
+
+        except Exception as e:
+            raise Exception(f"Erreur lors de la récupération: {str(e)}")
+
+    @staticmethod
+    async def mettre_a_jour_projet(projet_id: str, updates: dict, user_id: str) -> ProjetIA:
+        """Mettre à jour un projet"""
+        try:
+            updates['updated_at'] = 'now()'
+
+            client = await get_async_supabase()
+            response = await executer_async(
+                client.table('projets_ia')
+                .update(updates)
+                .eq('id', projet_id)
+                .eq('created_by', user_id)
+            )
+
+            if response.data:
+                cache.invalider(tag_utilisateur(user_id), TAG_TOUS_PROJETS)
+                statistiques_store.publier_lignes('projets_ia', 'UPDATE', response.data)
+                return ProjetIA.from_dict(response.data[0])
+            else:
+                raise Exception("Projet non trouvé ou accès refusé")
+
+        except Exception as e:
+            raise Exception(f"Erreur mise à jour: {str(e)}")
+
+    @staticmethod
+    async def supprimer_projet(projet_id: str, user_id: str) -> bool:
+        """Supprimer un projet"""
+        try:
+            client = await get_async_supabase()
+            response = await executer_async(
+                client.table('projets_ia')
+                .delete()
+                .eq('id', projet_id)
+                .eq('created_by', user_id)
+            )
+
+            if response.data:
+                cache.invalider(tag_utilisateur(user_id), *tags_datasets(projet_id), TAG_TOUS_PROJETS)
+                statistiques_store.oublier_projet(projet_id)
+
+            return len(response.data) > 0
+
+        except Exception as e:
+            raise Exception(f"Erreur suppression: {str(e)}")
+
+    @staticmethod
+    async def rechercher_projets(user_id: str, terme: str, fields: Optional[Iterable[str]] = None) -> List[ProjetIA]:
+        """Recherche full-text dans les projets"""
+        try:
+            fields = normaliser_fields(ProjetIA, fields)
+            client = await get_async_supabase()
+            response = await executer_async(
+                client.table('projets_ia')
+                .select(colonnes_select(fields))
+                .eq('created_by', user_id)
+                .or_(f'nom.ilike.%{terme}%,description.ilike.%{terme}%')
+            )
+
+            return [hydrater(ProjetIA, item, fields) for item in response.data]
+
+        except Exception as e:
+            raise Exception(f"Erreur recherche: {str(e)}")
+
+    @staticmethod
+    async def statistiques_projets(user_id: str) -> dict:
+        """Analytics en temps réel des projets (agrégées par PostgreSQL)"""
+        try:
+            if user_id and statistiques_store.actif:
+                stats = statistiques_store.statistiques_projets(user_id, charger=False)
+                if stats is None:
+                    stats = await asyncio.to_thread(statistiques_store.statistiques_projets, user_id)
+                return stats
+
+            async def charger():
+                agregat = await appeler_rpc_async('statistiques_projets', {'p_user_id': user_id or None})
+                if agregat is not None:
+                    return CompteurProjets.depuis_agregat(agregat)
+                # Fonction SQL non déployée : calcul côté client dans un thread
+                return await asyncio.to_thread(ProjetService.statistiques_projets_client, user_id)
+
+            return await cache.charger_async(
+                ("stats_projets", user_id),
+                [tag_utilisateur(user_id) if user_id else TAG_TOUS_PROJETS],
+                charger
+            )
+
+        except Exception as e:
+            raise Exception(f"Erreur calcul statistiques: {str(e)}")
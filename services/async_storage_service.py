@@ -0,0 +1,52 @@
+# services/async_storage_service.py
+import asyncio
+from typing import Optional, List
+from config.database import get_async_supabase
+from services.concurrence import limite_concurrence
+from services.instrumentation import instrumenter_service
+from services.storage_service import StorageService
+
+@instrumenter_service
+class AsyncStorageService:
+    """Version asynchrone de StorageService"""
+
+    @staticmethod
+    async def uploader_dataset(fichier_path: str, nom_fichier: str, bucket: str = "datasets") -> Optional[str]:
+        """
+        Upload d'un dataset
+        Envoi de StorageService._envoyer dans un thread : fichier lu par blocs
+        (résumable au-delà du seuil), jamais chargé en entier en mémoire
+        """
+        try:
+            async with limite_concurrence():
+                await asyncio.to_thread(StorageService._envoyer, fichier_path, nom_fichier, bucket, None, None)
+
+            # Récupérer l'URL publique
+            client = await get_async_supabase()
+            return await client.storage.from_(bucket).get_public_url(nom_fichier)
+
+        except Exception as e:
+            raise Exception(f"Erreur upload: {str(e)}")
+
+    @staticmethod
+    async def lister_fichiers(bucket: str = "datasets") -> List[dict]:
+        """Lister les fichiers d'un bucket"""
+        try:
+            client = await get_async_supabase()
+            async with limite_concurrence():
+                return await client.storage.from_(bucket).list()
+
+        except Exception as e:
+            raise Exception(f"Erreur listage: {str(e)}")
+
+    @staticmethod
+    async def supprimer_fichier(nom_fichier: str, bucket: str = "datasets") -> bool:
+        """Supprimer un fichier"""
+        try:
+            client = await get_async_supabase()
+            async with limite_concurrence():
+                response = await client.storage.from_(bucket).remove([nom_fichier])
+            return len(response) > 0
+
+        except Exception as e:
+            raise Exception(f"Erreur suppression: {str(e)}")
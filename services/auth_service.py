@@ -1,6 +1,8 @@
 from config.database import supabase
 from typing import Optional, Dict
+from services.instrumentation import instrumenter_service
 
+@instrumenter_service
 class AuthService:
     
     @staticmethod
@@ -0,0 +1,303 @@
+# services/cache.py
+"""
+Cache en lecture pour les listings et statistiques des services
+
+- CacheLRU : cache en mémoire du processus (LRU + TTL), thread-safe
+- BackendCache : interface à implémenter pour un cache partagé (Redis, ...)
+
+Les entrées sont associées à des tags (utilisateur, projet) : une écriture
+invalide uniquement les entrées des tags concernés. Sur une absence, les
+lectures concurrentes de la même clé n'en font qu'une (services/coalescence.py).
+"""
+import copy
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from services.coalescence import coalescence
+
+# Sentinelle : distingue "absent du cache" d'une valeur None mise en cache
+ABSENT = object()
+
+
+def tag_utilisateur(user_id: Optional[str]) -> Tuple:
+    """Tag des entrées dépendant des projets d'un utilisateur"""
+    return ("user", user_id)
+
+
+def tag_projet(projet_id: Optional[str]) -> Tuple:
+    """Tag des entrées dépendant des datasets d'un projet"""
+    return ("projet", projet_id)
+
+
+def tags_datasets(*projet_ids: Optional[str]) -> Tuple[Tuple, ...]:
+    """
+    Tags à invalider après une écriture sur des datasets : ceux de leurs
+    projets et ceux des entrées sur tous les projets (projet_id None :
+    index de recherche global, statistiques globales)
+    """
+    return (*{tag_projet(projet_id) for projet_id in projet_ids}, tag_projet(None))
+
+
+# Entrées qui dépendent de tous les projets (statistiques sans utilisateur)
+TAG_TOUS_PROJETS = ("projets",)
+# Entrées qui dépendent de tous les datasets
+TAG_TOUS_DATASETS = ("datasets",)
+
+
+class BackendCache(ABC):
+    """Interface d'un backend de cache (local ou partagé)"""
+
+    @abstractmethod
+    def obtenir(self, cle: Hashable) -> Any:
+        """Valeur associée à la clé, ou ABSENT"""
+
+    @abstractmethod
+    def stocker(self, cle: Hashable, valeur: Any, ttl: float, tags: Iterable[Hashable] = ()):
+        """Stocke une valeur pour ttl secondes"""
+
+    @abstractmethod
+    def invalider_tag(self, tag: Hashable) -> int:
+        """Supprime les entrées associées au tag, renvoie leur nombre"""
+
+    @abstractmethod
+    def vider(self):
+        """Supprime toutes les entrées"""
+
+    def statistiques(self) -> Dict[str, int]:
+        """Compteurs du backend (hits, misses, évictions...)"""
+        return {}
+
+
+class CacheLRU(BackendCache):
+    """Cache en mémoire : LRU borné en nombre d'entrées, avec expiration"""
+
+    def __init__(self, max_entrees: int = 1000):
+        self.max_entrees = max_entrees
+        self._entrees: "OrderedDict[Hashable, Tuple[float, Any, Tuple]]" = OrderedDict()
+        self._tags: Dict[Hashable, set] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _retirer(self, cle: Hashable):
+        _, _, tags = self._entrees.pop(cle)
+        for tag in tags:
+            cles = self._tags.get(tag)
+            if cles is not None:
+                cles.discard(cle)
+                if not cles:
+                    del self._tags[tag]
+
+    def obtenir(self, cle: Hashable) -> Any:
+        with self._lock:
+            entree = self._entrees.get(cle)
+            if entree is None:
+                self.misses += 1
+                return ABSENT
+
+            expiration, valeur, _ = entree
+            if expiration < time.monotonic():
+                self._retirer(cle)
+                self.expirations += 1
+                self.misses += 1
+                return ABSENT
+
+            self._entrees.move_to_end(cle)
+            self.hits += 1
+            return valeur
+
+    def stocker(self, cle: Hashable, valeur: Any, ttl: float, tags: Iterable[Hashable] = ()):
+        tags = tuple(tags)
+        with self._lock:
+            if cle in self._entrees:
+                self._retirer(cle)
+
+            self._entrees[cle] = (time.monotonic() + ttl, valeur, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(cle)
+
+            while len(self._entrees) > self.max_entrees:
+                self._retirer(next(iter(self._entrees)))
+                self.evictions += 1
+
+    def invalider_tag(self, tag: Hashable) -> int:
+        with self._lock:
+            cles = list(self._tags.get(tag, ()))
+            for cle in cles:
+                self._retirer(cle)
+            self.invalidations += len(cles)
+            return len(cles)
+
+    def vider(self):
+        with self._lock:
+            self._entrees.clear()
+            self._tags.clear()
+
+    def statistiques(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entrees": len(self._entrees),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+class CacheServices:
+    """Point d'entrée utilisé par les services (désactivable, backend remplaçable)"""
+
+    def __init__(self, backend: BackendCache, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        # tag -> nombre d'invalidations : un chargement ne stocke son résultat
+        # que si aucun de ses tags n'a été invalidé pendant qu'il lisait.
+        # Tenus seulement pour les tags d'un chargement en cours (tag -> nombre de
+        # chargements) et retirés à la fin du dernier : bornés par les chargements
+        # simultanés, pas par le nombre de tags invalidés depuis le démarrage
+        self._generations: Dict[Hashable, int] = {}
+        self._chargements: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def actif(self) -> bool:
+        return self.ttl > 0
+
+    def configurer(self, backend: Optional[BackendCache] = None, ttl: Optional[float] = None):
+        """Change de backend et/ou de TTL (ttl=0 désactive le cache)"""
+        if backend is not None:
+            self.backend = backend
+        if ttl is not None:
+            self.ttl = ttl
+
+    def obtenir(self, cle: Hashable, copier: bool = True) -> Any:
+        """
+        Copie de la valeur en cache, ou ABSENT
+        copier=False : valeur partagée, réservé aux objets jamais modifiés (index...)
+        """
+        if not self.actif:
+            return ABSENT
+        valeur = self.backend.obtenir(cle)
+        return valeur if valeur is ABSENT or not copier else copy.deepcopy(valeur)
+
+    def stocker(self, cle: Hashable, valeur: Any, tags: Iterable[Hashable] = (), copier: bool = True):
+        """Met en cache une copie de la valeur (ou la valeur elle-même si copier=False)"""
+        if self.actif:
+            self.backend.stocker(cle, copy.deepcopy(valeur) if copier else valeur, self.ttl, tags)
+
+    def charger(
+        self,
+        cle: Hashable,
+        tags: Iterable[Hashable],
+        chargeur: Callable[[], Any],
+        copier: bool = True
+    ) -> Any:
+        """
+        Lecture à travers le cache : appelle chargeur() en cas d'absence
+        Les appels concurrents de même clé attendent le chargement en cours (copie du résultat)
+        """
+        valeur = self.obtenir(cle, copier)
+        if valeur is not ABSENT:
+            return valeur
+        tags = tuple(tags)
+
+        def charger():
+            # Chargement terminé entre l'absence et la prise en charge de la clé
+            valeur = self.obtenir(cle, copier)
+            if valeur is ABSENT:
+                generations = self._debut_chargement(tags)
+                try:
+                    valeur = chargeur()
+                    self._stocker_si_inchange(cle, valeur, tags, copier, generations)
+                finally:
+                    self._fin_chargement(tags)
+            return valeur
+
+        return coalescence.executer(cle, charger, tags, copy.deepcopy if copier else None)
+
+    async def charger_async(
+        self,
+        cle: Hashable,
+        tags: Iterable[Hashable],
+        chargeur: Callable[[], Awaitable[Any]],
+        copier: bool = True
+    ) -> Any:
+        """Équivalent de charger pour les services asynchrones (chargeur() est une coroutine)"""
+        valeur = self.obtenir(cle, copier)
+        if valeur is not ABSENT:
+            return valeur
+        tags = tuple(tags)
+
+        async def charger():
+            valeur = self.obtenir(cle, copier)
+            if valeur is ABSENT:
+                generations = self._debut_chargement(tags)
+                try:
+                    valeur = await chargeur()
+                    self._stocker_si_inchange(cle, valeur, tags, copier, generations)
+                finally:
+                    self._fin_chargement(tags)
+            return valeur
+
+        return await coalescence.executer_async(cle, charger, tags, copy.deepcopy if copier else None)
+
+    def _debut_chargement(self, tags: Tuple[Hashable, ...]) -> Tuple[int, ...]:
+        """Suit les invalidations des tags pendant le chargement ; renvoie leurs générations"""
+        with self._lock:
+            for tag in tags:
+                self._chargements[tag] = self._chargements.get(tag, 0) + 1
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def _fin_chargement(self, tags: Tuple[Hashable, ...]):
+        with self._lock:
+            for tag in tags:
+                restants = self._chargements[tag] - 1
+                if restants:
+                    self._chargements[tag] = restants
+                else:
+                    del self._chargements[tag]
+                    self._generations.pop(tag, None)
+
+    def _stocker_si_inchange(
+        self, cle: Hashable, valeur: Any, tags: Tuple[Hashable, ...], copier: bool, generations: Tuple[int, ...]
+    ):
+        """
+        Stocke le résultat d'un chargement sauf si un de ses tags a été invalidé
+        depuis son début : lu avant l'écriture, il la ferait disparaître jusqu'au TTL
+        """
+        if not self.actif:
+            return
+        valeur = copy.deepcopy(valeur) if copier else valeur
+        with self._lock:
+            if all(self._generations.get(tag, 0) == generation for tag, generation in zip(tags, generations)):
+                self.backend.stocker(cle, valeur, self.ttl, tags)
+
+    def invalider(self, *tags: Hashable):
+        """Invalide les entrées des tags donnés (et détache leurs chargements en cours)"""
+        for tag in tags:
+            coalescence.invalider_tag(tag)
+            with self._lock:
+                if tag in self._chargements:
+                    self._generations[tag] = self._generations.get(tag, 0) + 1
+                self.backend.invalider_tag(tag)
+
+    def vider(self):
+        self.backend.vider()
+
+    def statistiques(self) -> Dict[str, int]:
+        return self.backend.statistiques()
+
+
+# Instance globale utilisée par les services
+cache = CacheServices(
+    CacheLRU(max_entrees=int(os.getenv("CACHE_MAX_ENTREES", "1000"))),
+    ttl=float(os.getenv("CACHE_TTL_S", "30"))
+)
@@ -0,0 +1,147 @@
+# services/cache_fichiers.py
+"""
+Cache disque des datasets téléchargés (StorageService.telecharger_dataset)
+
+- objets/ : un fichier par contenu, nommé d'après son ETag (deux chemins de
+  même contenu, comme les fichiers cas/, partagent la même copie)
+- index/  : pour chaque objet distant (bucket/chemin), l'ETag et la taille
+  de la dernière version téléchargée
+
+La validité d'une copie est vérifiée par une requête conditionnelle
+(If-None-Match) : 304 = rien à retélécharger. Au-delà de taille_max, les
+copies les moins récemment utilisées sont supprimées (LRU sur la date de
+modification, mise à jour à chaque accès).
+"""
+import hashlib
+import json
+import os
+import threading
+import uuid
+from typing import Dict, Optional
+
+REPERTOIRE_DEFAUT = os.path.join(os.path.expanduser("~"), ".cache", "tutorial_supabase", "datasets")
+
+
+def _hash(texte: str) -> str:
+    return hashlib.sha1(texte.encode()).hexdigest()
+
+
+class CacheFichiers:
+    """Cache LRU borné en octets, partageable entre processus (écritures atomiques)"""
+
+    def __init__(self, repertoire: str = REPERTOIRE_DEFAUT, taille_max: int = 20 * 1024 ** 3):
+        self.repertoire = repertoire
+        self.taille_max = taille_max
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.octets_telecharges = 0
+
+    def _chemin_index(self, cle: str) -> str:
+        return os.path.join(self.repertoire, "index", f"{_hash(cle)}.json")
+
+    def chemin_objet(self, etag: str) -> str:
+        return os.path.join(self.repertoire, "objets", _hash(etag))
+
+    def entree(self, cle: str) -> Optional[dict]:
+        """{'etag', 'taille', 'fichier'} de la copie locale de l'objet, ou None"""
+        try:
+            with open(self._chemin_index(cle), 'r') as f:
+                entree = json.load(f)
+        except (OSError, ValueError):
+            return None
+        entree["fichier"] = self.chemin_objet(entree["etag"])
+        # Copie évincée ou tronquée : l'index seul ne suffit pas
+        try:
+            if os.path.getsize(entree["fichier"]) != entree["taille"]:
+                return None
+        except OSError:
+            return None
+        return entree
+
+    def utiliser(self, entree: dict) -> str:
+        """Copie locale validée : compte un hit et la marque comme récemment utilisée"""
+        with self._lock:
+            self.hits += 1
+        try:
+            os.utime(entree["fichier"])
+        except OSError:
+            pass
+        return entree["fichier"]
+
+    def nouveau_temporaire(self) -> str:
+        """Fichier de travail sur le même disque que le cache (os.replace atomique)"""
+        repertoire = os.path.join(self.repertoire, "tmp")
+        os.makedirs(repertoire, exist_ok=True)
+        return os.path.join(repertoire, uuid.uuid4().hex)
+
+    def enregistrer(self, cle: str, etag: str, taille: int, temporaire: str) -> str:
+        """Publie un téléchargement terminé et met à jour l'index ; renvoie la copie"""
+        with self._lock:
+            self.misses += 1
+            self.octets_telecharges += taille
+
+        fichier = self.chemin_objet(etag)
+        os.makedirs(os.path.dirname(fichier), exist_ok=True)
+        os.replace(temporaire, fichier)
+
+        index = self._chemin_index(cle)
+        os.makedirs(os.path.dirname(index), exist_ok=True)
+        with open(f"{index}.tmp", 'w') as f:
+            json.dump({"cle": cle, "etag": etag, "taille": taille}, f)
+        os.replace(f"{index}.tmp", index)
+
+        self._evincer(garder=fichier)
+        return fichier
+
+    def _evincer(self, garder: str):
+        """Supprime les copies les moins récemment utilisées au-delà de taille_max"""
+        repertoire = os.path.join(self.repertoire, "objets")
+        copies = []
+        for nom in os.listdir(repertoire):
+            chemin = os.path.join(repertoire, nom)
+            try:
+                stat = os.stat(chemin)
+            except OSError:
+                continue
+            copies.append((stat.st_mtime, stat.st_size, chemin))
+
+        total = sum(taille for _, taille, _ in copies)
+        for _, taille, chemin in sorted(copies):
+            if total <= self.taille_max:
+                break
+            if chemin == garder:
+                continue
+            try:
+                os.remove(chemin)
+            except OSError:
+                continue
+            total -= taille
+            with self._lock:
+                self.evictions += 1
+
+    def vider(self):
+        for sous_repertoire in ("objets", "index", "tmp"):
+            repertoire = os.path.join(self.repertoire, sous_repertoire)
+            for nom in os.listdir(repertoire) if os.path.isdir(repertoire) else ():
+                try:
+                    os.remove(os.path.join(repertoire, nom))
+                except OSError:
+                    pass
+
+    def statistiques(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "octets_telecharges": self.octets_telecharges,
+            }
+
+
+# Instance globale utilisée par StorageService
+cache_fichiers = CacheFichiers(
+    os.getenv("CACHE_FICHIERS_DIR", REPERTOIRE_DEFAUT),
+    int(float(os.getenv("CACHE_FICHIERS_MAX_GO", "20")) * 1024 ** 3)
+)
@@ -0,0 +1,241 @@
+# services/coalescence.py
+"""
+Regroupement des lectures identiques en cours (single-flight)
+
+Quand plusieurs appels concurrents demandent la même clé (cache expiré,
+invalidation), un seul exécute la lecture ; les autres attendent son
+résultat (ou son erreur) au lieu d'envoyer chacun leur requête à PostgREST.
+
+- executer(cle, fonction) : threads (pool des services, serveur WSGI...)
+- executer_async(cle, fonction) : coroutines d'une même boucle asyncio ;
+  la lecture tourne dans une tâche partagée, l'annulation d'un appelant
+  n'interrompt pas les autres
+
+Utilisé par CacheServices.charger / charger_async sur les absences du cache.
+Les compteurs par clé (appels, exécutions, regroupés) sont dans
+statistiques() / par_cle() et dans l'export Prometheus de l'instrumentation.
+"""
+import asyncio
+import os
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from services.instrumentation import _labels, instrumentation
+
+
+class _Vol:
+    """Lecture en cours et appelants qui l'attendent"""
+
+    __slots__ = ("tags", "termine", "resultat", "erreur", "tache")
+
+    def __init__(self, tags: Iterable[Hashable]):
+        self.tags = tuple(tags)
+        self.termine = threading.Event()
+        self.resultat: Any = None
+        self.erreur: Optional[BaseException] = None
+        self.tache: Optional[asyncio.Task] = None
+
+
+def _famille(cle: Hashable) -> str:
+    """Libellé Prometheus d'une clé : son premier élément ("datasets", "stats_projets"...)"""
+    if isinstance(cle, tuple) and cle:
+        cle = cle[0]
+    return cle if isinstance(cle, str) else type(cle).__name__
+
+
+class Coalescence:
+    """
+    Single-flight par clé, pour threads et asyncio
+    max_cles: nombre de clés suivies dans les compteurs détaillés (les moins récentes sont oubliées)
+    """
+
+    def __init__(self, actif: bool = True, max_cles: int = 1000):
+        self.actif = actif
+        self.max_cles = max_cles
+        self._vols: Dict[Hashable, _Vol] = {}
+        self._vols_async: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], _Vol] = {}
+        self._lock = threading.Lock()
+        # cle -> [appels, exécutions, erreurs]
+        self._par_cle: "OrderedDict[Hashable, List[int]]" = OrderedDict()
+        self._familles: Counter = Counter()
+
+    # --- Exécution ---
+
+    def executer(
+        self,
+        cle: Hashable,
+        fonction: Callable[[], Any],
+        tags: Iterable[Hashable] = (),
+        copie: Optional[Callable[[Any], Any]] = None
+    ) -> Any:
+        """
+        Résultat de fonction(), partagé avec les appels concurrents de même clé
+        tags: invalider_tag(tag) détache la lecture (les appels suivants en relancent une)
+        copie: appliquée au résultat rendu aux appelants qui n'ont pas exécuté la lecture
+        """
+        if not self.actif:
+            return fonction()
+
+        with self._lock:
+            vol = self._vols.get(cle)
+            meneur = vol is None
+            if meneur:
+                vol = self._vols[cle] = _Vol(tags)
+            self._compter(cle, meneur)
+
+        if not meneur:
+            vol.termine.wait()
+            if vol.erreur is not None:
+                raise vol.erreur
+            return vol.resultat if copie is None else copie(vol.resultat)
+
+        try:
+            vol.resultat = fonction()
+            return vol.resultat
+        except BaseException as e:
+            vol.erreur = e
+            self._compter_erreur(cle)
+            raise
+        finally:
+            with self._lock:
+                if self._vols.get(cle) is vol:
+                    del self._vols[cle]
+            vol.termine.set()
+
+    async def executer_async(
+        self,
+        cle: Hashable,
+        fonction: Callable[[], Awaitable[Any]],
+        tags: Iterable[Hashable] = (),
+        copie: Optional[Callable[[Any], Any]] = None
+    ) -> Any:
+        """Équivalent asyncio d'executer : fonction() est une coroutine, partagée dans la boucle courante"""
+        if not self.actif:
+            return await fonction()
+
+        boucle = asyncio.get_running_loop()
+        with self._lock:
+            vol = self._vols_async.get((boucle, cle))
+            meneur = vol is None
+            if meneur:
+                vol = self._vols_async[(boucle, cle)] = _Vol(tags)
+                vol.tache = boucle.create_task(self._mener(boucle, cle, vol, fonction))
+                # Erreur lue même si tous les appelants ont été annulés
+                vol.tache.add_done_callback(lambda tache: tache.cancelled() or tache.exception())
+            self._compter(cle, meneur)
+
+        resultat = await asyncio.shield(vol.tache)
+        return resultat if meneur or copie is None else copie(resultat)
+
+    async def _mener(self, boucle, cle: Hashable, vol: _Vol, fonction: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            return await fonction()
+        except BaseException:
+            self._compter_erreur(cle)
+            raise
+        finally:
+            with self._lock:
+                if self._vols_async.get((boucle, cle)) is vol:
+                    del self._vols_async[(boucle, cle)]
+
+    def invalider_tag(self, tag: Hashable) -> int:
+        """
+        Détache les lectures en cours associées au tag : lancées avant une écriture,
+        elles ne sont plus partagées avec les appels qui arrivent après (et
+        CacheServices ne stocke pas leur résultat, voir _stocker_si_inchange)
+        """
+        with self._lock:
+            detachees = 0
+            for vols in (self._vols, self._vols_async):
+                for cle in [cle for cle, vol in vols.items() if tag in vol.tags]:
+                    del vols[cle]
+                    detachees += 1
+            return detachees
+
+    # --- Compteurs ---
+
+    def _compter(self, cle: Hashable, meneur: bool):
+        """Sous self._lock"""
+        compteurs = self._par_cle.get(cle)
+        if compteurs is None:
+            compteurs = self._par_cle[cle] = [0, 0, 0]
+            if len(self._par_cle) > self.max_cles:
+                self._par_cle.popitem(last=False)
+        else:
+            self._par_cle.move_to_end(cle)
+        compteurs[0] += 1
+        famille = _famille(cle)
+        self._familles[(famille, "appels")] += 1
+        if meneur:
+            compteurs[1] += 1
+            self._familles[(famille, "executions")] += 1
+
+    def _compter_erreur(self, cle: Hashable):
+        with self._lock:
+            compteurs = self._par_cle.get(cle)
+            if compteurs is not None:
+                compteurs[2] += 1
+            self._familles[(_famille(cle), "erreurs")] += 1
+
+    def par_cle(self, limite: Optional[int] = 20) -> List[Dict[str, Any]]:
+        """Clés suivies, les plus regroupées d'abord"""
+        with self._lock:
+            lignes = [
+                {"cle": cle, "appels": appels, "executions": executions,
+                 "regroupes": appels - executions, "erreurs": erreurs}
+                for cle, (appels, executions, erreurs) in self._par_cle.items()
+            ]
+        lignes.sort(key=lambda ligne: -ligne["regroupes"])
+        return lignes if limite is None else lignes[:limite]
+
+    def statistiques(self) -> Dict[str, int]:
+        with self._lock:
+            totaux = Counter()
+            for (_, metrique), n in self._familles.items():
+                totaux[metrique] += n
+            en_vol = len(self._vols) + len(self._vols_async)
+        return {
+            "appels": totaux["appels"],
+            "executions": totaux["executions"],
+            "regroupes": totaux["appels"] - totaux["executions"],
+            "erreurs": totaux["erreurs"],
+            "en_vol": en_vol,
+        }
+
+    def vider(self):
+        """Remet les compteurs à zéro (les lectures en cours continuent)"""
+        with self._lock:
+            self._par_cle.clear()
+            self._familles.clear()
+
+    def exporter_prometheus(self) -> str:
+        with self._lock:
+            familles = dict(self._familles)
+        series = {
+            "appels": ("services_coalescence_appels_total", "Lectures demandées, par famille de clé"),
+            "regroupes": ("services_coalescence_regroupes_total", "Lectures servies par une lecture déjà en cours"),
+            "erreurs": ("services_coalescence_erreurs_total", "Lectures partagées en erreur"),
+        }
+        valeurs: Dict[str, Dict[str, int]] = {metrique: {} for metrique in series}
+        for (famille, metrique), n in familles.items():
+            if metrique in valeurs:
+                valeurs[metrique][famille] = n
+        for famille, appels in valeurs["appels"].items():
+            valeurs["regroupes"][famille] = appels - familles.get((famille, "executions"), 0)
+
+        lignes = []
+        for metrique, (nom, aide) in series.items():
+            lignes.append(f"# HELP {nom} {aide}")
+            lignes.append(f"# TYPE {nom} counter")
+            for famille, n in sorted(valeurs[metrique].items()):
+                lignes.append(f"{nom}{_labels(cle=famille)} {n}")
+        return "\n".join(lignes) + "\n"
+
+
+# Instance globale utilisée par le cache des services
+coalescence = Coalescence(
+    actif=os.getenv("COALESCENCE", "1").lower() in ("1", "true", "oui"),
+    max_cles=int(os.getenv("COALESCENCE_MAX_CLES", "1000"))
+)
+instrumentation.enregistrer_collecteur("coalescence", coalescence.exporter_prometheus)
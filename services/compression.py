@@ -0,0 +1,216 @@
+# services/compression.py
+"""
+Compression transparente des datasets textuels à l'upload (gzip / zstd)
+
+Le fichier est découpé en blocs compressés indépendamment dans un pool de
+threads (zlib et zstd libèrent le GIL) : chaque bloc est une trame complète,
+et leur concaténation est un fichier .gz / .zst valide pour tous les outils
+standard. Les blocs sont produits dans l'ordre pendant que les précédents
+partent sur le réseau.
+
+Le codec est choisi par format (CODECS_PAR_FORMAT), modifiable par la variable
+d'environnement UPLOAD_COMPRESSION (auto, aucune, gzip, zstd). D'autres codecs
+s'ajoutent avec enregistrer_codec().
+"""
+import io
+import os
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:  # dépendance optionnelle : repli sur gzip
+    zstandard = None
+
+TAILLE_BLOC = 4 * 1024 * 1024
+
+# Formats déjà compressés (parquet, zip, images) : jamais recompressés
+CODECS_PAR_FORMAT = {
+    "csv": "zstd",
+    "tsv": "zstd",
+    "json": "zstd",
+    "ndjson": "zstd",
+    "jsonl": "zstd",
+    "txt": "gzip",
+}
+
+
+class Codec:
+    """Compression par trames indépendantes, décompression en flux"""
+
+    nom: str = ""
+    extension: str = ""
+    content_type: str = "application/octet-stream"
+
+    def compresser(self, bloc: bytes) -> bytes:
+        """Une trame complète pour le bloc"""
+        raise NotImplementedError
+
+    def _nouveau_decompresseur(self):
+        """Objet avec decompress(), unused_data et eof, pour une trame"""
+        raise NotImplementedError
+
+    def decompresser_flux(self, morceaux: Iterable[bytes]) -> Iterator[bytes]:
+        """Décompresse une suite de trames concaténées, morceau par morceau"""
+        decompresseur = self._nouveau_decompresseur()
+        for morceau in morceaux:
+            while morceau:
+                donnees = decompresseur.decompress(morceau)
+                if donnees:
+                    yield donnees
+                if not decompresseur.eof:
+                    break
+                # Fin de trame : la suite du morceau commence la trame suivante
+                morceau = decompresseur.unused_data
+                decompresseur = self._nouveau_decompresseur()
+
+
+class CodecGzip(Codec):
+    nom = "gzip"
+    extension = ".gz"
+    content_type = "application/gzip"
+
+    def __init__(self, niveau: int = 6):
+        self.niveau = niveau
+
+    def compresser(self, bloc: bytes) -> bytes:
+        compresseur = zlib.compressobj(self.niveau, zlib.DEFLATED, 31)
+        return compresseur.compress(bloc) + compresseur.flush()
+
+    def _nouveau_decompresseur(self):
+        return zlib.decompressobj(31)
+
+
+class CodecZstd(Codec):
+    nom = "zstd"
+    extension = ".zst"
+    content_type = "application/zstd"
+
+    def __init__(self, niveau: int = 3):
+        self.niveau = niveau
+
+    def compresser(self, bloc: bytes) -> bytes:
+        # Un compresseur par appel : ZstdCompressor n'est pas partageable entre threads
+        return zstandard.ZstdCompressor(level=self.niveau).compress(bloc)
+
+    def _nouveau_decompresseur(self):
+        return zstandard.ZstdDecompressor().decompressobj()
+
+
+CODECS: Dict[str, Codec] = {}
+
+
+def enregistrer_codec(codec: Codec):
+    """Ajoute (ou remplace) un codec, identifié par codec.nom"""
+    CODECS[codec.nom] = codec
+
+
+enregistrer_codec(CodecGzip())
+if zstandard is not None:
+    enregistrer_codec(CodecZstd())
+
+
+def obtenir_codec(nom: str) -> Codec:
+    """Codec d'un dataset déjà stocké (colonne compression)"""
+    if nom not in CODECS:
+        raise ValueError(f"Codec de compression indisponible: {nom}")
+    return CODECS[nom]
+
+
+def choisir_codec(format_fichier: Optional[str]) -> Optional[Codec]:
+    """
+    Codec à utiliser pour un format, ou None (pas de compression)
+    UPLOAD_COMPRESSION : auto (CODECS_PAR_FORMAT), aucune, ou un nom de codec
+    imposé pour tous les formats compressibles
+    """
+    prefere = CODECS_PAR_FORMAT.get((format_fichier or "").lower())
+    if prefere is None:
+        return None
+
+    choix = os.getenv("UPLOAD_COMPRESSION", "auto").lower()
+    if choix == "aucune":
+        return None
+    if choix != "auto":
+        prefere = choix
+    # zstandard non installé : gzip est toujours disponible
+    return CODECS.get(prefere) or CODECS["gzip"]
+
+
+def blocs_compresses(
+    fichier_path: str,
+    codec: Codec,
+    taille_bloc: int = TAILLE_BLOC,
+    max_workers: Optional[int] = None,
+    observateur: Optional[Callable[[bytes], None]] = None
+) -> Iterator[bytes]:
+    """
+    Trames compressées du fichier, dans l'ordre
+    Au plus 2 x max_workers blocs en mémoire : la lecture attend que l'envoi avance.
+    observateur: reçoit les blocs non compressés (profilage)
+    """
+    max_workers = max_workers or min(4, os.cpu_count() or 1)
+    en_cours = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, open(fichier_path, 'rb') as f:
+        while True:
+            bloc = f.read(taille_bloc)
+            if bloc:
+                if observateur:
+                    observateur(bloc)
+                en_cours.append(executor.submit(codec.compresser, bloc))
+            if en_cours and (not bloc or len(en_cours) >= 2 * max_workers):
+                yield en_cours.popleft().result()
+            elif not bloc:
+                return
+
+
+class FluxCompresse(io.RawIOBase):
+    """
+    Fichier compressé à la volée, lisible comme un fichier (corps d'upload)
+    Non repositionnable : la taille n'est pas connue d'avance (envoi chunked).
+    """
+
+    def __init__(self, blocs: Iterator[bytes]):
+        super().__init__()
+        self._blocs = blocs
+        self._courant = memoryview(b"")
+        self.octets_emis = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, tampon) -> int:
+        while not self._courant:
+            bloc = next(self._blocs, None)
+            if bloc is None:
+                return 0
+            self._courant = memoryview(bloc)
+        n = min(len(tampon), len(self._courant))
+        tampon[:n] = self._courant[:n]
+        self._courant = self._courant[n:]
+        self.octets_emis += n
+        return n
+
+    def close(self):
+        # Arrête le pipeline (et son pool) si l'envoi est interrompu
+        if hasattr(self._blocs, "close"):
+            self._blocs.close()
+        super().close()
+
+
+def compresser_fichier(
+    fichier_path: str,
+    destination: str,
+    codec: Codec,
+    taille_bloc: int = TAILLE_BLOC,
+    max_workers: Optional[int] = None,
+    observateur: Optional[Callable[[bytes], None]] = None
+) -> int:
+    """Écrit la version compressée sur disque (upload TUS : taille requise d'avance)"""
+    taille = 0
+    with open(destination, 'wb') as sortie:
+        for trame in blocs_compresses(fichier_path, codec, taille_bloc, max_workers, observateur):
+            sortie.write(trame)
+            taille += len(trame)
+    return taille
@@ -0,0 +1,51 @@
+# services/concurrence.py
+import asyncio
+import os
+import weakref
+from contextlib import asynccontextmanager
+
+# Nombre maximum de requêtes Supabase simultanées par boucle asyncio
+_max_requetes = int(os.getenv("SUPABASE_MAX_CONCURRENCE", "100"))
+
+# Un sémaphore par boucle (un asyncio.Semaphore est lié à sa boucle)
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def configurer_concurrence(max_requetes: int):
+    """Fixe le nombre maximum de requêtes simultanées des services async"""
+    global _max_requetes
+
+    if max_requetes < 1:
+        raise ValueError("La limite de concurrence doit être >= 1")
+
+    _max_requetes = max_requetes
+    # Les nouveaux appels utiliseront un sémaphore à la nouvelle taille
+    _semaphores.clear()
+
+
+def get_limite_concurrence() -> int:
+    """Limite de concurrence actuelle"""
+    return _max_requetes
+
+
+def _semaphore() -> asyncio.Semaphore:
+    """Sémaphore de la boucle courante"""
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(_max_requetes)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+@asynccontextmanager
+async def limite_concurrence():
+    """Réserve un emplacement de requête pendant la durée du bloc"""
+    async with _semaphore():
+        yield
+
+
+async def executer_async(requete):
+    """Exécute une requête PostgREST asynchrone en respectant la limite"""
+    async with limite_concurrence():
+        return await requete.execute()
@@ -0,0 +1,213 @@
+# services/conversion.py
+"""
+Conversion CSV / JSON -> Parquet compressé, par blocs (mémoire bornée)
+
+Le fichier source est lu bloc par bloc et chaque bloc est écrit comme un
+row group Parquet : la mémoire utilisée dépend de taille_bloc, pas de la
+taille du fichier.
+- CSV / TSV : lecteur en flux de pyarrow (types inférés sur le premier bloc)
+- NDJSON    : blocs coupés sur les fins de ligne, schéma du premier bloc
+- JSON      : tableau d'objets décodé élément par élément (raw_decode)
+
+pyarrow est importé à la première conversion (coût d'import évité au démarrage).
+"""
+import json
+import os
+import tempfile
+import time
+from typing import Iterator, List, Optional
+from models.resultats import ResultatConversion
+
+FORMATS_CONVERTIBLES = ("csv", "tsv", "json", "ndjson", "jsonl")
+
+TAILLE_BLOC = 16 * 1024 * 1024
+LIGNES_PAR_BLOC_JSON = 50_000
+COMPRESSION = "zstd"
+
+
+def est_convertible(format_fichier: Optional[str]) -> bool:
+    return bool(format_fichier) and format_fichier.lower() in FORMATS_CONVERTIBLES
+
+
+def convertir_en_parquet(
+    fichier_path: str,
+    format_fichier: str,
+    destination: Optional[str] = None,
+    compression: str = COMPRESSION,
+    taille_bloc: int = TAILLE_BLOC
+) -> ResultatConversion:
+    """
+    Convertit un fichier CSV/TSV/JSON/NDJSON en Parquet
+    destination: chemin du fichier produit (par défaut un fichier temporaire,
+    à supprimer par l'appelant)
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    format_fichier = format_fichier.lower()
+    if not est_convertible(format_fichier):
+        raise ValueError(f"Format non convertible en Parquet: {format_fichier}")
+
+    if destination is None:
+        descripteur, destination = tempfile.mkstemp(suffix=".parquet")
+        os.close(descripteur)
+
+    debut = time.perf_counter()
+    nb_lignes = 0
+    writer = schema = None
+    try:
+        for lot in _lots(fichier_path, format_fichier, taille_bloc):
+            if writer is None:
+                schema = lot.schema
+                writer = pq.ParquetWriter(destination, schema, compression=compression)
+            elif lot.schema != schema:
+                lot = lot.cast(schema)
+            writer.write_batch(lot)
+            nb_lignes += lot.num_rows
+
+        if writer is None:
+            raise ValueError("Fichier vide : aucune ligne à convertir")
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        if writer is not None:
+            writer.close()
+        os.remove(destination)
+        # Types figés sur le premier bloc : une valeur plus loin ne s'y conforme pas
+        raise ValueError(
+            f"Valeur incompatible avec le schéma déduit du premier bloc après {nb_lignes} ligne(s) "
+            f"(augmenter taille_bloc) : {e}"
+        ) from e
+    except Exception:
+        if writer is not None:
+            writer.close()
+        os.remove(destination)
+        raise
+    writer.close()
+
+    return ResultatConversion(
+        chemin_parquet=destination,
+        format_source=format_fichier,
+        octets_source=os.path.getsize(fichier_path),
+        octets_parquet=os.path.getsize(destination),
+        nb_lignes=nb_lignes,
+        duree_s=time.perf_counter() - debut
+    )
+
+
+def _lots(fichier_path: str, format_fichier: str, taille_bloc: int) -> Iterator["pyarrow.RecordBatch"]:
+    if format_fichier in ("csv", "tsv"):
+        return _lots_csv(fichier_path, "\t" if format_fichier == "tsv" else None, taille_bloc)
+    if format_fichier == "json" and _premier_caractere(fichier_path) == b"[":
+        return _lots_tableau_json(fichier_path, taille_bloc)
+    return _lots_ndjson(fichier_path, taille_bloc)
+
+
+def _lots_csv(fichier_path: str, separateur: Optional[str], taille_bloc: int):
+    import csv
+    import pyarrow.csv as pa_csv
+
+    if separateur is None:
+        with open(fichier_path, newline="", encoding="utf-8", errors="replace") as f:
+            echantillon = f.read(64 * 1024)
+        try:
+            separateur = csv.Sniffer().sniff(echantillon, delimiters=",;\t|").delimiter
+        except csv.Error:
+            separateur = ","
+
+    lecteur = pa_csv.open_csv(
+        fichier_path,
+        read_options=pa_csv.ReadOptions(block_size=taille_bloc),
+        parse_options=pa_csv.ParseOptions(delimiter=separateur, newlines_in_values=True)
+    )
+    for lot in lecteur:
+        if lot.num_rows:
+            yield lot
+
+
+def _lots_ndjson(fichier_path: str, taille_bloc: int):
+    import io
+    import pyarrow.json as pa_json
+
+    schema = None
+    with open(fichier_path, "rb") as f:
+        reste = b""
+        while True:
+            morceau = f.read(taille_bloc)
+            bloc = reste + morceau
+            if morceau:
+                # Bloc coupé après la dernière fin de ligne complète
+                fin = bloc.rfind(b"\n") + 1
+                bloc, reste = bloc[:fin], bloc[fin:]
+            else:
+                reste = b""
+            if bloc.strip():
+                options = pa_json.ParseOptions(
+                    explicit_schema=schema, unexpected_field_behavior="ignore"
+                ) if schema is not None else None
+                table = pa_json.read_json(io.BytesIO(bloc), parse_options=options)
+                schema = schema or table.schema
+                yield from table.to_batches()
+            if not morceau:
+                return
+
+
+def _lots_tableau_json(fichier_path: str, taille_bloc: int):
+    import pyarrow as pa
+
+    schema = None
+    enregistrements: List[dict] = []
+    for enregistrement in _elements_tableau_json(fichier_path, taille_bloc):
+        enregistrements.append(enregistrement)
+        if len(enregistrements) >= LIGNES_PAR_BLOC_JSON:
+            lot = pa.RecordBatch.from_pylist(enregistrements, schema=schema)
+            schema = schema or lot.schema
+            enregistrements = []
+            yield lot
+    if enregistrements:
+        yield pa.RecordBatch.from_pylist(enregistrements, schema=schema)
+
+
+def _elements_tableau_json(fichier_path: str, taille_bloc: int) -> Iterator[dict]:
+    """Éléments d'un tableau JSON de premier niveau, sans charger tout le fichier"""
+    decodeur = json.JSONDecoder()
+    with open(fichier_path, "r", encoding="utf-8") as f:
+        tampon = f.read(taille_bloc).lstrip()
+        if not tampon.startswith("["):
+            raise ValueError("Tableau JSON attendu")
+        position, fin_fichier = 1, False
+        while True:
+            # Séparateurs entre éléments
+            while position < len(tampon) and tampon[position] in " \t\r\n,":
+                position += 1
+            if position < len(tampon) and tampon[position] == "]":
+                return
+            try:
+                element, suivant = decodeur.raw_decode(tampon, position)
+                # Un nombre en fin de tampon peut être tronqué : on relit après complément
+                coupe = suivant >= len(tampon) and not fin_fichier
+            except json.JSONDecodeError:
+                if fin_fichier:
+                    raise
+                coupe = True
+            if coupe:
+                # Élément coupé par la fin du bloc : on complète le tampon
+                morceau = f.read(taille_bloc)
+                tampon, position = tampon[position:] + morceau, 0
+                fin_fichier = not morceau
+                continue
+            position = suivant
+            if not isinstance(element, dict):
+                element = {"valeur": element}
+            yield element
+            if position > taille_bloc:
+                tampon, position = tampon[position:], 0
+
+
+def _premier_caractere(fichier_path: str) -> bytes:
+    with open(fichier_path, "rb") as f:
+        while True:
+            morceau = f.read(4096)
+            if not morceau:
+                return b""
+            morceau = morceau.lstrip()
+            if morceau:
+                return morceau[:1]
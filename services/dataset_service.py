@@ -1,11 +1,33 @@
 # services/dataset_service.py
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Iterable, Iterator, Tuple, Callable
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from config.database import supabase
 from models.dataset import Dataset
+from models.resultats import ResultatBatch, ResultatSuppression, EchecLigne
+from services.cache import cache, tag_projet, tags_datasets, TAG_TOUS_DATASETS
+from services.pagination import iter_keyset, COLONNES_CURSEUR
+from services.compression import choisir_codec
+from services.instrumentation import instrumenter_service, propager
+from services.conversion import convertir_en_parquet, est_convertible
+from services.profilage import creer_profileur
+from services.projection import normaliser_fields, colonnes_select, hydrater
+from services.rpc import appeler_rpc
+from services.statistiques import CompteurDatasets
+from services.statistiques_store import statistiques_store
+import hashlib
 import os
+import uuid
 from datetime import datetime
 from decimal import Decimal
 
+# Préfixe des fichiers adressés par contenu (uploads dédupliqués)
+PREFIXE_CONTENU = "cas/"
+# Classes SQLSTATE d'un refus portant sur les données (22 valeur, 23 contrainte,
+# 42 colonne, P0 trigger) : rejouer ligne à ligne isole les lignes fautives
+CLASSES_REJET_DONNEES = ("22", "23", "42", "P0")
+
+@instrumenter_service
 class DatasetService:
     
     @staticmethod
@@ -17,6 +39,8 @@ class DatasetService:
             response = supabase.table('datasets').insert(data).execute()
             
             if response.data:
+                cache.invalider(*tags_datasets(dataset.projet_id))
+                statistiques_store.publier_lignes('datasets', 'INSERT', response.data)
                 return Dataset.from_dict(response.data[0])
             else:
                 raise Exception("Erreur lors de la création du dataset")
@@ -25,40 +49,321 @@ class DatasetService:
             raise Exception(f"Erreur service dataset: {str(e)}")
     
     @staticmethod
-    def lister_datasets_projet(projet_id: str) -> List[Dataset]:
-        """Lister tous les datasets d'un projet"""
+    def creer_datasets_batch(
+        datasets: Iterable[Dataset],
+        taille_chunk: int = 500,
+        max_workers: int = 1
+    ) -> ResultatBatch:
+        """
+        Créer des datasets par chunks (un INSERT multi-lignes par chunk)
+        Les identifiants sont générés côté client et gardés sur les datasets : un
+        chunk dont la réponse est perdue (délai, 5xx après le commit) est vérifié
+        par relecture de ses ids, sans doublon ; relancer le batch avec les mêmes
+        objets n'en crée pas non plus (23505 sur les lignes déjà écrites)
+        """
+        if taille_chunk < 1:
+            raise ValueError("taille_chunk doit être >= 1")
+        
+        resultat = ResultatBatch()
+        resultats_chunks = []
+        
+        def chunks():
+            iterateur = enumerate(datasets)
+            while True:
+                chunk = list(islice(iterateur, taille_chunk))
+                if not chunk:
+                    return
+                yield chunk
+        
+        if max_workers <= 1:
+            for chunk in chunks():
+                resultats_chunks.append(DatasetService._inserer_chunk(chunk))
+        else:
+            # Au plus 2 chunks en attente par worker : mémoire bornée même pour
+            # un itérable de plusieurs millions de datasets
+            inserer_chunk = propager(DatasetService._inserer_chunk)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                en_attente = []
+                for chunk in chunks():
+                    en_attente.append(executor.submit(inserer_chunk, chunk))
+                    if len(en_attente) >= max_workers * 2:
+                        resultats_chunks.append(en_attente.pop(0).result())
+                resultats_chunks.extend(f.result() for f in en_attente)
+        
+        for crees, echecs, nb_requetes in resultats_chunks:
+            if crees:
+                cache.invalider(*tags_datasets(*(d.projet_id for d in crees)))
+            if statistiques_store.actif:
+                statistiques_store.publier_lignes('datasets', 'INSERT', [dict(d.to_dict(), id=d.id) for d in crees])
+            resultat.reussis.extend(crees)
+            resultat.echecs.extend(echecs)
+            resultat.nb_requetes += nb_requetes
+        resultat.echecs.sort(key=lambda e: e.index)
+        
+        return resultat
+    
+    @staticmethod
+    def _inserer_chunk(chunk: List[Tuple[int, Dataset]]) -> Tuple[List[Dataset], List[EchecLigne], int]:
+        """Insère un chunk ; en cas d'échec, isole les lignes fautives une par une"""
+        crees, echecs, nb_requetes = [], [], 0
+        
+        # 1. Validation locale (évite de faire échouer tout le chunk)
+        valides = []
+        for index, dataset in chunk:
+            if not dataset.nom or not dataset.nom.strip():
+                echecs.append(EchecLigne(index, dataset, "Le nom du dataset est obligatoire"))
+            elif not dataset.projet_id:
+                echecs.append(EchecLigne(index, dataset, "projet_id est obligatoire"))
+            else:
+                valides.append((index, dataset))
+        
+        if not valides:
+            return crees, echecs, nb_requetes
+        
+        for _, dataset in valides:
+            if dataset.id is None:
+                dataset.id = str(uuid.uuid4())
+        
+        # 2. Un seul INSERT pour tout le chunk
         try:
+            nb_requetes += 1
+            crees.extend(DatasetService._inserer_lignes([d for _, d in valides]))
+            return crees, echecs, nb_requetes
+        except Exception as e:
+            erreur = e
+        
+        if not DatasetService._rejet_donnees(erreur):
+            # Réseau, délai ou 5xx : le chunk a pu être écrit avant l'erreur. Les
+            # lignes déjà présentes (mêmes ids) sont gardées, les autres renvoyées
+            try:
+                deja, nb_lectures = DatasetService._lignes_par_id([d.id for _, d in valides])
+                nb_requetes += nb_lectures
+                crees.extend(Dataset.from_dict(ligne) for ligne in deja.values())
+                valides = [(index, d) for index, d in valides if d.id not in deja]
+                if valides:
+                    nb_requetes += 1
+                    crees.extend(DatasetService._inserer_lignes([d for _, d in valides]))
+                return crees, echecs, nb_requetes
+            except Exception as e:
+                if not DatasetService._rejet_donnees(e):
+                    echecs.extend(EchecLigne(index, dataset, str(e)) for index, dataset in valides)
+                    return crees, echecs, nb_requetes
+        
+        # 3. Chunk refusé pour ses données : repli ligne par ligne pour identifier
+        # les échecs (sans creer_dataset : cache et statistiques sont mis à jour
+        # une seule fois, par creer_datasets_batch)
+        for index, dataset in valides:
+            try:
+                nb_requetes += 1
+                crees.extend(DatasetService._inserer_lignes([dataset]))
+            except Exception as e:
+                echecs.append(EchecLigne(index, dataset, str(e)))
+        
+        return crees, echecs, nb_requetes
+    
+    @staticmethod
+    def _inserer_lignes(datasets: List[Dataset]) -> List[Dataset]:
+        """INSERT multi-lignes avec les identifiants des datasets"""
+        response = supabase.table('datasets')\
+            .insert([dict(d.to_dict(), id=d.id) for d in datasets], default_to_null=False)\
+            .execute()
+        return [Dataset.from_dict(item) for item in response.data]
+    
+    @staticmethod
+    def _lignes_par_id(dataset_ids: List[str], taille_lot: int = 200) -> Tuple[Dict[str, dict], int]:
+        """Lignes existantes parmi ces identifiants, et nombre de requêtes (par lots : ils passent dans l'URL)"""
+        lignes, nb_requetes = {}, 0
+        for debut in range(0, len(dataset_ids), taille_lot):
+            nb_requetes += 1
             response = supabase.table('datasets')\
                 .select('*')\
-                .eq('projet_id', projet_id)\
-                .order('created_at', desc=True)\
+                .in_('id', dataset_ids[debut:debut + taille_lot])\
                 .execute()
+            lignes.update((ligne['id'], ligne) for ligne in response.data or [])
+        return lignes, nb_requetes
+    
+    @staticmethod
+    def _rejet_donnees(erreur: Exception) -> bool:
+        """
+        Requête refusée par PostgreSQL / PostgREST à cause des données (4xx) :
+        rien n'a été écrit. Les autres erreurs (réseau, délai, 5xx, réponse
+        illisible) ne disent pas si l'INSERT a été validé
+        """
+        code = getattr(erreur, 'code', None)
+        if isinstance(code, int):
+            # Réponse d'erreur non JSON (proxy) : seul le statut HTTP est connu
+            return 400 <= code < 500
+        return isinstance(code, str) and (code.startswith(CLASSES_REJET_DONNEES) or code.startswith("PGRST"))
+    
+    @staticmethod
+    def lister_datasets_projet(projet_id: str, fields: Optional[Iterable[str]] = None) -> List[Dataset]:
+        """
+        Lister tous les datasets d'un projet
+        fields: colonnes à récupérer (les autres sont chargées à la demande)
+        """
+        try:
+            fields = normaliser_fields(Dataset, fields)
+            lignes = cache.charger(
+                ("datasets", projet_id, fields),
+                [tag_projet(projet_id), TAG_TOUS_DATASETS],
+                lambda: supabase.table('datasets')\
+                    .select(colonnes_select(fields))\
+                    .eq('projet_id', projet_id)\
+                    .order('created_at', desc=True)\
+                    .execute().data
+            )
+            
+            return [hydrater(Dataset, item, fields, DatasetService._charger_colonnes) for item in lignes]
             
-            return [Dataset.from_dict(item) for item in response.data]
+        except Exception as e:
+            raise Exception(f"Erreur récupération datasets: {str(e)}")
+    
+    @staticmethod
+    def iter_datasets_projet(
+        projet_id: str,
+        page_size: int = 500,
+        prefetch: bool = True,
+        fields: Optional[Iterable[str]] = None
+    ) -> Iterator[Dataset]:
+        """Parcourt les datasets d'un projet page par page (mémoire constante)"""
+        try:
+            fields = normaliser_fields(Dataset, fields, COLONNES_CURSEUR)
+            for item in iter_keyset(
+                lambda: supabase.table('datasets').select(colonnes_select(fields)).eq('projet_id', projet_id),
+                page_size,
+                prefetch
+            ):
+                yield hydrater(Dataset, item, fields, DatasetService._charger_colonnes)
+            
+        except Exception as e:
+            raise Exception(f"Erreur récupération datasets: {str(e)}")
+    
+    @staticmethod
+    def datasets_frame(projet_id: str, page_size: int = 1000) -> 'DatasetFrame':
+        """
+        Datasets d'un projet en colonnes NumPy (statistiques vectorisées)
+        Seules les colonnes utiles sont transférées, page par page
+        """
+        from models.dataset_frame import DatasetFrame
+        
+        colonnes = COLONNES_CURSEUR + ('nom', 'projet_id', 'format_fichier', 'taille_mb', 'nb_lignes')
+        try:
+            return DatasetFrame.from_rows(iter_keyset(
+                lambda: supabase.table('datasets').select(', '.join(colonnes)).eq('projet_id', projet_id),
+                page_size
+            ))
             
         except Exception as e:
             raise Exception(f"Erreur récupération datasets: {str(e)}")
     
+    @staticmethod
+    def _charger_colonnes(dataset: Dataset, colonnes: Iterable[str]) -> dict:
+        """Charge les colonnes manquantes d'un dataset partiel"""
+        response = supabase.table('datasets')\
+            .select(', '.join(colonnes))\
+            .eq('id', dataset.id)\
+            .single()\
+            .execute()
+        return response.data or {}
+    
+    @staticmethod
+    def calculer_taille_mb(fichier_path: str) -> float:
+        """Taille d'un fichier local en MB (2 décimales)"""
+        taille_bytes = os.path.getsize(fichier_path)
+        return round(taille_bytes / (1024 * 1024), 2)
+    
+    @staticmethod
+    def generer_nom_fichier(fichier_path: str, projet_id: str) -> str:
+        """
+        Nom unique dans le storage : {projet_id}/{timestamp}_{aléa}_{nom}
+        Le timestamp (à la seconde) garde l'ordre de lecture, l'aléa évite les
+        collisions de deux uploads du même fichier dans la même seconde
+        """
+        timestamp = int(datetime.now().timestamp())
+        return f"{projet_id}/{timestamp}_{uuid.uuid4().hex[:12]}_{os.path.basename(fichier_path)}"
+    
+    @staticmethod
+    def calculer_empreinte_sha256(
+        fichier_path: str,
+        taille_bloc: int = 1024 * 1024,
+        observateur: Optional[Callable[[memoryview], None]] = None
+    ) -> str:
+        """
+        SHA-256 d'un fichier local, lu par blocs (mémoire constante)
+        observateur: reçoit chaque bloc lu (profilage dans la même passe)
+        """
+        empreinte = hashlib.sha256()
+        tampon = bytearray(taille_bloc)
+        vue = memoryview(tampon)
+        with open(fichier_path, 'rb', buffering=0) as f:
+            while True:
+                n = f.readinto(tampon)
+                if not n:
+                    break
+                empreinte.update(vue[:n])
+                if observateur:
+                    observateur(vue[:n])
+        return empreinte.hexdigest()
+    
+    @staticmethod
+    def generer_chemin_contenu(empreinte: str) -> str:
+        """Chemin adressé par contenu : cas/{2 premiers caractères}/{empreinte}"""
+        return f"{PREFIXE_CONTENU}{empreinte[:2]}/{empreinte}"
+    
     @staticmethod
     def uploader_et_creer_dataset(
         fichier_path: str, 
         nom_dataset: str, 
         projet_id: str,
-        format_fichier: str
+        format_fichier: str,
+        progression: Optional[Callable[[int, int], None]] = None,
+        dedupliquer: bool = False,
+        convertir_parquet: bool = False,
+        compresser: bool = False
     ) -> Dataset:
-        """Upload un fichier et crée le dataset correspondant"""
+        """
+        Upload un fichier et crée le dataset correspondant
+        Les gros fichiers passent automatiquement en upload résumable
+        dedupliquer: fichier stocké sous son SHA-256 (cas/), upload sauté s'il existe déjà
+        nb_lignes et schema_colonnes sont calculés pendant la lecture faite pour l'upload
+        (ou pour l'empreinte) : le fichier n'est pas relu
+        convertir_parquet: CSV/JSON convertis en Parquet compressé avant l'upload
+        (taille d'origine gardée dans taille_originale_mb)
+        compresser: formats textuels compressés à la volée (gzip/zstd selon le format,
+        voir services/compression.py) ; relire avec StorageService.telecharger_flux.
+        Sans effet en mode dedupliquer (le chemin cas/ ne dépend que de l'empreinte)
+        """
+        conversion = None
+        nom_source = fichier_path
         try:
-            # 1. Calculer la taille du fichier
-            taille_bytes = os.path.getsize(fichier_path)
-            taille_mb = round(taille_bytes / (1024 * 1024), 2)
+            # 0. Conversion éventuelle : c'est le fichier Parquet qui est stocké
+            taille_originale_mb = None
+            if convertir_parquet and est_convertible(format_fichier):
+                conversion = convertir_en_parquet(fichier_path, format_fichier)
+                taille_originale_mb = Decimal(str(DatasetService.calculer_taille_mb(fichier_path)))
+                fichier_path, format_fichier = conversion.chemin_parquet, "parquet"
             
-            # 2. Générer un nom unique pour le fichier
-            timestamp = int(datetime.now().timestamp())
-            nom_fichier = f"{projet_id}/{timestamp}_{os.path.basename(fichier_path)}"
+            # 1. Calculer la taille du fichier
+            taille_mb = DatasetService.calculer_taille_mb(fichier_path)
+            profileur = creer_profileur(format_fichier)
+            observateur = profileur.update if profileur else None
             
-            # 3. Upload vers Supabase Storage
+            # 2-3. Upload vers Supabase Storage (nom unique, ou chemin adressé par contenu)
             from services.storage_service import StorageService
-            fichier_url = StorageService.uploader_dataset(fichier_path, nom_fichier)
+            empreinte = codec = None
+            if dedupliquer:
+                empreinte = DatasetService.calculer_empreinte_sha256(fichier_path, observateur=observateur)
+                fichier_url = StorageService.uploader_contenu(
+                    fichier_path, DatasetService.generer_chemin_contenu(empreinte), progression=progression
+                )
+            else:
+                if conversion:
+                    nom_source = os.path.splitext(nom_source)[0] + ".parquet"
+                nom_fichier = DatasetService.generer_nom_fichier(nom_source, projet_id)
+                codec = choisir_codec(format_fichier) if compresser else None
+                fichier_url = StorageService.uploader_dataset(
+                    fichier_path, nom_fichier, progression=progression, observateur=observateur, codec=codec
+                )
             
             if not fichier_url:
                 raise Exception("Erreur lors de l'upload du fichier")
@@ -69,99 +374,203 @@ class DatasetService:
                 projet_id=projet_id,
                 fichier_url=fichier_url,
                 taille_mb=Decimal(str(taille_mb)),
-                format_fichier=format_fichier
+                format_fichier=format_fichier,
+                empreinte_sha256=empreinte,
+                taille_originale_mb=taille_originale_mb,
+                compression=codec.nom if codec else None
             )
             
+            # 5. Profil : lignes / enregistrements et schéma (footer Parquet, répertoire ZIP)
+            if profileur:
+                profil = profileur.resultat(fichier_path)
+                dataset.nb_lignes = profil.nb_lignes
+                dataset.schema_colonnes = profil.schema
+            
             return DatasetService.creer_dataset(dataset)
             
         except Exception as e:
             raise Exception(f"Erreur upload dataset: {str(e)}")
+        finally:
+            if conversion:
+                os.remove(conversion.chemin_parquet)
     
     @staticmethod
     def supprimer_dataset(dataset_id: str, supprimer_fichier: bool = True) -> bool:
         """Supprimer un dataset et optionnellement son fichier"""
         try:
-            # 1. Récupérer les infos du dataset avant suppression
-            dataset_info = supabase.table('datasets')\
-                .select('fichier_url')\
-                .eq('id', dataset_id)\
-                .single()\
-                .execute()
-            
-            # 2. Supprimer l'entrée en base
-            response = supabase.table('datasets')\
-                .delete()\
-                .eq('id', dataset_id)\
-                .execute()
+            resultat = DatasetService.supprimer_datasets([dataset_id], supprimer_fichier)
             
-            # 3. Supprimer le fichier si demandé
-            if supprimer_fichier and dataset_info.data and dataset_info.data.get('fichier_url'):
-                try:
-                    # Extraire le nom du fichier de l'URL
-                    fichier_url = dataset_info.data['fichier_url']
-                    nom_fichier = fichier_url.split('/')[-1]
-                    
-                    from services.storage_service import StorageService
-                    StorageService.supprimer_fichier(nom_fichier)
-                except Exception as e:
-                    print(f"Attention: Erreur suppression fichier: {str(e)}")
+            for echec in resultat.echecs:
+                if echec.erreur != "Dataset introuvable":
+                    raise Exception(echec.erreur)
+            for echec in resultat.echecs_fichiers:
+                print(f"Attention: Erreur suppression fichier: {echec.erreur}")
             
-            return len(response.data) > 0
+            return len(resultat.reussis) > 0
             
         except Exception as e:
             raise Exception(f"Erreur suppression dataset: {str(e)}")
     
+    @staticmethod
+    def supprimer_datasets(
+        dataset_ids: Iterable[str],
+        supprimer_fichiers: bool = True,
+        taille_lot: int = 200,
+        bucket: str = "datasets"
+    ) -> ResultatSuppression:
+        """
+        Supprimer des datasets en lot
+        - une requête delete().in_() par lot d'identifiants, qui renvoie les lignes
+          supprimées (donc leur fichier_url) : pas de select préalable
+        - les fichiers sont ensuite supprimés par appels remove groupés
+        taille_lot: identifiants par requête (ils passent dans l'URL)
+        """
+        from services.storage_service import StorageService
+        
+        ids = list(dict.fromkeys(str(dataset_id) for dataset_id in dataset_ids))
+        resultat = ResultatSuppression()
+        fichiers = []  # (index, dataset_id, chemin)
+        contenus = {}  # empreinte -> (index, dataset_id, chemin) : fichiers partagés
+        projets = set()
+        
+        for debut in range(0, len(ids), taille_lot):
+            lot = ids[debut:debut + taille_lot]
+            resultat.nb_requetes += 1
+            try:
+                response = supabase.table('datasets')\
+                    .delete()\
+                    .in_('id', lot)\
+                    .execute()
+            except Exception as e:
+                resultat.echecs.extend(EchecLigne(debut + i, dataset_id, str(e)) for i, dataset_id in enumerate(lot))
+                continue
+            
+            supprimes = {ligne['id']: ligne for ligne in response.data or []}
+            statistiques_store.publier_lignes('datasets', 'DELETE', response.data)
+            for i, dataset_id in enumerate(lot):
+                ligne = supprimes.get(dataset_id)
+                if ligne is None:
+                    resultat.echecs.append(EchecLigne(debut + i, dataset_id, "Dataset introuvable"))
+                    continue
+                
+                resultat.reussis.append(dataset_id)
+                projets.add(ligne.get('projet_id'))
+                if supprimer_fichiers and ligne.get('fichier_url'):
+                    chemin = StorageService.chemin_depuis_url(ligne['fichier_url'], bucket)
+                    if chemin is None:
+                        resultat.echecs_fichiers.append(EchecLigne(
+                            debut + i, dataset_id, f"URL hors du bucket {bucket}: {ligne['fichier_url']}"
+                        ))
+                    elif chemin.startswith(PREFIXE_CONTENU) and ligne.get('empreinte_sha256'):
+                        contenus.setdefault(ligne['empreinte_sha256'], (debut + i, dataset_id, chemin))
+                    else:
+                        fichiers.append((debut + i, dataset_id, chemin))
+        
+        if projets:
+            cache.invalider(*tags_datasets(*projets))
+        
+        # Un fichier dédupliqué n'est supprimé que si plus aucune ligne ne le référence
+        if contenus:
+            referencees, nb_requetes = DatasetService._empreintes_referencees(contenus)
+            resultat.nb_requetes += nb_requetes
+            fichiers.extend(element for empreinte, element in contenus.items() if empreinte not in referencees)
+        
+        if fichiers:
+            suppression = StorageService.supprimer_fichiers([chemin for _, _, chemin in fichiers], bucket)
+            resultat.nb_requetes += suppression.nb_requetes
+            resultat.fichiers_supprimes.extend(suppression.reussis)
+            for echec in suppression.echecs:
+                index, dataset_id, chemin = fichiers[echec.index]
+                resultat.echecs_fichiers.append(EchecLigne(index, dataset_id, f"{chemin}: {echec.erreur}"))
+        
+        return resultat
+    
+    @staticmethod
+    def _empreintes_referencees(empreintes: Iterable[str], exclure_projet: str = None) -> Tuple[set, int]:
+        """
+        Empreintes encore utilisées par au moins un dataset (hors projet exclu)
+        Renvoie (empreintes, nombre de requêtes)
+        """
+        empreintes = list(dict.fromkeys(empreintes))
+        trouvees = appeler_rpc('empreintes_referencees', {
+            'p_empreintes': empreintes, 'p_exclure_projet': exclure_projet
+        })
+        if trouvees is not None:
+            return {ligne['empreinte'] for ligne in trouvees}, 1
+        
+        # Sans la fonction SQL : une requête par lot (64 caractères par empreinte dans l'URL)
+        trouvees, nb_requetes = set(), 1
+        for debut in range(0, len(empreintes), 100):
+            query = supabase.table('datasets')\
+                .select('empreinte_sha256')\
+                .in_('empreinte_sha256', empreintes[debut:debut + 100])
+            if exclure_projet:
+                query = query.neq('projet_id', exclure_projet)
+            trouvees.update(ligne['empreinte_sha256'] for ligne in query.execute().data)
+            nb_requetes += 1
+        return trouvees, nb_requetes
+    
     @staticmethod
     def statistiques_datasets(projet_id: str) -> Dict:
-        """Récupère les statistiques des datasets d'un projet"""
+        """
+        Récupère les statistiques des datasets d'un projet (agrégées par PostgreSQL)
+        Avec le store incrémental actif : compteurs tenus à jour par les écritures
+        """
         try:
-            datasets = DatasetService.lister_datasets_projet(projet_id)
-            
-            if not datasets:
-                return {
-                    "nombre_datasets": 0,
-                    "taille_totale_mb": 0,
-                    "taille_totale_formatee": "0 MB",
-                    "formats": {},
-                    "dataset_plus_gros": None
-                }
-            
-            # Calculs statistiques
-            taille_totale = sum(float(d.taille_mb or 0) for d in datasets)
-            formats = {}
-            dataset_plus_gros = max(datasets, key=lambda d: float(d.taille_mb or 0))
-            
-            # Comptage des formats
-            for dataset in datasets:
-                format_fichier = dataset.format_fichier or "inconnu"
-                formats[format_fichier] = formats.get(format_fichier, 0) + 1
-            
-            # Formatage de la taille
-            if taille_totale >= 1024:
-                taille_formatee = f"{taille_totale/1024:.1f} GB"
-            else:
-                taille_formatee = f"{taille_totale:.1f} MB"
-            
-            return {
-                "nombre_datasets": len(datasets),
-                "taille_totale_mb": round(taille_totale, 2),
-                "taille_totale_formatee": taille_formatee,
-                "formats": formats,
-                "dataset_plus_gros": {
-                    "nom": dataset_plus_gros.nom,
-                    "taille": dataset_plus_gros.get_taille_formatee()
-                } if dataset_plus_gros.taille_mb else None
-            }
+            if statistiques_store.actif:
+                return statistiques_store.statistiques_datasets(projet_id)
+            return cache.charger(
+                ("stats_datasets", projet_id),
+                [tag_projet(projet_id), TAG_TOUS_DATASETS],
+                lambda: DatasetService._statistiques_datasets(projet_id)
+            )
             
         except Exception as e:
             raise Exception(f"Erreur calcul statistiques: {str(e)}")
     
     @staticmethod
-    def rechercher_datasets(terme: str, projet_id: str = None) -> List[Dataset]:
+    def _statistiques_datasets(projet_id: str) -> Dict:
+        agregat = appeler_rpc('statistiques_datasets', {'p_projet_id': projet_id})
+        if agregat is not None:
+            return CompteurDatasets.depuis_agregat(agregat)
+        
+        # Fonction SQL non déployée : calcul côté client
+        return DatasetService.statistiques_datasets_client(projet_id)
+    
+    @staticmethod
+    def statistiques_datasets_client(projet_id: str, taille_page: int = 1000) -> Dict:
+        """Repli client : parcourt les datasets par pages en ne gardant que des compteurs"""
+        compteur = CompteurDatasets()
+        
+        for item in iter_keyset(
+            lambda: supabase.table('datasets')\
+                .select('nom, taille_mb, format_fichier, created_at, id')\
+                .eq('projet_id', projet_id),
+            taille_page
+        ):
+            compteur.ajouter(item['nom'], item.get('taille_mb'), item.get('format_fichier'))
+        
+        return compteur.resultat()
+    
+    @staticmethod
+    def calculer_statistiques(datasets: List[Dataset]) -> Dict:
+        """Calcule les statistiques d'une liste de datasets"""
+        compteur = CompteurDatasets()
+        for dataset in datasets:
+            compteur.ajouter(dataset.nom, dataset.taille_mb, dataset.format_fichier)
+        return compteur.resultat()
+    
+    @staticmethod
+    def rechercher_datasets(
+        terme: str,
+        projet_id: str = None,
+        fields: Optional[Iterable[str]] = None
+    ) -> List[Dataset]:
         """Recherche des datasets par nom ou description"""
         try:
+            fields = normaliser_fields(Dataset, fields)
             query = supabase.table('datasets')\
-                .select('*')\
+                .select(colonnes_select(fields))\
                 .ilike('nom', f'%{terme}%')
             
             if projet_id:
@@ -169,7 +578,7 @@ class DatasetService:
             
             response = query.execute()
             
-            return [Dataset.from_dict(item) for item in response.data]
+            return [hydrater(Dataset, item, fields, DatasetService._charger_colonnes) for item in response.data]
             
         except Exception as e:
             raise Exception(f"Erreur recherche datasets: {str(e)}")
@@ -186,6 +595,12 @@ class DatasetService:
                 .execute()
             
             if response.data:
+                # Un dataset déplacé invalide aussi son ancien projet (inconnu ici)
+                cache.invalider(*(
+                    (TAG_TOUS_DATASETS,) if 'projet_id' in updates
+                    else tags_datasets(response.data[0].get('projet_id'))
+                ))
+                statistiques_store.publier_lignes('datasets', 'UPDATE', response.data)
                 return Dataset.from_dict(response.data[0])
             else:
                 raise Exception("Dataset non trouvé")
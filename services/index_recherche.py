@@ -0,0 +1,169 @@
+# services/index_recherche.py
+"""
+Index inversé en mémoire : repli de la recherche plein texte
+
+Mêmes correspondances que sql/recherche.sql, sans base de données :
+- chaque mot de la requête est un préfixe, tous doivent correspondre (ET)
+- correspondance approchée sur le nom par trigrammes (comme pg_trgm)
+Le classement n'est qu'une approximation de ts_rank_cd : BM25 avec des poids
+par colonne (nom > type > description), plus la similarité trigramme.
+
+Les listes de postings sont des tableaux NumPy : une requête coûte quelques
+opérations vectorisées, même sur des centaines de milliers de lignes.
+L'index est immuable une fois construit (partageable entre threads).
+"""
+import math
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+_MOT = re.compile(r"[^\W_]+")
+
+# Paramètres BM25 usuels
+K1 = 1.2
+B = 0.75
+
+# Seuil de similarité trigramme (valeur par défaut de pg_trgm)
+SEUIL_SIMILARITE = 0.3
+
+
+def normaliser(texte: Optional[str]) -> str:
+    """Minuscules sans accents"""
+    if not texte:
+        return ""
+    decompose = unicodedata.normalize("NFKD", str(texte))
+    return "".join(c for c in decompose if not unicodedata.combining(c)).lower()
+
+
+def tokeniser(texte: Optional[str]) -> List[str]:
+    """Mots (lettres et chiffres) du texte normalisé"""
+    return _MOT.findall(normaliser(texte))
+
+
+def trigrammes(texte: Optional[str]) -> set:
+    """Trigrammes au sens de pg_trgm (chaque mot complété par '  ' et ' ')"""
+    resultat = set()
+    for mot in tokeniser(texte):
+        mot = f"  {mot} "
+        resultat.update(mot[i:i + 3] for i in range(len(mot) - 2))
+    return resultat
+
+
+class IndexRecherche:
+    """
+    Index inversé d'un ensemble de lignes
+    champs: {colonne: poids} indexées ; la colonne 'nom' sert aussi aux trigrammes
+    """
+
+    def __init__(self, lignes: Iterable[dict], champs: Dict[str, float], champ_nom: str = "nom"):
+        self.lignes: List[dict] = []
+        postings: Dict[str, Dict[int, float]] = {}
+        postings_trigrammes: Dict[str, List[int]] = {}
+        longueurs = []
+        nb_trigrammes = []
+
+        for doc, ligne in enumerate(lignes):
+            self.lignes.append(ligne)
+            longueur = 0.0
+            for champ, poids in champs.items():
+                for mot in tokeniser(ligne.get(champ)):
+                    termes = postings.setdefault(mot, {})
+                    termes[doc] = termes.get(doc, 0.0) + poids
+                    longueur += poids
+            longueurs.append(longueur)
+
+            grammes = trigrammes(ligne.get(champ_nom))
+            nb_trigrammes.append(len(grammes))
+            for gramme in grammes:
+                postings_trigrammes.setdefault(gramme, []).append(doc)
+
+        longueurs = np.asarray(longueurs, dtype=np.float64)
+        longueur_moyenne = float(longueurs.mean()) if len(longueurs) else 0.0
+        # Dénominateur BM25 (hors tf), calculé une fois pour toutes les requêtes
+        self._normalisation = K1 * (1 - B + B * longueurs / (longueur_moyenne or 1.0))
+        self._nb_trigrammes = np.asarray(nb_trigrammes, dtype=np.float64)
+
+        # Vocabulaire trié : les préfixes sont des tranches contiguës
+        self._vocabulaire = sorted(postings)
+        self._postings = {
+            mot: (np.fromiter(docs.keys(), dtype=np.int32, count=len(docs)),
+                  np.fromiter(docs.values(), dtype=np.float64, count=len(docs)))
+            for mot, docs in postings.items()
+        }
+        self._postings_trigrammes = {
+            gramme: np.asarray(docs, dtype=np.int32) for gramme, docs in postings_trigrammes.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.lignes)
+
+    def _termes_prefixe(self, prefixe: str) -> Sequence[str]:
+        debut = bisect_left(self._vocabulaire, prefixe)
+        fin = bisect_left(self._vocabulaire, prefixe + "\U0010ffff", debut)
+        return self._vocabulaire[debut:fin]
+
+    def _scores_texte(self, mots: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Scores BM25 et masque des lignes contenant tous les mots (préfixes)"""
+        n = len(self.lignes)
+        scores = np.zeros(n)
+        correspond = np.ones(n, dtype=bool)
+
+        for mot in mots:
+            trouve = np.zeros(n, dtype=bool)
+            for terme in self._termes_prefixe(mot):
+                docs, tf = self._postings[terme]
+                idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+                # Un document n'apparaît qu'une fois par terme : pas de doublons d'indices
+                scores[docs] += idf * tf * (K1 + 1) / (tf + self._normalisation[docs])
+                trouve[docs] = True
+            correspond &= trouve
+        return scores, correspond
+
+    def _similarites_nom(self, terme: str) -> np.ndarray:
+        """Similarité trigramme (|A ∩ B| / |A ∪ B|) entre le terme et chaque nom"""
+        grammes = trigrammes(terme)
+        if not grammes or not len(self.lignes):
+            return np.zeros(len(self.lignes))
+
+        listes = [self._postings_trigrammes[g] for g in grammes if g in self._postings_trigrammes]
+        if not listes:
+            return np.zeros(len(self.lignes))
+        communs = np.bincount(np.concatenate(listes), minlength=len(self.lignes)).astype(np.float64)
+        union = len(grammes) + self._nb_trigrammes - communs
+        return np.divide(communs, union, out=np.zeros_like(communs), where=union > 0)
+
+    def rechercher(self, terme: str, limite: int = 20, offset: int = 0) -> Tuple[List[Tuple[dict, float]], int]:
+        """
+        Lignes correspondant au terme, par pertinence décroissante
+        Renvoie ([(ligne, score)] de la page demandée, nombre total de résultats)
+        """
+        mots = tokeniser(terme)
+        if not mots or not len(self.lignes):
+            return [], 0
+
+        scores, correspond = self._scores_texte(mots)
+        similarites = self._similarites_nom(terme)
+        correspond |= similarites >= SEUIL_SIMILARITE
+
+        trouves = np.flatnonzero(correspond)
+        totaux = scores[trouves] + similarites[trouves]
+        page = trouves[_meilleurs(totaux, offset + limite)][offset:]
+        return [(self.lignes[i], float(scores[i] + similarites[i])) for i in page], len(trouves)
+
+
+def _meilleurs(valeurs: np.ndarray, k: int) -> np.ndarray:
+    """
+    Positions des k plus grandes valeurs, triées par valeur décroissante
+    À valeur égale, l'ordre d'origine (plus récents d'abord) est conservé.
+    Sélection partielle : pas de tri complet des résultats.
+    """
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(valeurs):
+        seuil = np.partition(valeurs, len(valeurs) - k)[len(valeurs) - k]
+        candidats = np.flatnonzero(valeurs >= seuil)
+    else:
+        candidats = np.arange(len(valeurs))
+    return candidats[np.argsort(-valeurs[candidats], kind="stable")][:k]
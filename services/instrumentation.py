@@ -0,0 +1,95 @@
+# services/instrumentation.py
+"""
+Instrumentation des opérations de service
+
+Décorateurs qui font des méthodes publiques des services des opérations
+(spans parents des requêtes mesurées par config/transport.py), et propagation
+de l'opération en cours aux threads. Les primitives (Instrumentation, spans,
+export Prometheus / OpenTelemetry) sont dans config/instrumentation.py et
+réexportées ici.
+"""
+import contextvars
+import functools
+import inspect
+from typing import Callable
+
+# Réexportés : les services et benchmarks importent tout depuis ce module
+from config.instrumentation import (
+    BORNES_DUREE, Histogramme, Instrumentation, Span, _labels, _span_courant, decrire_url, instrumentation,
+    lignes_content_range
+)
+
+
+def instrumenter(nom: str):
+    """Décorateur : chaque appel est une opération (fonctions, générateurs, coroutines)"""
+    def decorer(fonction):
+        if inspect.isgeneratorfunction(fonction):
+            @functools.wraps(fonction)
+            def generateur(*args, **kwargs):
+                if not instrumentation.actif:
+                    yield from fonction(*args, **kwargs)
+                    return
+                # Le span n'est courant que pendant chaque next() : le code de
+                # l'appelant entre deux éléments ne lui est pas rattaché
+                span = instrumentation._ouvrir(nom, "INTERNAL", operation=nom)
+                iterateur = fonction(*args, **kwargs)
+                erreur = None
+                try:
+                    while True:
+                        jeton = _span_courant.set(span)
+                        try:
+                            element = next(iterateur)
+                        except StopIteration:
+                            return
+                        finally:
+                            _span_courant.reset(jeton)
+                        yield element
+                except BaseException as e:
+                    erreur = e
+                    raise
+                finally:
+                    iterateur.close()
+                    instrumentation._fin_operation(span, erreur)
+            return generateur
+
+        if inspect.iscoroutinefunction(fonction):
+            @functools.wraps(fonction)
+            async def coroutine(*args, **kwargs):
+                if not instrumentation.actif:
+                    return await fonction(*args, **kwargs)
+                with instrumentation.operation(nom):
+                    return await fonction(*args, **kwargs)
+            return coroutine
+
+        @functools.wraps(fonction)
+        def appel(*args, **kwargs):
+            if not instrumentation.actif:
+                return fonction(*args, **kwargs)
+            with instrumentation.operation(nom):
+                return fonction(*args, **kwargs)
+        return appel
+    return decorer
+
+
+def instrumenter_service(cls):
+    """Décorateur de classe : chaque méthode statique publique devient l'opération 'Classe.methode'"""
+    for nom, attribut in list(vars(cls).items()):
+        if not nom.startswith("_") and isinstance(attribut, staticmethod):
+            setattr(cls, nom, staticmethod(instrumenter(f"{cls.__name__}.{nom}")(attribut.__func__)))
+    return cls
+
+
+def propager(fonction: Callable) -> Callable:
+    """
+    fonction exécutée dans le contexte de l'appelant (opération en cours) quand
+    elle est soumise à un ThreadPoolExecutor ; inchangée sans instrumentation
+    """
+    if not instrumentation.actif:
+        return fonction
+    contexte = contextvars.copy_context()
+
+    @functools.wraps(fonction)
+    def dans_le_contexte(*args, **kwargs):
+        # Une copie par appel : un même Context ne peut pas être actif dans deux threads
+        return contexte.copy().run(fonction, *args, **kwargs)
+    return dans_le_contexte
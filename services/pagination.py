@@ -0,0 +1,67 @@
+# services/pagination.py
+"""
+Pagination par clé (keyset) sur (created_at, id), du plus récent au plus ancien
+
+Chaque page reprend après la dernière ligne de la page précédente au lieu
+d'utiliser OFFSET : le coût d'une page reste constant quelle que soit sa
+position, et une seule page (plus la suivante, préchargée) est en mémoire.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from services.instrumentation import propager
+
+# Colonnes nécessaires au curseur : à inclure dans les select()
+COLONNES_CURSEUR = ("created_at", "id")
+
+
+def filtre_apres(curseur: Tuple[Any, Any]) -> str:
+    """Filtre PostgREST 'or' : lignes strictement après le curseur (ordre décroissant)"""
+    created_at, id_ = curseur
+    return f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{id_}")'
+
+
+def _charger_page(construire_requete: Callable[[], Any], taille_page: int,
+                  curseur: Optional[Tuple[Any, Any]]) -> List[Dict]:
+    requete = construire_requete()
+    if curseur is not None:
+        requete = requete.or_(filtre_apres(curseur))
+    return requete\
+        .order('created_at', desc=True)\
+        .order('id', desc=True)\
+        .limit(taille_page)\
+        .execute()\
+        .data
+
+
+def iter_keyset(
+    construire_requete: Callable[[], Any],
+    taille_page: int = 500,
+    prefetch: bool = True
+) -> Iterator[Dict]:
+    """
+    Itère sur les lignes d'une requête, page par page
+    construire_requete: renvoie une requête filtrée (select + eq...) sans order/limit
+    prefetch: charge la page suivante en arrière-plan pendant la consommation
+    """
+    if taille_page < 1:
+        raise ValueError("taille_page doit être >= 1")
+
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        page = _charger_page(construire_requete, taille_page, None)
+        while page:
+            suivante = None
+            if len(page) == taille_page:
+                curseur = (page[-1]["created_at"], page[-1]["id"])
+                if executor:
+                    suivante = executor.submit(propager(_charger_page), construire_requete, taille_page, curseur)
+
+            yield from page
+
+            if len(page) < taille_page:
+                return
+            page = suivante.result() if suivante else _charger_page(construire_requete, taille_page, curseur)
+    finally:
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,430 @@
+# services/profilage.py
+"""
+Profilage d'un fichier de dataset en une seule passe de lecture
+
+Le profileur reçoit le fichier par morceaux (update) pendant la lecture faite
+pour l'upload (ou pour l'empreinte SHA-256) : le fichier n'est lu qu'une fois
+et jamais chargé entièrement en mémoire.
+
+- CSV / TSV / TXT : nombre de lignes (sauts de ligne entre guillemets exclus)
+- JSON / NDJSON   : nombre d'enregistrements (analyse de structure incrémentale)
+  Ces comptages sont vectorisés avec NumPy (plusieurs centaines de Mo/s).
+- Parquet         : nombre de lignes et schéma lus dans le footer (pyarrow)
+- ZIP             : répertoire central (liste des fichiers)
+Le schéma des colonnes est déduit d'un échantillon du début du fichier.
+"""
+import csv
+import io
+import json
+import mmap
+import os
+import re
+import zipfile
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+
+# Début du fichier conservé pour déduire le schéma
+TAILLE_ECHANTILLON = 64 * 1024
+MAX_LIGNES_SCHEMA = 1000
+MAX_FICHIERS_ZIP = 1000
+
+# Octets analysés
+_SAUT, _GUILLEMET, _VIRGULE, _BARRE = ord("\n"), ord('"'), ord(","), ord("\\")
+_CROCHET_OUVRANT, _CROCHET_FERMANT = ord("["), ord("]")
+_ACCOLADE_OUVRANTE, _ACCOLADE_FERMANTE = ord("{"), ord("}")
+
+_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?(Z|[+-]\d{2}:?\d{2})?$")
+_ENTIER = re.compile(r"^[+-]?\d+$")
+_DECIMAL = re.compile(r"^[+-]?(\d+[.,]?\d*|[.,]\d+)([eE][+-]?\d+)?$")
+
+
+@dataclass
+class ProfilFichier:
+    """Métadonnées extraites d'un fichier"""
+    nb_lignes: Optional[int] = None
+    schema: Optional[Dict[str, Any]] = None
+
+
+class Profileur:
+    """
+    Base des profileurs : update(morceau) pendant la lecture, puis resultat()
+    Une erreur de profilage n'interrompt jamais l'upload : le profil est vide.
+    """
+
+    format = None
+
+    def __init__(self):
+        self.erreur: Optional[str] = None
+        self.taille = 0
+        self._echantillon = bytearray()
+
+    def update(self, morceau):
+        """Morceau suivant du fichier (bytes ou memoryview)"""
+        if self.erreur is not None:
+            return
+        try:
+            if isinstance(morceau, memoryview):
+                morceau = morceau.tobytes()
+            if len(self._echantillon) < TAILLE_ECHANTILLON:
+                self._echantillon += morceau[:TAILLE_ECHANTILLON - len(self._echantillon)]
+            self.taille += len(morceau)
+            self._update(morceau)
+        except Exception as e:
+            self.erreur = str(e)
+
+    def resultat(self, fichier_path: Optional[str] = None) -> ProfilFichier:
+        """Profil du fichier (fichier_path : lectures ciblées, ex. footer Parquet)"""
+        if self.erreur is not None:
+            return ProfilFichier()
+        try:
+            return self._resultat(fichier_path)
+        except Exception as e:
+            self.erreur = str(e)
+            return ProfilFichier()
+
+    def _update(self, morceau: bytes):
+        pass
+
+    def _resultat(self, fichier_path: Optional[str]) -> ProfilFichier:
+        raise NotImplementedError
+
+    def _texte_echantillon(self) -> str:
+        """Échantillon décodé, sans la dernière ligne si elle est tronquée"""
+        texte = bytes(self._echantillon).decode("utf-8", errors="replace").lstrip("﻿")
+        if self.taille > len(self._echantillon) and "\n" in texte:
+            texte = texte[:texte.rindex("\n")]
+        return texte
+
+
+class ProfileurTexte(Profileur):
+    """CSV / TSV / TXT : lignes comptées à la volée, schéma déduit de l'en-tête"""
+
+    def __init__(self, format_fichier: str = "csv", separateur: Optional[str] = None):
+        super().__init__()
+        self.format = format_fichier
+        self.separateur = separateur
+        self.tabulaire = format_fichier != "txt"
+        self._sauts = 0
+        self._entre_guillemets = 0
+        self._dernier_octet = b""
+
+    def _update(self, morceau: bytes):
+        if not morceau:
+            return
+        if self.tabulaire and b'"' in morceau:
+            # Un saut de ligne compte s'il est précédé d'un nombre pair de guillemets ("" compris)
+            octets = np.frombuffer(morceau, dtype=np.uint8)
+            guillemets = np.flatnonzero(octets == _GUILLEMET)
+            sauts = np.flatnonzero(octets == _SAUT)
+            parite = (np.searchsorted(guillemets, sauts) + self._entre_guillemets) & 1
+            self._sauts += int(np.count_nonzero(parite == 0))
+            self._entre_guillemets = (self._entre_guillemets + len(guillemets)) & 1
+        elif not self._entre_guillemets:
+            self._sauts += morceau.count(b"\n")
+        self._dernier_octet = morceau[-1:]
+
+    def _resultat(self, fichier_path: Optional[str]) -> ProfilFichier:
+        lignes = self._sauts + (1 if self.taille and self._dernier_octet != b"\n" else 0)
+        if not self.tabulaire:
+            return ProfilFichier(nb_lignes=lignes, schema={"format": self.format})
+
+        separateur, colonnes = self._schema()
+        return ProfilFichier(
+            nb_lignes=max(lignes - 1, 0),  # sans l'en-tête
+            schema={"format": self.format, "separateur": separateur, "colonnes": colonnes}
+        )
+
+    def _schema(self):
+        texte = self._texte_echantillon()
+        separateur = self.separateur
+        if separateur is None:
+            try:
+                separateur = csv.Sniffer().sniff(texte[:8192], delimiters=",;\t|").delimiter
+            except csv.Error:
+                separateur = ","
+
+        lecteur = csv.reader(io.StringIO(texte), delimiter=separateur)
+        entete = next(lecteur, [])
+        types: List[Optional[str]] = [None] * len(entete)
+        for n, ligne in enumerate(lecteur):
+            if n >= MAX_LIGNES_SCHEMA:
+                break
+            for i, valeur in enumerate(ligne[:len(entete)]):
+                types[i] = _fusionner(types[i], _type_texte(valeur), "string")
+
+        return separateur, [{"nom": nom, "type": type_ or "string"} for nom, type_ in zip(entete, types)]
+
+
+class ProfileurJson(Profileur):
+    """
+    JSON / NDJSON : enregistrements comptés par une analyse de structure vectorisée
+    Tableau au premier niveau : ses éléments ; sinon : les objets de premier niveau
+    (un objet par ligne en NDJSON). Chaînes et caractères échappés sont ignorés.
+    """
+
+    format = "json"
+
+    def __init__(self):
+        super().__init__()
+        self._profondeur = 0
+        self._dans_chaine = 0
+        self._echappe = False  # premier octet du morceau suivant échappé
+        self._tableau: Optional[bool] = None
+        self._attente_element = False
+        self._non_vide = False
+        self._virgules = 0
+        self._valeurs = 0
+
+    def _update(self, morceau: bytes):
+        if not morceau:
+            return
+        if self._attente_element:
+            self._chercher_element(morceau, 0)
+
+        octets = np.frombuffer(morceau, dtype=np.uint8)
+        guillemets = self._guillemets_non_echappes(octets)
+
+        # Caractères de structure hors des chaînes
+        structure = np.flatnonzero(
+            (octets == _CROCHET_OUVRANT) | (octets == _CROCHET_FERMANT) |
+            (octets == _ACCOLADE_OUVRANTE) | (octets == _ACCOLADE_FERMANTE) | (octets == _VIRGULE)
+        )
+        parite = (np.searchsorted(guillemets, structure) + self._dans_chaine) & 1
+        structure = structure[parite == 0]
+        self._dans_chaine = (self._dans_chaine + len(guillemets)) & 1
+        if not len(structure):
+            return
+
+        caracteres = octets[structure]
+        ouvrants = (caracteres == _CROCHET_OUVRANT) | (caracteres == _ACCOLADE_OUVRANTE)
+        fermants = (caracteres == _CROCHET_FERMANT) | (caracteres == _ACCOLADE_FERMANTE)
+        profondeurs = self._profondeur + np.cumsum(ouvrants.astype(np.int64) - fermants)
+
+        if self._tableau is None and self._profondeur == 0:
+            self._tableau = bool(caracteres[0] == _CROCHET_OUVRANT)
+            if self._tableau:
+                self._attente_element = True
+                self._chercher_element(morceau, int(structure[0]) + 1)
+
+        if self._tableau:
+            self._virgules += int(np.count_nonzero((caracteres == _VIRGULE) & (profondeurs == 1)))
+        else:
+            self._valeurs += int(np.count_nonzero(fermants & (profondeurs == 0)))
+        self._profondeur = int(profondeurs[-1])
+
+    def _guillemets_non_echappes(self, octets: np.ndarray) -> np.ndarray:
+        """Positions des guillemets qui ne sont pas précédés d'un nombre impair de \\"""
+        guillemets = np.flatnonzero(octets == _GUILLEMET)
+        barres = np.flatnonzero(octets == _BARRE)
+        echappe_debut, self._echappe = self._echappe, False
+        if not len(barres):
+            return guillemets[1:] if echappe_debut and len(guillemets) and guillemets[0] == 0 else guillemets
+
+        # Suites de \ consécutifs : une suite de longueur impaire échappe l'octet suivant
+        debuts = np.flatnonzero(np.diff(barres, prepend=-2) != 1)
+        fins = np.append(debuts[1:], len(barres)) - 1
+        longueurs = fins - debuts + 1
+        if echappe_debut and barres[0] == 0:
+            longueurs[0] -= 1
+        echappes = barres[fins][longueurs % 2 == 1] + 1
+        if echappe_debut:
+            echappes = np.append(echappes, 0)
+        if len(echappes) and echappes.max() == len(octets):
+            self._echappe = True
+        return guillemets[~np.isin(guillemets, echappes)]
+
+    def _chercher_element(self, morceau: bytes, debut: int):
+        """Le tableau de premier niveau est-il vide ? (premier octet non blanc après '[')"""
+        reste = morceau[debut:].lstrip()
+        if reste:
+            self._attente_element = False
+            self._non_vide = reste[:1] != b"]"
+
+    def _resultat(self, fichier_path: Optional[str]) -> ProfilFichier:
+        if self._tableau:
+            nb = self._virgules + 1 if self._non_vide else 0
+        else:
+            nb = self._valeurs
+        return ProfilFichier(nb_lignes=nb, schema={"format": "json", "colonnes": self._schema()})
+
+    def _schema(self) -> List[Dict[str, str]]:
+        texte = self._texte_echantillon().strip()
+        enregistrements = []
+        if texte.startswith("["):
+            decodeur, i = json.JSONDecoder(), 1
+            while len(enregistrements) < MAX_LIGNES_SCHEMA:
+                while i < len(texte) and texte[i] in " \t\r\n,":
+                    i += 1
+                try:
+                    valeur, i = decodeur.raw_decode(texte, i)
+                except ValueError:
+                    break
+                enregistrements.append(valeur)
+        else:
+            for ligne in texte.splitlines()[:MAX_LIGNES_SCHEMA]:
+                try:
+                    enregistrements.append(json.loads(ligne))
+                except ValueError:
+                    continue
+            if not enregistrements:
+                try:
+                    enregistrements.append(json.loads(texte))
+                except ValueError:
+                    pass
+
+        types: Dict[str, Optional[str]] = {}
+        for enregistrement in enregistrements:
+            if isinstance(enregistrement, dict):
+                for cle, valeur in enregistrement.items():
+                    types[cle] = _fusionner(types.get(cle), _type_json(valeur), "mixte")
+        return [{"nom": nom, "type": type_ or "null"} for nom, type_ in types.items()]
+
+
+class ProfileurParquet(Profileur):
+    """Parquet : nombre de lignes et schéma lus dans le footer (quelques Ko en fin de fichier)"""
+
+    format = "parquet"
+
+    def _resultat(self, fichier_path: Optional[str]) -> ProfilFichier:
+        if not fichier_path or os.path.getsize(fichier_path) < 12:
+            return ProfilFichier()
+
+        # Import différé, comme services/conversion.py : pyarrow n'est chargé qu'au premier Parquet
+        import pyarrow.parquet as pq
+
+        # ParquetFile ne lit que le footer (métadonnées), pas les données
+        with pq.ParquetFile(fichier_path, memory_map=True) as fichier:
+            return ProfilFichier(
+                nb_lignes=fichier.metadata.num_rows,
+                schema={
+                    "format": "parquet",
+                    "colonnes": [{"nom": champ.name, "type": _type_arrow(champ.type)} for champ in fichier.schema_arrow]
+                }
+            )
+
+
+class ProfileurZip(Profileur):
+    """ZIP : répertoire central (fin de fichier), sans lire le contenu des fichiers"""
+
+    format = "zip"
+
+    def _resultat(self, fichier_path: Optional[str]) -> ProfilFichier:
+        if not fichier_path:
+            return ProfilFichier()
+
+        with zipfile.ZipFile(fichier_path) as archive:
+            fichiers = [info for info in archive.infolist() if not info.is_dir()]
+
+        extensions = Counter(os.path.splitext(info.filename)[1].lower().lstrip(".") or "aucune" for info in fichiers)
+        return ProfilFichier(
+            nb_lignes=len(fichiers),
+            schema={
+                "format": "zip",
+                "nb_fichiers": len(fichiers),
+                "taille_decompressee": sum(info.file_size for info in fichiers),
+                "extensions": dict(extensions.most_common()),
+                "fichiers": [{"nom": info.filename, "taille": info.file_size} for info in fichiers[:MAX_FICHIERS_ZIP]],
+                "tronque": len(fichiers) > MAX_FICHIERS_ZIP
+            }
+        )
+
+
+_PROFILEURS: Dict[str, Callable[[], Profileur]] = {
+    "csv": lambda: ProfileurTexte("csv"),
+    "tsv": lambda: ProfileurTexte("tsv", separateur="\t"),
+    "txt": lambda: ProfileurTexte("txt"),
+    "json": ProfileurJson,
+    "ndjson": ProfileurJson,
+    "jsonl": ProfileurJson,
+    "parquet": ProfileurParquet,
+    "zip": ProfileurZip,
+}
+
+
+def creer_profileur(format_fichier: Optional[str]) -> Optional[Profileur]:
+    """Profileur adapté au format, ou None si le format n'est pas profilé"""
+    fabrique = _PROFILEURS.get((format_fichier or "").lower())
+    return fabrique() if fabrique else None
+
+
+def profiler_fichier(fichier_path: str, format_fichier: str, taille_bloc: int = 8 * 1024 * 1024) -> ProfilFichier:
+    """Profil d'un fichier local seul (hors upload), lu par blocs via mmap"""
+    profileur = creer_profileur(format_fichier)
+    if profileur is None:
+        return ProfilFichier()
+
+    if os.path.getsize(fichier_path):
+        with open(fichier_path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as donnees:
+                for debut in range(0, len(donnees), taille_bloc):
+                    profileur.update(donnees[debut:debut + taille_bloc])
+    return profileur.resultat(fichier_path)
+
+
+def _type_texte(valeur: str) -> Optional[str]:
+    valeur = valeur.strip()
+    if not valeur:
+        return None
+    if valeur.lower() in ("true", "false", "vrai", "faux"):
+        return "bool"
+    if _ENTIER.match(valeur):
+        return "int"
+    if _DECIMAL.match(valeur):
+        return "float"
+    if _DATE.match(valeur):
+        return "date"
+    return "string"
+
+
+def _type_json(valeur: Any) -> Optional[str]:
+    if valeur is None:
+        return None
+    if isinstance(valeur, bool):
+        return "bool"
+    if isinstance(valeur, int):
+        return "int"
+    if isinstance(valeur, float):
+        return "float"
+    if isinstance(valeur, str):
+        return "date" if _DATE.match(valeur) else "string"
+    return "object" if isinstance(valeur, dict) else "array"
+
+
+def _fusionner(actuel: Optional[str], nouveau: Optional[str], repli: str) -> Optional[str]:
+    """Type commun de deux valeurs d'une colonne (None : valeur vide)"""
+    if actuel is None or actuel == nouveau:
+        return nouveau if actuel is None else actuel
+    if nouveau is None:
+        return actuel
+    if {actuel, nouveau} == {"int", "float"}:
+        return "float"
+    return repli
+
+
+def _type_arrow(type_) -> str:
+    """Type d'une colonne Arrow, dans le vocabulaire des autres profileurs"""
+    import pyarrow.types as pat
+
+    if pat.is_dictionary(type_):
+        return _type_arrow(type_.value_type)
+    if pat.is_boolean(type_):
+        return "bool"
+    if pat.is_integer(type_):
+        return "int"
+    if pat.is_floating(type_) or pat.is_decimal(type_):
+        return "float"
+    if pat.is_string(type_) or pat.is_large_string(type_):
+        return "string"
+    if pat.is_date(type_):
+        return "date"
+    if pat.is_timestamp(type_) or pat.is_time(type_):
+        return "timestamp"
+    if pat.is_list(type_) or pat.is_large_list(type_) or pat.is_fixed_size_list(type_):
+        return "array"
+    if pat.is_struct(type_) or pat.is_map(type_):
+        return "object"
+    if pat.is_null(type_):
+        return "null"
+    return "binary"
@@ -0,0 +1,32 @@
+# services/projection.py
+from typing import Iterable, Optional, Sequence, Tuple
+
+
+def normaliser_fields(modele, fields: Optional[Iterable[str]], obligatoires: Sequence[str] = ("id",)) -> Optional[Tuple[str, ...]]:
+    """
+    Valide une projection fields= et y ajoute les colonnes obligatoires
+    None : toutes les colonnes
+    """
+    if fields is None:
+        return None
+
+    connus = set(modele.champs())
+    colonnes = list(obligatoires)
+    for champ in fields:
+        if champ not in connus:
+            raise ValueError(f"Colonne inconnue pour {modele.__name__}: {champ}")
+        if champ not in colonnes:
+            colonnes.append(champ)
+    return tuple(colonnes)
+
+
+def colonnes_select(fields: Optional[Tuple[str, ...]]) -> str:
+    """Argument de select() pour une projection normalisée"""
+    return "*" if fields is None else ", ".join(fields)
+
+
+def hydrater(modele, item: dict, fields: Optional[Tuple[str, ...]], chargeur=None):
+    """Modèle complet, ou instance partielle si une projection est demandée"""
+    if fields is None:
+        return modele.from_dict(item)
+    return modele.partiel(item, chargeur)
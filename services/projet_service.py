@@ -1,24 +1,38 @@
-from typing import List, Optional
+from typing import List, Optional, Iterator, Iterable, Tuple
 from config.database import supabase
 from models.projet import ProjetIA
+from models.resultats import RapportSuppressionProjet
+from services.cache import cache, tag_utilisateur, tags_datasets, TAG_TOUS_PROJETS
+from services.pagination import iter_keyset, COLONNES_CURSEUR
+from services.projection import normaliser_fields, colonnes_select, hydrater
+from services.rpc import appeler_rpc
+from services.statistiques import CompteurProjets
+from services.statistiques_store import statistiques_store
+from services.instrumentation import instrumenter_service
 
+@instrumenter_service
 class ProjetService:
 
+    @staticmethod
+    def valider_projet(projet: ProjetIA):
+        """Validation métier avant création"""
+        # Validation business
+        if not projet.nom.strip():
+            raise ValueError("Le nom du projet est obligatoire")
+        
+        if projet.type_modele not in ['NLP', 'Computer Vision', 'ML', 'Deep Learning']:
+            raise ValueError("Type de modèle non supporté")
+        
+        # Validation des hyperparamètres
+        if projet.hyperparametres:
+            if not isinstance(projet.hyperparametres, dict):
+                raise ValueError("Les hyperparamètres doivent être un dictionnaire")
+
     @staticmethod
     def creer_projet_ia(projet: ProjetIA, user_id: str) -> ProjetIA:
         """Création avec validation métier"""
         try:
-            # Validation business
-            if not projet.nom.strip():
-                raise ValueError("Le nom du projet est obligatoire")
-            
-            if projet.type_modele not in ['NLP', 'Computer Vision', 'ML', 'Deep Learning']:
-                raise ValueError("Type de modèle non supporté")
-            
-            # Validation des hyperparamètres
-            if projet.hyperparametres:
-                if not isinstance(projet.hyperparametres, dict):
-                    raise ValueError("Les hyperparamètres doivent être un dictionnaire")
+            ProjetService.valider_projet(projet)
             
             data = projet.to_dict()
             data['created_by'] = user_id
@@ -26,6 +40,8 @@ class ProjetService:
             response = supabase.table('projets_ia').insert(data).execute()
             
             if response.data:
+                cache.invalider(tag_utilisateur(user_id), TAG_TOUS_PROJETS)
+                statistiques_store.publier_lignes('projets_ia', 'INSERT', response.data)
                 return ProjetIA.from_dict(response.data[0])
             else:
                 raise Exception("Erreur lors de la création")
@@ -34,20 +50,58 @@ class ProjetService:
             raise Exception(f"Erreur service création: {str(e)}")
 
     @staticmethod
-    def lister_projets(user_id: str) -> List[ProjetIA]:
-        """Lister tous les projets d'un utilisateur"""
+    def lister_projets(user_id: str, fields: Optional[Iterable[str]] = None) -> List[ProjetIA]:
+        """
+        Lister tous les projets d'un utilisateur
+        fields: colonnes à récupérer (les autres sont chargées à la demande)
+        """
         try:
-            response = supabase.table('projets_ia')\
-                .select('*')\
-                .eq('created_by', user_id)\
-                .order('created_at', desc=True)\
-                .execute()
+            fields = normaliser_fields(ProjetIA, fields)
+            lignes = cache.charger(
+                ("projets", user_id, fields),
+                [tag_utilisateur(user_id)],
+                lambda: supabase.table('projets_ia')\
+                    .select(colonnes_select(fields))\
+                    .eq('created_by', user_id)\
+                    .order('created_at', desc=True)\
+                    .execute().data
+            )
             
-            return [ProjetIA.from_dict(item) for item in response.data]
+            return [hydrater(ProjetIA, item, fields, ProjetService._charger_colonnes) for item in lignes]
             
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération: {str(e)}")
     
+    @staticmethod
+    def iter_projets(
+        user_id: str,
+        page_size: int = 500,
+        prefetch: bool = True,
+        fields: Optional[Iterable[str]] = None
+    ) -> Iterator[ProjetIA]:
+        """Parcourt les projets d'un utilisateur page par page (mémoire constante)"""
+        try:
+            fields = normaliser_fields(ProjetIA, fields, COLONNES_CURSEUR)
+            for item in iter_keyset(
+                lambda: supabase.table('projets_ia').select(colonnes_select(fields)).eq('created_by', user_id),
+                page_size,
+                prefetch
+            ):
+                yield hydrater(ProjetIA, item, fields, ProjetService._charger_colonnes)
+            
+        except Exception as e:
+            raise Exception(f"Erreur lors de la récupération: {str(e)}")
+    
+    @staticmethod
+    def _charger_colonnes(projet: ProjetIA, colonnes: Iterable[str]) -> dict:
+        """Charge les colonnes manquantes d'un projet partiel"""
+        response = supabase.table('projets_ia')\
+            .select(', '.join(colonnes))\
+            .eq('id', projet.id)\
+            .single()\
+            .execute()
+        return response.data or {}
+    
     @staticmethod
     def mettre_a_jour_projet(projet_id: str, updates: dict, user_id: str) -> ProjetIA:
         """Mettre à jour un projet"""
@@ -61,6 +115,8 @@ class ProjetService:
                 .execute()
             
             if response.data:
+                cache.invalider(tag_utilisateur(user_id), TAG_TOUS_PROJETS)
+                statistiques_store.publier_lignes('projets_ia', 'UPDATE', response.data)
                 return ProjetIA.from_dict(response.data[0])
             else:
                 raise Exception("Projet non trouvé ou accès refusé")
@@ -78,71 +134,203 @@ class ProjetService:
                 .eq('created_by', user_id)\
                 .execute()
             
+            if response.data:
+                cache.invalider(tag_utilisateur(user_id), *tags_datasets(projet_id), TAG_TOUS_PROJETS)
+                statistiques_store.oublier_projet(projet_id)
+            
             return len(response.data) > 0
             
         except Exception as e:
             raise Exception(f"Erreur suppression: {str(e)}")
     
     @staticmethod
-    def rechercher_projets(user_id: str, terme: str) -> List[ProjetIA]:
+    def supprimer_projet_cascade(
+        projet_id: str,
+        user_id: str,
+        dry_run: bool = False,
+        bucket: str = "datasets",
+        max_workers: int = 4
+    ) -> RapportSuppressionProjet:
+        """
+        Supprimer un projet, ses datasets et tous les fichiers sous {projet_id}/,
+        ainsi que les fichiers dédupliqués (cas/) qu'aucun autre projet n'utilise
+        dry_run: compte seulement les datasets, fichiers et octets concernés
+        Les fichiers sont supprimés en premier : en cas d'échec, le projet est
+        conservé et la suppression peut être relancée.
+        """
+        from services.storage_service import StorageService
+        
+        rapport = RapportSuppressionProjet(projet_id=projet_id, dry_run=dry_run)
+        try:
+            # 1. Le projet doit appartenir à l'utilisateur
+            response = supabase.table('projets_ia')\
+                .select('id')\
+                .eq('id', projet_id)\
+                .eq('created_by', user_id)\
+                .execute()
+            rapport.nb_requetes += 1
+            if not response.data:
+                return rapport
+            rapport.projet_trouve = True
+            
+            # 2. Inventaire : nombre de datasets (sans les lignes) et fichiers du préfixe
+            response = supabase.table('datasets')\
+                .select('id', count='exact', head=True)\
+                .eq('projet_id', projet_id)\
+                .execute()
+            rapport.nb_requetes += 1
+            rapport.nb_datasets = response.count or 0
+            
+            chemins = []
+            for objet in StorageService.iter_fichiers(bucket, projet_id, max_workers=max_workers):
+                chemins.append(objet['chemin'])
+                rapport.octets += objet['taille']
+            
+            # Fichiers dédupliqués (cas/) que seul ce projet utilise
+            for chemin, taille in ProjetService._contenus_exclusifs(projet_id, rapport):
+                chemins.append(chemin)
+                rapport.octets += taille
+            rapport.nb_fichiers = len(chemins)
+            
+            if dry_run:
+                return rapport
+            
+            # 3. Fichiers, par lots supprimés en parallèle
+            if chemins:
+                suppression = StorageService.supprimer_fichiers(chemins, bucket, max_workers=max_workers)
+                rapport.nb_requetes += suppression.nb_requetes
+                rapport.fichiers_supprimes = len(suppression.reussis)
+                rapport.echecs_fichiers = suppression.echecs
+                if suppression.echecs:
+                    return rapport
+            
+            # 4. Lignes : datasets en une requête, puis le projet
+            supabase.table('datasets')\
+                .delete(returning='minimal')\
+                .eq('projet_id', projet_id)\
+                .execute()
+            response = supabase.table('projets_ia')\
+                .delete(returning='minimal')\
+                .eq('id', projet_id)\
+                .eq('created_by', user_id)\
+                .execute()
+            rapport.nb_requetes += 2
+            rapport.projet_supprime = True
+            
+            cache.invalider(tag_utilisateur(user_id), *tags_datasets(projet_id), TAG_TOUS_PROJETS)
+            statistiques_store.oublier_projet(projet_id)
+            return rapport
+            
+        except Exception as e:
+            raise Exception(f"Erreur suppression: {str(e)}")
+    
+    @staticmethod
+    def _contenus_exclusifs(projet_id: str, rapport: RapportSuppressionProjet) -> List[Tuple[str, int]]:
+        """
+        Fichiers adressés par contenu référencés par ce projet et par aucun autre
+        Renvoie [(chemin, octets)] ; la taille est celle déclarée sur le dataset
+        """
+        from services.dataset_service import DatasetService
+        
+        contenus = {}
+        try:
+            for ligne in iter_keyset(
+                lambda: supabase.table('datasets')
+                    .select('created_at, id, empreinte_sha256, taille_mb')
+                    .eq('projet_id', projet_id)
+                    .not_.is_('empreinte_sha256', 'null'),
+                1000
+            ):
+                contenus.setdefault(ligne['empreinte_sha256'], float(ligne.get('taille_mb') or 0))
+        except Exception as e:
+            # Colonne absente (sql/deduplication.sql non déployé) : aucun fichier partagé
+            if getattr(e, 'code', None) == '42703':
+                return []
+            raise
+        if not contenus:
+            return []
+        
+        referencees, nb_requetes = DatasetService._empreintes_referencees(contenus, exclure_projet=projet_id)
+        rapport.nb_requetes += nb_requetes
+        return [
+            (DatasetService.generer_chemin_contenu(empreinte), int(taille_mb * 1024 * 1024))
+            for empreinte, taille_mb in contenus.items()
+            if empreinte not in referencees
+        ]
+    
+    @staticmethod
+    def rechercher_projets(user_id: str, terme: str, fields: Optional[Iterable[str]] = None) -> List[ProjetIA]:
         """Recherche full-text dans les projets"""
         try:
+            fields = normaliser_fields(ProjetIA, fields)
             response = supabase.table('projets_ia')\
-                .select('*')\
+                .select(colonnes_select(fields))\
                 .eq('created_by', user_id)\
                 .or_(f'nom.ilike.%{terme}%,description.ilike.%{terme}%')\
                 .execute()
             
-            return [ProjetIA.from_dict(item) for item in response.data]
+            return [hydrater(ProjetIA, item, fields, ProjetService._charger_colonnes) for item in response.data]
             
         except Exception as e:
             raise Exception(f"Erreur recherche: {str(e)}")
 
     @staticmethod
     def statistiques_projets(user_id: str) -> dict:
-        """Analytics en temps réel des projets"""
+        """
+        Analytics en temps réel des projets (agrégées par PostgreSQL)
+        Avec le store incrémental actif : compteurs tenus à jour par les écritures
+        """
         try:
-            # Requête pour récupérer tous les projets de l'utilisateur
-            if user_id:
-                response = supabase.table('projets_ia')\
-                    .select('type_modele, statut')\
-                    .eq('created_by', user_id)\
-                    .execute()
-            else:
-                response = supabase.table('projets_ia')\
-                    .select('type_modele, statut')\
-                    .order('created_at', desc=True)\
-                    .limit(10)\
-                    .execute()
-            
-            if not response.data:
-                return {"total": 0, "par_type": {}, "par_statut": {}, "type_favori": None}
-            
-            # Calculs des statistiques
-            par_type = {}
-            par_statut = {}
-            
-            for projet in response.data:
-                type_modele = projet['type_modele']
-                statut = projet['statut']
-                
-                # Compter par type
-                par_type[type_modele] = par_type.get(type_modele, 0) + 1
-                
-                # Compter par statut
-                par_statut[statut] = par_statut.get(statut, 0) + 1
-            
-            # Trouver le type favori
-            type_favori = None
-            if par_type:
-                type_favori = max(par_type.items(), key=lambda x: x[1])[0]
-            
-            return {
-                "total": len(response.data),
-                "par_type": par_type,
-                "par_statut": par_statut,
-                "type_favori": type_favori
-            }
+            if user_id and statistiques_store.actif:
+                return statistiques_store.statistiques_projets(user_id)
+            return cache.charger(
+                ("stats_projets", user_id),
+                [tag_utilisateur(user_id) if user_id else TAG_TOUS_PROJETS],
+                lambda: ProjetService._statistiques_projets(user_id)
+            )
             
         except Exception as e:
-            raise Exception(f"Erreur calcul statistiques: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Erreur calcul statistiques: {str(e)}")
+
+    @staticmethod
+    def _statistiques_projets(user_id: str) -> dict:
+        agregat = appeler_rpc('statistiques_projets', {'p_user_id': user_id or None})
+        if agregat is not None:
+            return CompteurProjets.depuis_agregat(agregat)
+        
+        # Fonction SQL non déployée : calcul côté client
+        return ProjetService.statistiques_projets_client(user_id)
+
+    @staticmethod
+    def statistiques_projets_client(user_id: str, taille_page: int = 1000) -> dict:
+        """Repli client : parcourt les projets par pages en ne gardant que des compteurs"""
+        compteur = CompteurProjets()
+        
+        if not user_id:
+            # Sans utilisateur : les 10 projets les plus récents
+            response = supabase.table('projets_ia')\
+                .select('type_modele, statut')\
+                .order('created_at', desc=True)\
+                .limit(10)\
+                .execute()
+            for projet in response.data:
+                compteur.ajouter(projet['type_modele'], projet['statut'])
+            return compteur.resultat()
+        
+        for projet in iter_keyset(
+            lambda: supabase.table('projets_ia')\
+                .select('type_modele, statut, created_at, id')\
+                .eq('created_by', user_id),
+            taille_page
+        ):
+            compteur.ajouter(projet['type_modele'], projet['statut'])
+        
+        return compteur.resultat()
+
+    @staticmethod
+    def calculer_statistiques(projets: List[dict]) -> dict:
+        """Calcule les statistiques à partir des lignes (type_modele, statut)"""
+        compteur = CompteurProjets()
+        for projet in projets:
+            compteur.ajouter(projet['type_modele'], projet['statut'])
+        return compteur.resultat()
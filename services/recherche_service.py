@@ -0,0 +1,186 @@
+# services/recherche_service.py
+import copy
+import os
+from itertools import islice
+from typing import Iterable, List, Optional, Tuple
+from config.database import supabase
+from models.dataset import Dataset
+from models.projet import ProjetIA
+from models.resultats import ResultatRecherche
+from services.cache import cache, tag_utilisateur, tag_projet, TAG_TOUS_DATASETS
+from services.dataset_service import DatasetService
+from services.index_recherche import IndexRecherche
+from services.pagination import iter_keyset
+from services.projection import normaliser_fields, hydrater
+from services.projet_service import ProjetService
+from services.rpc import appeler_rpc
+from services.instrumentation import instrumenter_service
+
+# Colonnes indexées et leur poids (mêmes poids relatifs que sql/recherche.sql)
+CHAMPS_PROJETS = {'nom': 3.0, 'type_modele': 2.0, 'description': 1.0}
+CHAMPS_DATASETS = {'nom': 3.0, 'format_fichier': 1.0}
+
+MODES = ("auto", "serveur", "local")
+
+# Index local de tous les datasets (projet_id None) : au-delà, la recherche
+# doit passer par sql/recherche.sql ou être limitée à un projet
+MAX_LIGNES_INDEX_GLOBAL = int(os.getenv("RECHERCHE_INDEX_GLOBAL_MAX", "50000"))
+
+
+@instrumenter_service
+class RechercheService:
+    """
+    Recherche plein texte classée et paginée
+    mode="serveur" : fonctions de sql/recherche.sql (index GIN + trigrammes)
+    mode="local"   : index inversé en mémoire (tests, hors ligne, SQL non déployé)
+    mode="auto"    : serveur si les fonctions sont déployées, sinon local
+    """
+
+    @staticmethod
+    def rechercher_projets(
+        user_id: str,
+        terme: str,
+        limite: int = 20,
+        offset: int = 0,
+        fields: Optional[Iterable[str]] = None,
+        mode: str = "auto"
+    ) -> ResultatRecherche:
+        """Projets d'un utilisateur correspondant au terme, les plus pertinents d'abord"""
+        try:
+            RechercheService._verifier_mode(mode)
+            fields = normaliser_fields(ProjetIA, fields)
+
+            lignes = None
+            if mode != "local":
+                lignes = appeler_rpc('rechercher_projets_classes', {
+                    'p_user_id': user_id, 'p_terme': terme, 'p_limite': limite, 'p_offset': offset
+                })
+                if lignes is None and mode == "serveur":
+                    raise ValueError("Fonction rechercher_projets_classes absente (voir sql/recherche.sql)")
+
+            if lignes is not None:
+                page, total, mode = RechercheService._depuis_rpc(lignes), RechercheService._total(lignes), "serveur"
+            else:
+                page, total = RechercheService.index_projets(user_id).rechercher(terme, limite, offset)
+                mode = "local"
+
+            return ResultatRecherche(
+                resultats=[
+                    hydrater(ProjetIA, RechercheService._projeter(ligne, fields), fields, ProjetService._charger_colonnes)
+                    for ligne, _ in page
+                ],
+                scores=[score for _, score in page],
+                total=total,
+                limite=limite,
+                offset=offset,
+                mode=mode
+            )
+
+        except Exception as e:
+            raise Exception(f"Erreur recherche: {str(e)}")
+
+    @staticmethod
+    def rechercher_datasets(
+        terme: str,
+        projet_id: str = None,
+        limite: int = 20,
+        offset: int = 0,
+        fields: Optional[Iterable[str]] = None,
+        mode: str = "auto"
+    ) -> ResultatRecherche:
+        """Datasets (d'un projet, ou tous) correspondant au terme, les plus pertinents d'abord"""
+        try:
+            RechercheService._verifier_mode(mode)
+            fields = normaliser_fields(Dataset, fields)
+
+            lignes = None
+            if mode != "local":
+                lignes = appeler_rpc('rechercher_datasets_classes', {
+                    'p_terme': terme, 'p_projet_id': projet_id, 'p_limite': limite, 'p_offset': offset
+                })
+                if lignes is None and mode == "serveur":
+                    raise ValueError("Fonction rechercher_datasets_classes absente (voir sql/recherche.sql)")
+
+            if lignes is not None:
+                page, total, mode = RechercheService._depuis_rpc(lignes), RechercheService._total(lignes), "serveur"
+            else:
+                page, total = RechercheService.index_datasets(projet_id).rechercher(terme, limite, offset)
+                mode = "local"
+
+            return ResultatRecherche(
+                resultats=[
+                    hydrater(Dataset, RechercheService._projeter(ligne, fields), fields, DatasetService._charger_colonnes)
+                    for ligne, _ in page
+                ],
+                scores=[score for _, score in page],
+                total=total,
+                limite=limite,
+                offset=offset,
+                mode=mode
+            )
+
+        except Exception as e:
+            raise Exception(f"Erreur recherche datasets: {str(e)}")
+
+    @staticmethod
+    def index_projets(user_id: str) -> IndexRecherche:
+        """Index local des projets d'un utilisateur (en cache, invalidé par les écritures)"""
+        return cache.charger(
+            ("index_projets", user_id),
+            [tag_utilisateur(user_id)],
+            lambda: IndexRecherche(
+                iter_keyset(lambda: supabase.table('projets_ia').select('*').eq('created_by', user_id)),
+                CHAMPS_PROJETS
+            ),
+            copier=False
+        )
+
+    @staticmethod
+    def index_datasets(projet_id: str = None) -> IndexRecherche:
+        """
+        Index local des datasets d'un projet, ou de tous si projet_id est None
+        (au plus MAX_LIGNES_INDEX_GLOBAL lignes, ValueError au-delà)
+        """
+        def construire_requete():
+            query = supabase.table('datasets').select('*')
+            return query.eq('projet_id', projet_id) if projet_id else query
+
+        def construire_index() -> IndexRecherche:
+            if projet_id:
+                return IndexRecherche(iter_keyset(construire_requete), CHAMPS_DATASETS)
+            # Lecture arrêtée au premier dépassement : la table n'est jamais chargée en entier
+            lignes = list(islice(iter_keyset(construire_requete), MAX_LIGNES_INDEX_GLOBAL + 1))
+            if len(lignes) > MAX_LIGNES_INDEX_GLOBAL:
+                raise ValueError(
+                    f"Plus de {MAX_LIGNES_INDEX_GLOBAL} datasets : recherche globale locale impossible, "
+                    "déployez sql/recherche.sql ou précisez projet_id"
+                )
+            return IndexRecherche(lignes, CHAMPS_DATASETS)
+
+        return cache.charger(
+            ("index_datasets", projet_id),
+            [tag_projet(projet_id), TAG_TOUS_DATASETS],
+            construire_index,
+            copier=False
+        )
+
+    @staticmethod
+    def _verifier_mode(mode: str):
+        if mode not in MODES:
+            raise ValueError(f"Mode de recherche inconnu: {mode} (attendu: {', '.join(MODES)})")
+
+    @staticmethod
+    def _depuis_rpc(lignes: List[dict]) -> List[Tuple[dict, float]]:
+        return [(item['ligne'], float(item['score'])) for item in lignes]
+
+    @staticmethod
+    def _total(lignes: List[dict]) -> int:
+        # total est identique sur chaque ligne ; page vide (offset trop grand) : inconnu, 0
+        return int(lignes[0]['total']) if lignes else 0
+
+    @staticmethod
+    def _projeter(ligne: dict, fields: Optional[Tuple[str, ...]]) -> dict:
+        """Copie de la ligne (l'index est partagé), limitée aux colonnes demandées"""
+        if fields is None:
+            return copy.deepcopy(ligne)
+        return {colonne: copy.deepcopy(ligne[colonne]) for colonne in fields if colonne in ligne}
@@ -0,0 +1,49 @@
+# services/rpc.py
+from typing import Any, Dict, Optional
+from config.database import supabase, get_async_supabase
+from services.concurrence import executer_async
+
+# Codes renvoyés quand la fonction n'existe pas (PostgREST / PostgreSQL)
+CODES_FONCTION_ABSENTE = {"PGRST202", "42883"}
+
+# Fonctions détectées comme absentes : on ne les rappelle plus
+_fonctions_absentes = set()
+
+
+def appeler_rpc(nom: str, params: Optional[Dict] = None) -> Optional[Any]:
+    """
+    Appelle une fonction PostgreSQL via PostgREST
+    Renvoie None si la fonction n'est pas déployée (voir sql/)
+    """
+    if nom in _fonctions_absentes:
+        return None
+
+    try:
+        return supabase.rpc(nom, params or {}).execute().data
+    except Exception as e:
+        # postgrest.APIError (non importé ici pour garder l'import léger)
+        if getattr(e, 'code', None) in CODES_FONCTION_ABSENTE:
+            _fonctions_absentes.add(nom)
+            return None
+        raise
+
+
+async def appeler_rpc_async(nom: str, params: Optional[Dict] = None) -> Optional[Any]:
+    """Version asynchrone de appeler_rpc (respecte la limite de concurrence)"""
+    if nom in _fonctions_absentes:
+        return None
+
+    try:
+        client = await get_async_supabase()
+        return (await executer_async(client.rpc(nom, params or {}))).data
+    except Exception as e:
+        # postgrest.APIError (non importé ici pour garder l'import léger)
+        if getattr(e, 'code', None) in CODES_FONCTION_ABSENTE:
+            _fonctions_absentes.add(nom)
+            return None
+        raise
+
+
+def reinitialiser_rpc():
+    """Oublie les fonctions absentes (après déploiement du SQL)"""
+    _fonctions_absentes.clear()
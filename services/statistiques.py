@@ -0,0 +1,122 @@
+# services/statistiques.py
+from typing import Dict, Optional
+
+
+def formater_taille_mb(taille_mb: float) -> str:
+    """Taille formatée (ex: '125.5 MB', '1.2 GB')"""
+    if taille_mb >= 1024:
+        return f"{taille_mb/1024:.1f} GB"
+    return f"{taille_mb:.1f} MB"
+
+
+class CompteurDatasets:
+    """Statistiques de datasets calculées en un passage, sans garder les lignes"""
+
+    def __init__(self):
+        self.nombre = 0
+        self.taille_totale = 0.0
+        self.formats: Dict[str, int] = {}
+        self.plus_gros_nom: Optional[str] = None
+        self.plus_gros_taille = 0.0
+
+    def ajouter(self, nom: str, taille_mb, format_fichier: Optional[str]):
+        """Compte une ligne"""
+        taille = float(taille_mb or 0)
+        format_fichier = format_fichier or "inconnu"
+
+        self.nombre += 1
+        self.taille_totale += taille
+        self.formats[format_fichier] = self.formats.get(format_fichier, 0) + 1
+
+        if self.plus_gros_nom is None or taille > self.plus_gros_taille:
+            self.plus_gros_nom = nom
+            self.plus_gros_taille = taille
+
+    def resultat(self) -> Dict:
+        """Dictionnaire au format de DatasetService.statistiques_datasets"""
+        if not self.nombre:
+            return {
+                "nombre_datasets": 0,
+                "taille_totale_mb": 0,
+                "taille_totale_formatee": "0 MB",
+                "formats": {},
+                "dataset_plus_gros": None
+            }
+
+        return {
+            "nombre_datasets": self.nombre,
+            "taille_totale_mb": round(self.taille_totale, 2),
+            "taille_totale_formatee": formater_taille_mb(self.taille_totale),
+            "formats": dict(self.formats),
+            "dataset_plus_gros": {
+                "nom": self.plus_gros_nom,
+                "taille": formater_taille_mb(self.plus_gros_taille)
+            } if self.plus_gros_taille else None
+        }
+
+    @staticmethod
+    def depuis_agregat(agregat: Dict) -> Dict:
+        """Met en forme le résultat de la fonction SQL statistiques_datasets"""
+        if not agregat or not agregat.get("nombre_datasets"):
+            return CompteurDatasets().resultat()
+
+        taille_totale = float(agregat.get("taille_totale_mb") or 0)
+        plus_gros = agregat.get("dataset_plus_gros")
+
+        return {
+            "nombre_datasets": agregat["nombre_datasets"],
+            "taille_totale_mb": round(taille_totale, 2),
+            "taille_totale_formatee": formater_taille_mb(taille_totale),
+            "formats": agregat.get("formats") or {},
+            "dataset_plus_gros": {
+                "nom": plus_gros["nom"],
+                "taille": formater_taille_mb(float(plus_gros["taille_mb"]))
+            } if plus_gros else None
+        }
+
+
+class CompteurProjets:
+    """Statistiques de projets (par type et par statut) en un passage"""
+
+    def __init__(self):
+        self.total = 0
+        self.par_type: Dict[str, int] = {}
+        self.par_statut: Dict[str, int] = {}
+
+    def ajouter(self, type_modele: str, statut: str):
+        """Compte une ligne"""
+        self.total += 1
+        self.par_type[type_modele] = self.par_type.get(type_modele, 0) + 1
+        self.par_statut[statut] = self.par_statut.get(statut, 0) + 1
+
+    def resultat(self) -> Dict:
+        """Dictionnaire au format de ProjetService.statistiques_projets"""
+        return CompteurProjets.formater(self.total, self.par_type, self.par_statut)
+
+    @staticmethod
+    def formater(total: int, par_type: Dict[str, int], par_statut: Dict[str, int]) -> Dict:
+        """Ajoute le type favori et normalise le résultat"""
+        if not total:
+            return {"total": 0, "par_type": {}, "par_statut": {}, "type_favori": None}
+
+        # Trouver le type favori
+        type_favori = None
+        if par_type:
+            type_favori = max(par_type.items(), key=lambda x: x[1])[0]
+
+        return {
+            "total": total,
+            "par_type": dict(par_type),
+            "par_statut": dict(par_statut),
+            "type_favori": type_favori
+        }
+
+    @staticmethod
+    def depuis_agregat(agregat: Dict) -> Dict:
+        """Met en forme le résultat de la fonction SQL statistiques_projets"""
+        agregat = agregat or {}
+        return CompteurProjets.formater(
+            agregat.get("total") or 0,
+            agregat.get("par_type") or {},
+            agregat.get("par_statut") or {}
+        )
@@ -0,0 +1,506 @@
+# services/statistiques_store.py
+"""
+Statistiques maintenues incrémentalement (tableaux de bord)
+
+Au premier accès, les lignes d'un utilisateur (projets) ou d'un projet
+(datasets) sont chargées une fois ; ensuite chaque écriture est appliquée
+comme un delta. Une lecture ne coûte que la mise en forme des compteurs.
+
+Sources des écritures :
+- les services publient un Evenement après chaque insert / update / delete
+- un flux de changements optionnel (FluxChangements : Supabase Realtime,
+  ou FluxChangementsMemoire pour les tests) couvre les autres processus
+
+Pour chaque ligne suivie, le store garde les colonnes utiles : appliquer deux
+fois le même événement (service + flux) ne compte rien en double, et un
+DELETE ne portant que l'id (Realtime sans REPLICA IDENTITY FULL) suffit.
+Une réconciliation périodique recharge les compteurs depuis la base et
+compte les écarts trouvés.
+
+Désactivé par défaut : STATS_INCREMENTALES=1, ou statistiques_store.activer().
+"""
+import heapq
+import os
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+from services.statistiques import CompteurDatasets, CompteurProjets, formater_taille_mb
+
+TABLE_PROJETS = "projets_ia"
+TABLE_DATASETS = "datasets"
+
+
+@dataclass
+class Evenement:
+    """Changement d'une ligne (même forme que les charges postgres_changes de Realtime)"""
+    table: str
+    type: str  # INSERT, UPDATE ou DELETE
+    nouveau: Optional[dict] = None
+    ancien: Optional[dict] = None
+
+    @property
+    def id(self):
+        return (self.nouveau or self.ancien or {}).get('id')
+
+
+class _AgregatProjets:
+    """Compteurs des projets d'un utilisateur"""
+
+    def __init__(self):
+        self.lignes: Dict[str, Tuple[str, str]] = {}
+        self.par_type: Dict[str, int] = {}
+        self.par_statut: Dict[str, int] = {}
+
+    def appliquer(self, projet_id: str, ligne: Optional[Tuple[str, str]]):
+        """ligne=(type_modele, statut) ; None = projet retiré"""
+        ancienne = self.lignes.pop(projet_id, None)
+        if ancienne:
+            _decrementer(self.par_type, ancienne[0])
+            _decrementer(self.par_statut, ancienne[1])
+        if ligne:
+            self.lignes[projet_id] = ligne
+            self.par_type[ligne[0]] = self.par_type.get(ligne[0], 0) + 1
+            self.par_statut[ligne[1]] = self.par_statut.get(ligne[1], 0) + 1
+
+    def resultat(self) -> Dict:
+        return CompteurProjets.formater(len(self.lignes), self.par_type, self.par_statut)
+
+
+class _AgregatDatasets:
+    """
+    Compteurs des datasets d'un projet
+    Tailles en centièmes de MB (entiers, comme DECIMAL(10,2)) : pas de dérive
+    d'arrondi après des milliers d'ajouts et de retraits
+    """
+
+    def __init__(self):
+        self.lignes: Dict[str, Tuple[str, int, str]] = {}
+        self.taille_totale = 0
+        self.formats: Dict[str, int] = {}
+        # Tas (-taille, id) : les entrées périmées sont écartées à la lecture
+        self._tas: List[Tuple[int, str]] = []
+
+    def appliquer(self, dataset_id: str, ligne: Optional[Tuple[str, int, str]]):
+        """ligne=(nom, taille en centièmes de MB, format) ; None = dataset retiré"""
+        ancienne = self.lignes.pop(dataset_id, None)
+        if ancienne:
+            self.taille_totale -= ancienne[1]
+            _decrementer(self.formats, ancienne[2])
+        if ligne:
+            self.lignes[dataset_id] = ligne
+            self.taille_totale += ligne[1]
+            self.formats[ligne[2]] = self.formats.get(ligne[2], 0) + 1
+            if ligne[1] > 0:
+                heapq.heappush(self._tas, (-ligne[1], dataset_id))
+        if len(self._tas) > 2 * len(self.lignes) + 64:
+            self._tas = [(-l[1], i) for i, l in self.lignes.items() if l[1] > 0]
+            heapq.heapify(self._tas)
+
+    def _plus_gros(self) -> Optional[Tuple[str, int, str]]:
+        while self._tas:
+            taille, dataset_id = self._tas[0]
+            ligne = self.lignes.get(dataset_id)
+            if ligne and ligne[1] == -taille:
+                return ligne
+            heapq.heappop(self._tas)
+        return None
+
+    def resultat(self) -> Dict:
+        if not self.lignes:
+            return CompteurDatasets().resultat()
+        taille_totale = self.taille_totale / 100
+        plus_gros = self._plus_gros()
+        return {
+            "nombre_datasets": len(self.lignes),
+            "taille_totale_mb": round(taille_totale, 2),
+            "taille_totale_formatee": formater_taille_mb(taille_totale),
+            "formats": dict(self.formats),
+            "dataset_plus_gros": {
+                "nom": plus_gros[0],
+                "taille": formater_taille_mb(plus_gros[1] / 100)
+            } if plus_gros else None
+        }
+
+
+def _decrementer(compteurs: Dict[str, int], cle: str):
+    if compteurs.get(cle, 0) <= 1:
+        compteurs.pop(cle, None)
+    else:
+        compteurs[cle] -= 1
+
+
+def _ligne_projet(row: dict) -> Tuple[str, str]:
+    return row.get('type_modele'), row.get('statut')
+
+
+def _ligne_dataset(row: dict) -> Tuple[str, int, str]:
+    return (
+        row.get('nom'),
+        int(round(float(row.get('taille_mb') or 0) * 100)),
+        row.get('format_fichier') or "inconnu"
+    )
+
+
+def _charger_projets(user_id: str) -> Iterable[dict]:
+    from config.database import supabase
+    from services.pagination import iter_keyset
+    return iter_keyset(
+        lambda: supabase.table(TABLE_PROJETS)
+            .select('id, created_by, type_modele, statut, created_at')
+            .eq('created_by', user_id),
+        1000
+    )
+
+
+def _charger_datasets(projet_id: str) -> Iterable[dict]:
+    from config.database import supabase
+    from services.pagination import iter_keyset
+    return iter_keyset(
+        lambda: supabase.table(TABLE_DATASETS)
+            .select('id, projet_id, nom, taille_mb, format_fichier, created_at')
+            .eq('projet_id', projet_id),
+        1000
+    )
+
+
+class FluxChangements(ABC):
+    """Source de changements de lignes (autres processus, réplication)"""
+
+    @abstractmethod
+    def abonner(self, callback: Callable[[Evenement], None]):
+        """callback est appelé pour chaque changement sur projets_ia et datasets"""
+
+    def fermer(self):
+        """Arrête la réception"""
+
+
+class FluxChangementsMemoire(FluxChangements):
+    """Flux en mémoire pour les tests : emettre() distribue aux abonnés"""
+
+    def __init__(self):
+        self._abonnes: List[Callable[[Evenement], None]] = []
+
+    def abonner(self, callback: Callable[[Evenement], None]):
+        self._abonnes.append(callback)
+
+    def emettre(self, table: str, type: str, nouveau: Optional[dict] = None, ancien: Optional[dict] = None):
+        evenement = Evenement(table, type, nouveau, ancien)
+        for callback in list(self._abonnes):
+            callback(evenement)
+
+    def fermer(self):
+        self._abonnes.clear()
+
+
+class FluxChangementsRealtime(FluxChangements):
+    """
+    Changements reçus par Supabase Realtime (postgres_changes)
+    Les tables doivent faire partie de la publication supabase_realtime.
+    À démarrer depuis la boucle asyncio : await flux.demarrer()
+    """
+
+    def __init__(self, tables: Tuple[str, ...] = (TABLE_PROJETS, TABLE_DATASETS)):
+        self.tables = tables
+        self._abonnes: List[Callable[[Evenement], None]] = []
+        self._canal = None
+
+    def abonner(self, callback: Callable[[Evenement], None]):
+        self._abonnes.append(callback)
+
+    def _recevoir(self, charge: dict):
+        donnees = charge.get('data', charge)
+        evenement = Evenement(donnees['table'], donnees['type'], donnees.get('record'), donnees.get('old_record'))
+        for callback in list(self._abonnes):
+            callback(evenement)
+
+    async def demarrer(self):
+        from config.database import get_async_supabase
+        client = await get_async_supabase()
+        canal = client.channel("statistiques")
+        for table in self.tables:
+            canal.on_postgres_changes("*", self._recevoir, table=table, schema="public")
+        await canal.subscribe()
+        self._canal = canal
+
+    async def arreter(self):
+        if self._canal is not None:
+            await self._canal.unsubscribe()
+            self._canal = None
+
+    def fermer(self):
+        self._abonnes.clear()
+
+
+class StatistiquesStore:
+    """Compteurs par utilisateur (projets) et par projet (datasets), thread-safe"""
+
+    def __init__(
+        self,
+        charger_projets: Callable[[str], Iterable[dict]] = _charger_projets,
+        charger_datasets: Callable[[str], Iterable[dict]] = _charger_datasets
+    ):
+        self._charger_projets = charger_projets
+        self._charger_datasets = charger_datasets
+        self._lock = threading.RLock()
+        self._projets: Dict[str, _AgregatProjets] = {}
+        self._datasets: Dict[str, _AgregatDatasets] = {}
+        # Clé de rattachement des lignes suivies (DELETE / UPDATE sans l'ancienne ligne)
+        self._user_de_projet: Dict[str, str] = {}
+        self._projet_de_dataset: Dict[str, str] = {}
+        # Chargements en cours : événements reçus pendant la lecture de la base
+        self._en_chargement: Dict[Hashable, Tuple[threading.Event, List[Evenement]]] = {}
+        self.actif = False
+        self._flux: Optional[FluxChangements] = None
+        self._arret_reconciliation: Optional[threading.Event] = None
+        self.evenements = 0
+        self.chargements = 0
+        self.reconciliations = 0
+        self.ecarts = 0
+
+    # --- Configuration ---
+
+    def activer(self, reconciliation_s: float = 60.0, flux: Optional[FluxChangements] = None):
+        """Active le store (lectures servies par les compteurs) et sa réconciliation périodique"""
+        with self._lock:
+            self.actif = True
+            if flux is not None:
+                self._flux = flux
+                flux.abonner(self.publier)
+        if reconciliation_s > 0:
+            self.demarrer_reconciliation(reconciliation_s)
+
+    def desactiver(self):
+        """Retour au calcul à la demande ; les compteurs sont oubliés"""
+        self.arreter_reconciliation()
+        with self._lock:
+            self.actif = False
+            if self._flux is not None:
+                self._flux.fermer()
+                self._flux = None
+            self.vider()
+
+    def vider(self):
+        with self._lock:
+            self._projets.clear()
+            self._datasets.clear()
+            self._user_de_projet.clear()
+            self._projet_de_dataset.clear()
+
+    # --- Lectures ---
+
+    def statistiques_projets(self, user_id: str, charger: bool = True) -> Optional[Dict]:
+        """
+        Format de ProjetService.statistiques_projets
+        charger=False : None si les compteurs ne sont pas encore en mémoire (appelants
+        asynchrones : le premier chargement fait des requêtes bloquantes)
+        """
+        with self._lock:
+            agregat = self._projets.get(user_id)
+            if agregat is not None:
+                return agregat.resultat()
+        return self._charger(('user', user_id)).resultat() if charger else None
+
+    def statistiques_datasets(self, projet_id: str, charger: bool = True) -> Optional[Dict]:
+        """Format de DatasetService.statistiques_datasets (charger : voir statistiques_projets)"""
+        with self._lock:
+            agregat = self._datasets.get(projet_id)
+            if agregat is not None:
+                return agregat.resultat()
+        return self._charger(('projet', projet_id)).resultat() if charger else None
+
+    def _charger(self, cle: Tuple[str, str]):
+        """Premier accès : chargement depuis la base, un seul à la fois par clé"""
+        with self._lock:
+            en_cours = self._en_chargement.get(cle)
+            if en_cours is None:
+                self._en_chargement[cle] = (threading.Event(), [])
+        if en_cours is not None:
+            en_cours[0].wait()
+            with self._lock:
+                agregat = self._agregats(cle[0]).get(cle[1])
+            return agregat if agregat is not None else self._charger(cle)
+
+        termine, tampon = self._en_chargement[cle]
+        try:
+            agregat, rattachements = self._construire(cle)
+            with self._lock:
+                if not self._oublie_pendant(cle, tampon):
+                    self._installer(cle, agregat, rattachements)
+                    # Écritures arrivées pendant la lecture : rejouées (idempotentes)
+                    for evenement in tampon:
+                        self._appliquer(evenement)
+                self.chargements += 1
+            return agregat
+        finally:
+            with self._lock:
+                del self._en_chargement[cle]
+            termine.set()
+
+    @staticmethod
+    def _oublie_pendant(cle: Tuple[str, str], tampon: List[Evenement]) -> bool:
+        """Projet supprimé (oublier_projet) pendant la lecture de ses datasets : rien à installer"""
+        return cle[0] == 'projet' and any(
+            evenement.table == TABLE_PROJETS and evenement.type == "DELETE" and evenement.id == cle[1]
+            for evenement in tampon
+        )
+
+    def _agregats(self, nature: str) -> Dict:
+        return self._projets if nature == 'user' else self._datasets
+
+    def _construire(self, cle: Tuple[str, str]):
+        """Agrégat neuf depuis la base (hors verrou : requêtes réseau)"""
+        nature, valeur = cle
+        if nature == 'user':
+            agregat = _AgregatProjets()
+            for row in self._charger_projets(valeur):
+                agregat.appliquer(row['id'], _ligne_projet(row))
+        else:
+            agregat = _AgregatDatasets()
+            for row in self._charger_datasets(valeur):
+                agregat.appliquer(row['id'], _ligne_dataset(row))
+        return agregat, {ligne_id: valeur for ligne_id in agregat.lignes}
+
+    def _installer(self, cle: Tuple[str, str], agregat, rattachements: Dict[str, str]):
+        nature, valeur = cle
+        ancien = self._agregats(nature).get(valeur)
+        index = self._user_de_projet if nature == 'user' else self._projet_de_dataset
+        if ancien is not None:
+            for ligne_id in ancien.lignes:
+                index.pop(ligne_id, None)
+        self._agregats(nature)[valeur] = agregat
+        index.update(rattachements)
+
+    # --- Écritures ---
+
+    def publier(self, evenement: Evenement):
+        """Applique un changement de ligne (appelé par les services et par le flux)"""
+        if not self.actif:
+            return
+        with self._lock:
+            self.evenements += 1
+            for _, tampon in self._en_chargement.values():
+                tampon.append(evenement)
+            self._appliquer(evenement)
+
+    def publier_lignes(self, table: str, type: str, lignes: Iterable[dict]):
+        """Un événement par ligne renvoyée par PostgREST"""
+        if not self.actif:
+            return
+        for ligne in lignes or ():
+            if type == "DELETE":
+                self.publier(Evenement(table, type, ancien=ligne))
+            else:
+                self.publier(Evenement(table, type, nouveau=ligne))
+
+    def oublier_projet(self, projet_id: str):
+        """Projet supprimé avec ses datasets (suppression groupée sans lignes renvoyées)"""
+        if not self.actif:
+            return
+        self.publier(Evenement(TABLE_PROJETS, "DELETE", ancien={'id': projet_id}))
+        with self._lock:
+            # Entrée retirée : ni gardée en mémoire, ni rechargée par la réconciliation
+            agregat = self._datasets.pop(projet_id, None)
+            if agregat is not None:
+                for dataset_id in agregat.lignes:
+                    self._projet_de_dataset.pop(dataset_id, None)
+
+    def _appliquer(self, evenement: Evenement):
+        ligne_id = evenement.id
+        if ligne_id is None:
+            return
+        if evenement.table == TABLE_PROJETS:
+            self._deplacer(ligne_id, evenement, 'created_by', self._projets, self._user_de_projet, _ligne_projet)
+        elif evenement.table == TABLE_DATASETS:
+            self._deplacer(ligne_id, evenement, 'projet_id', self._datasets, self._projet_de_dataset, _ligne_dataset)
+
+    @staticmethod
+    def _deplacer(ligne_id, evenement: Evenement, colonne_cle: str, agregats: Dict, index: Dict, extraire):
+        """Retire la ligne de son agrégat actuel et l'ajoute à celui de sa nouvelle clé"""
+        cle_actuelle = index.pop(ligne_id, None)
+        if cle_actuelle is not None and cle_actuelle in agregats:
+            agregats[cle_actuelle].appliquer(ligne_id, None)
+
+        nouveau = evenement.nouveau if evenement.type != "DELETE" else None
+        if not nouveau:
+            return
+        # Colonne de rattachement absente de la ligne renvoyée : la clé ne change pas
+        cle = nouveau.get(colonne_cle, cle_actuelle)
+        if cle in agregats:
+            agregats[cle].appliquer(ligne_id, extraire(nouveau))
+            index[ligne_id] = cle
+
+    # --- Réconciliation ---
+
+    def reconcilier(self) -> int:
+        """
+        Recharge chaque agrégat suivi depuis la base et remplace les compteurs
+        Renvoie le nombre d'agrégats qui avaient divergé (écritures d'autres processus
+        sans flux, écritures directes en SQL...)
+        """
+        with self._lock:
+            cles = [('user', u) for u in self._projets] + [('projet', p) for p in self._datasets]
+        ecarts = 0
+        for cle in cles:
+            with self._lock:
+                if cle in self._en_chargement or cle[1] not in self._agregats(cle[0]):
+                    continue
+                self._en_chargement[cle] = (threading.Event(), [])
+            termine, tampon = self._en_chargement[cle]
+            try:
+                agregat, rattachements = self._construire(cle)
+                with self._lock:
+                    actuel = self._agregats(cle[0]).get(cle[1])
+                    if actuel is None or self._oublie_pendant(cle, tampon):
+                        # Oublié depuis le début du passage (projet supprimé, vider) : pas réinstallé
+                        continue
+                    if actuel.lignes != agregat.lignes:
+                        ecarts += 1
+                    self._installer(cle, agregat, rattachements)
+                    for evenement in tampon:
+                        self._appliquer(evenement)
+            finally:
+                with self._lock:
+                    del self._en_chargement[cle]
+                termine.set()
+        with self._lock:
+            self.reconciliations += 1
+            self.ecarts += ecarts
+        return ecarts
+
+    def demarrer_reconciliation(self, intervalle_s: float):
+        """Réconciliation dans un thread de fond, toutes les intervalle_s secondes"""
+        self.arreter_reconciliation()
+        arret = threading.Event()
+        self._arret_reconciliation = arret
+
+        def boucle():
+            while not arret.wait(intervalle_s):
+                try:
+                    self.reconcilier()
+                except Exception as e:
+                    print(f"Attention: Erreur réconciliation statistiques: {e}")
+
+        threading.Thread(target=boucle, name="reconciliation-statistiques", daemon=True).start()
+
+    def arreter_reconciliation(self):
+        if self._arret_reconciliation is not None:
+            self._arret_reconciliation.set()
+            self._arret_reconciliation = None
+
+    def statistiques(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "utilisateurs": len(self._projets),
+                "projets": len(self._datasets),
+                "evenements": self.evenements,
+                "chargements": self.chargements,
+                "reconciliations": self.reconciliations,
+                "ecarts": self.ecarts,
+            }
+
+
+# Instance globale utilisée par les services
+statistiques_store = StatistiquesStore()
+if os.getenv("STATS_INCREMENTALES", "0").lower() in ("1", "true", "oui"):
+    statistiques_store.activer(float(os.getenv("STATS_RECONCILIATION_S", "60")))
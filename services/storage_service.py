@@ -1,25 +1,365 @@
+import hashlib
+import io
+import mmap
 import os
-from typing import Optional, List
-from config.database import supabase
+import queue
+import shutil
+import tempfile
+import threading
+from typing import Optional, List, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, unquote
+from config.database import supabase, supabase_config
+from models.resultats import ResultatBatch, EchecLigne, RapportStockage
+from services.cache_fichiers import cache_fichiers
+from services.instrumentation import instrumenter_service, propager
+from services.compression import Codec, FluxCompresse, blocs_compresses, compresser_fichier, obtenir_codec, CODECS
 
+class _LecteurObserve(io.BufferedReader):
+    """
+    Fichier transmis à l'upload : chaque octet lu l'est aussi par l'observateur
+    (une seule fois, même si le client HTTP revient au début du fichier)
+    """
+
+    def __init__(self, fichier_path: str, observateur: Callable[[bytes], None]):
+        super().__init__(io.FileIO(fichier_path, 'rb'))
+        self._observateur = observateur
+        self._observe = 0
+
+    def read(self, n: Optional[int] = -1) -> bytes:
+        debut = self.tell()
+        donnees = super().read(n)
+        if debut + len(donnees) > self._observe >= debut:
+            self._observateur(donnees[self._observe - debut:])
+            self._observe = debut + len(donnees)
+        return donnees
+
+def _deposer(file: "queue.Queue", element, arret: threading.Event) -> bool:
+    """put() interruptible : les producteurs s'arrêtent si le consommateur a abandonné"""
+    while not arret.is_set():
+        try:
+            file.put(element, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+@instrumenter_service
 class StorageService:
     
+    # Au-delà de ce seuil, l'upload passe en mode résumable (TUS, parts de 6 MB)
+    SEUIL_UPLOAD_RESUMABLE_MB = float(os.getenv("UPLOAD_SEUIL_RESUMABLE_MB", "50"))
+    
+    # Nombre maximum de chemins par appel remove (limite de l'API Storage)
+    TAILLE_LOT_SUPPRESSION = 1000
+    
+    # Téléchargement : taille des requêtes Range envoyées en parallèle
+    TAILLE_SEGMENT_TELECHARGEMENT = 16 * 1024 * 1024
+    
     @staticmethod
-    def uploader_dataset(fichier_path: str, nom_fichier: str, bucket: str = "datasets") -> Optional[str]:
-        """Upload d'un dataset"""
+    def uploader_dataset(
+        fichier_path: str,
+        nom_fichier: str,
+        bucket: str = "datasets",
+        resumable: Optional[bool] = None,
+        progression: Optional[Callable[[int, int], None]] = None,
+        observateur: Optional[Callable[[bytes], None]] = None,
+        codec: Optional[Codec] = None
+    ) -> Optional[str]:
+        """
+        Upload d'un dataset
+        resumable: None = automatique selon SEUIL_UPLOAD_RESUMABLE_MB
+        progression: callback(octets_envoyes, octets_totaux)
+        observateur: reçoit le contenu lu pour l'envoi (profilage sans seconde lecture)
+        codec: compression à la volée (services/compression.py) ; l'objet est stocké
+        sous nom_fichier + codec.extension
+        """
         try:
-            with open(fichier_path, 'rb') as f:
-                response = supabase.storage.from_(bucket).upload(nom_fichier, f)
+            if codec:
+                nom_fichier += codec.extension
+            StorageService._envoyer(fichier_path, nom_fichier, bucket, resumable, progression, observateur, codec)
+            # Récupérer l'URL publique
+            return supabase.storage.from_(bucket).get_public_url(nom_fichier)
             
-            if response:
-                # Récupérer l'URL publique
-                url = supabase.storage.from_(bucket).get_public_url(nom_fichier)
-                return url
+        except Exception as e:
+            raise Exception(f"Erreur upload: {str(e)}")
+    
+    @staticmethod
+    def uploader_contenu(
+        fichier_path: str,
+        chemin: str,
+        bucket: str = "datasets",
+        progression: Optional[Callable[[int, int], None]] = None
+    ) -> str:
+        """
+        Upload adressé par contenu (chemin dérivé de l'empreinte du fichier)
+        Si l'objet existe déjà, rien n'est envoyé : une seule requête HEAD
+        """
+        try:
+            if supabase.storage.from_(bucket).exists(chemin):
+                if progression:
+                    taille = os.path.getsize(fichier_path)
+                    progression(taille, taille)
+            else:
+                try:
+                    StorageService._envoyer(fichier_path, chemin, bucket, None, progression)
+                except Exception as e:
+                    # Même contenu envoyé en parallèle par un autre client : déjà stocké
+                    if not StorageService._est_conflit(e):
+                        raise
+            
+            return supabase.storage.from_(bucket).get_public_url(chemin)
             
         except Exception as e:
             raise Exception(f"Erreur upload: {str(e)}")
+    
+    @staticmethod
+    def _envoyer(
+        fichier_path: str,
+        nom_fichier: str,
+        bucket: str,
+        resumable: Optional[bool],
+        progression: Optional[Callable[[int, int], None]],
+        observateur: Optional[Callable[[bytes], None]] = None,
+        codec: Optional[Codec] = None
+    ):
+        """Envoi simple ou résumable (TUS) selon la taille du fichier"""
+        if resumable is None:
+            taille_mb = os.path.getsize(fichier_path) / (1024 * 1024)
+            resumable = taille_mb > StorageService.SEUIL_UPLOAD_RESUMABLE_MB
         
-        return None
+        if codec and resumable:
+            response = StorageService._envoyer_compresse_resumable(
+                fichier_path, nom_fichier, bucket, progression, observateur, codec
+            )
+        elif codec:
+            # Compression en pool de threads pendant l'envoi des blocs précédents
+            taille = os.path.getsize(fichier_path)
+            flux = io.BufferedReader(FluxCompresse(blocs_compresses(fichier_path, codec, observateur=observateur)))
+            with flux:
+                response = supabase.storage.from_(bucket).upload(nom_fichier, flux, {
+                    "content-type": codec.content_type,
+                    "metadata": {"compression": codec.nom, "taille_originale": taille},
+                })
+            if progression:
+                progression(taille, taille)
+        elif resumable:
+            from services.upload_resumable import UploadResumable
+            response = UploadResumable(
+                fichier_path, nom_fichier, bucket, progression=progression, observateur=observateur
+            ).executer()
+        else:
+            with (_LecteurObserve(fichier_path, observateur) if observateur else open(fichier_path, 'rb')) as f:
+                response = supabase.storage.from_(bucket).upload(nom_fichier, f)
+        
+        if not response:
+            raise Exception("Réponse vide du stockage")
+    
+    @staticmethod
+    def _envoyer_compresse_resumable(
+        fichier_path: str,
+        nom_fichier: str,
+        bucket: str,
+        progression: Optional[Callable[[int, int], None]],
+        observateur: Optional[Callable[[bytes], None]],
+        codec: Codec
+    ):
+        """
+        TUS exige la taille (Upload-Length) à la création : le fichier est compressé
+        sur disque d'abord. La copie compressée a un nom stable (source, taille, mtime)
+        et n'est supprimée qu'après succès, pour que la reprise retrouve son état.
+        """
+        from services.upload_resumable import UploadResumable, REPERTOIRE_ETAT
+        
+        stat = os.stat(fichier_path)
+        cle = f"{os.path.abspath(fichier_path)}|{stat.st_size}|{stat.st_mtime_ns}|{codec.nom}"
+        chemin_compresse = os.path.join(REPERTOIRE_ETAT, hashlib.sha1(cle.encode()).hexdigest() + codec.extension)
+        
+        if os.path.exists(chemin_compresse):
+            if observateur:
+                with open(fichier_path, 'rb') as f:
+                    for bloc in iter(lambda: f.read(1024 * 1024), b""):
+                        observateur(bloc)
+        else:
+            os.makedirs(REPERTOIRE_ETAT, exist_ok=True)
+            temporaire = f"{chemin_compresse}.tmp"
+            compresser_fichier(fichier_path, temporaire, codec, observateur=observateur)
+            os.replace(temporaire, chemin_compresse)
+        
+        response = UploadResumable(
+            chemin_compresse, nom_fichier, bucket, content_type=codec.content_type, progression=progression
+        ).executer()
+        os.remove(chemin_compresse)
+        return response
+    
+    @staticmethod
+    def telecharger_flux(
+        chemin: str,
+        bucket: str = "datasets",
+        compression: Optional[str] = None,
+        taille_morceau: int = 1024 * 1024
+    ) -> Iterator[bytes]:
+        """
+        Contenu d'un objet, décompressé en flux (mémoire constante)
+        compression: codec du dataset (colonne compression) ; par défaut déduit de
+        l'extension du chemin (.gz, .zst), sinon le contenu est renvoyé tel quel
+        """
+        if compression is None:
+            compression = next((c.nom for c in CODECS.values() if chemin.endswith(c.extension)), None)
+        codec = obtenir_codec(compression) if compression else None
+        
+        try:
+            with supabase_config.get_http_client().stream(
+                "GET", StorageService._url_objet(chemin, bucket), headers=StorageService._headers_http()
+            ) as response:
+                response.raise_for_status()
+                morceaux = response.iter_bytes(taille_morceau)
+                yield from (codec.decompresser_flux(morceaux) if codec else morceaux)
+        except Exception as e:
+            raise Exception(f"Erreur téléchargement: {str(e)}")
+    
+    @staticmethod
+    def telecharger_dataset(
+        fichier: str,
+        destination: Optional[str] = None,
+        bucket: str = "datasets",
+        taille_segment: Optional[int] = None,
+        max_workers: int = 8,
+        utiliser_cache: bool = True
+    ) -> str:
+        """
+        Télécharge un objet (chemin ou fichier_url) et renvoie le chemin local
+        Les gros objets sont découpés en requêtes Range parallèles écrites directement
+        dans un fichier préalloué (mmap). Avec le cache, un objet inchangé (ETag)
+        n'est pas retéléchargé : une seule requête HEAD conditionnelle, sans corps.
+        destination: copie demandée à cet endroit (sinon la copie du cache)
+        Contenu brut de l'objet : un dataset compressé se lit avec telecharger_flux
+        """
+        try:
+            chemin = fichier
+            if fichier.startswith(("http://", "https://")):
+                chemin = StorageService.chemin_depuis_url(fichier, bucket)
+                if not chemin:
+                    raise ValueError(f"URL hors du bucket {bucket}: {fichier}")
+            
+            client = supabase_config.get_http_client()
+            url = StorageService._url_objet(chemin, bucket)
+            # identity : Content-Length et Range portent sur les octets stockés
+            headers = {**StorageService._headers_http(), "Accept-Encoding": "identity"}
+            cle = f"{bucket}/{chemin}"
+            
+            # 1. HEAD (conditionnel si une copie existe) : taille, ETag, validité
+            entree = cache_fichiers.entree(cle) if utiliser_cache else None
+            response = client.head(url, headers={**headers, **({"If-None-Match": entree["etag"]} if entree else {})})
+            etag = response.headers.get("etag")
+            if entree and (response.status_code == 304 or (response.is_success and etag == entree["etag"])):
+                local = cache_fichiers.utiliser(entree)
+            else:
+                response.raise_for_status()
+                taille = int(response.headers["content-length"])
+                en_cache = utiliser_cache and bool(etag)
+                
+                # 2. Téléchargement dans un fichier de travail, publié une fois complet
+                if en_cache:
+                    temporaire = cache_fichiers.nouveau_temporaire()
+                else:
+                    temporaire = f"{destination}.part" if destination else None
+                    if temporaire is None:
+                        descripteur, temporaire = tempfile.mkstemp()
+                        os.close(descripteur)
+                try:
+                    StorageService._telecharger_segments(
+                        client, url, headers, taille, etag, temporaire,
+                        taille_segment or StorageService.TAILLE_SEGMENT_TELECHARGEMENT,
+                        max_workers if response.headers.get("accept-ranges") == "bytes" else 1
+                    )
+                except BaseException:
+                    if os.path.exists(temporaire):
+                        os.remove(temporaire)
+                    raise
+                
+                if en_cache:
+                    local = cache_fichiers.enregistrer(cle, etag, taille, temporaire)
+                elif destination:
+                    os.replace(temporaire, destination)
+                    return destination
+                else:
+                    return temporaire
+            
+            # 3. Copie hors du cache si demandée (lien physique quand c'est possible)
+            if destination:
+                if os.path.exists(destination):
+                    os.remove(destination)
+                try:
+                    os.link(local, destination)
+                except OSError:
+                    shutil.copyfile(local, destination)
+                return destination
+            return local
+            
+        except Exception as e:
+            raise Exception(f"Erreur téléchargement: {str(e)}")
+    
+    @staticmethod
+    def _telecharger_segments(
+        client,
+        url: str,
+        headers: dict,
+        taille: int,
+        etag: Optional[str],
+        fichier_path: str,
+        taille_segment: int,
+        max_workers: int
+    ):
+        """Écrit l'objet dans fichier_path : une requête Range par segment, en parallèle"""
+        with open(fichier_path, 'wb+') as f:
+            f.truncate(taille)
+            if taille == 0:
+                return
+            with mmap.mmap(f.fileno(), taille) as carte:
+                
+                def telecharger(debut: int):
+                    fin = min(debut + taille_segment, taille)
+                    entetes = {**headers, "Range": f"bytes={debut}-{fin - 1}"}
+                    if etag:
+                        # Objet remplacé pendant le téléchargement : 412 plutôt qu'un mélange
+                        entetes["If-Match"] = etag
+                    with client.stream("GET", url, headers=entetes) as response:
+                        response.raise_for_status()
+                        if response.status_code != 206 and (debut, fin) != (0, taille):
+                            raise Exception("Requêtes Range non prises en charge par le serveur")
+                        position = debut
+                        for morceau in response.iter_bytes():
+                            if position + len(morceau) > fin:
+                                raise Exception("Segment plus long que demandé")
+                            carte[position:position + len(morceau)] = morceau
+                            position += len(morceau)
+                    if position != fin:
+                        raise Exception(f"Segment incomplet ({position - debut}/{fin - debut} octets)")
+                
+                debuts = range(0, taille, taille_segment if max_workers > 1 else taille)
+                if len(debuts) == 1:
+                    telecharger(0)
+                else:
+                    with ThreadPoolExecutor(max_workers=min(max_workers, len(debuts))) as executor:
+                        list(executor.map(propager(telecharger), debuts))
+                carte.flush()
+    
+    @staticmethod
+    def _url_objet(chemin: str, bucket: str) -> str:
+        """URL authentifiée d'un objet (buckets publics ou privés)"""
+        return f"{supabase_config.url.rstrip('/')}/storage/v1/object/{bucket}/{chemin}"
+    
+    @staticmethod
+    def _headers_http() -> dict:
+        key = supabase_config.service_key or supabase_config.anon_key
+        return {"authorization": f"Bearer {key}", "apikey": key}
+    
+    @staticmethod
+    def _est_conflit(erreur: Exception) -> bool:
+        """True si l'objet existe déjà (409 du stockage ou de l'endpoint TUS)"""
+        statut = getattr(erreur, 'status', None) or getattr(getattr(erreur, 'response', None), 'status_code', None)
+        return str(statut) == "409" or "Duplicate" in str(erreur)
     
     @staticmethod
     def lister_fichiers(bucket: str = "datasets") -> List[dict]:
@@ -31,6 +371,123 @@ class StorageService:
         except Exception as e:
             raise Exception(f"Erreur listage: {str(e)}")
     
+    @staticmethod
+    def lister_fichiers_recursif(bucket: str = "datasets", prefix: str = "") -> List[dict]:
+        """
+        Lister tous les objets sous un préfixe (toutes les pages, sous-dossiers compris)
+        Entrées {'chemin', 'taille', 'modifie_le', 'dossier'} de iter_fichiers
+        """
+        try:
+            return list(StorageService.iter_fichiers(bucket, prefix))
+            
+        except Exception as e:
+            raise Exception(f"Erreur listage: {str(e)}")
+    
+    @staticmethod
+    def iter_fichiers(
+        bucket: str = "datasets",
+        prefix: str = "",
+        recursive: bool = True,
+        taille_page: int = 1000,
+        max_workers: int = 8
+    ) -> Iterator[dict]:
+        """
+        Parcourt les objets sous un préfixe, page par page
+        Les sous-dossiers sont listés en parallèle (max_workers) et les entrées
+        produites au fil de l'eau, sans ordre global : mémoire bornée quelle que
+        soit la taille du bucket.
+        Produit {'chemin', 'taille' (octets), 'modifie_le', 'dossier'} ;
+        les dossiers ne sont produits qu'avec recursive=False
+        """
+        resultats: "queue.Queue" = queue.Queue(maxsize=2 * max_workers)
+        arret = threading.Event()
+        lock = threading.Lock()
+        en_cours = [0]
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        
+        def soumettre(dossier: str):
+            with lock:
+                en_cours[0] += 1
+            executor.submit(propager(lister), dossier)
+        
+        def lister(dossier: str):
+            try:
+                offset = 0
+                while not arret.is_set():
+                    page = supabase.storage.from_(bucket).list(
+                        dossier, {'limit': taille_page, 'offset': offset, 'sortBy': {'column': 'name', 'order': 'asc'}}
+                    )
+                    entrees = []
+                    for entree in page:
+                        chemin = f"{dossier}/{entree['name']}" if dossier else entree['name']
+                        # Les dossiers n'ont pas d'id
+                        if entree.get('id') is None:
+                            if recursive:
+                                soumettre(chemin)
+                            else:
+                                entrees.append({'chemin': chemin, 'taille': None, 'modifie_le': None, 'dossier': True})
+                        else:
+                            metadata = entree.get('metadata') or {}
+                            entrees.append({
+                                'chemin': chemin,
+                                'taille': metadata.get('size') or 0,
+                                'modifie_le': entree.get('updated_at') or metadata.get('lastModified'),
+                                'dossier': False,
+                            })
+                    if entrees and not _deposer(resultats, entrees, arret):
+                        return
+                    if len(page) < taille_page:
+                        break
+                    offset += taille_page
+            except Exception as e:
+                _deposer(resultats, e, arret)
+            finally:
+                with lock:
+                    en_cours[0] -= 1
+                    termine = en_cours[0] == 0
+                if termine:
+                    _deposer(resultats, None, arret)
+        
+        try:
+            soumettre(prefix.strip('/'))
+            while True:
+                element = resultats.get()
+                if element is None:
+                    return
+                if isinstance(element, Exception):
+                    raise element
+                yield from element
+        finally:
+            # Consommateur arrêté (break, erreur) : les listages en cours s'interrompent
+            arret.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    @staticmethod
+    def rapport_prefixes(
+        bucket: str = "datasets",
+        prefix: str = "",
+        profondeur: int = 1,
+        max_workers: int = 8
+    ) -> RapportStockage:
+        """
+        Octets et nombre d'objets par préfixe (capacité) : {projet_id}/ avec profondeur=1
+        Agrégé pendant le parcours : rien n'est gardé par objet
+        """
+        try:
+            racine = prefix.strip('/')
+            rapport = RapportStockage(bucket=bucket, prefixe=racine, profondeur=profondeur)
+            debut = len(racine) + 1 if racine else 0
+            for objet in StorageService.iter_fichiers(bucket, racine, max_workers=max_workers):
+                segments = objet['chemin'][debut:].split('/')
+                # Fichiers posés directement au niveau demandé : regroupés sous la racine
+                cle = '/'.join(segments[:profondeur]) if len(segments) > profondeur else ''
+                cle = f"{racine}/{cle}".strip('/') if racine else cle
+                rapport.ajouter(cle, objet['taille'])
+            return rapport
+            
+        except Exception as e:
+            raise Exception(f"Erreur rapport stockage: {str(e)}")
+    
     @staticmethod
     def supprimer_fichier(nom_fichier: str, bucket: str = "datasets") -> bool:
         """Supprimer un fichier"""
@@ -39,4 +496,62 @@ class StorageService:
             return len(response) > 0
             
         except Exception as e:
-            raise Exception(f"Erreur suppression: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Erreur suppression: {str(e)}")
+    
+    @staticmethod
+    def supprimer_fichiers(
+        chemins: List[str],
+        bucket: str = "datasets",
+        taille_lot: int = TAILLE_LOT_SUPPRESSION,
+        max_workers: int = 1
+    ) -> ResultatBatch:
+        """
+        Supprimer des fichiers avec un appel remove par lot de chemins
+        max_workers: lots supprimés en parallèle
+        reussis: chemins supprimés ; echecs: index dans chemins (lot en erreur, fichier introuvable)
+        """
+        debuts = range(0, len(chemins), taille_lot)
+        
+        def supprimer_lot(debut: int):
+            lot = chemins[debut:debut + taille_lot]
+            try:
+                return debut, lot, supabase.storage.from_(bucket).remove(lot), None
+            except Exception as e:
+                return debut, lot, None, e
+        
+        if max_workers > 1 and len(debuts) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                reponses = list(executor.map(propager(supprimer_lot), debuts))
+        else:
+            reponses = [supprimer_lot(debut) for debut in debuts]
+        
+        resultat = ResultatBatch(nb_requetes=len(reponses))
+        for debut, lot, response, erreur in reponses:
+            if erreur is not None:
+                resultat.echecs.extend(
+                    EchecLigne(debut + i, chemin, f"Erreur suppression: {str(erreur)}") for i, chemin in enumerate(lot)
+                )
+                continue
+            
+            # Seuls les objets effectivement supprimés sont renvoyés
+            supprimes = {objet.get('name') for objet in response or []}
+            for i, chemin in enumerate(lot):
+                if chemin in supprimes:
+                    resultat.reussis.append(chemin)
+                else:
+                    resultat.echecs.append(EchecLigne(debut + i, chemin, "Fichier introuvable"))
+        
+        return resultat
+    
+    @staticmethod
+    def chemin_depuis_url(fichier_url: str, bucket: str = "datasets") -> Optional[str]:
+        """
+        Chemin d'un objet dans le bucket à partir de son URL (publique, signée ou authentifiée)
+        None si l'URL ne désigne pas un objet de ce bucket
+        """
+        chemin = unquote(urlparse(fichier_url).path)
+        for acces in ("public", "sign", "authenticated"):
+            prefixe = f"/storage/v1/object/{acces}/{bucket}/"
+            if prefixe in chemin:
+                return chemin.split(prefixe, 1)[1] or None
+        return None
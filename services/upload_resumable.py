@@ -0,0 +1,218 @@
+# services/upload_resumable.py
+"""
+Upload résumable (protocole TUS) vers Supabase Storage
+
+Supabase expose TUS sur /storage/v1/upload/resumable avec des parts de 6 MB.
+Le fichier est lu part par part via mmap (jamais entièrement en mémoire), les
+parts suivantes sont préparées en arrière-plan pendant l'envoi de la part
+courante, et l'état (URL d'upload + offset) est sauvegardé sur disque pour
+reprendre après une coupure.
+"""
+import base64
+import hashlib
+import json
+import mmap
+import os
+import queue
+import threading
+from typing import Callable, Optional
+import httpx
+from config.database import supabase_config
+
+TAILLE_PART = 6 * 1024 * 1024  # Taille imposée par Supabase Storage
+VERSION_TUS = "1.0.0"
+REPERTOIRE_ETAT = os.getenv(
+    "UPLOAD_ETAT_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "tutorial_supabase", "uploads")
+)
+
+
+class UploadResumable:
+    """Upload TUS d'un fichier, avec reprise et progression"""
+
+    def __init__(
+        self,
+        fichier_path: str,
+        nom_fichier: str,
+        bucket: str = "datasets",
+        content_type: str = "application/octet-stream",
+        upsert: bool = False,
+        progression: Optional[Callable[[int, int], None]] = None,
+        parts_en_avance: int = 2,
+        observateur: Optional[Callable[[bytes], None]] = None
+    ):
+        """
+        observateur: reçoit le contenu du fichier dans l'ordre, dans la passe de lecture
+        de l'upload (profilage) ; en reprise, la partie déjà envoyée lui est relue
+        """
+        self.fichier_path = fichier_path
+        self.nom_fichier = nom_fichier
+        self.bucket = bucket
+        self.content_type = content_type
+        self.upsert = upsert
+        self.progression = progression
+        self.parts_en_avance = max(1, parts_en_avance)
+        self.observateur = observateur
+        self.taille = os.path.getsize(fichier_path)
+        self.chemin_etat = os.path.join(REPERTOIRE_ETAT, f"{self._cle_etat()}.json")
+
+    def _cle_etat(self) -> str:
+        """Identifie un upload : même fichier (taille, mtime) vers la même destination"""
+        stat = os.stat(self.fichier_path)
+        cle = f"{os.path.abspath(self.fichier_path)}|{stat.st_size}|{stat.st_mtime_ns}|{self.bucket}|{self.nom_fichier}"
+        return hashlib.sha1(cle.encode()).hexdigest()
+
+    def _headers(self) -> dict:
+        key = supabase_config.service_key or supabase_config.anon_key
+        return {
+            "authorization": f"Bearer {key}",
+            "apikey": key,
+            "Tus-Resumable": VERSION_TUS,
+        }
+
+    def _url_endpoint(self) -> str:
+        return f"{supabase_config.url.rstrip('/')}/storage/v1/upload/resumable"
+
+    # --- État de reprise ---
+
+    def _lire_etat(self) -> Optional[dict]:
+        try:
+            with open(self.chemin_etat, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _sauver_etat(self, upload_url: str, offset: int):
+        os.makedirs(REPERTOIRE_ETAT, exist_ok=True)
+        temporaire = f"{self.chemin_etat}.tmp"
+        with open(temporaire, 'w') as f:
+            json.dump({"upload_url": upload_url, "offset": offset, "taille": self.taille}, f)
+        os.replace(temporaire, self.chemin_etat)
+
+    def _effacer_etat(self):
+        try:
+            os.remove(self.chemin_etat)
+        except OSError:
+            pass
+
+    # --- Protocole TUS ---
+
+    def _creer_upload(self, client: httpx.Client) -> str:
+        """POST de création : renvoie l'URL de l'upload"""
+        metadata = {
+            "bucketName": self.bucket,
+            "objectName": self.nom_fichier,
+            "contentType": self.content_type,
+            "cacheControl": "3600",
+        }
+        headers = {
+            **self._headers(),
+            "Upload-Length": str(self.taille),
+            "Upload-Metadata": ",".join(
+                f"{cle} {base64.b64encode(valeur.encode()).decode()}" for cle, valeur in metadata.items()
+            ),
+            "x-upsert": "true" if self.upsert else "false",
+        }
+        response = client.post(self._url_endpoint(), headers=headers)
+        response.raise_for_status()
+        return response.headers["Location"]
+
+    def _offset_serveur(self, client: httpx.Client, upload_url: str) -> Optional[int]:
+        """HEAD de reprise : offset déjà reçu par le serveur (None si l'upload a expiré)"""
+        response = client.head(upload_url, headers=self._headers())
+        if response.status_code in (404, 410):
+            return None
+        response.raise_for_status()
+        return int(response.headers["Upload-Offset"])
+
+    @staticmethod
+    def _deposer(parts: "queue.Queue", element, arret: threading.Event) -> bool:
+        """put() interruptible : le lecteur s'arrête si l'envoi a échoué"""
+        while not arret.is_set():
+            try:
+                parts.put(element, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _lecteur_parts(self, offset: int, parts: "queue.Queue", arret: threading.Event):
+        """Thread de lecture : prépare les parts suivantes pendant l'envoi"""
+        try:
+            with open(self.fichier_path, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as donnees:
+                    if self.observateur:
+                        for debut in range(0, offset, TAILLE_PART):
+                            self.observateur(donnees[debut:min(debut + TAILLE_PART, offset)])
+                    while offset < self.taille:
+                        fin = min(offset + TAILLE_PART, self.taille)
+                        part = donnees[offset:fin]
+                        if self.observateur:
+                            self.observateur(part)
+                        if not self._deposer(parts, (offset, part), arret):
+                            return
+                        offset = fin
+            self._deposer(parts, None, arret)
+        except Exception as e:
+            self._deposer(parts, e, arret)
+
+    def executer(self, client: Optional[httpx.Client] = None) -> str:
+        """Lance (ou reprend) l'upload ; renvoie le chemin de l'objet"""
+        if self.taille == 0:
+            raise ValueError("Upload résumable impossible pour un fichier vide")
+
+        client = client or supabase_config.get_http_client()
+        arret = threading.Event()
+
+        try:
+            # 1. Reprise si un état valide existe, sinon création
+            upload_url, offset = None, 0
+            etat = self._lire_etat()
+            if etat and etat.get("taille") == self.taille:
+                offset = self._offset_serveur(client, etat["upload_url"])
+                if offset is not None:
+                    upload_url = etat["upload_url"]
+            if upload_url is None:
+                upload_url, offset = self._creer_upload(client), 0
+            self._sauver_etat(upload_url, offset)
+
+            if self.progression:
+                self.progression(offset, self.taille)
+
+            # 2. Envoi des parts, lues en avance par un thread dédié
+            parts = queue.Queue(maxsize=self.parts_en_avance)
+            lecteur = threading.Thread(
+                target=self._lecteur_parts, args=(offset, parts, arret), daemon=True
+            )
+            lecteur.start()
+
+            while True:
+                element = parts.get()
+                if element is None:
+                    break
+                if isinstance(element, Exception):
+                    raise element
+
+                debut, contenu = element
+                response = client.patch(
+                    upload_url,
+                    content=contenu,
+                    headers={
+                        **self._headers(),
+                        "Upload-Offset": str(debut),
+                        "Content-Type": "application/offset+octet-stream",
+                    },
+                )
+                response.raise_for_status()
+                offset = int(response.headers.get("Upload-Offset", debut + len(contenu)))
+                self._sauver_etat(upload_url, offset)
+
+                if self.progression:
+                    self.progression(offset, self.taille)
+
+            # 3. Upload terminé : l'état de reprise n'est plus utile
+            self._effacer_etat()
+            return self.nom_fichier
+
+        finally:
+            arret.set()
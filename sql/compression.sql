@@ -0,0 +1,7 @@
+-- sql/compression.sql
+-- Compression à l'upload (uploader_et_creer_dataset(..., compresser=True)) :
+-- codec de l'objet stocké ('gzip', 'zstd'), NULL si le fichier est stocké tel quel.
+-- taille_mb reste la taille du fichier non compressé.
+-- À exécuter dans l'éditeur SQL Supabase.
+
+ALTER TABLE datasets ADD COLUMN IF NOT EXISTS compression VARCHAR(16);
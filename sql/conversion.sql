@@ -0,0 +1,6 @@
+-- sql/conversion.sql
+-- Conversion à l'ingestion (uploader_et_creer_dataset(..., convertir_parquet=True)) :
+-- taille_mb est la taille du Parquet stocké, taille_originale_mb celle du fichier reçu.
+-- À exécuter dans l'éditeur SQL Supabase.
+
+ALTER TABLE datasets ADD COLUMN IF NOT EXISTS taille_originale_mb DECIMAL(10,2);
@@ -0,0 +1,27 @@
+-- sql/deduplication.sql
+-- Uploads adressés par contenu (uploader_et_creer_dataset(..., dedupliquer=True)) :
+-- le fichier est stocké sous cas/{aa}/{sha256} et partagé par tous les datasets
+-- de même contenu. À exécuter dans l'éditeur SQL Supabase.
+
+ALTER TABLE datasets ADD COLUMN IF NOT EXISTS empreinte_sha256 TEXT;
+
+-- Comptage des références avant suppression d'un fichier partagé
+CREATE INDEX IF NOT EXISTS datasets_empreinte_sha256_idx
+    ON datasets (empreinte_sha256)
+    WHERE empreinte_sha256 IS NOT NULL;
+
+-- Empreintes encore référencées par un dataset (hors projet exclu),
+-- une ligne par empreinte quel que soit le nombre de datasets qui la partagent
+CREATE OR REPLACE FUNCTION empreintes_referencees(
+    p_empreintes TEXT[],
+    p_exclure_projet UUID DEFAULT NULL
+)
+RETURNS TABLE (empreinte TEXT)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT DISTINCT d.empreinte_sha256
+    FROM datasets d
+    WHERE d.empreinte_sha256 = ANY (p_empreintes)
+      AND (p_exclure_projet IS NULL OR d.projet_id <> p_exclure_projet);
+$$;
@@ -0,0 +1,10 @@
+-- sql/pagination.sql
+-- Index de la pagination par clé (created_at DESC, id DESC) utilisée par
+-- ProjetService.iter_projets et DatasetService.iter_datasets_projet :
+-- chaque page est un parcours d'index borné, sans OFFSET.
+
+CREATE INDEX IF NOT EXISTS projets_ia_keyset_idx
+    ON projets_ia (created_by, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS datasets_keyset_idx
+    ON datasets (projet_id, created_at DESC, id DESC);
@@ -0,0 +1,7 @@
+-- sql/profilage.sql
+-- Schéma des colonnes détecté pendant l'upload (services/profilage.py) :
+-- {"colonnes": [{"nom": ..., "type": ...}], ...} selon le format du fichier.
+-- nb_lignes existe déjà ; il est désormais renseigné à l'upload.
+-- À exécuter dans l'éditeur SQL Supabase.
+
+ALTER TABLE datasets ADD COLUMN IF NOT EXISTS schema_colonnes JSONB;
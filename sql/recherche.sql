@@ -0,0 +1,108 @@
+-- sql/recherche.sql
+-- Recherche plein texte classée (RechercheService) : colonne tsvector générée
+-- + index GIN, et index trigramme sur le nom pour les fautes de frappe.
+-- Remplace les ilike '%terme%' (parcours séquentiel) par des parcours d'index.
+-- À exécuter dans l'éditeur SQL Supabase.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() n'est pas IMMUTABLE : enveloppe utilisable dans les colonnes
+-- générées et les index
+CREATE OR REPLACE FUNCTION immutable_unaccent(texte TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE PARALLEL SAFE STRICT
+AS $$
+    SELECT public.unaccent('public.unaccent'::regdictionary, texte);
+$$;
+
+-- Configuration 'simple' (sans racinisation) : mêmes résultats que l'index
+-- local de services/index_recherche.py. Poids : nom (A) > type (B) > description (C)
+ALTER TABLE projets_ia ADD COLUMN IF NOT EXISTS recherche TSVECTOR
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', immutable_unaccent(COALESCE(nom, ''))), 'A') ||
+        setweight(to_tsvector('simple', immutable_unaccent(COALESCE(type_modele, ''))), 'B') ||
+        setweight(to_tsvector('simple', immutable_unaccent(COALESCE(description, ''))), 'C')
+    ) STORED;
+
+ALTER TABLE datasets ADD COLUMN IF NOT EXISTS recherche TSVECTOR
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', immutable_unaccent(COALESCE(nom, ''))), 'A') ||
+        setweight(to_tsvector('simple', immutable_unaccent(COALESCE(format_fichier, ''))), 'C')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS projets_ia_recherche_idx ON projets_ia USING GIN (recherche);
+CREATE INDEX IF NOT EXISTS datasets_recherche_idx ON datasets USING GIN (recherche);
+
+-- L'expression doit être identique à celle des fonctions ci-dessous
+CREATE INDEX IF NOT EXISTS projets_ia_nom_trgm_idx
+    ON projets_ia USING GIN (lower(immutable_unaccent(nom)) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS datasets_nom_trgm_idx
+    ON datasets USING GIN (lower(immutable_unaccent(nom)) gin_trgm_ops);
+
+-- "modele clas" -> 'modele':* & 'clas':* (chaque mot est un préfixe)
+CREATE OR REPLACE FUNCTION requete_prefixes(p_terme TEXT)
+RETURNS TSQUERY
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT to_tsquery('simple', string_agg(quote_literal(mot) || ':*', ' & '))
+    FROM regexp_split_to_table(lower(immutable_unaccent(p_terme)), '[^[:alnum:]]+') AS mot
+    WHERE mot <> '';
+$$;
+
+-- Projets d'un utilisateur correspondant au terme, classés par pertinence
+-- total : nombre de résultats avant LIMIT/OFFSET (pagination)
+CREATE OR REPLACE FUNCTION rechercher_projets_classes(
+    p_user_id UUID,
+    p_terme TEXT,
+    p_limite INT DEFAULT 20,
+    p_offset INT DEFAULT 0
+)
+RETURNS TABLE (ligne JSONB, score REAL, total BIGINT)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH q AS (
+        SELECT requete_prefixes(p_terme) AS requete, lower(immutable_unaccent(p_terme)) AS texte
+    ), trouves AS (
+        SELECT p.*,
+               COALESCE(ts_rank_cd(p.recherche, q.requete), 0)
+               + similarity(lower(immutable_unaccent(p.nom)), q.texte) AS score
+        FROM projets_ia p, q
+        WHERE p.created_by = p_user_id
+          AND (p.recherche @@ q.requete OR lower(immutable_unaccent(p.nom)) % q.texte)
+    )
+    SELECT to_jsonb(t) - 'recherche' - 'score', t.score::REAL, COUNT(*) OVER ()
+    FROM trouves t
+    ORDER BY t.score DESC, t.created_at DESC, t.id DESC
+    LIMIT p_limite OFFSET p_offset;
+$$;
+
+-- Datasets (d'un projet, ou tous si p_projet_id est NULL) correspondant au terme
+CREATE OR REPLACE FUNCTION rechercher_datasets_classes(
+    p_terme TEXT,
+    p_projet_id UUID DEFAULT NULL,
+    p_limite INT DEFAULT 20,
+    p_offset INT DEFAULT 0
+)
+RETURNS TABLE (ligne JSONB, score REAL, total BIGINT)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH q AS (
+        SELECT requete_prefixes(p_terme) AS requete, lower(immutable_unaccent(p_terme)) AS texte
+    ), trouves AS (
+        SELECT d.*,
+               COALESCE(ts_rank_cd(d.recherche, q.requete), 0)
+               + similarity(lower(immutable_unaccent(d.nom)), q.texte) AS score
+        FROM datasets d, q
+        WHERE (p_projet_id IS NULL OR d.projet_id = p_projet_id)
+          AND (d.recherche @@ q.requete OR lower(immutable_unaccent(d.nom)) % q.texte)
+    )
+    SELECT to_jsonb(t) - 'recherche' - 'score', t.score::REAL, COUNT(*) OVER ()
+    FROM trouves t
+    ORDER BY t.score DESC, t.created_at DESC, t.id DESC
+    LIMIT p_limite OFFSET p_offset;
+$$;
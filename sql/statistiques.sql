@@ -0,0 +1,74 @@
+-- sql/statistiques.sql
+-- Agrégats calculés dans PostgreSQL : seul le résultat (quelques octets)
+-- transite par PostgREST, quelle que soit la taille du projet.
+-- À exécuter dans l'éditeur SQL Supabase.
+
+-- Index utilisés par les agrégats
+CREATE INDEX IF NOT EXISTS datasets_projet_id_idx ON datasets (projet_id);
+CREATE INDEX IF NOT EXISTS projets_ia_created_by_idx ON projets_ia (created_by);
+
+-- Statistiques des datasets d'un projet
+-- (SECURITY INVOKER par défaut : la RLS de l'appelant s'applique)
+CREATE OR REPLACE FUNCTION statistiques_datasets(p_projet_id UUID)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    WITH d AS (
+        SELECT nom, taille_mb, COALESCE(format_fichier, 'inconnu') AS format_fichier
+        FROM datasets
+        WHERE projet_id = p_projet_id
+    )
+    SELECT jsonb_build_object(
+        'nombre_datasets', (SELECT COUNT(*) FROM d),
+        'taille_totale_mb', COALESCE((SELECT SUM(taille_mb) FROM d), 0),
+        'formats', COALESCE(
+            (SELECT jsonb_object_agg(format_fichier, n)
+             FROM (SELECT format_fichier, COUNT(*) AS n FROM d GROUP BY format_fichier) f),
+            '{}'::jsonb
+        ),
+        'dataset_plus_gros', (
+            SELECT jsonb_build_object('nom', nom, 'taille_mb', taille_mb)
+            FROM d
+            WHERE taille_mb > 0
+            ORDER BY taille_mb DESC
+            LIMIT 1
+        )
+    );
+$$;
+
+-- Statistiques des projets d'un utilisateur
+-- (p_user_id NULL : les 10 projets les plus récents, comme côté Python)
+CREATE OR REPLACE FUNCTION statistiques_projets(p_user_id UUID)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    WITH p AS (
+        SELECT type_modele, statut
+        FROM projets_ia
+        WHERE p_user_id IS NOT NULL AND created_by = p_user_id
+        UNION ALL
+        SELECT type_modele, statut
+        FROM (
+            SELECT type_modele, statut
+            FROM projets_ia
+            WHERE p_user_id IS NULL
+            ORDER BY created_at DESC
+            LIMIT 10
+        ) recents
+    )
+    SELECT jsonb_build_object(
+        'total', (SELECT COUNT(*) FROM p),
+        'par_type', COALESCE(
+            (SELECT jsonb_object_agg(type_modele, n)
+             FROM (SELECT type_modele, COUNT(*) AS n FROM p GROUP BY type_modele) t),
+            '{}'::jsonb
+        ),
+        'par_statut', COALESCE(
+            (SELECT jsonb_object_agg(statut, n)
+             FROM (SELECT statut, COUNT(*) AS n FROM p GROUP BY statut) s),
+            '{}'::jsonb
+        )
+    );
+$$;